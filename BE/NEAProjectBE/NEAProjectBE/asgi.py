@@ -5,12 +5,38 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Server-sent events (/api/events/) are only served through this application,
+e.g. `uvicorn NEAProjectBE.asgi:application`: the stream is handled by
+myapp.events.events_application, ahead of Django's handler. Django's
+handler routes with ASGI_URLCONF, which serves the read-heavy GET endpoints
+with async views (myapp/views/asynchronous.py).
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'NEAProjectBE.settings')
 
-application = get_asgi_application()
+
+class AsyncURLConfHandler(ASGIHandler):
+    """Django's ASGI handler, routing with ASGI_URLCONF"""
+
+    async def get_response_async(self, request):
+        request.urlconf = getattr(settings, 'ASGI_URLCONF', settings.ROOT_URLCONF)
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+django_application = AsyncURLConfHandler()
+
+from myapp.events import events_application  # noqa: E402  needs the app registry
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == '/api/events/':
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
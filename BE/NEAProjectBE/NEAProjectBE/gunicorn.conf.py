@@ -0,0 +1,28 @@
+"""
+gunicorn hooks of `manage.py serve`, which passes everything else on the
+command line. The master never imports Django: every worker, including
+the ones a reload (SIGHUP) starts, loads the current code and settings.
+"""
+import logging
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def post_worker_init(worker):
+    # The application is loaded: fill this worker's caches before it accepts a connection
+    from myapp.warmup import warm_up
+
+    try:
+        warm_up()
+    except Exception:
+        # The worker still serves; /readyz reports what failed
+        logger.exception('Warm-up of worker %s failed', worker.pid)
+
+
+def worker_exit(server, worker):
+    # A recycled worker's last counts would be lost with the process
+    from django.conf import settings
+
+    if getattr(settings, 'METRICS_ENABLED', False):
+        from myapp.middleware.metrics import get_store
+        get_store().flush()
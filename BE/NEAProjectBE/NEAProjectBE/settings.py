@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-nu7$qq+v$_)va^cyazj3_t#gxfe9&b8vo57g6b4g4ekr9s*71*'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# `manage.py serve` turns it off unless DJANGO_DEBUG is set
+DEBUG = os.environ.get('DJANGO_DEBUG', 'True').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = ['*']
 
@@ -51,6 +53,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myapp.middleware.MetricsMiddleware',
+    'myapp.middleware.ServerTimingMiddleware',
+    'myapp.middleware.CompressionMiddleware',
+    'myapp.middleware.NPlusOneDetectorMiddleware',
+    'myapp.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -59,9 +66,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'myapp.middleware.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'NEAProjectBE.urls'
+# The ASGI application routes with this URLconf: the regular one behind async
+# versions of the read-heavy GET views
+ASGI_URLCONF = 'NEAProjectBE.urls_async'
 
 TEMPLATES = [
     {
@@ -87,8 +98,36 @@ WSGI_APPLICATION = 'NEAProjectBE.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # DATABASE_PATH points a process at another database file (e.g. the benchmark dataset)
+        'NAME': os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+    },
+    # Letters of closed fiscal years, moved out of the live database by
+    # `manage.py archive_letters` (myapp/archive.py); read-only to the app
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('ARCHIVE_DATABASE_PATH', BASE_DIR / 'archive.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['myapp.routers.ArchiveRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Login and password reset attempt windows (myapp/throttling.py), kept in
+    # files so every worker process on the host counts the same attempts
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('THROTTLE_CACHE_DIR', BASE_DIR / 'var' / 'throttle'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Data versions of the tables (myapp/versions.py), shared by the worker
+    # processes so none of them serves facet counts cached before a write
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('VERSIONS_CACHE_DIR', BASE_DIR / 'var' / 'versions'),
+    },
 }
 
 
@@ -127,6 +166,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# `manage.py collectstatic` gathers the admin's and the browsable API's files
+# here, and the app serves them at STATIC_URL (myapp/frontend.py)
+STATIC_ROOT = Path(os.environ.get('STATIC_ROOT', BASE_DIR / 'var' / 'static'))
+
+# The frontend (FE/NEAprojectFE) is served from its production build:
+# `manage.py build_frontend` writes it, with precompressed copies, to
+# FRONTEND_BUILD_DIR. Files under FRONTEND_IMMUTABLE_PREFIX have content
+# hashes in their names and are cached for FRONTEND_MAX_AGE seconds
+FRONTEND_DIR = Path(os.environ.get('FRONTEND_DIR', BASE_DIR.parent.parent / 'FE' / 'NEAprojectFE'))
+FRONTEND_BUILD_DIR = Path(os.environ.get('FRONTEND_BUILD_DIR', FRONTEND_DIR / 'dist'))
+FRONTEND_IMMUTABLE_PREFIX = 'assets/'
+FRONTEND_MAX_AGE = 365 * 24 * 60 * 60
 
 
 # Default primary key field type
@@ -156,7 +207,37 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
     ],
      'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON through JSON_BACKEND (myapp/renderers.py); compact, non-ASCII unescaped
+    'DEFAULT_RENDERER_CLASSES': [
+        'myapp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'myapp.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'COMPACT_JSON': True,
+    'UNICODE_JSON': True,
+    # Sliding-window limits on login and password reset attempts per client IP
+    # and per submitted email (myapp/throttling.py), as '<requests>/<period>'
+    # with an optional period multiplier: '10/15min' is 10 per 15 minutes
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '10/min',
+        'login_email': '10/15min',
+        'password_reset_ip': '10/hour',
+        'password_reset_email': '3/hour',
+    },
+    # Client IPs are read from X-Forwarded-For only behind this many proxies;
+    # with none the header is ignored, so it cannot dodge the per-IP limits
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
+# AUTH_THROTTLE=False lifts the limits (`manage.py benchmark_login` compares)
+AUTH_THROTTLE_ENABLED = os.environ.get('AUTH_THROTTLE', 'True').lower() in ('1', 'true', 'yes')
+
+# Encoder for API requests and responses: 'auto' (orjson when installed),
+# 'orjson' or 'json' (the stdlib encoder DRF uses by default)
+JSON_BACKEND = 'auto'
 
 from datetime import timedelta
 
@@ -177,5 +258,124 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API schema for dashboard',
     'VERSION': '1.0.0',
 }
+# The schema and the docs pages are generated once per deploy into this
+# directory and served from memory (myapp/openapi.py)
+SCHEMA_CACHE_DIR = Path(os.environ.get('SCHEMA_CACHE_DIR', BASE_DIR / 'var' / 'schema'))
+# Server-Timing header (query count, SQL, serializer, render and total time)
+# Fraction of requests to time; lower it on busy servers to reduce overhead
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get('SERVER_TIMING_SAMPLE_RATE', 1.0))
+# Also write one JSON line per timed request to the 'myapp.middleware.timing' logger
+SERVER_TIMING_LOG = False
+
+# N+1 query detector (enabled in NEAProjectBE/test_settings.py)
+NPLUSONE_ENABLED = False
+# Repetitions of one query shape within a request that count as N+1
+NPLUSONE_THRESHOLD = 5
+# Raise NPlusOneError instead of logging a warning
+NPLUSONE_RAISE = False
+
+# On-demand profiler: admins add ?profile=1 or ?profile=cprofile (cProfile) or
+# ?profile=sample to any request; other values leave profiling off
+PROFILER_ENABLED = True
+PROFILER_REPORT_DIR = BASE_DIR / 'var' / 'profiles'
+# Oldest reports are deleted once the directory grows beyond this size
+PROFILER_MAX_BYTES = 50 * 1024 * 1024
+
+# Prometheus metrics served at /metrics; every worker process writes its own
+# file into METRICS_DIR and the endpoint sums them, after folding the files of
+# exited workers into exited.json
+METRICS_ENABLED = True
+METRICS_DIR = Path(os.environ.get('METRICS_DIR', BASE_DIR / 'var' / 'metrics'))
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Statements slower than this are logged with their EXPLAIN QUERY PLAN and
+# listed at /api/slow-queries/ (None disables the log)
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = BASE_DIR / 'var' / 'slow_queries.log'
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# Serve letter lists and the all-active endpoints from `.values()` rows through
+# precompiled row serializers (myapp/serializers/fast.py) instead of DRF
+# serializers; the JSON is identical, set False to fall back
+FAST_READ_PATH = True
+
+# ?facets= counts on list endpoints are cached this many seconds under the
+# data versions of the tables they count (myapp/versions.py), which every
+# write bumps; the timeout only bounds how long unused entries linger
+FACET_CACHE_TIMEOUT = 300
+
+# /api/changes/ returns at most this many change log entries per request
+CHANGES_PAGE_SIZE = 500
+# `manage.py prune_changes` drops change log entries older than this; clients
+# with an older cursor are told to fetch the tables again
+CHANGE_LOG_RETENTION_DAYS = 90
+
+# `manage.py backup_db` and POST /api/backups/ take online backups of the
+# database, and of the letter archive, into BACKUP_DIR (myapp/backups.py):
+# BACKUP_PAGES_PER_STEP pages (of 4 KiB) are copied at a time with
+# BACKUP_STEP_PAUSE seconds between steps for writers to commit. Every
+# commit restarts the copy; after BACKUP_MAX_RESTARTS restarts it is
+# finished in one step. `restore_db` waits up to BACKUP_RESTORE_TIMEOUT
+# seconds for the database to be idle
+BACKUP_DIR = Path(os.environ.get('BACKUP_DIR', BASE_DIR / 'var' / 'backups'))
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_PAUSE = 0.005
+BACKUP_MAX_RESTARTS = 3
+BACKUP_COMPRESSION_LEVEL = 6
+BACKUP_RESTORE_TIMEOUT = 30
+# After each backup the older ones are deleted except the newest 'last', and
+# the newest one of each of the most recent 'daily' days, 'weekly' weeks and
+# 'monthly' months that have a backup
+BACKUP_RETENTION = {'last': 3, 'daily': 7, 'weekly': 4, 'monthly': 6}
+
+# Fiscal-year archival (myapp/archive.py): letters move to the archive
+# database ARCHIVE_BATCH_SIZE at a time, one transaction per batch, with
+# ARCHIVE_BATCH_PAUSE seconds between batches for the app's writers
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_BATCH_PAUSE = 0.05
+
+# Server-sent events at /api/events/ (ASGI only): the broadcaster reads the
+# change log every SSE_POLL_INTERVAL seconds; idle streams get a comment line
+# every SSE_HEARTBEAT seconds; a client with SSE_QUEUE_SIZE undelivered events
+# is disconnected and reconnects with a fresh snapshot
+SSE_POLL_INTERVAL = 1.0
+SSE_HEARTBEAT = 15
+SSE_QUEUE_SIZE = 100
+
+# `manage.py serve`: gunicorn with one worker process per CPU (SERVE_WORKERS
+# overrides), serving the WSGI application through threaded workers
+# (SERVE_THREADS each) or the ASGI one through uvicorn workers. WSGI is the
+# default: `manage.py benchmark_asgi` measured the async views at about 70%
+# of its throughput, with a worse p99. SERVE_INTERFACE=asgi is needed for
+# the server-sent events at /api/events/. Workers are recycled after about
+# SERVE_MAX_REQUESTS requests, which bounds the memory long exports leave
+# behind; a request running past SERVE_TIMEOUT seconds gets its worker
+# restarted, and a reload or shutdown waits SERVE_GRACEFUL_TIMEOUT seconds
+# for requests in flight
+SERVE_BIND = os.environ.get('SERVE_BIND', '0.0.0.0:8000')
+SERVE_INTERFACE = os.environ.get('SERVE_INTERFACE', 'wsgi')
+SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', 0))
+SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 4))
+SERVE_MAX_REQUESTS = int(os.environ.get('SERVE_MAX_REQUESTS', 2000))
+SERVE_TIMEOUT = int(os.environ.get('SERVE_TIMEOUT', 300))
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30))
+# `manage.py serve --reload` signals the server whose pid is in this file
+SERVE_PIDFILE = Path(os.environ.get('SERVE_PIDFILE', BASE_DIR / 'var' / 'serve.pid'))
+
+# Response compression: brotli when the library is installed, else gzip
+COMPRESSION_ENABLED = True
+# Smaller bodies are sent uncompressed
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# Reference data fetched unchanged by every client: compressed once at the
+# highest level and kept in an in-process cache of COMPRESSION_CACHE_MAX_BYTES
+COMPRESSION_CACHED_PATHS = [
+    r'^/api/[\w-]+/all-active/$',
+    r'^/api/letters/letter-creation-data/$',
+]
+COMPRESSION_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
 #use CORS_ALLOWED_ORIGINS for production
 CORS_ALLOW_ALL_ORIGINS = True
@@ -0,0 +1,31 @@
+"""
+Settings used by `python manage.py test`.
+
+Extends the regular settings with a fast password hasher and turns the
+N+1 query detector into a hard failure so regressions are caught in CI.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+NPLUSONE_ENABLED = True
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_RAISE = True
+
+METRICS_DIR = BASE_DIR / 'var' / 'test-metrics'
+SLOW_QUERY_LOG = BASE_DIR / 'var' / 'test-slow_queries.log'
+SCHEMA_CACHE_DIR = BASE_DIR / 'var' / 'test-schema'
+BACKUP_DIR = BASE_DIR / 'var' / 'test-backups'
+# A file, not the in-memory default: archive_letters() attaches it by name
+(BASE_DIR / 'var').mkdir(exist_ok=True)
+DATABASES['archive']['TEST'] = {'NAME': BASE_DIR / 'var' / 'test-archive.sqlite3'}
+CACHES = {
+    **CACHES,
+    'throttle': {**CACHES['throttle'], 'LOCATION': os.environ.get('THROTTLE_CACHE_DIR', BASE_DIR / 'var' / 'test-throttle')},
+    'versions': {**CACHES['versions'], 'LOCATION': os.environ.get('VERSIONS_CACHE_DIR', BASE_DIR / 'var' / 'test-versions')},
+}
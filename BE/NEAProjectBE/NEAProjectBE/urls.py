@@ -14,11 +14,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework.routers import DefaultRouter
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from myapp.views import (
     DashboardViewSet,
     LetterViewSet,
@@ -29,13 +29,25 @@ from myapp.views import (
     EmployeeViewSet,
     UserViewSet ,
     SeedDatabaseView,
+    ProfileReportViewSet,
+    SlowQueryViewSet,
+    BackupViewSet,
+    ChangeFeedViewSet,
     change_password,
     login_view,
     logout_view,
     reset_password_request,
     signup_view,
     get_me_view,
-    
+    metrics_view,
+    events_view,
+    liveness_view,
+    readiness_view,
+    frontend_view,
+    static_view,
+    schema_view,
+    swagger_view,
+    redoc_view,
 )
 
 router = DefaultRouter()
@@ -47,12 +59,16 @@ router.register('branches', BranchViewSet)
 router.register('employees', EmployeeViewSet)
 router.register('users', UserViewSet)
 router.register('dashboard', DashboardViewSet, basename='dashboard')
+router.register('profiles', ProfileReportViewSet, basename='profiles')
+router.register('slow-queries', SlowQueryViewSet, basename='slow-queries')
+router.register('backups', BackupViewSet, basename='backups')
+router.register('changes', ChangeFeedViewSet, basename='changes')
 
 
 urlpatterns = [
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', schema_view, name='schema'),
+    path('api/docs/', swagger_view, name='swagger-ui'),
+    path('api/redoc/', redoc_view, name='redoc'),
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     # path('api/auth/token/', obtain_auth_token, name='api-token'),
@@ -66,5 +82,13 @@ urlpatterns = [
     path('api/auth/change-password/', change_password, name='change_password'),
     path('api/auth/reset-password-request/', reset_password_request, name='reset_password_request'),
     path('api/auth/me/', get_me_view, name='get-me'),
-    
+    path('api/events/', events_view, name='events'),
+    path('metrics', metrics_view, name='metrics'),
+    path('healthz', liveness_view, name='liveness'),
+    path('readyz', readiness_view, name='readiness'),
+
+    # The admin's and the browsable API's static files, from STATIC_ROOT
+    re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', static_view, name='static'),
+    # The frontend build, and index.html for its client-side routes
+    re_path(r'^(?!(?:api|admin)(?:/|$))(?P<path>.*)$', frontend_view, name='frontend'),
 ]
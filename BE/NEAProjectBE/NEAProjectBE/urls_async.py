@@ -0,0 +1,19 @@
+"""
+URL configuration of the ASGI application (ASGI_URLCONF).
+
+The read-heavy GET routes (letter list and detail, the all-active lists,
+the dashboard and auth/me) are served by the async twins of their views,
+ahead of the regular URLconf, which serves everything else; see
+myapp/views/asynchronous.py.
+"""
+from django.urls import include, path
+
+from myapp.views import CurrentUserView, async_routes
+
+from .urls import router, urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include(async_routes(router))),
+    path('api/auth/me/', CurrentUserView.as_async_view(), name='get-me'),
+    *sync_urlpatterns,
+]
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from . import changes, versions
+        from .middleware.queries import install_everywhere
+        install_everywhere()
+        from .models import Branch, Employee, Letter, Office, Product, Receiver
+        versions.track(Branch, Employee, Letter, Office, Product, Receiver)
+        for model, table in (
+            (Product, 'products'), (Office, 'offices'), (Branch, 'branches'),
+            (Receiver, 'receivers'), (Employee, 'employees'), (Letter, 'letters'),
+        ):
+            changes.track(model, table)
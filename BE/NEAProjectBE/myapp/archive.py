@@ -0,0 +1,191 @@
+"""
+Fiscal-year archival of letters.
+
+Letters and their items only grow, and every list, count, facet and export
+of the live database reads the past fiscal years too. archive_letters()
+moves the letters dated in fiscal years that started before `before`, which
+must have closed, into the 'archive' database (myapp/routers.py)
+with their items, ARCHIVE_BATCH_SIZE letters at a time.
+
+A batch is one transaction of the default connection with the archive
+ATTACHed. It copies the rows with INSERT ... SELECT, column for column, and
+deletes them from the live tables, so a letter is in exactly one of the two
+databases whatever happens to the process. A run holds archive_lock(), as
+do backups of the two databases (myapp/backups.py), so a backup never
+catches a letter in both databases or in neither. Between batches the write lock
+is released for ARCHIVE_BATCH_PAUSE seconds, so the app's writers wait for
+at most one batch. Each batch logs its letters as deleted in the change log
+(/api/changes/ follows the live tables) and bumps the data versions of
+Letter and LetterItem.
+
+Letters without a date belong to no fiscal year and are never archived.
+Archived letters are read-only. LetterViewSet reads them with
+?include_archived=true, through WithArchived.
+"""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Min
+
+from .changes import TABLES, record
+from .locks import file_lock
+from .fiscal import current_fiscal_year, fiscal_year, fiscal_year_label, fiscal_year_start
+from .models import ChangeAction, Letter, LetterItem
+from .routers import ARCHIVE
+from .versions import bump_version
+
+# Schema name of the archive while it is attached to the default connection
+SCHEMA = 'letter_archive'
+
+
+class ArchiveError(Exception):
+    """Letters could not be archived"""
+
+
+def archivable(before):
+    """Live letters of the fiscal years that started before `before`"""
+    return Letter.objects.exclude(date_key='').filter(date_key__lt=fiscal_year_start(before))
+
+
+def pending(before):
+    """{fiscal year: live letters} of the fiscal years archive_letters(before) moves"""
+    first = archivable(before).aggregate(first=Min('date_key'))['first']
+    if first is None:
+        return {}
+    counts = {}
+    for year in range(fiscal_year(first), before):
+        count = Letter.objects.filter(date_key__gte=fiscal_year_start(year), date_key__lt=fiscal_year_start(year + 1)).count()
+        if count:
+            counts[year] = count
+    return counts
+
+
+def archive_path():
+    return Path(connections[ARCHIVE].settings_dict['NAME'])
+
+
+def archive_lock():
+    """Held while letters move into the archive, across processes"""
+    return file_lock(Path(settings.BASE_DIR) / 'var' / 'archive.lock')
+
+
+def archive_ready():
+    """Whether there is an archive database to read"""
+    return ARCHIVE in settings.DATABASES and archive_path().is_file()
+
+
+def archive_letters(before, batch_size=None, pause=None, progress=None):
+    """
+    Move the letters of the fiscal years that started before `before` and
+    their items into the archive. `before` is at most the current fiscal
+    year: an open one is never archived. `progress` is called with the
+    letters and items of each batch. Returns the totals.
+    """
+    if before > current_fiscal_year():
+        raise ArchiveError(f'Fiscal year {fiscal_year_label(before - 1)} has not closed yet')
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+    pause = getattr(settings, 'ARCHIVE_BATCH_PAUSE', 0.05) if pause is None else pause
+    if ARCHIVE not in settings.DATABASES:
+        raise ArchiveError(f"No '{ARCHIVE}' database in DATABASES")
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or connections[ARCHIVE].vendor != 'sqlite':
+        raise ArchiveError('Archiving needs SQLite default and archive databases')
+    if connection.in_atomic_block:
+        raise ArchiveError('Letters cannot be archived inside a transaction')
+    if not archive_path().is_file():
+        raise ArchiveError(f'No archive database at {archive_path()}: run `manage.py migrate --database {ARCHIVE}`')
+
+    totals = {'letters': 0, 'items': 0, 'batches': 0}
+    with archive_lock():
+        with connection.cursor() as cursor:
+            cursor.execute(f'ATTACH DATABASE %s AS {SCHEMA}', [str(archive_path())])
+        try:
+            while True:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    letters, items = _move_batch(connection, before, batch_size)
+                if not letters:
+                    break
+                totals['letters'] += letters
+                totals['items'] += items
+                totals['batches'] += 1
+                if progress is not None:
+                    progress(letters, items)
+                if pause:
+                    time.sleep(pause)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DETACH DATABASE {SCHEMA}')
+    return totals
+
+
+def _move_batch(connection, before, batch_size):
+    """Move the next `batch_size` archivable letters; (letters, items) moved"""
+    quote = connection.ops.quote_name
+    letters, items = (quote(model._meta.db_table) for model in (Letter, LetterItem))
+    with connection.cursor() as cursor:
+        # A write first: a read lock taken by a deferred transaction cannot
+        # be upgraded while another writer waits to commit, and fails at once
+        cursor.execute(f'DELETE FROM main.{letters} WHERE 0')
+        ids = list(archivable(before).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0, 0
+        params = ', '.join(['%s'] * len(ids))
+        moved = {}
+        for model, key in ((Letter, 'id'), (LetterItem, 'letter_id')):
+            table = quote(model._meta.db_table)
+            columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+            cursor.execute(
+                f'INSERT INTO {SCHEMA}.{table} ({columns}) SELECT {columns} FROM main.{table} WHERE {quote(key)} IN ({params})',
+                ids,
+            )
+            moved[model] = cursor.rowcount
+        cursor.execute(f'DELETE FROM main.{items} WHERE {quote("letter_id")} IN ({params})', ids)
+        cursor.execute(f'DELETE FROM main.{letters} WHERE {quote("id")} IN ({params})', ids)
+    if Letter in TABLES:
+        record(Letter, ids, ChangeAction.DELETED)
+    bump_version(Letter)
+    bump_version(LetterItem)
+    return moved[Letter], moved[LetterItem]
+
+
+class WithArchived:
+    """
+    The rows of a live queryset, then the rows of the same query in the
+    archive, each part in the queryset's order. The paginator can count and
+    slice it like a queryset: a page that straddles the two parts runs one
+    query in each database.
+    """
+    ordered = True
+
+    def __init__(self, queryset):
+        self.model = queryset.model
+        self.querysets = (queryset, queryset.using(ARCHIVE))
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        for queryset in self.querysets:
+            yield from queryset
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.count())
+        rows = []
+        for queryset, count in zip(self.querysets, self.counts()):
+            if start < count and stop > 0:
+                rows.extend(queryset[max(start, 0):min(stop, count)])
+            start, stop = start - count, stop - count
+        return rows
@@ -0,0 +1,441 @@
+"""
+Online backups of the SQLite database.
+
+BackupStore.create() copies the live database file with SQLite's online
+backup API, BACKUP_PAGES_PER_STEP pages per step. A step holds a shared
+lock only while it copies, and BACKUP_STEP_PAUSE seconds pass between
+steps. A writer therefore waits at most one step to commit, not for the
+whole copy. A commit by another connection restarts the copy from the
+first page. After BACKUP_MAX_RESTARTS restarts, the rest is copied in
+one step.
+
+The copy is checked with PRAGMA integrity_check, then gzip-compressed
+into BACKUP_DIR as <id>.sqlite3.gz. A manifest, <id>.json, records:
+  - when and from which database the backup was taken
+  - the archive and database sizes
+  - the SHA-256 of the archive and of the database
+  - the newest applied migration of each app
+prune() then applies the BACKUP_RETENTION policy.
+
+Once letters have been archived (myapp/archive.py), a backup also holds
+the archive database, as <id>.archive.sqlite3.gz, described under
+'databases' in the manifest. Both are copied under archive_lock(), so no
+archival batch falls between the two copies.
+
+restore() checks both digests and the integrity of every copy before it
+replaces the content of any live database. It does so through the backup
+API again, in one step, so an open connection sees either the old data
+or the restored data. An archive database the backup does not hold is
+emptied: the live database of the backup still has its letters. The
+restore is then logged in the change log (myapp/changes.py) with an id past
+every id handed out before it, so the change feed answers 410 to the
+cursors clients took before the restore and new entries never reuse them.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .archive import archive_lock
+from .changes import DATABASE
+from .locks import file_lock
+from .models import Change, ChangeAction
+from .routers import ARCHIVE
+
+BACKUP_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+ARCHIVE_SUFFIX = '.sqlite3.gz'
+CHUNK_SIZE = 1024 * 1024
+# Bucket of a backup's creation time for each retention period
+PERIODS = {
+    'daily': lambda created: created.date(),
+    'weekly': lambda created: created.isocalendar()[:2],
+    'monthly': lambda created: (created.year, created.month),
+}
+
+
+class BackupError(Exception):
+    """A backup could not be taken, verified or restored"""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def database_path(alias='default'):
+    """The file of the SQLite database `alias`"""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        raise BackupError(f"Database '{alias}' is not an SQLite database file")
+    return Path(connection.settings_dict['NAME'])
+
+
+def database_files(existing=True):
+    """
+    {alias: file} of the databases a backup holds: the default one, and the
+    archive one if it exists (or whether it exists or not).
+    """
+    files = {DEFAULT_DB_ALIAS: database_path()}
+    if ARCHIVE in settings.DATABASES:
+        path = database_path(ARCHIVE)
+        if path.is_file() or not existing:
+            files[ARCHIVE] = path
+    return files
+
+
+def _files(databases):
+    # A single path stands for the default database
+    if databases is None:
+        return None
+    if not isinstance(databases, dict):
+        return {DEFAULT_DB_ALIAS: Path(databases)}
+    return {alias: Path(path) for alias, path in databases.items()}
+
+
+def _connect(path, timeout=5.0):
+    # mode=rw: a missing file is an error rather than a new empty database
+    path = Path(path)
+    if not path.is_file():
+        raise BackupError(f'No database at {path}')
+    return sqlite3.connect(f'{path.resolve().as_uri()}?mode=rw', uri=True, timeout=timeout)
+
+
+def copy_database(source, target, pages=None, pause=None, max_restarts=None):
+    """
+    Copy the database at `source` into `target` with the online backup API,
+    `pages` pages per step and `pause` seconds between steps. Returns the
+    page count and the steps and restarts it took.
+    """
+    pages = pages or getattr(settings, 'BACKUP_PAGES_PER_STEP', 256)
+    pause = getattr(settings, 'BACKUP_STEP_PAUSE', 0.005) if pause is None else pause
+    max_restarts = getattr(settings, 'BACKUP_MAX_RESTARTS', 3) if max_restarts is None else max_restarts
+    stats = {'pages': 0, 'steps': 0, 'restarts': 0}
+    previous = [None]
+
+    def progress(status, remaining, total):
+        stats['steps'] += 1
+        stats['pages'] = total
+        # No progress since the last step: a commit restarted the copy
+        if previous[0] is not None and remaining >= previous[0]:
+            stats['restarts'] += 1
+            if stats['restarts'] > max_restarts:
+                raise _Restarted
+        previous[0] = remaining
+        if remaining and pause:
+            time.sleep(pause)
+
+    src = _connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        try:
+            src.backup(dst, pages=pages, progress=progress)
+        except _Restarted:
+            # Written to faster than it can be copied in steps: finish in one
+            src.backup(dst, pages=-1)
+            stats['steps'] += 1
+    finally:
+        dst.close()
+        src.close()
+    return stats
+
+
+def check_integrity(path):
+    db = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in db.execute('PRAGMA integrity_check')]
+    except sqlite3.DatabaseError as e:
+        problems = [str(e)]
+    finally:
+        db.close()
+    if problems != ['ok']:
+        raise BackupError(f"{path} is damaged: {'; '.join(problems[:5])}")
+
+
+def applied_migrations(path):
+    """{app: newest applied migration} of the database at `path`"""
+    db = sqlite3.connect(path)
+    try:
+        return dict(db.execute('SELECT app, max(name) FROM django_migrations GROUP BY app ORDER BY app'))
+    except sqlite3.DatabaseError:
+        return {}
+    finally:
+        db.close()
+
+
+def retained(manifests, policy):
+    """
+    Ids of the backups `policy` keeps: the newest policy['last'], and the
+    newest backup of each of the policy['daily'] most recent days (weeks,
+    months) that have one.
+    """
+    newest_first = sorted(manifests, key=_age, reverse=True)
+    keep = {manifest['id'] for manifest in newest_first[:policy.get('last', 0)]}
+    for period, bucket in PERIODS.items():
+        seen = set()
+        for manifest in newest_first:
+            if len(seen) >= policy.get(period, 0):
+                break
+            key = bucket(timezone.localtime(datetime.fromisoformat(manifest['created_at'])))
+            if key not in seen:
+                seen.add(key)
+                keep.add(manifest['id'])
+    return keep
+
+
+def _age(manifest):
+    return manifest['created_at'], manifest['id']
+
+
+def _write_json(path, data):
+    with tempfile.NamedTemporaryFile('w', dir=path.parent, prefix=f'.{path.name}.', delete=False, encoding='utf-8') as tmp:
+        json.dump(data, tmp, indent=2)
+    os.replace(tmp.name, path)
+
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def _empty(path, timeout):
+    """Delete every row of the database at `path` but its migration history"""
+    db = _connect(path, timeout=timeout)
+    try:
+        tables = [row[0] for row in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != 'django_migrations'"
+        )]
+        with db:
+            for table in tables:
+                db.execute(f'DELETE FROM "{table}"')
+    finally:
+        db.close()
+
+
+def _change_log_position(db):
+    """The newest id the change log of `db` handed out, or None if it has no change log"""
+    table = Change._meta.db_table
+    if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is None:
+        return None
+    sequence = db.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    latest = db.execute(f'SELECT max(id) FROM "{table}"').fetchone()[0]
+    return max(sequence[0] if sequence else 0, latest or 0)
+
+
+def _log_restore(db, before):
+    """Log the restore in the change log of `db`, past `before`, the newest id before the restore"""
+    position = _change_log_position(db)
+    if position is None:
+        # The backup predates the change log: `migrate` starts one, and its ids are below every old cursor
+        return
+    created_at = connections[DEFAULT_DB_ALIAS].ops.adapt_datetimefield_value(timezone.now())
+    with db:
+        db.execute(
+            f'INSERT INTO "{Change._meta.db_table}" (id, "table", object_id, action, created_at) VALUES (?, ?, 0, ?, ?)',
+            (max(position, before or 0) + 1, DATABASE, ChangeAction.RESTORED, created_at),
+        )
+
+
+class BackupStore:
+    """Backups kept in BACKUP_DIR as <id>.sqlite3.gz archives, each with an <id>.json manifest"""
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or getattr(settings, 'BACKUP_DIR', Path(settings.BASE_DIR) / 'var' / 'backups'))
+
+    def archive_path(self, backup_id, alias=DEFAULT_DB_ALIAS):
+        if alias == DEFAULT_DB_ALIAS:
+            return self.directory / f'{backup_id}{ARCHIVE_SUFFIX}'
+        return self.directory / f'{backup_id}.{alias}{ARCHIVE_SUFFIX}'
+
+    def lock(self):
+        """One backup, prune or restore at a time, across processes"""
+        return file_lock(self.directory / '.lock')
+
+    def list(self):
+        """Manifests of the backups, newest first"""
+        if not self.directory.is_dir():
+            return []
+        manifests = []
+        for path in self.directory.glob('*.json'):
+            if not BACKUP_ID.match(path.stem) or not self.archive_path(path.stem).is_file():
+                continue
+            try:
+                manifests.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue
+        return sorted(manifests, key=_age, reverse=True)
+
+    def get(self, backup_id):
+        if not BACKUP_ID.match(backup_id or ''):
+            return None
+        return next((manifest for manifest in self.list() if manifest['id'] == backup_id), None)
+
+    def create(self, databases=None, reason='manual', prune=True):
+        """
+        Back up the database files `databases` ({alias: path}, or the path of
+        the default database; by default database_files()); returns the manifest
+        """
+        databases = _files(databases) or database_files()
+        level = getattr(settings, 'BACKUP_COMPRESSION_LEVEL', 6)
+        with self.lock(), (archive_lock() if ARCHIVE in databases else nullcontext()):
+            now = timezone.now()
+            backup_id = f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            started = time.perf_counter()
+            copies = {}
+            try:
+                for alias, source in databases.items():
+                    copies[alias] = self._copy(source, self.archive_path(backup_id, alias), level)
+            except (OSError, sqlite3.Error) as e:
+                for copy in copies.values():
+                    (self.directory / copy['archive']).unlink(missing_ok=True)
+                raise BackupError(f'Could not back up {source}: {e}') from e
+            default = copies.pop(DEFAULT_DB_ALIAS)
+            manifest = {
+                'id': backup_id,
+                'created_at': now.isoformat(),
+                'reason': reason,
+                **default,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                'databases': copies,
+            }
+            # Written last: a manifest always describes complete archives
+            _write_json(self.directory / f'{backup_id}.json', manifest)
+            if prune:
+                manifest['pruned'] = self._prune()
+        return manifest
+
+    def _copy(self, source, archive, level):
+        """Back up the database file `source` into `archive`; returns what the manifest says of it"""
+        copy = self.directory / f'.{archive.name.removesuffix(ARCHIVE_SUFFIX)}.sqlite3'
+        partial = archive.with_name(f'.{archive.name}')
+        try:
+            started = time.perf_counter()
+            stats = copy_database(source, copy)
+            copied = time.perf_counter()
+            check_integrity(copy)
+            with open(copy, 'rb') as f, gzip.GzipFile(partial, 'wb', compresslevel=level, mtime=0) as out:
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+            os.replace(partial, archive)
+            return {
+                'source': str(source),
+                'archive': archive.name,
+                'size': copy.stat().st_size,
+                'compressed_size': archive.stat().st_size,
+                'sha256': _sha256(archive),
+                'database_sha256': _sha256(copy),
+                **stats,
+                'copy_ms': round((copied - started) * 1000, 1),
+                'migrations': applied_migrations(copy),
+            }
+        finally:
+            copy.unlink(missing_ok=True)
+            partial.unlink(missing_ok=True)
+
+    def prune(self, policy=None):
+        """Delete the backups the retention policy does not keep; returns their ids"""
+        with self.lock():
+            return self._prune(policy)
+
+    def _prune(self, policy=None):
+        policy = policy or getattr(settings, 'BACKUP_RETENTION', {'last': 3})
+        manifests = self.list()
+        keep = retained(manifests, policy)
+        deleted = []
+        for manifest in manifests:
+            if manifest['id'] not in keep:
+                # The manifest goes first: an archive without one is not listed
+                (self.directory / f"{manifest['id']}.json").unlink(missing_ok=True)
+                self.archive_path(manifest['id']).unlink(missing_ok=True)
+                for copy in manifest.get('databases', {}).values():
+                    (self.directory / copy['archive']).unlink(missing_ok=True)
+                deleted.append(manifest['id'])
+        return deleted
+
+    def resolve(self, backup):
+        """(archive path, manifest or None) of a backup id, 'latest' or an archive path"""
+        if backup == 'latest':
+            manifests = self.list()
+            if not manifests:
+                raise BackupError(f'No backups in {self.directory}')
+            backup = manifests[0]['id']
+        if BACKUP_ID.match(backup):
+            manifest = self.get(backup)
+            if manifest is None:
+                raise BackupError(f'No backup {backup} in {self.directory}')
+            return self.archive_path(backup), manifest
+        archive = Path(backup)
+        if not archive.is_file():
+            raise BackupError(f'No backup {backup}')
+        manifest_path = archive.with_name(archive.name.removesuffix(ARCHIVE_SUFFIX) + '.json')
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.is_file() else None
+        return archive, manifest
+
+    def restore(self, backup, databases=None):
+        """
+        Replace the content of the database files `databases` ({alias: path},
+        or the path of the default database; by default every database a
+        backup can hold) with a verified backup; returns its manifest, or None
+        when the archive came without one and only its integrity was checked.
+        """
+        archive, manifest = self.resolve(backup)
+        targets = _files(databases) or database_files(existing=False)
+        copies = {DEFAULT_DB_ALIAS: (archive, manifest)}
+        for alias, copy in (manifest or {}).get('databases', {}).items():
+            copies[alias] = (archive.with_name(copy['archive']), copy)
+        timeout = getattr(settings, 'BACKUP_RESTORE_TIMEOUT', 30)
+        with self.lock(), (archive_lock() if ARCHIVE in targets else nullcontext()):
+            restored = {}
+            try:
+                # Every copy is verified before any database is replaced
+                for alias, target in targets.items():
+                    if alias in copies:
+                        restored[alias] = self._unpack(*copies[alias], target)
+                for alias, target in targets.items():
+                    if alias in restored:
+                        src = _connect(restored[alias])
+                        # Waits for readers and writers of the live database to finish
+                        dst = _connect(target, timeout=timeout) if target.is_file() else sqlite3.connect(target)
+                        try:
+                            before = _change_log_position(dst)
+                            src.backup(dst, pages=-1)
+                            if alias == DEFAULT_DB_ALIAS:
+                                _log_restore(dst, before)
+                        finally:
+                            dst.close()
+                            src.close()
+                    elif target.is_file():
+                        _empty(target, timeout)
+            except (OSError, EOFError, gzip.BadGzipFile, sqlite3.DatabaseError) as e:
+                raise BackupError(f'Could not restore {archive}: {e}') from e
+            finally:
+                for copy in restored.values():
+                    copy.unlink(missing_ok=True)
+        return manifest
+
+    def _unpack(self, archive, manifest, target):
+        """Decompress `archive` next to `target` and verify it; returns the copy"""
+        if manifest is not None and _sha256(archive) != manifest['sha256']:
+            raise BackupError(f'{archive} does not match the checksum in its manifest')
+        fd, name = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.restore-')
+        copy = Path(name)
+        try:
+            with os.fdopen(fd, 'wb') as out, gzip.open(archive, 'rb') as f:
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+            if manifest is not None and _sha256(copy) != manifest['database_sha256']:
+                raise BackupError(f'{archive} does not decompress to the database in its manifest')
+            check_integrity(copy)
+        except BaseException:
+            copy.unlink(missing_ok=True)
+            raise
+        return copy
@@ -0,0 +1,28 @@
+from .results import compare, environment, latency_stats, load_results, percentile, summarize, write_results
+from .micro import BENCHMARKS, measure, run_benchmarks
+from .login import LEGITIMATE_USERS, run_attack, status_counts
+from .workload import DEFAULT_MIX, OPERATIONS, READ_MIX, Client, Dataset, Workload, parse_mix, run_level
+
+__all__ = [
+    'compare',
+    'environment',
+    'latency_stats',
+    'load_results',
+    'percentile',
+    'summarize',
+    'write_results',
+    'BENCHMARKS',
+    'measure',
+    'run_benchmarks',
+    'LEGITIMATE_USERS',
+    'run_attack',
+    'status_counts',
+    'DEFAULT_MIX',
+    'OPERATIONS',
+    'READ_MIX',
+    'Client',
+    'Dataset',
+    'Workload',
+    'parse_mix',
+    'run_level',
+]
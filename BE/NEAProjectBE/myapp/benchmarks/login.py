@@ -0,0 +1,105 @@
+"""
+Logins under a password-guessing attack (`manage.py benchmark_login`).
+
+Legitimate users log in at a steady pace while a misbehaving host sends
+wrong passwords for made-up emails over several connections, as fast as
+the server answers. Every user and attacking host connects from its own
+loopback address: Linux routes all of 127.0.0.0/8 to the loopback
+interface, so the server sees a distinct REMOTE_ADDR per client without
+proxies or network setup.
+"""
+import json
+import os
+import threading
+import time
+
+from .workload import Client
+
+# The users seed_db creates, with their passwords
+LEGITIMATE_USERS = (
+    ('admin@example.com', 'admin123'),
+    ('creator@example.com', 'creator123'),
+    ('viewer@example.com', 'viewer123'),
+)
+
+
+def user_address(index):
+    return f'127.0.1.{index + 1}'
+
+
+def attacker_address(index):
+    return f'127.0.2.{index + 1}'
+
+
+def login_body(email, password):
+    return json.dumps({'email': email, 'password': password}).encode()
+
+
+def run_attack(host, port, duration, attackers=8, interval=10.0, attacker_addresses=1, users=LEGITIMATE_USERS, timeout=60):
+    """
+    Log every user in once per `interval` seconds next to `attackers`
+    closed-loop password guessers, spread over `attacker_addresses` hosts,
+    for `duration` seconds. Returns the ('login' | 'attack', latency,
+    status, bytes) samples and the wall time.
+    """
+    deadline = time.perf_counter() + duration
+    samples = []
+    samples_lock = threading.Lock()
+
+    def collect(local):
+        with samples_lock:
+            samples.extend(local)
+
+    def user(index, email, password):
+        client = Client(host, port, timeout=timeout, source_address=user_address(index))
+        # Staggered, so the users' logins do not all arrive together
+        due = time.perf_counter() + interval * index / len(users)
+        local = []
+        try:
+            while True:
+                time.sleep(max(0.0, due - time.perf_counter()))
+                if time.perf_counter() >= deadline:
+                    break
+                start = time.perf_counter()
+                status, data = client.send('POST', '/api/auth/login/', login_body(email, password), 'application/json')
+                local.append(('login', time.perf_counter() - start, status, len(data)))
+                due += interval
+        finally:
+            client.close()
+            collect(local)
+
+    def attacker(index):
+        # Lowest CPU priority: the attacking host is another machine, its
+        # own loop should not take CPU time from the server
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        client = Client(host, port, timeout=timeout, source_address=attacker_address(index % attacker_addresses))
+        local = []
+        guess = 0
+        try:
+            while time.perf_counter() < deadline:
+                guess += 1
+                body = login_body(f'user{guess}.{index}@attacker.test', f'guess-{guess}')
+                start = time.perf_counter()
+                status, data = client.send('POST', '/api/auth/login/', body, 'application/json')
+                local.append(('attack', time.perf_counter() - start, status, len(data)))
+        finally:
+            client.close()
+            collect(local)
+
+    threads = [threading.Thread(target=user, args=(i, *credentials), daemon=True) for i, credentials in enumerate(users)]
+    threads += [threading.Thread(target=attacker, args=(i,), daemon=True) for i in range(attackers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def status_counts(samples, op):
+    """{status: requests} of one operation's samples"""
+    counts = {}
+    for sample_op, _, status, _ in samples:
+        if sample_op == op:
+            counts[str(status)] = counts.get(str(status), 0) + 1
+    return dict(sorted(counts.items()))
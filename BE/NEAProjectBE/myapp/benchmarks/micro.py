@@ -0,0 +1,257 @@
+import gc
+import random
+import statistics
+import time
+
+NEPALI_DIGITS = str.maketrans('0123456789', '०१२३४५६७८९')
+
+
+def measure(func, min_time=0.05, repeat=7):
+    """
+    Time `func()` like timeit: the loop count is calibrated so one sample
+    takes at least `min_time` seconds, then `repeat` samples are taken with
+    the garbage collector paused. Per-call times are reported in microseconds;
+    the median is the headline number and spread_pct (interquartile range
+    over median) tells how stable it was.
+    """
+    func()  # warm caches and lazy imports
+    loops = 1
+    while True:
+        elapsed = _run(func, loops)
+        if elapsed >= min_time or loops >= 10 ** 7:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    per_call = sorted(_run(func, loops) / loops * 1e6 for _ in range(repeat))
+    median = statistics.median(per_call)
+    quartiles = statistics.quantiles(per_call, n=4) if repeat > 1 else [median, median, median]
+    return {
+        'loops': loops,
+        'repeat': repeat,
+        'median_us': round(median, 3),
+        'min_us': round(per_call[0], 3),
+        'max_us': round(per_call[-1], 3),
+        'spread_pct': round((quartiles[2] - quartiles[0]) / median * 100, 2) if median else 0.0,
+    }
+
+
+def _run(func, loops):
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def sample_letters(count, seed=0):
+    """
+    Unsaved letters with 1-6 items each, shaped like seed_db output. Items are
+    attached as a prefetch cache so serializing them runs no queries.
+    """
+    from myapp.models import Letter, LetterItem, LetterStatus
+
+    rng = random.Random(seed)
+    letters = []
+    for i in range(1, count + 1):
+        letter = Letter(
+            id=i,
+            letter_count='८२/८३',
+            chalani_no=str(rng.randint(1, 20000)),
+            voucher_no=str(rng.randint(1, 20000)),
+            date=f"2082-{rng.randint(1, 12):02d}-{rng.randint(1, 29):02d}".translate(NEPALI_DIGITS),
+            receiver_address='Kathmandu, Nepal',
+            subject='विद्युत सामग्री खरिद',
+            request_chalani_number=str(rng.randint(1, 5000)),
+            request_letter_count='82/83',
+            request_date='२०८२-०४-०१',
+            gatepass_no=str(rng.randint(100000, 999999)),
+            office_id=str(rng.randint(1, 50)),
+            office_name='केन्द्रीय भण्डार',
+            sub_office_name='उप केन्द्रीय भण्डार',
+            receiver_id=str(rng.randint(1, 500)),
+            receiver_name='Ram Bahadur Thapa',
+            receiver_post='Store Keeper',
+            receiver_id_card_number=str(rng.randrange(10 ** 9, 10 ** 10)),
+            receiver_id_card_type='citizenship',
+            receiver_office_name='सगरमाथा ट्रेडर्स',
+            receiver_office_address='Lalitpur, Nepal',
+            receiver_phone_number=f"98{rng.randrange(10 ** 8):08d}",
+            receiver_vehicle_number='बा १ पा १२३४',
+            status=LetterStatus.SENT,
+        )
+        items = []
+        for j in range(rng.randint(1, 6)):
+            first = rng.randrange(10 ** 8, 9 * 10 ** 8)
+            items.append(LetterItem(
+                id=i * 10 + j,
+                letter=letter,
+                product_id=str(rng.randint(1, 500)),
+                name='ट्रान्सफर्मर',
+                company='नेपाल विद्युत प्राधिकरण',
+                serial_number=f"{first}-{first + 9}",
+                unit_of_measurement='nos',
+                quantity=str(rng.randint(1, 50)),
+                remarks='',
+            ))
+        letter._prefetched_objects_cache = {'items': items}
+        letters.append(letter)
+    return letters
+
+
+def sample_products(count, seed=0):
+    """Unsaved active products, shaped like seed_db output"""
+    from datetime import datetime, timedelta, timezone
+    from myapp.models import Product, ProductStatus, UnitOfMeasurement
+
+    rng = random.Random(seed)
+    created = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    units = [unit for unit, _ in UnitOfMeasurement.choices]
+    return [
+        Product(
+            id=i,
+            name=rng.choice(['ट्रान्सफर्मर', 'तार', 'मिटर', 'इन्सुलेटर', 'पोल']),
+            company=rng.choice(['सगरमाथा ट्रेडर्स', 'बुधनी सप्लायर्स', 'नेपाल विद्युत प्राधिकरण']),
+            status=ProductStatus.ACTIVE,
+            remarks='',
+            unit_of_measurement=rng.choice(units),
+            sku=f"{rng.randrange(10 ** 12, 10 ** 13)}",
+            created_at=created + timedelta(minutes=i, microseconds=rng.randrange(10 ** 6)),
+            updated_at=created + timedelta(minutes=i),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def letter_rows(letters):
+    """`letters` as the `.values()` rows LetterRowSerializer reads, items attached as load_nested does"""
+    from myapp.serializers import LetterItemRowSerializer, LetterRowSerializer
+
+    rows = []
+    for letter in letters:
+        row = {column: getattr(letter, column) for column in LetterRowSerializer.columns()}
+        row['items'] = [
+            {column: getattr(item, column) for column in LetterItemRowSerializer.columns()}
+            for item in letter._prefetched_objects_cache['items']
+        ]
+        rows.append(row)
+    return rows
+
+
+def letter_payload(letter):
+    """Request body for creating `letter`, with Devanagari digits as the frontend sends them"""
+    from myapp.serializers import LetterSerializer
+
+    data = LetterSerializer(letter).data
+    payload = {key: value for key, value in data.items() if key not in ('id', 'created_at', 'updated_at')}
+    payload['items'] = [{key: value for key, value in item.items() if key != 'id'} for item in data['items']]
+    payload['receiver'] = dict(data['receiver'])
+    return payload
+
+
+def _fresh(payload):
+    # to_internal_value rewrites digits in place: give every call its own dicts
+    return {**payload, 'items': [dict(item) for item in payload['items']], 'receiver': dict(payload['receiver'])}
+
+
+def _to_number():
+    from myapp.views.letter import to_number
+    return lambda: (to_number('१२३४५६'), to_number('2082'), to_number('SN-००१२'), to_number(''))
+
+
+def _normalize_date():
+    from myapp.views.letter import normalize_date
+    return lambda: (normalize_date('२०८२-०७-१५'), normalize_date('2082-07-15'), normalize_date('2082/7/15'))
+
+
+def _to_representation():
+    from myapp.serializers import LetterSerializer
+    letter = sample_letters(1, seed=1)[0]
+    serializer = LetterSerializer()
+    return lambda: serializer.to_representation(letter)
+
+
+def _to_internal_value():
+    from myapp.serializers import LetterSerializer
+    payload = letter_payload(sample_letters(1, seed=1)[0])
+    serializer = LetterSerializer()
+    return lambda: serializer.to_internal_value(_fresh(payload))
+
+
+def _serialize(count):
+    def factory():
+        from myapp.serializers import LetterSerializer
+        letters = sample_letters(count, seed=count)
+        return lambda: LetterSerializer(letters, many=True).data
+    return factory
+
+
+def _serialize_rows(count):
+    def factory():
+        from myapp.serializers import LetterRowSerializer
+        rows = letter_rows(sample_letters(count, seed=count))
+        serializer = LetterRowSerializer()
+        return lambda: serializer.to_representation(rows)
+    return factory
+
+
+def _render(renderer, payload):
+    def factory():
+        from rest_framework.renderers import JSONRenderer
+        from myapp.renderers import FastJSONRenderer
+        from myapp.serializers import LetterSerializer, ProductSerializer
+        if payload == 'letters':
+            data = {'status': 'success', 'data': LetterSerializer(sample_letters(1000, seed=1000), many=True).data}
+        else:
+            data = {'status': 'success', 'count': 1000, 'data': ProductSerializer(sample_products(1000, seed=1000), many=True).data}
+        render = (JSONRenderer if renderer == 'json' else FastJSONRenderer)().render
+        return lambda: render(data)
+    return factory
+
+
+def _serve_schema(accept_encoding):
+    def factory():
+        from django.http import HttpRequest
+        from myapp.views import schema_view
+        request = HttpRequest()
+        request.method = 'GET'
+        request.META['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        return lambda: schema_view(request)
+    return factory
+
+
+# name -> factory returning the zero-argument callable to time (setup is not timed)
+BENCHMARKS = {
+    'to_number': _to_number,
+    'normalize_date': _normalize_date,
+    'letter.to_representation': _to_representation,
+    'letter.to_internal_value': _to_internal_value,
+    'serialize_letters[1]': _serialize(1),
+    'serialize_letters[10]': _serialize(10),
+    'serialize_letters[1000]': _serialize(1000),
+    'serialize_letter_rows[10]': _serialize_rows(10),
+    'serialize_letter_rows[1000]': _serialize_rows(1000),
+    'render_letters[1000].json': _render('json', 'letters'),
+    'render_letters[1000].fast': _render('fast', 'letters'),
+    'render_all_active[1000].json': _render('json', 'products'),
+    'render_all_active[1000].fast': _render('fast', 'products'),
+    # The first call loads (or generates) the cached schema
+    'serve_schema': _serve_schema(''),
+    'serve_schema.br': _serve_schema('gzip, br'),
+}
+
+
+def run_benchmarks(names=None, min_time=0.05, repeat=7, progress=None):
+    runs = {}
+    for name, factory in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        runs[name] = measure(factory(), min_time=min_time, repeat=repeat)
+        if progress:
+            progress(name, runs[name])
+    return runs
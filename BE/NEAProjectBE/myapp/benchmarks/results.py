@@ -0,0 +1,121 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile (0 <= q <= 1) of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = q * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def latency_stats(latencies):
+    """p50/p99/mean/max in milliseconds for a list of durations in seconds"""
+    values = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def summarize(samples, wall_time):
+    """
+    Aggregate (operation, latency_seconds, status, response_bytes) samples of
+    one run into overall and per-operation numbers.
+    """
+    operations = {}
+    for op, latency, status, size in samples:
+        operations.setdefault(op, []).append((latency, status, size))
+
+    def errors(rows):
+        return sum(1 for _, status, _ in rows if status is None or status >= 400)
+
+    summary = {
+        'requests': len(samples),
+        'errors': errors([(latency, status, size) for _, latency, status, size in samples]),
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+        **latency_stats([latency for _, latency, _, _ in samples]),
+        'operations': {},
+    }
+    for op, rows in sorted(operations.items()):
+        summary['operations'][op] = {
+            'requests': len(rows),
+            'errors': errors(rows),
+            'throughput_rps': round(len(rows) / wall_time, 2) if wall_time else 0.0,
+            'mean_bytes': round(sum(size for _, _, size in rows) / len(rows)),
+            **latency_stats([latency for latency, _, _ in rows]),
+        }
+    return summary
+
+
+def git_revision(cwd=None):
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{sha}-dirty" if dirty else sha
+
+
+def environment(cwd=None):
+    """Where and on what a benchmark ran, stored next to its numbers"""
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(cwd),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'argv': sys.argv[1:],
+    }
+
+
+def write_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def compare(baseline, current, metrics=('p50_ms', 'p99_ms', 'throughput_rps')):
+    """
+    Rows of (scenario, operation, metric, baseline, current, change %) for
+    every scenario and operation present in both result files. A scenario is
+    a concurrency level for the API suite and a benchmark name for the
+    micro-benchmarks.
+    """
+    rows = []
+    for scenario, current_run in current['runs'].items():
+        base_run = baseline['runs'].get(scenario)
+        if base_run is None:
+            continue
+        pairs = [('ALL', base_run, current_run)] + [
+            (op, base_run['operations'][op], stats)
+            for op, stats in current_run.get('operations', {}).items()
+            if op in base_run.get('operations', {})
+        ]
+        for op, base, cur in pairs:
+            for metric in metrics:
+                if metric not in base or metric not in cur:
+                    continue
+                before, after = base[metric], cur[metric]
+                change = round((after - before) / before * 100, 1) if before else None
+                rows.append((scenario, op, metric, before, after, change))
+    return rows
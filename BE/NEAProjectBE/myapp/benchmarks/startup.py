@@ -0,0 +1,113 @@
+"""
+Cold start of a worker: a fresh interpreter sets Django up, loads the WSGI
+application and answers its first requests, the way a gunicorn worker
+does after a (re)start. The probe runs in its own process so nothing is
+imported already; with `importtime` it runs under ``python -X importtime``
+and the per-module import times are returned too.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+# Loaded on first use by the code that needs them, never by a starting worker
+LAZY_MODULES = ('openpyxl', 'faker', 'drf_spectacular.generators', 'drf_spectacular.views')
+FIRST_REQUESTS = ('/healthz', '/api/letters/')
+
+PROBE = '''
+import io, json, resource, sys, time
+started_at = time.time()
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from NEAProjectBE.wsgi import application
+loaded = time.perf_counter()
+
+def get(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    b''.join(response)
+    response.close()
+    return int(status[0].split()[0])
+
+statuses, request_ms = {}, {}
+for path in PATHS:
+    before = time.perf_counter()
+    statuses[path] = get(path)
+    request_ms[path] = (time.perf_counter() - before) * 1000
+first = time.perf_counter()
+ready_at = time.time()
+before = time.perf_counter()
+get(PATHS[0])
+warm_request_ms = (time.perf_counter() - before) * 1000
+print(json.dumps({
+    'started_at': started_at,
+    'ready_at': ready_at,
+    'setup_ms': (setup - started) * 1000,
+    'application_ms': (loaded - setup) * 1000,
+    'first_requests_ms': (first - loaded) * 1000,
+    'request_ms': request_ms,
+    'warm_request_ms': warm_request_ms,
+    'statuses': statuses,
+    'rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': sorted(sys.modules),
+}))
+'''
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_times(stderr):
+    """{module: (self us, cumulative us, depth)} from the output of -X importtime"""
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            times.setdefault(module, (int(own), int(cumulative), len(indent) // 2))
+    return times
+
+
+def cold_start(base_dir, paths=FIRST_REQUESTS, importtime=False, env=None):
+    """
+    Start a fresh interpreter in `base_dir` and time it up to the end of the
+    first requests to `paths`; DEBUG is off, as under `manage.py serve`
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'NEAProjectBE.settings',
+            'DJANGO_DEBUG': 'False',
+            'METRICS_DIR': tmp,
+            **(env or {}),
+        }
+        argv = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', f'PATHS = {list(paths)!r}\n{PROBE}']
+        spawned = time.time()
+        result = subprocess.run(argv, cwd=base_dir, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f'The cold start probe failed:\n{result.stderr[-4000:]}')
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = probe.pop('modules')
+    run = {
+        'ready_ms': round((probe.pop('ready_at') - spawned) * 1000, 1),
+        'interpreter_ms': round((probe.pop('started_at') - spawned) * 1000, 1),
+        **{key: round(value, 1) if isinstance(value, float) else value for key, value in probe.items()},
+        'request_ms': {path: round(ms, 1) for path, ms in probe['request_ms'].items()},
+        'module_count': len(modules),
+        'lazy_modules_loaded': [module for module in LAZY_MODULES if module in modules],
+    }
+    if importtime:
+        times = import_times(result.stderr)
+        run['import_ms'] = round(sum(cumulative for _, cumulative, depth in times.values() if depth == 0) / 1000, 1)
+        run['imports'] = times
+    return run
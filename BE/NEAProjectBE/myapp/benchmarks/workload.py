@@ -0,0 +1,329 @@
+import http.client
+import io
+import json
+import math
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from array import array
+from collections import namedtuple
+from itertools import count
+
+NEPALI_DIGITS = str.maketrans('0123456789', '०१२३४५६७८९')
+
+# Relative frequency of each call in the replayed mix, modelled on what the
+# frontend issues: the letter list and detail pages dominate, the form pages
+# load the all-active lookups and letter-creation-data, exports and imports
+# are rare but expensive.
+DEFAULT_MIX = {
+    'letter_list': 30,
+    'letter_retrieve': 20,
+    'all_active': 16,
+    'dashboard': 10,
+    'letter_creation_data': 8,
+    'letter_create': 10,
+    'export_xlsx': 3,
+    'import_xlsx': 3,
+}
+
+# The GET endpoints that have async views (myapp/views/asynchronous.py), as
+# the frontend weighs them; benchmark_asgi replays this mix
+READ_MIX = {
+    'letter_list': 30,
+    'letter_retrieve': 20,
+    'all_active': 16,
+    'dashboard': 10,
+    'me': 8,
+}
+
+OPERATIONS = tuple(dict.fromkeys([*DEFAULT_MIX, *READ_MIX]))
+
+ALL_ACTIVE = ('products', 'offices', 'receivers', 'branches', 'employees')
+
+IMPORT_HEADERS = [
+    'सि.नं.', 'च.नं.', 'भौचर क्र. सं.', 'मिति', 'गेटपास नं.', 'रेट पठाउन बाकी',
+    'कार्यालय', 'उप कार्यालय',
+    'सामानको नाम', 'कम्पनी', 'सिरियल नं.', 'इकाई', 'बुझेको परिमाण पुरानो', 'बुझेको परिमाण नया',
+    'बुझ्नेको पुरा नाम', 'थर', 'पद', 'Mobile', 'गाडी नम्बर', 'तयार गर्ने', 'कैफियत'
+]
+
+Request = namedtuple('Request', 'op method path body content_type')
+
+# Letters created or imported by the benchmark use chalani numbers from this
+# counter so repeated imports insert rows instead of being skipped as duplicates
+_unique = count(90_000_000)
+_unique_lock = threading.Lock()
+
+
+def unique_number():
+    with _unique_lock:
+        return next(_unique)
+
+
+def parse_mix(text):
+    """'letter_list=30,dashboard=10' -> {'letter_list': 30, 'dashboard': 10}"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Dataset:
+    """Ids and reference rows of the seeded database, read directly from the SQLite file"""
+
+    def __init__(self, path, page_size=10, sample=500):
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            self.letter_ids = array('q', (row[0] for row in db.execute('SELECT id FROM myapp_letter ORDER BY id')))
+            self.bin_letters = db.execute("SELECT COUNT(*) FROM myapp_letter WHERE status = 'bin'").fetchone()[0]
+            self.products = db.execute(
+                "SELECT id, name, company, unit_of_measurement FROM myapp_product WHERE status = 'active' ORDER BY id LIMIT ?",
+                (sample,),
+            ).fetchall()
+            self.receivers = db.execute(
+                'SELECT id, name, post, id_card_number, id_card_type, office_name, office_address, phone_number, vehicle_number '
+                'FROM myapp_receiver ORDER BY id LIMIT ?',
+                (sample,),
+            ).fetchall()
+            self.offices = db.execute("SELECT id, name FROM myapp_office WHERE status = 'active' ORDER BY id LIMIT ?", (sample,)).fetchall()
+        finally:
+            db.close()
+        self.pages = max(1, math.ceil(len(self.letter_ids) / page_size))
+        if not (self.letter_ids and self.products and self.receivers and self.offices):
+            raise ValueError(f"{path} has no seeded letters, products, receivers or offices")
+
+
+class Workload:
+    """Deterministic stream of requests drawn from a weighted mix"""
+
+    def __init__(self, dataset, seed, mix=None, import_rows=20):
+        self.dataset = dataset
+        self.rng = random.Random(seed)
+        mix = mix or DEFAULT_MIX
+        self.ops = [op for op, weight in mix.items() if weight > 0]
+        self.weights = [mix[op] for op in self.ops]
+        self.import_rows = import_rows
+
+    def next(self):
+        op = self.rng.choices(self.ops, weights=self.weights)[0]
+        return getattr(self, op)()
+
+    def letter_list(self):
+        roll = self.rng.random()
+        if roll < 0.5:
+            page = 1
+        elif roll < 0.9:
+            page = self.rng.randint(2, min(self.dataset.pages, 100)) if self.dataset.pages > 1 else 1
+        else:
+            page = self.rng.randint(1, self.dataset.pages)
+        if self.dataset.bin_letters and self.rng.random() < 0.1:
+            return Request('letter_list', 'GET', '/api/letters/?page=1&status=bin', None, None)
+        return Request('letter_list', 'GET', f'/api/letters/?page={page}', None, None)
+
+    def letter_retrieve(self):
+        letter_id = self.dataset.letter_ids[self.rng.randrange(len(self.dataset.letter_ids))]
+        return Request('letter_retrieve', 'GET', f'/api/letters/{letter_id}/', None, None)
+
+    def all_active(self):
+        return Request('all_active', 'GET', f'/api/{self.rng.choice(ALL_ACTIVE)}/all-active/', None, None)
+
+    def dashboard(self):
+        return Request('dashboard', 'GET', '/api/dashboard/', None, None)
+
+    def me(self):
+        return Request('me', 'GET', '/api/auth/me/', None, None)
+
+    def letter_creation_data(self):
+        return Request('letter_creation_data', 'GET', '/api/letters/letter-creation-data/', None, None)
+
+    def export_xlsx(self):
+        return Request('export_xlsx', 'GET', '/api/letters/export_xlsx/', None, None)
+
+    def letter_create(self):
+        rng = self.rng
+        number = unique_number()
+        receiver = rng.choice(self.dataset.receivers)
+        office_id, office_name = rng.choice(self.dataset.offices)
+        items = []
+        for product_id, name, company, unit in rng.sample(self.dataset.products, min(rng.randint(1, 5), len(self.dataset.products))):
+            serial = rng.randrange(10 ** 8, 9 * 10 ** 8)
+            items.append({
+                'product_id': str(product_id),
+                'name': name,
+                'company': company,
+                'serial_number': str(serial).translate(NEPALI_DIGITS),
+                'unit_of_measurement': unit,
+                'quantity': str(rng.randint(1, 20)).translate(NEPALI_DIGITS),
+                'remarks': '',
+            })
+        body = {
+            'letter_count': '८२/८३',
+            'chalani_no': str(number).translate(NEPALI_DIGITS),
+            'voucher_no': str(number).translate(NEPALI_DIGITS),
+            'date': f"२०८२-{rng.randint(4, 12):02d}-{rng.randint(1, 29):02d}".translate(NEPALI_DIGITS),
+            'receiver_address': receiver[6],
+            'subject': 'विद्युत सामग्री खरिद',
+            'request_chalani_number': str(rng.randint(1, 5000)).translate(NEPALI_DIGITS),
+            'request_letter_count': '८२/८३',
+            'request_date': '२०८२-०४-०१',
+            'gatepass_no': str(number).translate(NEPALI_DIGITS),
+            'office_id': str(office_id),
+            'office_name': office_name,
+            'sub_office_name': 'उप केन्द्रीय भण्डार',
+            'receiver_id': str(receiver[0]),
+            'receiver': {
+                'name': receiver[1],
+                'post': receiver[2],
+                'id_card_number': receiver[3],
+                'id_card_type': receiver[4],
+                'office_name': receiver[5],
+                'office_address': receiver[6],
+                'phone_number': receiver[7],
+                'vehicle_number': receiver[8],
+            },
+            'status': 'sent',
+            'items': items,
+        }
+        return Request('letter_create', 'POST', '/api/letters/', json.dumps(body).encode(), 'application/json')
+
+    def import_xlsx(self):
+        from openpyxl import Workbook
+
+        rng = self.rng
+        wb = Workbook()
+        ws = wb.active
+        ws.append(IMPORT_HEADERS)
+        row_number = 1
+        while row_number <= self.import_rows:
+            number = unique_number()
+            receiver = rng.choice(self.dataset.receivers)
+            # Several rows of one letter, as exported: one row per item
+            for _ in range(min(rng.randint(1, 4), self.import_rows - row_number + 1)):
+                _, name, company, unit = rng.choice(self.dataset.products)
+                ws.append([
+                    row_number, number, number, f"2082.{rng.randint(4, 12):02d}.{rng.randint(1, 29):02d}", number, '-',
+                    'केन्द्रीय भण्डार', 'उप केन्द्रीय भण्डार',
+                    name, company, str(rng.randrange(10 ** 8, 9 * 10 ** 8)), unit, '-', rng.randint(1, 50),
+                    receiver[1], receiver[1].split(' ')[-1], receiver[2],
+                    receiver[7].translate(NEPALI_DIGITS), receiver[8], 'Central Store', '',
+                ])
+                row_number += 1
+        buffer = io.BytesIO()
+        wb.save(buffer)
+
+        boundary = uuid.UUID(int=rng.getrandbits(128)).hex
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            b'Content-Disposition: form-data; name="file"; filename="letters.xlsx"\r\n',
+            b'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n',
+            buffer.getvalue(),
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+        return Request('import_xlsx', 'POST', '/api/letters/import-xlsx/', body, f'multipart/form-data; boundary={boundary}')
+
+
+class Client:
+    """
+    HTTP client for one worker thread. With `keep_alive` the connection is
+    reused (and re-opened when the server closes it); without it every
+    request uses a new connection, which avoids the ~40 ms Nagle/delayed-ACK
+    stall of servers that do not set TCP_NODELAY, such as runserver.
+    `source_address` is the local address to connect from.
+    """
+
+    def __init__(self, host, port, token=None, timeout=300, keep_alive=False, source_address=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.source_address = (source_address, 0) if source_address else None
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+        self.conn = None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def send(self, method, path, body=None, content_type=None):
+        """Return (status, body bytes); status is None when the request could not be completed"""
+        headers = dict(self.headers)
+        if content_type:
+            headers['Content-Type'] = content_type
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout,
+                                                       source_address=self.source_address)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.will_close or not self.keep_alive:
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                # A stale keep-alive connection fails on first use: retry once on a new one
+                self.close()
+                if attempt or not self.keep_alive:
+                    return None, b''
+
+    def login(self, email, password):
+        status, data = self.send('POST', '/api/auth/login/', json.dumps({'email': email, 'password': password}).encode(), 'application/json')
+        if status != 200:
+            raise RuntimeError(f"Login as {email} failed with status {status}: {data[:200]!r}")
+        token = json.loads(data)['access']
+        self.headers['Authorization'] = f'Bearer {token}'
+        return token
+
+
+def run_level(host, port, token, dataset, concurrency, duration, max_requests=None, seed=0, mix=None, import_rows=20,
+              timeout=300, keep_alive=False):
+    """
+    Replay the mix with `concurrency` closed-loop workers for `duration`
+    seconds (or until `max_requests` requests completed) and return the
+    (operation, latency, status, bytes) samples and the wall time.
+    """
+    deadline = time.perf_counter() + duration
+    budget = [max_requests]
+    budget_lock = threading.Lock()
+    samples = []
+    samples_lock = threading.Lock()
+
+    def take():
+        if budget[0] is None:
+            return True
+        with budget_lock:
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            return True
+
+    def worker(index):
+        client = Client(host, port, token, timeout, keep_alive)
+        workload = Workload(dataset, seed * 1000 + index, mix, import_rows)
+        local = []
+        try:
+            while time.perf_counter() < deadline and take():
+                request = workload.next()
+                start = time.perf_counter()
+                status, data = client.send(request.method, request.path, request.body, request.content_type)
+                local.append((request.op, time.perf_counter() - start, status, len(data)))
+        finally:
+            client.close()
+            with samples_lock:
+                samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
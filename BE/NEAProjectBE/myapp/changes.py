@@ -0,0 +1,54 @@
+"""
+Change log behind /api/changes/: one Change row per created, updated or
+deleted row of the synced tables, written in the same transaction as the
+row. A row moved to the bin is logged as deleted, so clients drop it like
+a hard-deleted one.
+
+save() and delete() record through signals; writes that skip them
+(bulk_create, QuerySet.update) call record() themselves.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .models import Change, ChangeAction
+
+# Every status enum spells the bin the same way
+BIN = 'bin'
+# Table of the entry a restore from a backup logs (myapp/backups.py)
+DATABASE = 'database'
+
+# model -> table name in the feed
+TABLES = {}
+
+
+def record(model, ids, action):
+    """Log `action` for the rows of `model` with primary keys `ids`"""
+    table = TABLES[model]
+    Change.objects.bulk_create([Change(table=table, object_id=pk, action=action) for pk in ids], batch_size=1000)
+
+
+def record_created(model, objects):
+    """Log rows inserted by bulk_create"""
+    table = TABLES[model]
+    Change.objects.bulk_create([Change(table=table, object_id=obj.pk, action=_action(obj, True)) for obj in objects], batch_size=1000)
+
+
+def _action(instance, created):
+    if getattr(instance, 'status', None) == BIN:
+        return ChangeAction.DELETED
+    return ChangeAction.CREATED if created else ChangeAction.UPDATED
+
+
+def _on_save(sender, instance, created, **kwargs):
+    Change.objects.create(table=TABLES[sender], object_id=instance.pk, action=_action(instance, created))
+
+
+def _on_delete(sender, instance, **kwargs):
+    Change.objects.create(table=TABLES[sender], object_id=instance.pk, action=ChangeAction.DELETED)
+
+
+def track(model, table):
+    """Log every save and delete of `model` under `table`"""
+    TABLES[model] = table
+    uid = f'change-log:{model._meta.label_lower}'
+    post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=uid)
@@ -0,0 +1,292 @@
+"""
+Server-sent events at /api/events/ and the in-process broadcaster behind them.
+
+events_application is a bare ASGI application that NEAProjectBE.asgi mounts
+in front of Django: Django's ASGI handler keeps a thread for every request
+until its response ends, which for an event stream is the whole connection.
+Here every connected client holds an asyncio queue, not a thread. One feeder
+task per process follows the change log (myapp/changes.py), so writes made
+by any worker reach every client: each poll reads the new entries past its
+cursor, publishes a `letter` event per created, updated or deleted letter
+and, for the tables that changed, a `counters` event with their fresh
+counts. The feeder starts with the first subscriber and stops with the
+last; a client whose queue fills up is disconnected and reconnects with a
+fresh snapshot. Django's middleware never sees these requests, so the CORS
+headers come from corsheaders' CorsMiddleware here too, for the frontend
+served from another origin (the Vite dev server).
+"""
+import asyncio
+import contextvars
+import io
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from corsheaders.middleware import CorsMiddleware
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .changes import BIN, TABLES
+from .models import Change, ChangeAction, Letter
+
+logger = logging.getLogger(__name__)
+
+# table -> status values counted next to the total
+COUNTED_STATUSES = {
+    'products': ('active', BIN),
+    'offices': ('active', BIN),
+    'branches': ('active', BIN),
+    'employees': ('active', BIN),
+    'receivers': (),
+    'letters': ('draft', 'sent', BIN),
+}
+
+
+def encode(event, data, event_id=None):
+    """One server-sent event frame"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def table_counts(table):
+    """Total and per-status row counts of `table`, in one query"""
+    model = next(model for model, name in TABLES.items() if name == table)
+    aggregates = {'total': Count('pk')}
+    for value in COUNTED_STATUSES[table]:
+        aggregates[value] = Count('pk', filter=Q(status=value))
+    return model.objects.aggregate(**aggregates)
+
+
+def latest_cursor():
+    return Change.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def read_changes(cursor, limit):
+    """
+    The change log entries after `cursor`, as (id, table, object_id, action),
+    and the current status of the letters among them
+    """
+    entries = list(
+        Change.objects.filter(id__gt=cursor).order_by('id')
+        .values_list('id', 'table', 'object_id', 'action')[:limit]
+    )
+    if not entries:
+        return [], {}
+    letter_ids = {object_id for _, table, object_id, _ in entries if table == 'letters'}
+    statuses = dict(Letter.objects.filter(pk__in=letter_ids).values_list('pk', 'status')) if letter_ids else {}
+    return entries, statuses
+
+
+class Subscription:
+    """One client's queue of encoded events"""
+
+    def __init__(self, size):
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too slow to keep up: the stream ends and the client reconnects
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next event, or None once `timeout` seconds pass without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    def __init__(self):
+        self.subscribers = set()
+        self.counters = {}
+        self.cursor = None
+        self.ready = None
+        self.feeder = None
+
+    def subscribe(self):
+        subscription = Subscription(getattr(settings, 'SSE_QUEUE_SIZE', 100))
+        self.subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self.feeder is None or self.feeder.done() or self.feeder.get_loop() is not loop:
+            self.ready = asyncio.Event()
+            # The feeder outlives the request that starts it: none of that request's context
+            self.feeder = loop.create_task(self.feed(), context=contextvars.Context())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, message):
+        for subscription in list(self.subscribers):
+            subscription.put(message)
+
+    async def snapshot(self):
+        """Counts of every table, as of the feeder's last poll"""
+        await self.ready.wait()
+        return self.counters
+
+    async def feed(self):
+        try:
+            await self.start()
+            interval = getattr(settings, 'SSE_POLL_INTERVAL', 1.0)
+            while self.subscribers:
+                await asyncio.sleep(interval)
+                try:
+                    await self.poll()
+                except Exception:
+                    logger.exception('Reading the change log for server-sent events failed')
+        finally:
+            self.ready.set()
+
+    async def start(self):
+        def load():
+            return latest_cursor(), {table: table_counts(table) for table in COUNTED_STATUSES}
+        self.cursor, self.counters = await sync_to_async(load)()
+        self.ready.set()
+
+    async def poll(self):
+        """Publish the change log entries written since the last poll"""
+        limit = getattr(settings, 'CHANGES_PAGE_SIZE', 500)
+        while True:
+            entries, statuses = await sync_to_async(read_changes)(self.cursor, limit)
+            if not entries:
+                return
+            self.cursor = entries[-1][0]
+            for entry_id, table, object_id, action in entries:
+                if table == 'letters':
+                    self.publish(encode('letter', {
+                        'id': object_id, 'action': action, 'status': statuses.get(object_id),
+                    }, entry_id))
+            if any(action == ChangeAction.RESTORED for _, _, _, action in entries):
+                # Restored from a backup: any table may have changed
+                changed = set(COUNTED_STATUSES)
+            else:
+                changed = {table for _, table, _, _ in entries}
+            counts = await sync_to_async(lambda: {table: table_counts(table) for table in changed})()
+            counts = {table: value for table, value in counts.items() if value != self.counters.get(table)}
+            if counts:
+                self.counters = {**self.counters, **counts}
+                self.publish(encode('counters', counts, self.cursor))
+            if len(entries) < limit:
+                return
+
+
+broadcaster = Broadcaster()
+
+
+def authenticate(headers, query):
+    """The user of the bearer token in the Authorization header or ?token= (EventSource cannot set headers)"""
+    auth = JWTAuthentication()
+    header = headers.get(b'authorization')
+    raw_token = auth.get_raw_token(header) if header else query.get('token', [''])[0].encode()
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def stream(heartbeat):
+    subscription = broadcaster.subscribe()
+    try:
+        yield encode('counters', await broadcaster.snapshot())
+        while not subscription.overflowed:
+            message = await subscription.get(heartbeat)
+            if subscription.overflowed:
+                break
+            # A comment line keeps idle connections open through proxies
+            yield message if message is not None else b': ping\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+_cors = CorsMiddleware(lambda request: None)
+
+
+def cors_headers(scope):
+    """
+    Whether the request is a CORS preflight, and the CORS headers of its
+    response, as the CorsMiddleware in MIDDLEWARE would answer it
+    """
+    if 'corsheaders.middleware.CorsMiddleware' not in settings.MIDDLEWARE:
+        return False, []
+    request = ASGIRequest(scope, io.BytesIO())
+    preflight = _cors.check_preflight(request)
+    response = _cors.add_response_headers(request, preflight or HttpResponse())
+    return preflight is not None, [
+        (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.items()
+        if name.lower() == 'vary' or name.lower().startswith('access-control-')
+    ]
+
+
+async def send_json(send, status, message, headers=()):
+    body = json.dumps({"status": "error", "message": message}).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers,
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def events_application(scope, receive, send):
+    """
+    GET /api/events/: a `counters` snapshot on connect, then `letter` events
+    ({id, action, status}) and `counters` events for the tables that changed
+    """
+    preflight, cors = cors_headers(scope)
+    if preflight:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-length', b'0'), *cors]})
+        return await send({'type': 'http.response.body', 'body': b''})
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await send_json(send, 405, f"Method \"{scope['method']}\" not allowed.", cors)
+    headers = dict(scope['headers'])
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if await sync_to_async(authenticate)(headers, query) is None:
+        return await send_json(send, 401, "Authentication credentials were not provided or are invalid", cors)
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        # Stop nginx from buffering the stream
+        (b'x-accel-buffering', b'no'),
+        *cors,
+    ]})
+
+    async def pump():
+        events = stream(getattr(settings, 'SSE_HEARTBEAT', 15))
+        try:
+            async for chunk in events:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await events.aclose()
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(disconnected())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        error = None if task.cancelled() else task.exception()
+        # A client gone mid-write is a disconnect too
+        if error is not None and not isinstance(error, OSError):
+            raise error
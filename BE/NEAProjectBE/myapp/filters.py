@@ -0,0 +1,66 @@
+from django import forms
+from django_filters import rest_framework as filters
+from django_filters.fields import RangeField
+
+from .models import Letter
+from .models.letter import ENGLISH_DIGITS, letter_date
+
+
+class NumberField(forms.IntegerField):
+    """An integer in Nepali or English digits"""
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            value = value.translate(ENGLISH_DIGITS)
+        return super().to_python(value)
+
+
+class NumberRangeField(RangeField):
+    def __init__(self, fields=None, *args, **kwargs):
+        super().__init__(fields or (NumberField(), NumberField()), *args, **kwargs)
+
+
+class NumberRangeFilter(filters.RangeFilter):
+    field_class = NumberRangeField
+
+
+class DateKeyField(forms.CharField):
+    """A 'YYYY-MM-DD' Nepali date in Nepali or English digits, cleaned to Letter.date_key form"""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return value
+        key = letter_date(value)
+        if not key:
+            raise forms.ValidationError("Use YYYY-MM-DD")
+        return key
+
+
+class DateKeyFilter(filters.CharFilter):
+    field_class = DateKeyField
+
+
+class LetterFilter(filters.FilterSet):
+    """
+    Letter list filters. Each one is answered from an index on Letter: the
+    equality filters from (field, created_at) indexes that also give the
+    list order, the number and date ranges from the normalized
+    chalani_number, voucher_number, gatepass_number and date_key columns.
+    Numbers and dates may be written in Nepali or English digits.
+    """
+    office = filters.CharFilter(field_name='office_id')
+    office_name = filters.CharFilter()
+    sub_office = filters.CharFilter(field_name='sub_office_name')
+    receiver = filters.CharFilter(field_name='receiver_id')
+    receiver_name = filters.CharFilter()
+    # ?chalani_min=10&chalani_max=20, either bound optional
+    chalani = NumberRangeFilter(field_name='chalani_number')
+    voucher = NumberRangeFilter(field_name='voucher_number')
+    gatepass = NumberRangeFilter(field_name='gatepass_number')
+    date_from = DateKeyFilter(field_name='date_key', lookup_expr='gte')
+    date_to = DateKeyFilter(field_name='date_key', lookup_expr='lte')
+
+    class Meta:
+        model = Letter
+        fields = ['status']
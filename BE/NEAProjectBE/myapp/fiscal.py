@@ -0,0 +1,39 @@
+"""
+Nepali fiscal years.
+
+A fiscal year runs from the first of Shrawan, the fourth Bikram Sambat
+month, to the end of Asar, and is named by the BS year it starts in
+(2082/83 starts in Shrawan 2082). Letter dates are stored in BS, so
+comparing them with a fiscal year only needs the year and the month.
+"""
+from datetime import date
+
+SHRAWAN = 4
+# Shrawan 1 falls between 15 and 17 July. This is the first AD day (month,
+# day) that is surely in the new fiscal year: without the BS month lengths
+# of every year, the days before it count as the old one
+NEW_FISCAL_YEAR_BY = (7, 18)
+
+
+def current_fiscal_year(today=None):
+    """
+    BS start year of the current fiscal year. For a few days after Shrawan 1
+    this is still the previous one, never a fiscal year that has not begun.
+    """
+    today = today or date.today()
+    year = today.year + 57
+    return year if (today.month, today.day) >= NEW_FISCAL_YEAR_BY else year - 1
+
+
+def fiscal_year(date_key):
+    """Start year of the fiscal year of a 'YYYY-MM-DD' BS date"""
+    year, month = int(date_key[:4]), int(date_key[5:7])
+    return year if month >= SHRAWAN else year - 1
+
+
+def fiscal_year_start(year):
+    return f'{year:04d}-{SHRAWAN:02d}-01'
+
+
+def fiscal_year_label(year):
+    return f'{year}/{str(year + 1)[-2:]}'
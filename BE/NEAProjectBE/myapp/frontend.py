@@ -0,0 +1,167 @@
+"""
+The production build of the frontend (FE/NEAprojectFE), served by Django.
+
+`manage.py build_frontend` runs Vite's build into FRONTEND_BUILD_DIR and
+precompress() then writes a gzip copy, and a brotli one when the library
+is installed, next to every text file at the highest levels. Vite puts a
+content hash in the name of everything under assets/, so those files never
+change and are cached for a year; index.html and the files copied from
+public/ are revalidated with their ETag on every use.
+
+FrontendBuild lists the build once per process, and again only when the
+build directory changes, so serving a file costs a dict lookup and a
+single stat.
+
+The static files of the admin and the browsable API, which `manage.py
+collectstatic` gathers into STATIC_ROOT, are served the same way by
+static_file(), looked up on each request and revalidated on every use.
+"""
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+from .middleware.compression import Codec, brotli
+
+# Extensions worth compressing; images and woff2 fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    '.css', '.html', '.ico', '.js', '.json', '.map', '.mjs', '.otf', '.svg', '.ttf', '.txt', '.wasm', '.webmanifest', '.xml',
+})
+# Coding -> suffix of the precompressed copy, in the server's order of preference
+CODINGS = {'br': '.br', 'gzip': '.gz'}
+CONTENT_TYPES = {
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.map': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.ttf': 'font/ttf',
+    '.otf': 'font/otf',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+}
+
+
+def content_type(name):
+    suffix = Path(name).suffix.lower()
+    content_type = CONTENT_TYPES.get(suffix) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/json', 'image/svg+xml'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def precompress(root):
+    """
+    Write the .br and .gz copies of the compressible files under `root`
+    and remove stale ones; return {relative path: (size, {coding: size})}
+    for the files compressed. A copy that is not smaller is not kept.
+    """
+    codecs = {'gzip': Codec('gzip', 9)}
+    if brotli is not None:
+        codecs = {'br': Codec('br', 11), **codecs}
+    min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+    suffixes = tuple(CODINGS.values())
+
+    sizes = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = Path(directory, name)
+            if name.endswith(suffixes):
+                if not path.with_suffix('').exists():
+                    path.unlink()
+                continue
+            if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            content = path.read_bytes()
+            compressed = {}
+            for coding, suffix in CODINGS.items():
+                copy = path.with_name(name + suffix)
+                data = codecs[coding].compress(content) if coding in codecs and len(content) >= min_bytes else None
+                if data is not None and len(data) < len(content):
+                    copy.write_bytes(data)
+                    compressed[coding] = len(data)
+                elif copy.exists():
+                    copy.unlink()
+            sizes[path.relative_to(root).as_posix()] = (len(content), compressed)
+    # Running servers list the build again
+    os.utime(root)
+    return sizes
+
+
+class BuiltFile:
+    """One file of the build and its precompressed copies"""
+    __slots__ = ('name', 'content_type', 'cache_control', 'representations')
+
+    def __init__(self, path, cache_control='no-cache'):
+        self.name = path.name
+        self.content_type = content_type(path.name)
+        self.cache_control = cache_control
+        # coding (None for identity) -> (path, size, ETag, mtime)
+        self.representations = {}
+        for coding, suffix in (*CODINGS.items(), (None, '')):
+            copy = path.with_name(path.name + suffix)
+            try:
+                stat = copy.stat()
+            except OSError:
+                continue
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            self.representations[coding] = (copy, stat.st_size, etag, int(stat.st_mtime))
+
+    @property
+    def codings(self):
+        return [coding for coding in self.representations if coding is not None]
+
+
+class FrontendBuild:
+    def __init__(self, root, stamp):
+        self.root = root
+        self.stamp = stamp
+        self.files = {}
+        suffixes = tuple(CODINGS.values())
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(suffixes):
+                    continue
+                path = Path(directory, name)
+                relative = path.relative_to(root).as_posix()
+                if relative.startswith(settings.FRONTEND_IMMUTABLE_PREFIX):
+                    self.files[relative] = BuiltFile(path, f'public, max-age={settings.FRONTEND_MAX_AGE}, immutable')
+                else:
+                    self.files[relative] = BuiltFile(path)
+        self.index = self.files.get('index.html')
+
+    def get(self, path):
+        return self.files.get(path)
+
+
+_build = None
+
+
+def frontend_build():
+    """The current build in FRONTEND_BUILD_DIR, or None when there is none"""
+    global _build
+    root = Path(settings.FRONTEND_BUILD_DIR)
+    try:
+        # A build or precompress() run adds and removes entries here
+        stamp = root.stat().st_mtime_ns
+    except OSError:
+        return None
+    build = _build
+    if build is None or build.root != root or build.stamp != stamp:
+        build = _build = FrontendBuild(root, stamp)
+    return build if build.index is not None else None
+
+
+def static_file(path):
+    """The file at `path` in STATIC_ROOT, or None"""
+    if path.endswith(tuple(CODINGS.values())):
+        return None
+    try:
+        full = Path(safe_join(settings.STATIC_ROOT, path))
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    if not full.is_file():
+        return None
+    return BuiltFile(full)
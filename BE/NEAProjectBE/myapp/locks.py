@@ -0,0 +1,95 @@
+"""
+Cross-process file locks.
+
+file_lock() holds an exclusive lock on a lock file for the duration of a
+with block: flock() on POSIX, msvcrt.locking() on Windows, which has no
+fcntl. Each call opens the file anew, so the lock also excludes the other
+threads of the same process. cache_lock() makes the read-modify-write
+updates of a shared cache (get, then set) atomic. acquire() takes a lock
+that outlives a with block, such as one a process holds while it runs.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock(f, blocking=True):
+        f.seek(0)
+        if not blocking:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        while True:
+            try:
+                # Gives up with OSError after ten one-second retries
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f, blocking=True):
+        fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def acquire(path, blocking=True):
+    """
+    Take the exclusive lock on the file at `path`, which is created if
+    missing, and return the open file to pass to release(). Without
+    `blocking`, returns None at once if another holds the lock.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, 'a+b')
+    try:
+        _lock(f, blocking)
+    except OSError:
+        f.close()
+        if blocking:
+            raise
+        return None
+    return f
+
+
+def release(f):
+    try:
+        _unlock(f)
+    finally:
+        f.close()
+
+
+@contextmanager
+def file_lock(path):
+    """Hold the exclusive lock on the file at `path`, which is created if missing"""
+    f = acquire(path)
+    try:
+        yield
+    finally:
+        release(f)
+
+
+_process_lock = threading.RLock()
+
+
+def cache_lock(alias):
+    """
+    The lock of the updates of the cache `alias`: a file lock in its
+    directory for a file-based cache, which the worker processes share,
+    else a lock of this process
+    """
+    config = settings.CACHES[alias]
+    if config['BACKEND'].endswith('.FileBasedCache'):
+        return file_lock(Path(config['LOCATION']) / 'updates.lock')
+    return _process_lock
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.archive import ArchiveError, archive_letters, pending
+from myapp.fiscal import current_fiscal_year, fiscal_year_label
+from myapp.routers import ARCHIVE
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the letters of closed fiscal years and their items from the live database into the archive '
+        'database, in batches of ARCHIVE_BATCH_SIZE letters. Archived letters are read-only; the letter API '
+        'lists them with ?include_archived=true.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=int, required=True,
+                            help='BS start year of the oldest fiscal year to keep live, at most the current one '
+                                 '(2082 archives 2081/82 and older)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Letters per batch (default ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the letters that would be archived')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='VACUUM the live database afterwards to return the freed pages to the disk '
+                                 '(locks it for the duration; otherwise new rows reuse them)')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        before = options['before']
+        if before > current_fiscal_year():
+            raise CommandError(f'Fiscal year {fiscal_year_label(before - 1)} has not closed yet')
+        counts = pending(before)
+        if not counts:
+            self.stdout.write(f'No live letters before fiscal year {fiscal_year_label(before)}')
+            return
+        for year, count in counts.items():
+            self.stdout.write(f'  {fiscal_year_label(year)}: {count} letters')
+        if options['dry_run']:
+            return
+
+        # Creates the archive on first use and keeps its tables in step with the models
+        call_command('migrate', database=ARCHIVE, verbosity=0, interactive=False)
+        started = time.perf_counter()
+        try:
+            totals = archive_letters(before, batch_size=options['batch_size'], progress=self.progress)
+        except ArchiveError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {totals['letters']} letters and {totals['items']} items in {totals['batches']} batches "
+            f"({time.perf_counter() - started:.1f} s)"
+        ))
+        if options['vacuum']:
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+            self.stdout.write(f'Vacuumed the live database ({time.perf_counter() - started:.1f} s)')
+
+    def progress(self, letters, items):
+        if self.verbosity > 1:
+            self.stdout.write(f'  moved {letters} letters, {items} items')
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.backups import BackupError, BackupStore
+
+
+class Command(BaseCommand):
+    help = (
+        'Back up the database, and the letter archive once there is one, while the app keeps serving: an online, page-by-page copy (SQLite backup API), '
+        'integrity-checked, gzip-compressed and checksummed into BACKUP_DIR. Older backups are then deleted '
+        'as BACKUP_RETENTION says. Restore one with `manage.py restore_db`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='List the backups instead of taking one')
+        parser.add_argument('--no-prune', action='store_true', help='Keep every older backup')
+        parser.add_argument('--directory', default=None, help='Backup directory (default BACKUP_DIR)')
+
+    def handle(self, *args, **options):
+        store = BackupStore(options['directory'])
+        if options['list']:
+            self.list_backups(store)
+            return
+        try:
+            manifest = store.create(prune=not options['no_prune'])
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Backed up {manifest['source']} to {store.directory / manifest['archive']} in {manifest['duration_ms']:.0f} ms"
+        ))
+        self.stdout.write(
+            f"  {manifest['size'] / 1024 / 1024:.1f} MiB, {manifest['compressed_size'] / 1024 / 1024:.1f} MiB compressed; "
+            f"{manifest['pages']} pages in {manifest['steps']} steps, {manifest['restarts']} restarts\n"
+            f"  sha256 {manifest['sha256']}"
+        )
+        for alias, copy in manifest['databases'].items():
+            self.stdout.write(
+                f"  {alias}: {copy['source']}, {copy['size'] / 1024 / 1024:.1f} MiB, "
+                f"{copy['compressed_size'] / 1024 / 1024:.1f} MiB compressed, sha256 {copy['sha256']}"
+            )
+        for backup_id in manifest.get('pruned', []):
+            self.stdout.write(f'  Deleted {backup_id} (retention policy)')
+
+    def list_backups(self, store):
+        manifests = store.list()
+        if not manifests:
+            self.stdout.write(f'No backups in {store.directory}')
+            return
+        self.stdout.write(f"  {'id':26} {'created':20} {'reason':12} {'size MiB':>9} {'archive MiB':>12}")
+        for manifest in manifests:
+            self.stdout.write(
+                f"  {manifest['id']:26} {manifest['created_at'][:19]:20} {manifest['reason']:12} "
+                f"{manifest['size'] / 1024 / 1024:>9.1f} {manifest['compressed_size'] / 1024 / 1024:>12.1f}"
+            )
@@ -0,0 +1,188 @@
+import os
+import shlex
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import Client, Dataset, DEFAULT_MIX, OPERATIONS, compare, environment, load_results, parse_mix, run_level, summarize, write_results
+
+# Fiscal year the benchmark datasets are pinned to, so a dataset seeded later is identical
+DATASET_FISCAL_YEAR = 2082
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed (or reuse) a benchmark database of the given --scale, start the app against a copy of it '
+        'and replay a weighted mix of API calls at several concurrency levels. Prints p50/p99 latency '
+        'and throughput and writes them as JSON; --compare prints the change against an earlier result file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=200, help='seed_db scale of the dataset (default 200: 3000 letters)')
+        parser.add_argument('--seed', type=int, default=42, help='seed_db and workload seed (default 42)')
+        parser.add_argument('--concurrency', default='1,4,16', help='Comma separated worker counts (default 1,4,16)')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds per concurrency level (default 20)')
+        parser.add_argument('--requests', type=int, default=None, help='Stop a level after this many requests')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of discarded warm-up traffic (default 3)')
+        parser.add_argument('--mix', default=None,
+                            help=f"Operation weights, e.g. 'letter_list=30,dashboard=10'. Operations: {', '.join(OPERATIONS)}")
+        parser.add_argument('--import-rows', type=int, default=20, help='Rows per uploaded import-xlsx file (default 20)')
+        parser.add_argument('--server-cmd', default=None,
+                            help="Command serving the app, with {port} placeholder (default: runserver --noreload)")
+        parser.add_argument('--keep-alive', action='store_true',
+                            help='Reuse connections; only for servers that set TCP_NODELAY (runserver does not)')
+        parser.add_argument('--debug', action='store_true', help='Run the server with DEBUG=True')
+        parser.add_argument('--reseed', action='store_true', help='Rebuild the dataset even if it exists')
+        parser.add_argument('--output', default=None, help='Result file (default var/bench/api-<revision>-<time>.json)')
+        parser.add_argument('--compare', default=None, help='Earlier result file to compare against')
+        parser.add_argument('--timeout', type=float, default=300, help='Per-request timeout in seconds (default 300)')
+
+    def handle(self, *args, **options):
+        bench_dir = Path(settings.BASE_DIR) / 'var' / 'bench'
+        bench_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+            mix = parse_mix(options['mix']) if options['mix'] else dict(DEFAULT_MIX)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        dataset_path = self.dataset(bench_dir, options['scale'], options['seed'], options['reseed'])
+        run_path = bench_dir / 'run.sqlite3'
+        shutil.copyfile(dataset_path, run_path)
+        dataset = Dataset(run_path)
+        self.stdout.write(f"Dataset: {dataset_path.name} ({len(dataset.letter_ids)} letters)")
+
+        port = _free_port()
+        server = self.start_server(run_path, port, options['server_cmd'], options['debug'], bench_dir / 'server.log')
+        runs = {}
+        try:
+            client = Client('127.0.0.1', port, timeout=options['timeout'])
+            token = client.login('admin@example.com', 'admin123')
+            client.close()
+
+            if options['warmup'] > 0:
+                run_level('127.0.0.1', port, token, dataset, 1, options['warmup'], seed=options['seed'] + 1,
+                          mix=mix, import_rows=options['import_rows'], timeout=options['timeout'], keep_alive=options['keep_alive'])
+
+            for level in levels:
+                samples, wall = run_level(
+                    '127.0.0.1', port, token, dataset, level, options['duration'], options['requests'],
+                    seed=options['seed'], mix=mix, import_rows=options['import_rows'], timeout=options['timeout'],
+                    keep_alive=options['keep_alive'],
+                )
+                runs[str(level)] = summarize(samples, wall)
+                self.report(level, runs[str(level)])
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+        results = {
+            'suite': 'api',
+            'environment': environment(settings.BASE_DIR),
+            'config': {
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'letters': len(dataset.letter_ids),
+                'duration_s': options['duration'],
+                'requests': options['requests'],
+                'mix': mix,
+                'import_rows': options['import_rows'],
+                'server_cmd': options['server_cmd'] or 'runserver --noreload',
+                'keep_alive': options['keep_alive'],
+                'debug': options['debug'],
+            },
+            'runs': runs,
+        }
+        revision = results['environment']['git_revision'] or 'unknown'
+        output = Path(options['output'] or bench_dir / f"api-{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        write_results(results, output)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+
+        if options['compare']:
+            self.print_comparison(load_results(options['compare']), results)
+
+    def dataset(self, bench_dir, scale, seed, reseed):
+        """Path of the seeded dataset, built once per (scale, seed) and reused by later runs"""
+        path = bench_dir / f"dataset-s{scale:g}-seed{seed}.sqlite3"
+        if path.exists() and not reseed:
+            return path
+        building = path.with_suffix('.building')
+        building.unlink(missing_ok=True)
+        env = dict(os.environ, DATABASE_PATH=str(building))
+        manage = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')]
+        self.stdout.write(f"Seeding {path.name}, this runs once per scale and seed...")
+        for command in (
+            ['migrate', '--noinput', '-v', '0'],
+            ['seed_db', '--scale', f'{scale:g}', '--seed', str(seed), '--last-fiscal-year', str(DATASET_FISCAL_YEAR)],
+        ):
+            result = subprocess.run(manage + command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+            if result.returncode != 0 or 'Error during seeding' in result.stderr:
+                raise CommandError(f"{' '.join(command[:1])} failed:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+        # import-xlsx is limited to staff users; the seeded admin gets staff rights in benchmark datasets only
+        db = sqlite3.connect(building)
+        with db:
+            db.execute("UPDATE myapp_user SET is_staff = 1 WHERE email = 'admin@example.com'")
+        db.close()
+        os.replace(building, path)
+        return path
+
+    def start_server(self, database, port, server_cmd, debug, log_path, env=None):
+        env = dict(os.environ, **(env or {}), DATABASE_PATH=str(database), DJANGO_DEBUG='True' if debug else 'False')
+        if server_cmd:
+            command = shlex.split(server_cmd.format(port=port))
+        else:
+            command = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'runserver', '--noreload', f'127.0.0.1:{port}']
+        log = open(log_path, 'w')
+        server = subprocess.Popen(command, env=env, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}, see {log_path}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError(f"Server did not accept connections within 60s, see {log_path}")
+
+    def report(self, level, summary):
+        self.stdout.write(self.style.SUCCESS(
+            f"\nconcurrency {level}: {summary['requests']} requests, {summary['throughput_rps']} req/s, "
+            f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms, {summary['errors']} errors"
+        ))
+        self.stdout.write(f"  {'operation':22} {'requests':>8} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for op, stats in summary['operations'].items():
+            self.stdout.write(
+                f"  {op:22} {stats['requests']:>8} {stats['throughput_rps']:>8} "
+                f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>7}"
+            )
+
+    def print_comparison(self, baseline, current):
+        revision = baseline.get('environment', {}).get('git_revision')
+        self.stdout.write(f"\nChange against {revision or 'baseline'}:")
+        self.stdout.write(f"  {'concurrency':>11} {'operation':22} {'metric':15} {'before':>10} {'after':>10} {'change':>8}")
+        for level, op, metric, before, after, change in compare(baseline, current):
+            change_text = f"{change:+.1f}%" if change is not None else 'n/a'
+            # Lower latency and higher throughput are improvements
+            worse = change is not None and (change > 10 if metric.endswith('_ms') else change < -10)
+            line = f"  {level:>11} {op:22} {metric:15} {before:>10} {after:>10} {change_text:>8}"
+            self.stdout.write(self.style.ERROR(line) if worse else line)
@@ -0,0 +1,141 @@
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from myapp.benchmarks import Client, Dataset, OPERATIONS, READ_MIX, compare, environment, parse_mix, run_level, summarize, write_results
+
+from .benchmark_api import Command as BenchmarkAPICommand, _free_port
+
+WSGI_SERVER = 'gunicorn NEAProjectBE.wsgi:application --bind 127.0.0.1:{port} --workers {workers} --worker-class gthread --threads {threads}'
+ASGI_SERVER = 'uvicorn NEAProjectBE.asgi:application --host 127.0.0.1 --port {port} --workers {workers} --no-access-log'
+INTERFACES = ('wsgi', 'asgi')
+
+
+class Command(BenchmarkAPICommand):
+    help = (
+        'Replay the read-only mix of the endpoints with async views against the WSGI application '
+        '(sync views) and the ASGI application (async views), each pinned to 1 and then 4 cores with '
+        'one worker per core, at several concurrency levels. Prints throughput and p50/p99 latency '
+        'side by side and writes them as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=200, help='seed_db scale of the dataset (default 200: 3000 letters)')
+        parser.add_argument('--seed', type=int, default=42, help='seed_db and workload seed (default 42)')
+        parser.add_argument('--cores', default='1,4', help='Comma separated core counts to pin the servers to (default 1,4)')
+        parser.add_argument('--concurrency', default='8,32,128', help='Comma separated client counts (default 8,32,128)')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds per concurrency level (default 15)')
+        parser.add_argument('--requests', type=int, default=None, help='Stop a level after this many requests')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of discarded warm-up traffic (default 3)')
+        parser.add_argument('--mix', default=None,
+                            help=f"Operation weights (default {','.join(f'{op}={w}' for op, w in READ_MIX.items())}). "
+                                 f"Operations: {', '.join(OPERATIONS)}")
+        parser.add_argument('--threads', type=int, default=8, help='Threads per WSGI worker (default 8)')
+        parser.add_argument('--wsgi-cmd', default=WSGI_SERVER,
+                            help='Command serving the WSGI application, with {port}, {workers} and {threads} placeholders')
+        parser.add_argument('--asgi-cmd', default=ASGI_SERVER,
+                            help='Command serving the ASGI application, with {port} and {workers} placeholders')
+        parser.add_argument('--keep-alive', action='store_true', help='Reuse connections')
+        parser.add_argument('--debug', action='store_true', help='Run the servers with DEBUG=True')
+        parser.add_argument('--reseed', action='store_true', help='Rebuild the dataset even if it exists')
+        parser.add_argument('--output', default=None, help='Result file (default var/bench/asgi-<revision>-<time>.json)')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds (default 60)')
+
+    def handle(self, *args, **options):
+        bench_dir = Path(settings.BASE_DIR) / 'var' / 'bench'
+        bench_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            cores = [int(value) for value in options['cores'].split(',') if value.strip()]
+            levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+            mix = parse_mix(options['mix']) if options['mix'] else dict(READ_MIX)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if shutil.which('taskset') is None:
+            raise CommandError('taskset (util-linux) is needed to pin the servers to a number of cores')
+        available = len(self.cpus())
+        if max(cores) > available:
+            self.stderr.write(f"Only {available} cores available: skipping {', '.join(str(n) for n in cores if n > available)}")
+            cores = [n for n in cores if n <= available]
+
+        dataset_path = self.dataset(bench_dir, options['scale'], options['seed'], options['reseed'])
+        runs = {interface: {} for interface in INTERFACES}
+        for count in cores:
+            for interface in INTERFACES:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{interface.upper()} on {count} core{'s' if count > 1 else ''}"))
+                for level, summary in self.run_server(interface, count, dataset_path, bench_dir, levels, mix, options):
+                    runs[interface][f'{count}c/{level}'] = summary
+                    self.report(level, summary)
+
+        results = {
+            'suite': 'asgi',
+            'environment': environment(settings.BASE_DIR),
+            'config': {
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'cores': cores,
+                'duration_s': options['duration'],
+                'requests': options['requests'],
+                'mix': mix,
+                'threads': options['threads'],
+                'wsgi_cmd': options['wsgi_cmd'],
+                'asgi_cmd': options['asgi_cmd'],
+                'keep_alive': options['keep_alive'],
+                'debug': options['debug'],
+            },
+            'runs': runs,
+        }
+        revision = results['environment']['git_revision'] or 'unknown'
+        output = Path(options['output'] or bench_dir / f"asgi-{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        write_results(results, output)
+        self.print_interfaces(runs)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+
+    @staticmethod
+    def cpus():
+        """The CPUs this process may run on, which the servers are pinned to"""
+        return sorted(os.sched_getaffinity(0))
+
+    def run_server(self, interface, cores, dataset_path, bench_dir, levels, mix, options):
+        """Serve `interface` from a fresh copy of the dataset, pinned to `cores` CPUs, and yield (level, summary)"""
+        run_path = bench_dir / 'run.sqlite3'
+        shutil.copyfile(dataset_path, run_path)
+        dataset = Dataset(run_path)
+        template = options['wsgi_cmd'] if interface == 'wsgi' else options['asgi_cmd']
+        pinned = ','.join(str(cpu) for cpu in self.cpus()[:cores])
+        command = f"taskset -c {pinned} " + template.format(port='{port}', workers=cores, threads=options['threads'])
+
+        port = _free_port()
+        server = self.start_server(run_path, port, command, options['debug'], bench_dir / f'server-{interface}.log')
+        try:
+            client = Client('127.0.0.1', port, timeout=options['timeout'])
+            token = client.login('admin@example.com', 'admin123')
+            client.close()
+            run = dict(mix=mix, timeout=options['timeout'], keep_alive=options['keep_alive'])
+            if options['warmup'] > 0:
+                run_level('127.0.0.1', port, token, dataset, max(levels), options['warmup'], seed=options['seed'] + 1, **run)
+            for level in levels:
+                samples, wall = run_level('127.0.0.1', port, token, dataset, level, options['duration'], options['requests'],
+                                          seed=options['seed'], **run)
+                yield level, summarize(samples, wall)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def print_interfaces(self, runs):
+        self.stdout.write("\nASGI (async views) against WSGI (sync views):")
+        self.stdout.write(f"  {'cores/clients':>13} {'operation':16} {'metric':15} {'wsgi':>10} {'asgi':>10} {'change':>8}")
+        for scenario, op, metric, before, after, change in compare({'runs': runs['wsgi']}, {'runs': runs['asgi']}):
+            if op != 'ALL' and metric != 'p99_ms':
+                continue
+            change_text = f"{change:+.1f}%" if change is not None else 'n/a'
+            worse = change is not None and (change > 10 if metric.endswith('_ms') else change < -10)
+            line = f"  {scenario:>13} {op:16} {metric:15} {before:>10} {after:>10} {change_text:>8}"
+            self.stdout.write(self.style.ERROR(line) if worse else line)
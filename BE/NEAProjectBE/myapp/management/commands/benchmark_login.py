@@ -0,0 +1,133 @@
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from myapp.benchmarks import LEGITIMATE_USERS, Client, environment, load_results, run_attack, status_counts, summarize, write_results
+
+from .benchmark_api import Command as BenchmarkAPICommand, _free_port
+
+SERVER = '{python} manage.py serve --bind 127.0.0.1:{{port}} --interface wsgi --workers {workers} --threads {threads}'
+# name: (attackers?, throttles on?)
+SCENARIOS = {
+    'quiet': (False, True),
+    'attack': (True, True),
+    'attack-unthrottled': (True, False),
+}
+
+
+class Command(BenchmarkAPICommand):
+    help = (
+        'Log the seeded users in every few seconds, alone and next to a host guessing passwords, '
+        'against `manage.py serve` with the login throttles on and then off. Each client connects from '
+        'its own loopback address. Prints the legitimate logins\' latency and what the attack got '
+        'through, and writes them as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=10, help='seed_db scale of the dataset (default 10)')
+        parser.add_argument('--seed', type=int, default=42, help='seed_db seed (default 42)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds per scenario (default 30)')
+        parser.add_argument('--attackers', type=int, default=8, help='Concurrent password-guessing connections (default 8)')
+        parser.add_argument('--attacker-addresses', type=int, default=1,
+                            help='Hosts the attacking connections come from (default 1)')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between one user\'s logins (default 10)')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes (default 2)')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per worker (default 4)')
+        parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                            help='Run only this scenario (repeatable; default all)')
+        parser.add_argument('--reseed', action='store_true', help='Rebuild the dataset even if it exists')
+        parser.add_argument('--output', default=None, help='Result file (default var/bench/login-<revision>-<time>.json)')
+        parser.add_argument('--compare', default=None, help='Earlier result file to compare against')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds (default 60)')
+
+    def handle(self, *args, **options):
+        bench_dir = Path(settings.BASE_DIR) / 'var' / 'bench'
+        bench_dir.mkdir(parents=True, exist_ok=True)
+        dataset_path = self.dataset(bench_dir, options['scale'], options['seed'], options['reseed'])
+        server_cmd = SERVER.format(python=shlex.quote(sys.executable), workers=options['workers'], threads=options['threads'])
+
+        runs = {}
+        for name in options['scenario'] or SCENARIOS:
+            attack, throttled = SCENARIOS[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            runs[name] = self.run_scenario(name, attack, throttled, dataset_path, bench_dir, server_cmd, options)
+            self.report_scenario(runs[name])
+
+        results = {
+            'suite': 'login',
+            'environment': environment(settings.BASE_DIR),
+            'config': {
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'duration_s': options['duration'],
+                'attackers': options['attackers'],
+                'attacker_addresses': options['attacker_addresses'],
+                'interval_s': options['interval'],
+                'workers': options['workers'],
+                'threads': options['threads'],
+                'rates': settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}),
+            },
+            'runs': runs,
+        }
+        revision = results['environment']['git_revision'] or 'unknown'
+        output = Path(options['output'] or bench_dir / f"login-{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        write_results(results, output)
+        self.print_logins(runs)
+        if options['compare']:
+            self.print_comparison(load_results(options['compare']), results)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+
+    def run_scenario(self, name, attack, throttled, dataset_path, bench_dir, server_cmd, options):
+        run_path = bench_dir / 'run.sqlite3'
+        shutil.copyfile(dataset_path, run_path)
+        throttle_dir = bench_dir / 'throttle'
+        shutil.rmtree(throttle_dir, ignore_errors=True)
+        env = {
+            'AUTH_THROTTLE': 'True' if throttled else 'False',
+            'THROTTLE_CACHE_DIR': str(throttle_dir),
+            'SERVE_PIDFILE': str(bench_dir / 'serve-login.pid'),
+        }
+        port = _free_port()
+        server = self.start_server(run_path, port, server_cmd, False, bench_dir / f'server-login-{name}.log', env=env)
+        try:
+            # One login per user first: the workers' first hash is not part of the run
+            for email, password in LEGITIMATE_USERS:
+                Client('127.0.0.1', port, timeout=options['timeout']).login(email, password)
+            samples, wall = run_attack('127.0.0.1', port, options['duration'], options['attackers'] if attack else 0,
+                                       options['interval'], options['attacker_addresses'], timeout=options['timeout'])
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        summary = summarize(samples, wall)
+        for op, stats in summary['operations'].items():
+            stats['statuses'] = status_counts(samples, op)
+        return summary
+
+    def report_scenario(self, summary):
+        for op, stats in summary['operations'].items():
+            statuses = ', '.join(f'{status}: {count}' for status, count in stats['statuses'].items())
+            self.stdout.write(
+                f"  {op:8} {stats['requests']:>7} requests {stats['throughput_rps']:>8} req/s "
+                f"p50 {stats['p50_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  ({statuses})"
+            )
+
+    def print_logins(self, runs):
+        self.stdout.write("\nLegitimate logins:")
+        self.stdout.write(f"  {'scenario':20} {'logins':>7} {'failed':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'attack req/s':>13}")
+        for name, summary in runs.items():
+            login = summary['operations'].get('login')
+            if login is None:
+                continue
+            attack = summary['operations'].get('attack', {})
+            failed = login['requests'] - login['statuses'].get('200', 0)
+            line = (f"  {name:20} {login['requests']:>7} {failed:>7} {login['p50_ms']:>9.1f} "
+                    f"{login['p99_ms']:>9.1f} {login['max_ms']:>9.1f} {attack.get('throughput_rps', 0):>13}")
+            self.stdout.write(self.style.ERROR(line) if failed else line)
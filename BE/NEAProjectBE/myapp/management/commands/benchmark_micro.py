@@ -0,0 +1,81 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import compare, environment, load_results, write_results
+from myapp.benchmarks.micro import BENCHMARKS, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the letter serializer and the export conversion helpers in-process (no server, no '
+        'database) and write the per-call medians as JSON. With --compare, benchmarks that got '
+        'slower than --threshold percent are flagged and --fail-on-regression exits non-zero.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Only run benchmarks whose name contains one of these: {', '.join(BENCHMARKS)}")
+        parser.add_argument('--min-time', type=float, default=0.05, help='Minimum seconds per sample (default 0.05)')
+        parser.add_argument('--repeat', type=int, default=7, help='Samples per benchmark (default 7)')
+        parser.add_argument('--output', default=None, help='Result file (default var/bench/micro-<revision>-<time>.json)')
+        parser.add_argument('--compare', default=None, help='Earlier result file to compare against')
+        parser.add_argument('--threshold', type=float, default=10.0, help='Slowdown in percent that is flagged (default 10)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a slowdown is flagged')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'benchmark':28} {'median':>12} {'min':>12} {'spread':>8} {'loops':>8}")
+
+        def progress(name, stats):
+            self.stdout.write(
+                f"{name:28} {_format_us(stats['median_us']):>12} {_format_us(stats['min_us']):>12} "
+                f"{stats['spread_pct']:>7.1f}% {stats['loops']:>8}"
+            )
+
+        runs = run_benchmarks(options['names'], options['min_time'], options['repeat'], progress)
+        if not runs:
+            raise CommandError(f"No benchmark matches {' '.join(options['names'])}")
+
+        results = {
+            'suite': 'micro',
+            'environment': environment(settings.BASE_DIR),
+            'config': {'min_time_s': options['min_time'], 'repeat': options['repeat']},
+            'runs': runs,
+        }
+        revision = results['environment']['git_revision'] or 'unknown'
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'var' / 'bench' / f"micro-{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        write_results(results, output)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+
+        if options['compare']:
+            regressions = self.print_comparison(load_results(options['compare']), results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} benchmark(s) slower by more than {options['threshold']:g}%: {', '.join(regressions)}")
+
+    def print_comparison(self, baseline, current, threshold):
+        """Print median/min changes; a benchmark regressed when both got slower than `threshold`"""
+        changes = {}
+        for name, _, metric, before, after, change in compare(baseline, current, metrics=('median_us', 'min_us')):
+            changes.setdefault(name, {})[metric] = (before, after, change)
+
+        revision = baseline.get('environment', {}).get('git_revision')
+        self.stdout.write(f"\nChange against {revision or 'baseline'}:")
+        regressions = []
+        for name, metrics in changes.items():
+            before, after, change = metrics['median_us']
+            min_change = metrics.get('min_us', (None, None, change))[2]
+            regressed = change is not None and min_change is not None and change > threshold and min_change > threshold
+            line = f"  {name:28} {_format_us(before):>12} -> {_format_us(after):>12} {change:+7.1f}%"
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line + '  SLOWER'))
+            else:
+                self.stdout.write(line)
+        return regressions
+
+
+def _format_us(value):
+    if value >= 1000:
+        return f"{value / 1000:.3f} ms"
+    return f"{value:.3f} us"
@@ -0,0 +1,88 @@
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import compare, environment, load_results, write_results
+from myapp.benchmarks.startup import FIRST_REQUESTS, cold_start
+
+METRICS = ('ready_ms', 'interpreter_ms', 'setup_ms', 'application_ms', 'first_requests_ms', 'warm_request_ms', 'rss_kib', 'module_count')
+COMPARED = ('ready_ms', 'setup_ms', 'first_requests_ms', 'import_ms', 'rss_kib', 'module_count')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the cold start of a worker: fresh interpreters that set Django up, load the WSGI '
+        'application and answer their first requests. Prints the medians, the slowest imports of '
+        'one run under `python -X importtime` and the heavy modules loaded that should load lazily, '
+        'and writes them as JSON. With --compare, metrics that grew by more than --threshold '
+        'percent are flagged and --fail-on-regression exits non-zero.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=7, help='Cold starts to take the medians of (default 7)')
+        parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list (default 15)')
+        parser.add_argument('--path', action='append', dest='paths', default=None,
+                            help=f"First request paths (repeatable, default {' '.join(FIRST_REQUESTS)})")
+        parser.add_argument('--output', default=None, help='Result file (default var/bench/startup-<revision>-<time>.json)')
+        parser.add_argument('--compare', default=None, help='Earlier result file to compare against')
+        parser.add_argument('--threshold', type=float, default=10.0, help='Growth in percent that is flagged (default 10)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a metric is flagged')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        paths = options['paths'] or FIRST_REQUESTS
+        try:
+            runs = [cold_start(settings.BASE_DIR, paths) for _ in range(options['repeat'])]
+            traced = cold_start(settings.BASE_DIR, paths, importtime=True)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        summary = {metric: round(statistics.median(run[metric] for run in runs), 1) for metric in METRICS}
+        summary['import_ms'] = traced['import_ms']
+        summary['statuses'] = traced['statuses']
+        summary['lazy_modules_loaded'] = traced['lazy_modules_loaded']
+        slowest = sorted(((cumulative, module) for module, (_, cumulative, depth) in traced['imports'].items() if depth == 0),
+                         reverse=True)[:options['top']]
+        summary['slowest_imports_ms'] = {module: round(cumulative / 1000, 1) for cumulative, module in slowest}
+
+        self.stdout.write(f"Cold start to the end of the first requests ({', '.join(paths)}), median of {len(runs)}:")
+        for metric in (*METRICS, 'import_ms'):
+            self.stdout.write(f"  {metric:18} {summary[metric]:>10}")
+        self.stdout.write('\nSlowest top-level imports (-X importtime, cumulative):')
+        for module, ms in summary['slowest_imports_ms'].items():
+            self.stdout.write(f"  {module:50} {ms:>8.1f} ms")
+        if summary['lazy_modules_loaded']:
+            self.stdout.write(self.style.ERROR(f"\nLoaded at startup: {', '.join(summary['lazy_modules_loaded'])}"))
+
+        results = {
+            'suite': 'startup',
+            'environment': environment(settings.BASE_DIR),
+            'config': {'repeat': options['repeat'], 'paths': list(paths)},
+            'runs': {'cold_start': summary},
+        }
+        revision = results['environment']['git_revision'] or 'unknown'
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'var' / 'bench' / f"startup-{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+        write_results(results, output)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+
+        if options['compare']:
+            regressions = self.print_comparison(load_results(options['compare']), results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} metric(s) grew by more than {options['threshold']:g}%: {', '.join(regressions)}")
+
+    def print_comparison(self, baseline, current, threshold):
+        revision = baseline.get('environment', {}).get('git_revision')
+        self.stdout.write(f"\nChange against {revision or 'baseline'}:")
+        regressions = []
+        for _, _, metric, before, after, change in compare(baseline, current, metrics=COMPARED):
+            line = f"  {metric:18} {before:>10} -> {after:>10} {change:+7.1f}%" if change is not None else f"  {metric:18} {before:>10} -> {after:>10}"
+            if change is not None and change > threshold:
+                regressions.append(metric)
+                self.stdout.write(self.style.ERROR(line + '  WORSE'))
+            else:
+                self.stdout.write(line)
+        return regressions
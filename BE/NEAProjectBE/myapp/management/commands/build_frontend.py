@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.frontend import brotli, precompress
+
+# What a build is made from, relative to FRONTEND_DIR
+SOURCES = ('src', 'public', 'index.html', 'package.json', 'package-lock.json', 'vite.config.ts', 'tsconfig.app.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the frontend for production into FRONTEND_BUILD_DIR with Vite (content-hashed assets) '
+        'and write gzip and brotli copies of its text files, for Django to serve without a Node process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-stale', action='store_true',
+                            help='Do nothing when the build is newer than every source file')
+        parser.add_argument('--skip-npm', action='store_true',
+                            help='Only precompress an existing build (from `npm run build`)')
+
+    def handle(self, *args, **options):
+        source = Path(settings.FRONTEND_DIR)
+        build = Path(settings.FRONTEND_BUILD_DIR)
+        if options['if_stale'] and not self.stale(source, build):
+            self.stdout.write(f'The frontend build in {build} is up to date')
+            return
+
+        if not options['skip_npm']:
+            self.run_vite(source, build)
+        if not (build / 'index.html').exists():
+            raise CommandError(f'No frontend build in {build}')
+
+        sizes = precompress(build)
+        original = sum(size for size, _ in sizes.values())
+        self.stdout.write(self.style.SUCCESS(f'Precompressed {len(sizes)} files of {build} ({original / 1024:.0f} KiB):'))
+        for coding in ('br', 'gzip'):
+            total = sum(compressed.get(coding, size) for size, compressed in sizes.values())
+            if any(coding in compressed for _, compressed in sizes.values()):
+                self.stdout.write(f'  {coding:5} {total / 1024:.0f} KiB')
+        if brotli is None:
+            self.stderr.write('brotli is not installed: gzip copies only (pip install -r requirements.txt)')
+
+    def run_vite(self, source, build):
+        npm = shutil.which('npm')
+        if npm is None:
+            raise CommandError('npm is needed to build the frontend; it is not needed to serve the build')
+        if not (source / 'node_modules').exists():
+            raise CommandError(f'Run `npm install --legacy-peer-deps` in {source} first')
+        # The API is served from the same origin as the build
+        env = dict(os.environ, VITE_API_URL='')
+        try:
+            subprocess.run([npm, 'run', 'build', '--', '--outDir', str(build), '--emptyOutDir'], cwd=source, env=env, check=True)
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f'The frontend build failed (exit status {e.returncode})')
+
+    @staticmethod
+    def stale(source, build):
+        """Whether a source file changed after the last build"""
+        try:
+            built = (build / 'index.html').stat().st_mtime
+        except OSError:
+            return True
+        for name in SOURCES:
+            path = source / name
+            paths = path.rglob('*') if path.is_dir() else [path]
+            if any(p.exists() and p.stat().st_mtime > built for p in paths):
+                return True
+        return False
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myapp import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema (YAML and JSON) and the Swagger UI and Redoc pages into '
+        'SCHEMA_CACHE_DIR, with ETags and gzip/brotli copies, for the schema and docs endpoints to '
+        'serve from memory. Run it on deploy; workers also regenerate the files when the code changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-stale', action='store_true',
+                            help='Do nothing when the files were generated from the current code')
+
+    def handle(self, *args, **options):
+        stamp = openapi.fingerprint()
+        if options['if_stale'] and openapi.load(stamp=stamp) is not None:
+            self.stdout.write(f'The schema in {settings.SCHEMA_CACHE_DIR} is up to date')
+            return
+        started = time.perf_counter()
+        documents = openapi.build(stamp=stamp)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f'Generated the schema into {settings.SCHEMA_CACHE_DIR} in {elapsed:.0f} ms:'))
+        for name, document in documents.items():
+            sizes = ', '.join(f'{coding or "identity"} {len(body) / 1024:.1f} KiB'
+                              for coding, (body, _) in document.representations.items())
+            self.stdout.write(f'  {name:14} {sizes}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from myapp.middleware.metrics import get_store, quantile
+
+
+class Command(BaseCommand):
+    help = 'Print per-route request rate, latency percentiles and error rate from the local metrics store'
+
+    def handle(self, *args, **options):
+        _, histograms = get_store().collect()
+        routes = {}
+        for (name, labels), histogram in histograms.items():
+            if name != 'http_request_duration_seconds':
+                continue
+            labels = dict(labels)
+            route = routes.setdefault(labels['route'], {'buckets': None, 'sum': 0.0, 'count': 0, 'errors': 0})
+            if route['buckets'] is None:
+                route['buckets'] = list(histogram['buckets'])
+            else:
+                route['buckets'] = [a + b for a, b in zip(route['buckets'], histogram['buckets'])]
+            route['sum'] += histogram['sum']
+            route['count'] += histogram['count']
+            if labels['status'].startswith('5'):
+                route['errors'] += histogram['count']
+
+        if not routes:
+            self.stdout.write(self.style.WARNING('No requests recorded yet'))
+            return
+
+        self.stdout.write(f"{'route':40} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'5xx %':>7}")
+        for name, route in sorted(routes.items(), key=lambda item: -item[1]['count']):
+            self.stdout.write(
+                f"{name:40} {route['count']:>9} "
+                f"{quantile(route, 0.5) * 1000:>9.1f} {quantile(route, 0.99) * 1000:>9.1f} "
+                f"{route['sum'] / route['count'] * 1000:>9.1f} "
+                f"{100 * route['errors'] / route['count']:>7.2f}"
+            )
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from myapp.models import Change
+
+
+class Command(BaseCommand):
+    help = 'Delete change log entries older than the retention period; the newest entry is always kept'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CHANGE_LOG_RETENTION_DAYS', 90),
+                            help='Keep entries from the last DAYS days (default CHANGE_LOG_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        latest = Change.objects.order_by('-id').values_list('id', flat=True).first()
+        if latest is None:
+            self.stdout.write('The change log is empty')
+            return
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # The newest entry stays, so a pruned cursor is always told apart from a current one
+        deleted, _ = Change.objects.filter(created_at__lt=cutoff, id__lt=latest).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change log entries older than {cutoff:%Y-%m-%d %H:%M}'))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+from myapp.backups import BackupError, BackupStore, database_files
+from myapp.versions import TRACKED, bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Replace the content of the database, and of the letter archive, with a backup taken by '
+        '`manage.py backup_db`, after checking its checksums and integrity. The current content is backed up first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', help="Backup id, 'latest', or the path of a .sqlite3.gz archive")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+        parser.add_argument('--no-safety-backup', action='store_true',
+                            help='Do not back up the current content first')
+        parser.add_argument('--directory', default=None, help='Backup directory (default BACKUP_DIR)')
+
+    def handle(self, *args, **options):
+        store = BackupStore(options['directory'])
+        try:
+            targets = database_files(existing=False)
+            archive, manifest = store.resolve(options['backup'])
+        except BackupError as e:
+            raise CommandError(str(e))
+        described = f"backup {manifest['id']} of {manifest['created_at'][:19]}" if manifest else str(archive)
+        if manifest is None:
+            self.stderr.write(f'{archive} has no manifest: only its integrity can be checked')
+
+        files = ', '.join(str(target) for target in targets.values())
+        if options['interactive']:
+            answer = input(
+                f"This replaces everything in {files} with {described}.\n"
+                "Type 'yes' to continue, or 'no' to cancel: "
+            )
+            if answer != 'yes':
+                raise CommandError('Restore cancelled.')
+
+        for alias in targets:
+            connections[alias].close()
+        try:
+            if not options['no_safety_backup']:
+                existing = {alias: target for alias, target in targets.items() if target.is_file()}
+                safety = store.create(existing, reason='pre-restore', prune=False)
+                self.stdout.write(f"Backed up the current content as {safety['id']}")
+            store.restore(archive if manifest is None else manifest['id'], targets)
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Restored {files} from {described}'))
+        # Results cached under the old versions, such as list facets, are not served again
+        for model in TRACKED:
+            bump_version(model)
+
+        for alias, target in targets.items():
+            if not target.is_file():
+                continue
+            executor = MigrationExecutor(connections[alias])
+            pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+            if pending:
+                self.stdout.write(self.style.WARNING(
+                    f'The backup of {target} predates {len(pending)} migrations of this code: '
+                    f'run `manage.py migrate --database {alias}`'
+                ))
+        self.stdout.write('Reload the server (`manage.py serve --reload`) so its workers drop what they cached')
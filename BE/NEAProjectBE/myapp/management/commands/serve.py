@@ -0,0 +1,98 @@
+import os
+import signal
+import sys
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# interface -> (application, gunicorn worker class, module it needs)
+INTERFACES = {
+    'asgi': ('NEAProjectBE.asgi:application', 'uvicorn.workers.UvicornWorker', 'uvicorn'),
+    # gthread, serving the connections it accepted before it stops (myapp/workers.py)
+    'wsgi': ('NEAProjectBE.wsgi:application', 'myapp.workers.ThreadWorker', None),
+}
+
+
+def cpu_count():
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the app with gunicorn: a pre-forked worker per CPU, each warmed up before it accepts '
+        'connections, with DEBUG off unless DJANGO_DEBUG is set. Defaults come from the SERVE_* settings. '
+        'Send SIGHUP (or run `serve --reload`) to replace the workers gracefully with freshly loaded code.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=None, help='host:port to listen on (default SERVE_BIND)')
+        parser.add_argument('--interface', choices=INTERFACES, default=None,
+                            help='wsgi: threaded sync workers; asgi: async views and /api/events/ through '
+                                 'uvicorn workers (default SERVE_INTERFACE)')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default SERVE_WORKERS, or one per CPU)')
+        parser.add_argument('--threads', type=int, default=None, help='Threads per wsgi worker (default SERVE_THREADS)')
+        parser.add_argument('--debug', action='store_true', help='Keep DEBUG as configured instead of turning it off')
+        parser.add_argument('--reload', action='store_true', help='Gracefully reload the running server and exit')
+
+    def handle(self, *args, **options):
+        if options['reload']:
+            return self.reload()
+
+        interface = options['interface'] or settings.SERVE_INTERFACE
+        if interface not in INTERFACES:
+            raise CommandError(f"SERVE_INTERFACE must be one of {', '.join(INTERFACES)}, not {interface!r}")
+        for module in ('gunicorn', INTERFACES[interface][2]):
+            if module and find_spec(module) is None:
+                raise CommandError(f"serve needs {module} (pip install -r requirements.txt); "
+                                   "gunicorn does not run on Windows, use runserver there")
+
+        argv = self.gunicorn_argv(interface, options)
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'NEAProjectBE.settings')
+        if not options['debug']:
+            # DEBUG keeps every query of a request in connection.queries and serves debug pages
+            env.setdefault('DJANGO_DEBUG', 'False')
+        Path(settings.SERVE_PIDFILE).parent.mkdir(parents=True, exist_ok=True)
+        self.stdout.write(f"Serving {interface} on {argv[argv.index('--bind') + 1]} "
+                          f"with {argv[argv.index('--workers') + 1]} workers, DEBUG={env.get('DJANGO_DEBUG', 'True')}")
+        self.stdout.flush()
+        os.execve(sys.executable, argv, env)
+
+    def gunicorn_argv(self, interface, options):
+        """The gunicorn command line serving `interface`"""
+        application, worker_class, _ = INTERFACES[interface]
+        workers = options.get('workers') or settings.SERVE_WORKERS or cpu_count()
+        max_requests = settings.SERVE_MAX_REQUESTS
+        argv = [
+            sys.executable, '-m', 'gunicorn', application,
+            '--config', str(Path(settings.BASE_DIR) / 'NEAProjectBE' / 'gunicorn.conf.py'),
+            '--chdir', str(settings.BASE_DIR),
+            '--bind', options.get('bind') or settings.SERVE_BIND,
+            '--workers', str(workers),
+            '--worker-class', worker_class,
+            '--timeout', str(settings.SERVE_TIMEOUT),
+            '--graceful-timeout', str(settings.SERVE_GRACEFUL_TIMEOUT),
+            '--pid', str(settings.SERVE_PIDFILE),
+            '--name', 'neaproject',
+        ]
+        if max_requests:
+            # Jitter keeps the workers from restarting all at once
+            argv += ['--max-requests', str(max_requests), '--max-requests-jitter', str(max_requests // 10)]
+        if interface == 'wsgi':
+            argv += ['--threads', str(options.get('threads') or settings.SERVE_THREADS)]
+        return argv
+
+    def reload(self):
+        pidfile = Path(settings.SERVE_PIDFILE)
+        try:
+            pid = int(pidfile.read_text().strip())
+            os.kill(pid, signal.SIGHUP)
+        except (OSError, ValueError):
+            raise CommandError(f"No server is running (pid file {pidfile})")
+        self.stdout.write(self.style.SUCCESS(f"Reloading server {pid}: new workers start, the old ones finish their requests"))
@@ -0,0 +1,33 @@
+from .timing import ServerTimingMiddleware, RequestTimings, current_timings, phase
+from .nplusone import (
+    NPlusOneDetectorMiddleware,
+    NPlusOneError,
+    QueryFingerprints,
+    detect_n_plus_one,
+    fingerprint,
+)
+from .profiler import RequestProfilerMiddleware, ReportStore
+from .metrics import MetricsMiddleware, MetricsStore
+from .slow_queries import SlowQueryLogMiddleware, SlowQueryLog
+from .compression import CompressionMiddleware, CompressedCache, accepted_encoding
+
+__all__ = [
+    'ServerTimingMiddleware',
+    'RequestTimings',
+    'current_timings',
+    'phase',
+    'NPlusOneDetectorMiddleware',
+    'NPlusOneError',
+    'QueryFingerprints',
+    'detect_n_plus_one',
+    'fingerprint',
+    'RequestProfilerMiddleware',
+    'ReportStore',
+    'MetricsMiddleware',
+    'MetricsStore',
+    'SlowQueryLogMiddleware',
+    'SlowQueryLog',
+    'CompressionMiddleware',
+    'CompressedCache',
+    'accepted_encoding',
+]
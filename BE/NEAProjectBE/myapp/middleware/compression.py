@@ -0,0 +1,242 @@
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .timing import phase
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+)
+
+
+def accepted_encoding(accept_encoding, available):
+    """
+    The coding in `available` (server preference order) with the highest
+    q-value in the Accept-Encoding header, or None when none is acceptable
+    """
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = qualities.get(coding)
+        if quality is None and coding == 'gzip':
+            quality = qualities.get('x-gzip')
+        if quality is None:
+            quality = qualities.get('*', 0.0)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class Codec:
+    """One content coding: whole-body and streaming compression at a given level"""
+
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+
+    def compress(self, content):
+        if self.name == 'br':
+            return brotli.compress(content, quality=self.level)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(content) + compressor.flush()
+
+    def compressor(self):
+        """(compress, flush, finish) for a stream; flush pushes the chunk so far to the client"""
+        if self.name == 'br':
+            compressor = brotli.Compressor(quality=self.level)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def stream(self, chunks):
+        compress, flush, finish = self.compressor()
+        for chunk in chunks:
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+
+    async def astream(self, chunks):
+        compress, flush, finish = self.compressor()
+        async for chunk in chunks:
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+
+
+class CompressedCache:
+    """
+    Compressed bodies keyed by a digest of the uncompressed body and the
+    coding, least recently used dropped first once `max_bytes` is exceeded.
+    Keying on the content means a changed response is never served stale.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(content, coding):
+        return hashlib.blake2b(content, digest_size=16).digest(), coding
+
+    def get(self, key):
+        with self.lock:
+            compressed = self.entries.get(key)
+            if compressed is not None:
+                self.entries.move_to_end(key)
+            return compressed
+
+    def set(self, key, compressed):
+        if len(compressed) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, dropped = self.entries.popitem(last=False)
+                self.size -= len(dropped)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class CompressionMiddleware:
+    """
+    Compress text responses with brotli (when the library is installed) or
+    gzip, whichever the client accepts with the higher q-value.
+
+    Bodies under COMPRESSION_MIN_BYTES and content types outside
+    COMPRESSION_CONTENT_TYPES are sent as they are. Streaming responses are
+    compressed chunk by chunk and flushed after every chunk. Responses to
+    paths matching COMPRESSION_CACHED_PATHS (reference data that many
+    clients fetch unchanged) are compressed once at the highest level and
+    then served from an in-process cache of COMPRESSION_CACHE_MAX_BYTES.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'COMPRESSION_ENABLED', True)
+        self.min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+        self.content_types = frozenset(getattr(settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_CONTENT_TYPES))
+        self.cached_paths = [re.compile(pattern) for pattern in getattr(settings, 'COMPRESSION_CACHED_PATHS', ())]
+        self.cache = CompressedCache(getattr(settings, 'COMPRESSION_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+        gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        self.codecs = {'gzip': Codec('gzip', gzip_level)}
+        self.cache_codecs = {'gzip': Codec('gzip', 9)}
+        if brotli is not None:
+            self.codecs = {'br': Codec('br', brotli_quality), **self.codecs}
+            self.cache_codecs = {'br': Codec('br', 11), **self.cache_codecs}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.enabled or not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            codec = self.codecs[coding]
+            if response.is_async:
+                response.streaming_content = codec.astream(response.streaming_content)
+            else:
+                response.streaming_content = codec.stream(response.streaming_content)
+            # The compressed size is not known until the stream ends
+            del response.headers['Content-Length']
+        else:
+            with phase('compress'):
+                compressed = self.compress(request, response.content, coding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed body is not byte-identical any more (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def compressible(self, response):
+        if response.has_header('Content-Encoding') or response.has_header('Content-Range'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in self.content_types:
+            return False
+        if response.streaming:
+            # A file response knows its length up front
+            length = response.get('Content-Length')
+            return length is None or int(length) >= self.min_bytes
+        return len(response.content) >= self.min_bytes
+
+    def compress(self, request, content, coding):
+        if request.method != 'GET' or not any(pattern.search(request.path) for pattern in self.cached_paths):
+            return self.codecs[coding].compress(content)
+        key = self.cache.key(content, coding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.cache_codecs[coding].compress(content)
+            self.cache.set(key, compressed)
+        return compressed
@@ -0,0 +1,285 @@
+import json
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from ..locks import acquire, file_lock, release
+from .queries import observe_queries
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by route, method and status'),
+    'db_queries_total': ('counter', 'SQL statements executed by route'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL by route'),
+    'export_duration_seconds': ('histogram', 'Duration of export endpoints'),
+    'import_duration_seconds': ('histogram', 'Duration of import endpoints'),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsStore:
+    """
+    Counters and histograms of one worker process, periodically written to
+    ``<METRICS_DIR>/<pid>-<token>.json`` so that any worker can serve totals
+    for all. The token is new for every process, so a worker that gets the
+    pid of an exited one does not overwrite its file. A worker holds the
+    lock on its ``.lock`` file while it runs; collect() folds the files of
+    the exited workers into ``exited.json``, whose counts stay part of the
+    totals.
+    """
+
+    def __init__(self, directory=None, flush_interval=None):
+        self.directory = Path(directory or getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / 'var' / 'metrics'))
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.name = f'{self.pid}-{secrets.token_hex(4)}'
+        # A forked worker leaves the parent's lock to the parent
+        self.held = None
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def _check_fork(self):
+        # A forked worker must not re-publish the parent's numbers under its own name
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self._check_fork()
+            key = (name, _labels_key(labels))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            self._check_fork()
+            key = (name, _labels_key(labels))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+            histogram['buckets'][bisect_left(BUCKETS, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self._check_fork()
+            if self.held is None:
+                # Taken before the first write: a file whose lock is free belongs to an exited worker
+                self.held = acquire(self.directory / f'{self.name}.lock')
+            payload = _payload(self.counters, self.histograms)
+            self.last_flush = time.monotonic()
+        _write(self.directory / f'{self.name}.json', payload)
+
+    def collect(self):
+        """Merge the files of every worker (this one flushed first) into one snapshot"""
+        self.flush()
+        self.fold_exited()
+        return _merge(self.directory.glob('*.json'))
+
+    def fold_exited(self):
+        """Add the files of the exited workers to exited.json and delete them"""
+        exited = self.directory / 'exited.json'
+        with file_lock(self.directory / 'exited.lock'):
+            folded = []
+            for path in self.directory.glob('*.json'):
+                if path == exited:
+                    continue
+                held = acquire(path.with_suffix('.lock'), blocking=False)
+                if held is not None:
+                    folded.append((path, held))
+            if not folded:
+                return
+            try:
+                _write(exited, _payload(*_merge([exited] + [path for path, _ in folded])))
+                for path, _ in folded:
+                    path.unlink(missing_ok=True)
+            finally:
+                for path, held in folded:
+                    release(held)
+                    path.with_suffix('.lock').unlink(missing_ok=True)
+
+
+def _payload(counters, histograms):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, list(labels), h] for (name, labels), h in histograms.items()],
+    }
+
+
+def _write(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.tmp{threading.get_ident()}')
+    tmp.write_text(json.dumps(payload), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _merge(paths):
+    counters, histograms = {}, {}
+    for path in paths:
+        try:
+            payload = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in payload.get('counters', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, h in payload.get('histograms', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0})
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], h['buckets'])]
+            merged['sum'] += h['sum']
+            merged['count'] += h['count']
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus(counters, histograms):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        kind, help_text = HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (metric, labels), h in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float('inf'),), h['buckets']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {h["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {h["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def quantile(histogram, q):
+    """Estimate a quantile from bucket counts by linear interpolation, as Prometheus does"""
+    total = histogram['count']
+    if not total:
+        return 0.0
+    rank = q * total
+    cumulative, lower = 0, 0.0
+    for bound, count in zip(BUCKETS + (float('inf'),), histogram['buckets']):
+        if cumulative + count >= rank:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * ((rank - cumulative) / count if count else 0)
+        cumulative += count
+        lower = bound
+    return lower
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MetricsStore()
+    return _store
+
+
+class _QueryCounter:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Record per-route latency histograms, DB query counters and export/import
+    durations for the /metrics endpoint. The route label is the URL name
+    (e.g. 'letter-list', 'letter-export-xlsx', 'login'); routes whose name
+    contains 'export' or 'import' also feed the export/import histograms.
+
+    Settings:
+        METRICS_ENABLED: record metrics (default True)
+        METRICS_DIR: directory shared by all worker processes
+        METRICS_FLUSH_INTERVAL: seconds between writes of this worker's file
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = get_store()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = _QueryCounter()
+        start = time.perf_counter()
+        with observe_queries(queries):
+            response = self.get_response(request)
+        return self.record(request, response, queries, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        queries = _QueryCounter()
+        start = time.perf_counter()
+        with observe_queries(queries):
+            response = await self.get_response(request)
+        return self.record(request, response, queries, time.perf_counter() - start)
+
+    def record(self, request, response, queries, duration):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        self.store.observe('http_request_duration_seconds', {
+            'route': route, 'method': request.method, 'status': str(response.status_code),
+        }, duration)
+        self.store.inc('db_queries_total', {'route': route}, queries.count)
+        self.store.inc('db_query_duration_seconds_total', {'route': route}, queries.duration)
+        if 'export' in route:
+            self.store.observe('export_duration_seconds', {'export': route}, duration)
+        elif 'import' in route and 'template' not in route:
+            self.store.observe('import_duration_seconds', {'import': route}, duration)
+        self.store.maybe_flush()
+        return response
@@ -0,0 +1,148 @@
+import logging
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .queries import observe_queries
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_OWN_DIR = str(Path(__file__).resolve().parent)
+
+
+def fingerprint(sql):
+    """
+    Reduce a SQL statement to its structure: literals and placeholders become
+    '?', IN lists of any length collapse to '(...)' and whitespace is squashed.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def call_site(depth=3):
+    """
+    Return the innermost `depth` project frames issuing the current query as
+    'file:line in function', joined innermost first.
+    """
+    base_dir = str(settings.BASE_DIR)
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and not filename.startswith(_OWN_DIR) and 'site-packages' not in filename:
+            relative = filename[len(base_dir):].lstrip('/\\')
+            frames.append(f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return ' <- '.join(frames) or 'unknown'
+
+
+class NPlusOneError(Exception):
+    """Raised when a request repeats a structurally identical query too many times"""
+
+
+class QueryFingerprints:
+    """Database execute wrapper counting queries per fingerprint"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = {}
+        self.call_sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == self.threshold:
+            self.call_sites[key] = call_site()
+        return execute(sql, params, many, context)
+
+    def offenders(self):
+        """(fingerprint, count, call site) for every query repeated at least `threshold` times"""
+        found = [
+            (key, count, self.call_sites.get(key, 'unknown'))
+            for key, count in self.counts.items()
+            if count >= self.threshold
+        ]
+        return sorted(found, key=lambda offender: offender[1], reverse=True)
+
+    def report(self, label=''):
+        lines = [f"Possible N+1 queries{f' in {label}' if label else ''}:"]
+        for key, count, site in self.offenders():
+            lines.append(f"  {count}x at {site}\n      {key}")
+        return '\n'.join(lines)
+
+
+def _threshold():
+    return getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None, raise_error=True, label=''):
+    """
+    Collect query fingerprints for the enclosed block and raise NPlusOneError
+    if any of them repeats `threshold` times or more.
+
+        with detect_n_plus_one(threshold=3):
+            self.client.get('/api/employees/')
+    """
+    collector = QueryFingerprints(threshold or _threshold())
+    with observe_queries(collector):
+        yield collector
+    if raise_error and collector.offenders():
+        raise NPlusOneError(collector.report(label))
+
+
+class NPlusOneDetectorMiddleware:
+    """
+    Flag requests that issue the same query shape repeatedly.
+
+    Settings:
+        NPLUSONE_ENABLED: turn the detector on (off unless set, it is wired into test settings)
+        NPLUSONE_THRESHOLD: repetitions of one fingerprint that count as N+1 (default 5)
+        NPLUSONE_RAISE: raise NPlusOneError instead of logging a warning
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'NPLUSONE_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = _threshold()
+        self.raise_error = getattr(settings, 'NPLUSONE_RAISE', False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with detect_n_plus_one(self.threshold, raise_error=False) as collector:
+            response = self.get_response(request)
+        return self.check(request, response, collector)
+
+    async def __acall__(self, request):
+        with detect_n_plus_one(self.threshold, raise_error=False) as collector:
+            response = await self.get_response(request)
+        return self.check(request, response, collector)
+
+    def check(self, request, response, collector):
+        if collector.offenders():
+            report = collector.report(f"{request.method} {request.path}")
+            if self.raise_error:
+                raise NPlusOneError(report)
+            logger.warning(report)
+        return response
@@ -0,0 +1,257 @@
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .queries import observe_queries
+
+REPORT_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+# ?profile= values that turn profiling on; any other value leaves it off
+PROFILE_MODES = {'1': 'cprofile', 'cprofile': 'cprofile', 'sample': 'sample'}
+
+
+def _report_dir():
+    return Path(getattr(settings, 'PROFILER_REPORT_DIR', Path(settings.BASE_DIR) / 'var' / 'profiles'))
+
+
+class ReportStore:
+    """Profile reports kept as JSON files, oldest deleted once PROFILER_MAX_BYTES is exceeded"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Path(directory or _report_dir())
+        self.max_bytes = max_bytes or getattr(settings, 'PROFILER_MAX_BYTES', 50 * 1024 * 1024)
+
+    def _files(self):
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob('*.json'))
+
+    def save(self, report):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{report['id']}.json"
+        path.write_text(json.dumps(report, ensure_ascii=False), encoding='utf-8')
+        self.prune()
+        return path
+
+    def prune(self):
+        files = self._files()
+        total = sum(f.stat().st_size for f in files)
+        for f in files:
+            if total <= self.max_bytes:
+                break
+            total -= f.stat().st_size
+            f.unlink(missing_ok=True)
+
+    def list(self):
+        """Report summaries, newest first"""
+        summaries = []
+        for f in reversed(self._files()):
+            try:
+                report = json.loads(f.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            summaries.append({key: report.get(key) for key in (
+                'id', 'created_at', 'method', 'path', 'mode', 'status_code', 'duration_ms', 'query_count', 'sql_ms'
+            )})
+        return summaries
+
+    def get(self, report_id):
+        if not REPORT_ID.match(report_id or ''):
+            return None
+        path = self.directory / f"{report_id}.json"
+        if not path.is_file():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+
+
+class SQLRecorder:
+    """Database execute wrapper keeping every statement with its duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({'sql': sql, 'duration_ms': round((time.perf_counter() - start) * 1000, 3)})
+
+
+class SamplingProfiler:
+    """Stdlib sampling profiler: snapshots the profiled thread's stack every `interval` seconds"""
+
+    def __init__(self, interval=0.005, max_depth=40):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{frame.f_lineno}({code.co_name})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def report(self, limit=30):
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms", '', 'Top frames by own samples:']
+        for frame, count in own.most_common(limit):
+            lines.append(f"  {count:6d}  {100 * count / max(self.samples, 1):5.1f}%  {frame}")
+        lines += ['', 'Hottest stacks:']
+        for stack, count in self.stacks.most_common(10):
+            lines.append(f"  {count:6d}  " + ' > '.join(stack[-8:]))
+        return '\n'.join(lines)
+
+
+class ProfiledRun:
+    """Profiler, SQL and outcome of one profiled request"""
+
+    def __init__(self, mode):
+        self.recorder = SQLRecorder()
+        self.profiler = cProfile.Profile() if mode == 'cprofile' else SamplingProfiler()
+        self.response = None
+        self.duration = 0.0
+
+
+class RequestProfilerMiddleware:
+    """
+    Profile a request when an admin adds ``?profile=1`` or
+    ``?profile=cprofile`` (cProfile) or ``?profile=sample`` (sampling
+    profiler) and return the report with the executed SQL instead of the
+    normal response; any other value is ignored. Reports are stored on disk
+    and listed at /api/profiles/.
+
+    Settings:
+        PROFILER_ENABLED: allow on-demand profiling (default True)
+        PROFILER_REPORT_DIR: directory for stored reports
+        PROFILER_MAX_BYTES: total size cap of stored reports
+
+    Under ASGI the profiler runs on the event loop thread, so a cProfile
+    report also shows whatever other requests ran there meanwhile.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = ReportStore()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = PROFILE_MODES.get(request.GET.get('profile'))
+        if mode is None or not self.is_admin(request):
+            return self.get_response(request)
+        with self.profiling(mode) as run:
+            run.response = self.get_response(request)
+        return self.report(request, mode, run)
+
+    async def __acall__(self, request):
+        mode = PROFILE_MODES.get(request.GET.get('profile'))
+        if mode is None or not await sync_to_async(self.is_admin)(request):
+            return await self.get_response(request)
+        with self.profiling(mode) as run:
+            run.response = await self.get_response(request)
+        return self.report(request, mode, run)
+
+    @staticmethod
+    def is_admin(request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                result = JWTAuthentication().authenticate(request)
+            except (InvalidToken, AuthenticationFailed):
+                return False
+            user = result[0] if result else None
+        return user is not None and getattr(user, 'role', None) == 'admin'
+
+    @contextmanager
+    def profiling(self, mode):
+        """Profile and record the SQL of the enclosed block; the caller sets `response` on the yielded run"""
+        run = ProfiledRun(mode)
+        start = time.perf_counter()
+        with observe_queries(run.recorder):
+            if mode == 'cprofile':
+                run.profiler.enable()
+            else:
+                run.profiler.start()
+            try:
+                yield run
+            finally:
+                if mode == 'cprofile':
+                    run.profiler.disable()
+                else:
+                    run.profiler.stop()
+        run.duration = time.perf_counter() - start
+
+    def report(self, request, mode, run):
+        recorder, response, duration = run.recorder, run.response, run.duration
+        if mode == 'cprofile':
+            out = io.StringIO()
+            pstats.Stats(run.profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(60)
+            text = out.getvalue()
+        else:
+            text = run.profiler.report()
+
+        now = timezone.now()
+        report = {
+            'id': f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            'created_at': now.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'mode': mode,
+            'status_code': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'query_count': len(recorder.queries),
+            'sql_ms': round(sum(q['duration_ms'] for q in recorder.queries), 3),
+            'sql': recorder.queries,
+            'profile': text,
+        }
+        self.store.save(report)
+        return JsonResponse({
+            "status": "success",
+            "message": "Profile report generated",
+            "data": report,
+        }, json_dumps_params={'ensure_ascii': False})
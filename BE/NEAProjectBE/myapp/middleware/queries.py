@@ -0,0 +1,49 @@
+"""
+Query observers that follow a request into every thread it uses.
+
+connection.execute_wrapper() only sees queries on the connection of the
+thread that installed it, while the async ORM runs queries in the
+sync_to_async worker thread. observe_queries() keeps the wrapper in a
+context variable instead, which asgiref copies into that thread, and one
+dispatcher installed on every connection calls the wrappers of the
+current context. Outside of an observed block a query costs one lookup.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db.backends.signals import connection_created
+
+_observers = ContextVar('query_observers', default=())
+
+
+def _dispatch(execute, sql, params, many, context):
+    observers = _observers.get()
+    # The first observer is the outermost, as with nested execute_wrapper() blocks
+    for observer in reversed(observers):
+        execute = partial(observer, execute)
+    return execute(sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    """Add the dispatcher to `connection`, once"""
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+def install_everywhere():
+    """Install the dispatcher on every connection as it is opened"""
+    connection_created.connect(install, dispatch_uid='myapp.middleware.queries')
+
+
+@contextmanager
+def observe_queries(observer):
+    """
+    Call `observer` as an execute wrapper for every query run in the
+    enclosed block, in this thread or any thread it hands work to
+    """
+    token = _observers.set(_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        _observers.reset(token)
@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import sys
+import time
+from logging.handlers import WatchedFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from ..locks import file_lock
+from .nplusone import fingerprint
+from .queries import observe_queries
+
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _log_path():
+    return Path(getattr(settings, 'SLOW_QUERY_LOG', Path(settings.BASE_DIR) / 'var' / 'slow_queries.log'))
+
+
+def redact(params):
+    """Keep numbers, booleans and NULLs; replace text and binary values by their type and length"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact(value) for key, value in params.items()}
+    redacted = []
+    for value in params:
+        if value is None or isinstance(value, (bool, int, float)):
+            redacted.append(value)
+        elif isinstance(value, (str, bytes, bytearray, memoryview)):
+            redacted.append(f"<{type(value).__name__}:{len(value)}>")
+        else:
+            redacted.append(f"<{type(value).__name__}>")
+    return redacted
+
+
+def origin():
+    """The DRF view (with action) and serializer on the current call stack, if any"""
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    view = serializer = None
+    frame = sys._getframe(1)
+    while frame is not None and view is None:
+        owner = frame.f_locals.get('self')
+        if serializer is None and isinstance(owner, BaseSerializer):
+            target = getattr(owner, 'child', owner)
+            serializer = type(target).__name__
+        elif isinstance(owner, APIView):
+            action = getattr(owner, 'action', None)
+            view = f"{type(owner).__name__}.{action}" if action else type(owner).__name__
+        frame = frame.f_back
+    return view, serializer
+
+
+class SharedRotatingFileHandler(WatchedFileHandler):
+    """
+    Size-based rotation that the worker processes appending to one file can
+    share. RotatingFileHandler goes by what its own process has written and
+    renames the file under the others, which keep writing to the renamed
+    file and rotate it again over the backups. Here each write holds a file
+    lock and reads the size from the file itself, and a process reopens the
+    path once another one has rotated it.
+    """
+
+    def __init__(self, filename, max_bytes, backups, encoding=None):
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock_path = f'{self.baseFilename}.lock'
+
+    def emit(self, record):
+        try:
+            with file_lock(self.lock_path):
+                if self.max_bytes and self.backups and self.size() >= self.max_bytes:
+                    self.rotate()
+                super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def size(self):
+        try:
+            return os.stat(self.baseFilename).st_size
+        except FileNotFoundError:
+            return 0
+
+    def rotate(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        for i in range(self.backups - 1, 0, -1):
+            source = f'{self.baseFilename}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.baseFilename}.{i + 1}')
+        os.replace(self.baseFilename, f'{self.baseFilename}.1')
+        self.stream = self._open()
+        self._statstream()
+
+
+class SlowQueryLog:
+    """Append-only JSON lines log of slow statements with size-based rotation shared by the workers"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or _log_path())
+        self.max_bytes = getattr(settings, 'SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+        self.backups = getattr(settings, 'SLOW_QUERY_LOG_BACKUPS', 3)
+        self._logger = None
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            logger = logging.getLogger(f'myapp.slow_queries.{self.path}')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            if not logger.handlers:
+                handler = SharedRotatingFileHandler(self.path, self.max_bytes, self.backups, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def write(self, entry):
+        self.logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def entries(self):
+        files = [self.path.with_name(f"{self.path.name}.{i}") for i in range(self.backups, 0, -1)] + [self.path]
+        for path in files:
+            if not path.is_file():
+                continue
+            with path.open(encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def top(self, limit=20):
+        """Entries grouped by fingerprint, ordered by total time spent"""
+        groups = {}
+        for entry in self.entries():
+            group = groups.get(entry['fingerprint'])
+            if group is None:
+                group = groups[entry['fingerprint']] = {
+                    'fingerprint': entry['fingerprint'],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'views': set(),
+                    'serializers': set(),
+                }
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            if entry['duration_ms'] >= group['max_ms']:
+                group['max_ms'] = entry['duration_ms']
+                group['sample_params'] = entry['params']
+                group['plan'] = entry['plan']
+            group['last_seen'] = entry['at']
+            if entry.get('view'):
+                group['views'].add(entry['view'])
+            if entry.get('serializer'):
+                group['serializers'].add(entry['serializer'])
+
+        ranked = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)[:limit]
+        for group in ranked:
+            group['total_ms'] = round(group['total_ms'], 3)
+            group['mean_ms'] = round(group['total_ms'] / group['count'], 3)
+            group['views'] = sorted(group['views'])
+            group['serializers'] = sorted(group['serializers'])
+        return ranked
+
+
+class SlowQueryRecorder:
+    """Execute wrapper logging statements slower than `threshold_ms` with their query plan"""
+
+    def __init__(self, log, threshold_ms):
+        self.log = log
+        self.threshold = threshold_ms / 1000
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self.record(context['connection'], sql, params, many, duration)
+        return result
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        self.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            self.explaining = False
+
+    def record(self, connection, sql, params, many, duration):
+        view, serializer = origin()
+        self.log.write({
+            'at': timezone.now().isoformat(),
+            'fingerprint': fingerprint(sql),
+            'duration_ms': round(duration * 1000, 3),
+            'params': redact(params[0] if many and params else params),
+            'view': view,
+            'serializer': serializer,
+            'plan': None if many else self.explain(connection, sql, params),
+        })
+
+
+class SlowQueryLogMiddleware:
+    """
+    Log every statement slower than SLOW_QUERY_THRESHOLD_MS with its
+    fingerprint, redacted parameters, originating view and serializer and
+    its EXPLAIN QUERY PLAN. The top offenders are listed at /api/slow-queries/.
+
+    Settings:
+        SLOW_QUERY_THRESHOLD_MS: minimum duration to log (None disables the log)
+        SLOW_QUERY_LOG: log file path
+        SLOW_QUERY_LOG_MAX_BYTES / SLOW_QUERY_LOG_BACKUPS: rotation policy
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+        if self.threshold_ms is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log = SlowQueryLog()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with observe_queries(SlowQueryRecorder(self.log, self.threshold_ms)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with observe_queries(SlowQueryRecorder(self.log, self.threshold_ms)):
+            return await self.get_response(request)
@@ -0,0 +1,170 @@
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .queries import observe_queries
+
+logger = logging.getLogger(__name__)
+
+_current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Query counters and phase durations collected for a single sampled request"""
+    __slots__ = ('queries', 'sql_time', 'phases', 'open_phases')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.phases = {}
+        self.open_phases = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and their wall time"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+def current_timings():
+    """Return the timings of the request being handled, or None when it is not sampled"""
+    return _current_timings.get()
+
+
+class phase:
+    """
+    Time a block of work under ``name`` for the current request.
+
+    Nested blocks with the same name are only counted once, so a serializer
+    calling itself for related objects does not double its own time. Outside
+    of a sampled request this is a no-op.
+    """
+    __slots__ = ('name', 'timings', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = None
+
+    def __enter__(self):
+        timings = _current_timings.get()
+        if timings is not None and self.name not in timings.open_phases:
+            timings.open_phases.add(self.name)
+            self.timings = timings
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timings is not None:
+            self.timings.open_phases.discard(self.name)
+            self.timings.add(self.name, time.perf_counter() - self.start)
+            self.timings = None
+        return False
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class ServerTimingMiddleware:
+    """
+    Emit a ``Server-Timing`` header with query count, SQL, serializer,
+    render, compression and total time for a sampled share of requests.
+
+    Settings:
+        SERVER_TIMING_SAMPLE_RATE: fraction of requests to time (0.0 - 1.0)
+        SERVER_TIMING_LOG: also write one JSON log line per timed request
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 1.0))
+        self.log = getattr(settings, 'SERVER_TIMING_LOG', False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with observe_queries(timings.record_query):
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with observe_queries(timings.record_query):
+                response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def finish(self, request, response, timings, total):
+        response['Server-Timing'] = self.build_header(timings, total)
+        if self.log:
+            self.log_request(request, response, timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        """DRF responses are rendered after this hook, so time the render from here"""
+        timings = _current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def record_render(rendered):
+                timings.add('render', time.perf_counter() - started)
+
+            response.add_post_render_callback(record_render)
+        return response
+
+    @staticmethod
+    def build_header(timings, total):
+        parts = [f'db;dur={_ms(timings.sql_time)};desc="{timings.queries} queries"']
+        for name in ('serializer', 'render', 'compress'):
+            if name in timings.phases:
+                parts.append(f'{name};dur={_ms(timings.phases[name])}')
+        parts.append(f'total;dur={_ms(total)}')
+        return ', '.join(parts)
+
+    @staticmethod
+    def log_request(request, response, timings, total):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            'db_ms': _ms(timings.sql_time),
+            'serializer_ms': _ms(timings.phases.get('serializer', 0.0)),
+            'render_ms': _ms(timings.phases.get('render', 0.0)),
+            'compress_ms': _ms(timings.phases.get('compress', 0.0)),
+            'total_ms': _ms(total),
+        }))
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:56
+
+from django.db import migrations, models
+
+from myapp.models.letter import letter_date, letter_number
+
+
+def backfill_normalized_fields(apps, schema_editor):
+    Letter = apps.get_model('myapp', 'Letter')
+    letters = Letter.objects.only('chalani_no', 'voucher_no', 'gatepass_no', 'date').order_by('pk')
+    batch = []
+    for letter in letters.iterator(chunk_size=2000):
+        letter.chalani_number = letter_number(letter.chalani_no)
+        letter.voucher_number = letter_number(letter.voucher_no)
+        letter.gatepass_number = letter_number(letter.gatepass_no)
+        letter.date_key = letter_date(letter.date)
+        batch.append(letter)
+        if len(batch) == 2000:
+            Letter.objects.bulk_update(batch, ['chalani_number', 'voucher_number', 'gatepass_number', 'date_key'])
+            batch = []
+    Letter.objects.bulk_update(batch, ['chalani_number', 'voucher_number', 'gatepass_number', 'date_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_remove_letteritem_unique_letter_serial_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='letter',
+            name='chalani_number',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='letter',
+            name='date_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='letter',
+            name='gatepass_number',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='letter',
+            name='voucher_number',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_normalized_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['status', '-created_at'], name='letter_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['-created_at'], name='letter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['office_id', '-created_at'], name='letter_office_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['office_name', '-created_at'], name='letter_office_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['sub_office_name', '-created_at'], name='letter_sub_office_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['receiver_id', '-created_at'], name='letter_receiver_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['receiver_name', '-created_at'], name='letter_receiver_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['chalani_no'], name='letter_chalani_no_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['chalani_number'], name='letter_chalani_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['voucher_number'], name='letter_voucher_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['gatepass_number'], name='letter_gatepass_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['date_key'], name='letter_date_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='letter',
+            index=models.Index(fields=['status', 'date_key'], name='letter_status_date_idx'),
+        ),
+    ]
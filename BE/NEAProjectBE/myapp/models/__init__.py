@@ -8,6 +8,7 @@ from .letter import Letter, LetterItem, LetterStatus
 from .product import Product, ProductStatus, UnitOfMeasurement
 from .dashboard import Dashboard
 from .verification import EmailVerification
+from .change import Change, ChangeAction
 
 __all__ = [
     'TimeStampedModel',
@@ -20,4 +21,5 @@ __all__ = [
     'Product', 'ProductStatus', 'UnitOfMeasurement',
     'Dashboard',
     'EmailVerification',
+    'Change', 'ChangeAction',
 ]
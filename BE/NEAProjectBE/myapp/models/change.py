@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class ChangeAction(models.TextChoices):
+    CREATED = "created", "Created"
+    UPDATED = "updated", "Updated"
+    # Hard deletes and rows moved to the bin
+    DELETED = "deleted", "Deleted"
+    # The database was restored from a backup: every older cursor is stale
+    RESTORED = "restored", "Restored"
+
+
+class Change(models.Model):
+    """
+    One write to a synced table. The id only grows (AUTOINCREMENT, and
+    SQLite commits one writer at a time), so it is the cursor clients pass
+    back as /api/changes/?since=.
+    """
+    table = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ChangeAction.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id}: {self.action} {self.table} {self.object_id}"
+
+    class Meta:
+        app_label = 'myapp'
+        indexes = [
+            # prune_changes drops entries by age
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
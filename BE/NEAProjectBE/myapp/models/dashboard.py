@@ -25,40 +25,37 @@ class Dashboard(models.Model):
     def __str__(self):
         return f"Dashboard Stats - {self.last_updated.strftime('%Y-%m-%d %H:%M')}"
 
+    @staticmethod
+    def stat_querysets():
+        """Dashboard field -> the rows it counts"""
+        return {
+            'total_active_products': Product.objects.filter(status=ProductStatus.ACTIVE),
+            'total_active_branches': Branch.objects.filter(status=BranchStatus.ACTIVE),
+            'total_active_offices': Office.objects.filter(status=OfficeStatus.ACTIVE),
+            'total_active_employees': Employee.objects.filter(status=EmployeeStatus.ACTIVE),
+            'total_receivers': Receiver.objects.all(),
+            'total_letters': Letter.objects.all(),
+            'total_draft_letters': Letter.objects.filter(status=LetterStatus.DRAFT),
+            'total_sent_letters': Letter.objects.filter(status=LetterStatus.SENT),
+        }
+
     @classmethod
     def get_current_stats(cls):
-        total_active_products = Product.objects.filter(status=ProductStatus.ACTIVE).count()
-        total_active_branches = Branch.objects.filter(status=BranchStatus.ACTIVE).count()
-        total_active_offices = Office.objects.filter(status=OfficeStatus.ACTIVE).count()
-        total_active_employees = Employee.objects.filter(status=EmployeeStatus.ACTIVE).count()
-        total_receivers = Receiver.objects.count()
-        total_letters = Letter.objects.count()
-        total_draft_letters = Letter.objects.filter(status=LetterStatus.DRAFT).count()
-        total_sent_letters = Letter.objects.filter(status=LetterStatus.SENT).count()
-        
-        dashboard, created = cls.objects.get_or_create(
-            id=1,
-            defaults={
-                'total_active_products': total_active_products,
-                'total_active_branches': total_active_branches,
-                'total_active_offices': total_active_offices,
-                'total_active_employees': total_active_employees,
-                'total_receivers': total_receivers,
-                'total_letters': total_letters,
-                'total_draft_letters': total_draft_letters,
-                'total_sent_letters': total_sent_letters,
-            }
-        )
-        
+        stats = {name: queryset.count() for name, queryset in cls.stat_querysets().items()}
+        dashboard, created = cls.objects.get_or_create(id=1, defaults=stats)
         if not created:
-            dashboard.total_active_products = total_active_products
-            dashboard.total_active_branches = total_active_branches
-            dashboard.total_active_offices = total_active_offices
-            dashboard.total_active_employees = total_active_employees
-            dashboard.total_receivers = total_receivers
-            dashboard.total_letters = total_letters
-            dashboard.total_draft_letters = total_draft_letters
-            dashboard.total_sent_letters = total_sent_letters
+            for name, value in stats.items():
+                setattr(dashboard, name, value)
             dashboard.save()
-        
-        return dashboard
\ No newline at end of file
+        return dashboard
+
+    @classmethod
+    async def aget_current_stats(cls):
+        """get_current_stats() through the async ORM"""
+        stats = {name: await queryset.acount() for name, queryset in cls.stat_querysets().items()}
+        dashboard, created = await cls.objects.aget_or_create(id=1, defaults=stats)
+        if not created:
+            for name, value in stats.items():
+                setattr(dashboard, name, value)
+            await dashboard.asave()
+        return dashboard
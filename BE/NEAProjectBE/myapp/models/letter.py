@@ -1,6 +1,27 @@
+import re
+
 from django.db import models
 from .base import TimeStampedModel
 
+ENGLISH_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+DATE_KEY = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+MAX_NUMBER = 2 ** 63 - 1
+
+
+def letter_number(value):
+    """The digits of a chalani, voucher or gatepass number (Nepali or English) as an integer, None without any"""
+    digits = ''.join(ch for ch in str(value or '').translate(ENGLISH_DIGITS) if '0' <= ch <= '9')
+    if not digits or int(digits) > MAX_NUMBER:
+        return None
+    return int(digits)
+
+
+def letter_date(value):
+    """'२०८२-०७-१५' or '2082-07-15' -> '2082-07-15', which sorts by date; '' for anything else"""
+    value = (value or '').translate(ENGLISH_DIGITS).strip()
+    return value if DATE_KEY.fullmatch(value) else ''
+
+
 class LetterStatus(models.TextChoices):
     DRAFT = "draft", "Draft"
     SENT = "sent", "Sent"
@@ -53,11 +74,56 @@ class Letter(TimeStampedModel):
         default=LetterStatus.DRAFT
     )
 
+    # Normalized copies of the fields above for indexed filtering, kept in step by normalize()
+    chalani_number = models.BigIntegerField(null=True, blank=True, editable=False)
+    voucher_number = models.BigIntegerField(null=True, blank=True, editable=False)
+    gatepass_number = models.BigIntegerField(null=True, blank=True, editable=False)
+    date_key = models.CharField(max_length=10, blank=True, default="", editable=False)
+
+    # source field -> (normalized field, normalizer)
+    NORMALIZED_FIELDS = {
+        "chalani_no": ("chalani_number", letter_number),
+        "voucher_no": ("voucher_number", letter_number),
+        "gatepass_no": ("gatepass_number", letter_number),
+        "date": ("date_key", letter_date),
+    }
+
+    def normalize(self):
+        """Fill the normalized fields; bulk_create skips save(), so call this first"""
+        for source, (target, normalizer) in self.NORMALIZED_FIELDS.items():
+            setattr(self, target, normalizer(getattr(self, source)))
+
+    def save(self, *args, **kwargs):
+        self.normalize()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *(
+                target for source, (target, _) in self.NORMALIZED_FIELDS.items() if source in update_fields
+            )}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.subject or f"Letter {self.id}"
 
     class Meta:
         app_label = 'myapp'
+        indexes = [
+            # Every list is newest first; the equality filters share the order
+            models.Index(fields=['status', '-created_at'], name='letter_status_created_idx'),
+            models.Index(fields=['-created_at'], name='letter_created_idx'),
+            models.Index(fields=['office_id', '-created_at'], name='letter_office_created_idx'),
+            models.Index(fields=['office_name', '-created_at'], name='letter_office_name_idx'),
+            models.Index(fields=['sub_office_name', '-created_at'], name='letter_sub_office_idx'),
+            models.Index(fields=['receiver_id', '-created_at'], name='letter_receiver_created_idx'),
+            models.Index(fields=['receiver_name', '-created_at'], name='letter_receiver_name_idx'),
+            # import-xlsx matches rows to existing letters by chalani_no
+            models.Index(fields=['chalani_no'], name='letter_chalani_no_idx'),
+            models.Index(fields=['chalani_number'], name='letter_chalani_number_idx'),
+            models.Index(fields=['voucher_number'], name='letter_voucher_number_idx'),
+            models.Index(fields=['gatepass_number'], name='letter_gatepass_number_idx'),
+            models.Index(fields=['date_key'], name='letter_date_key_idx'),
+            models.Index(fields=['status', 'date_key'], name='letter_status_date_idx'),
+        ]
 
 class LetterItem(TimeStampedModel):
     letter = models.ForeignKey(Letter, on_delete=models.CASCADE, related_name="items")
@@ -26,6 +26,10 @@ class UnitOfMeasurement(models.TextChoices):
     FT = "ft", "FT."
     COIL = "coil", "Coil"
 
+def generate_sku():
+    return ''.join([str(random.randint(0, 9)) for _ in range(13)])
+
+
 class Product(TimeStampedModel):
     name = models.CharField(max_length=255)
     company = models.CharField(max_length=255, blank=True, default="")
@@ -40,8 +44,7 @@ class Product(TimeStampedModel):
     
     def save(self, *args, **kwargs):
         if not self.sku or self.sku.strip() == '':
-            random_digits = ''.join([str(random.randint(0, 9)) for _ in range(13)])
-            self.sku = random_digits
+            self.sku = generate_sku()
         super().save(*args, **kwargs)
 
     def __str__(self):
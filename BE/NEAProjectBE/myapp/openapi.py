@@ -0,0 +1,179 @@
+"""
+The OpenAPI schema and its documentation pages, generated once per deploy.
+
+drf_spectacular generates the schema by introspecting every view and its
+extend_schema blocks, which takes hundreds of milliseconds. build() does
+it once and writes the YAML and JSON schema, the Swagger UI page and the
+Redoc page to SCHEMA_CACHE_DIR, each with an ETag and gzip and brotli
+copies. Processes load those bytes on warm-up and serve them as they are.
+
+The manifest records a fingerprint of what the schema is generated from:
+the project's source files, the drf_spectacular settings and the library
+versions. A deploy that changes any of them regenerates the files on the
+next load (or `manage.py build_schema`); a restart without changes reads
+them back.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import rest_framework
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .middleware.compression import Codec, brotli
+
+MANIFEST = 'manifest.json'
+# Project packages whose code shapes the schema
+SOURCE_PACKAGES = ('myapp', 'NEAProjectBE')
+
+
+class Document:
+    """One cached response body: its content type, ETag and compressed copies"""
+    __slots__ = ('name', 'content_type', 'headers', 'representations')
+
+    def __init__(self, name, content_type, bodies, headers=None):
+        self.name = name
+        self.content_type = content_type
+        self.headers = headers or {}
+        digest = hashlib.blake2b(bodies[None], digest_size=12).hexdigest()
+        # coding (None for identity) -> (body, ETag)
+        self.representations = {
+            coding: (body, f'"{digest}-{coding}"' if coding else f'"{digest}"')
+            for coding, body in bodies.items()
+        }
+
+    @property
+    def codings(self):
+        return [coding for coding in self.representations if coding is not None]
+
+
+def fingerprint():
+    """Digest of everything the generated schema depends on"""
+    import drf_spectacular
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((drf_spectacular.__version__, rest_framework.VERSION,
+                        sorted(getattr(settings, 'SPECTACULAR_SETTINGS', {}).items()))).encode())
+    base = Path(settings.BASE_DIR)
+    for package in SOURCE_PACKAGES:
+        for directory, dirnames, filenames in os.walk(base / package):
+            dirnames[:] = sorted(name for name in dirnames if name not in ('tests', '__pycache__'))
+            for name in sorted(filenames):
+                if name.endswith('.py'):
+                    stat = os.stat(os.path.join(directory, name))
+                    digest.update(f'{os.path.relpath(directory, base)}/{name}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+
+def generate():
+    """{file name: (content type, body, extra headers)} of the schema and the documentation pages"""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+    from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+    schema = SchemaGenerator().get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+    schema_url = reverse('schema')
+    swagger = SpectacularSwaggerView()
+    redoc = SpectacularRedocView()
+    # Rendered without a request: the Swagger page's CSRF token is only sent
+    # with session authentication, which this API does not use
+    swagger_page = render_to_string(swagger.template_name, {
+        'title': swagger.title,
+        'swagger_ui_css': swagger._swagger_ui_resource('swagger-ui.css'),
+        'swagger_ui_bundle': swagger._swagger_ui_resource('swagger-ui-bundle.js'),
+        'swagger_ui_standalone': swagger._swagger_ui_resource('swagger-ui-standalone-preset.js'),
+        'favicon_href': swagger._swagger_ui_favicon(),
+        'schema_url': schema_url,
+        'settings': swagger._dump(spectacular_settings.SWAGGER_UI_SETTINGS),
+        'oauth2_config': swagger._dump(spectacular_settings.SWAGGER_UI_OAUTH2_CONFIG),
+        'template_name_js': swagger.template_name_js,
+        'script_url': None,
+        'csrf_header_name': swagger._get_csrf_header_name(),
+        'schema_auth_names': swagger._dump(swagger._get_schema_auth_names()),
+    })
+    redoc_page = render_to_string(redoc.template_name, {
+        'title': redoc.title,
+        'redoc_standalone': redoc._redoc_standalone(),
+        'schema_url': schema_url,
+        'settings': redoc._dump(spectacular_settings.REDOC_UI_SETTINGS),
+    })
+    return {
+        'schema.yaml': (OpenApiYamlRenderer.media_type, OpenApiYamlRenderer().render(schema, renderer_context={}), {}),
+        'schema.json': (OpenApiJsonRenderer.media_type, OpenApiJsonRenderer().render(schema, renderer_context={}), {}),
+        'swagger.html': ('text/html; charset=utf-8', swagger_page.encode(), {'Cross-Origin-Opener-Policy': 'unsafe-none'}),
+        'redoc.html': ('text/html; charset=utf-8', redoc_page.encode(), {}),
+    }
+
+
+def build(directory=None, stamp=None):
+    """Generate the documents into `directory` (SCHEMA_CACHE_DIR) and return them"""
+    directory = Path(directory or settings.SCHEMA_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    codecs = {'gzip': Codec('gzip', 9)}
+    if brotli is not None:
+        codecs = {'br': Codec('br', 11), **codecs}
+
+    documents, manifest = {}, {'fingerprint': stamp or fingerprint(), 'documents': {}}
+    for name, (content_type, body, headers) in generate().items():
+        bodies = {None: body, **{coding: codec.compress(body) for coding, codec in codecs.items()}}
+        documents[name] = Document(name, content_type, bodies, headers)
+        manifest['documents'][name] = {'content_type': content_type, 'headers': headers, 'codings': list(codecs)}
+        for coding, data in bodies.items():
+            _write(directory / (name + _suffix(coding)), data)
+    # Written last: a reader never sees a manifest without its files
+    _write(directory / MANIFEST, json.dumps(manifest, indent=2).encode())
+    return documents
+
+
+def load(directory=None, stamp=None):
+    """The documents in `directory` when they were generated from this code, else None"""
+    directory = Path(directory or settings.SCHEMA_CACHE_DIR)
+    try:
+        manifest = json.loads((directory / MANIFEST).read_bytes())
+        if manifest['fingerprint'] != (stamp or fingerprint()):
+            return None
+        return {
+            name: Document(name, entry['content_type'], {
+                coding: (directory / (name + _suffix(coding))).read_bytes() for coding in (None, *entry['codings'])
+            }, entry['headers'])
+            for name, entry in manifest['documents'].items()
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+_documents = None
+_lock = threading.Lock()
+
+
+def documents():
+    """This process's documents: read from SCHEMA_CACHE_DIR, generated there first when stale"""
+    global _documents
+    if _documents is None:
+        with _lock:
+            if _documents is None:
+                stamp = fingerprint()
+                _documents = load(stamp=stamp) or build(stamp=stamp)
+    return _documents
+
+
+def reset():
+    """Drop this process's documents; the next request loads them again"""
+    global _documents
+    _documents = None
+
+
+def _suffix(coding):
+    return {None: '', 'gzip': '.gz', 'br': '.br'}[coding]
+
+
+def _write(path, data):
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.', delete=False) as tmp:
+        tmp.write(data)
+    os.replace(tmp.name, path)
@@ -0,0 +1,87 @@
+"""
+JSON renderer and parser with a pluggable encoder.
+
+JSON_BACKEND picks the encoder: 'orjson' when it is installed ('auto', the
+default) or the stdlib 'json' module DRF uses. The fast backend only
+handles compact output (REST_FRAMEWORK COMPACT_JSON and UNICODE_JSON, both
+on by default: no whitespace, non-ASCII written as UTF-8), so indented
+output for the browsable API and anything the backend refuses (integers
+beyond 64 bits, unknown types) falls back to DRF's own renderer and parser.
+Dates, times and everything else DRF's encoder knows keep their DRF
+representation.
+"""
+import io
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import parsers, renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'json')
+
+# DRF escapes these so the output stays valid inside a <script> tag
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+_encoder = JSONEncoder()
+
+
+def json_backend():
+    """The backend in use: 'orjson' or 'json'"""
+    backend = getattr(settings, 'JSON_BACKEND', 'auto')
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"JSON_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+    if backend == 'json' or orjson is None:
+        if backend == 'orjson':
+            raise ImproperlyConfigured("JSON_BACKEND is 'orjson' but orjson is not installed")
+        return 'json'
+    return 'orjson'
+
+
+def _orjson_dumps(data):
+    content = orjson.dumps(
+        data,
+        default=_encoder.default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+    for separator, escaped in LINE_SEPARATORS:
+        if separator in content:
+            content = content.replace(separator, escaped)
+    return content
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or json_backend() != 'orjson'
+            or not (self.compact and not self.ensure_ascii)
+            or self.get_indent(accepted_media_type or '', renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return _orjson_dumps(data)
+        except TypeError:
+            # orjson.JSONEncodeError: let the stdlib encoder render it or raise its own error
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if json_backend() != 'orjson' or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Big integers, NaN without STRICT_JSON and plain errors: the stdlib parser decides
+            return super().parse(io.BytesIO(body), media_type, parser_context)
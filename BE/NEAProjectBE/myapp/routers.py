@@ -0,0 +1,37 @@
+"""
+Database routing for the letter archive (myapp/archive.py).
+
+The 'archive' database holds the letters of closed fiscal years and their
+items, in the same tables as the default database, and nothing else. Reads
+go there only through QuerySet.using(ARCHIVE); a row read from it keeps
+Django's default routing to its own database, so its items come from the
+archive too. A save or delete of an archived row is refused: archived
+letters are read-only, and only archive_letters() writes to the archive,
+through SQL of its own.
+"""
+from django.db import DatabaseError
+
+ARCHIVE = 'archive'
+ARCHIVED_MODELS = {'myapp.letter', 'myapp.letteritem'}
+
+
+class ArchiveReadOnlyError(DatabaseError):
+    """A save or delete of a row read from the archive database"""
+
+
+class ArchiveRouter:
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == ARCHIVE:
+            raise ArchiveReadOnlyError(f'{model._meta.object_name} {instance.pk} is archived and read-only')
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if ARCHIVE in (obj1._state.db, obj2._state.db):
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ARCHIVE:
+            return f'{app_label}.{model_name}' in ARCHIVED_MODELS
+        return None
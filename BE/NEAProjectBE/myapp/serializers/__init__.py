@@ -1,24 +1,34 @@
-from .office import OfficeSerializer
-from .branch import BranchSerializer
+from .office import OfficeSerializer, OfficeRowSerializer
+from .branch import BranchSerializer, BranchRowSerializer
 from .user import UserSignupSerializer, UserLoginSerializer, UserSerializer, CurrentUserSerializer
-from .employee import EmployeeSerializer
-from .receiver import ReceiverSerializer
-from .letter import LetterItemSerializer, LetterReceiverSerializer, LetterSerializer
-from .product import ProductSerializer
+from .employee import EmployeeSerializer, EmployeeRowSerializer
+from .receiver import ReceiverSerializer, ReceiverRowSerializer
+from .letter import LetterItemSerializer, LetterReceiverSerializer, LetterSerializer, LetterItemRowSerializer, LetterRowSerializer
+from .product import ProductSerializer, ProductRowSerializer
 from .dashboard import DashboardSerializer
+from .fast import RowSerializer, row_serializer_for
 
 __all__ = [
     'OfficeSerializer',
+    'OfficeRowSerializer',
     'BranchSerializer',
+    'BranchRowSerializer',
     'UserSignupSerializer',
     'UserLoginSerializer',
     'UserSerializer',
     'CurrentUserSerializer',
     'EmployeeSerializer',
+    'EmployeeRowSerializer',
     'ReceiverSerializer',
+    'ReceiverRowSerializer',
     'LetterItemSerializer',
     'LetterReceiverSerializer',
     'LetterSerializer',
+    'LetterItemRowSerializer',
+    'LetterRowSerializer',
     'ProductSerializer',
+    'ProductRowSerializer',
     'DashboardSerializer',
+    'RowSerializer',
+    'row_serializer_for',
 ]
@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from myapp.middleware.timing import phase
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer whose output time counts towards the 'serializer' Server-Timing phase"""
+
+    @property
+    def data(self):
+        with phase('serializer'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Count serializer output time towards the 'serializer' Server-Timing phase.
+    Pair with ``list_serializer_class = TimedListSerializer`` in Meta so that
+    ``many=True`` responses are timed as well.
+    """
+
+    @property
+    def data(self):
+        with phase('serializer'):
+            return super().data
+
+
+class SparseFieldsMixin:
+    """
+    Accept ``fields``: the names of the fields to return, in any order.
+    The serializer drops every other field; None keeps them all.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -1,12 +1,15 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from myapp.models import Branch
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer, index_serial
 
-class BranchSerializer(serializers.ModelSerializer):
+class BranchSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     serial_number = serializers.SerializerMethodField()
     
     class Meta:
         model = Branch
+        list_serializer_class = TimedListSerializer
         fields = [
             "serial_number",
             "id",
@@ -23,4 +26,9 @@ class BranchSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'branch_index_map'):
             return request.branch_index_map.get(obj.id, 0) + 1
-        return 0
\ No newline at end of file
+        return 0
+
+
+class BranchRowSerializer(RowSerializer):
+    serializer_class = BranchSerializer
+    method_fields = {'serial_number': index_serial('branch_index_map')}
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from myapp.models import Employee, Branch, EmployeeRole
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer, index_serial
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     serial_number = serializers.SerializerMethodField()
     branch_name = serializers.CharField(source="branch.name", read_only=True)
     organization_id = serializers.IntegerField(source="branch.organization_id", required=False)
@@ -11,6 +13,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Employee
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "first_name",
@@ -74,4 +77,9 @@ class EmployeeSerializer(serializers.ModelSerializer):
         if raw_pwd:
             obj.set_password(raw_pwd)
             obj.save(update_fields=["password", "updated_at"])
-        return obj
\ No newline at end of file
+        return obj
+
+
+class EmployeeRowSerializer(RowSerializer):
+    serializer_class = EmployeeSerializer
+    method_fields = {'serial_number': index_serial('employee_index_map')}
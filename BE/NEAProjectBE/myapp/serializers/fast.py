@@ -0,0 +1,261 @@
+"""
+Read-only fast path for list endpoints.
+
+A RowSerializer reproduces the output of a DRF serializer from `.values()`
+rows: no model instances, no serializer instances, no per-field method
+calls. The row-to-dict function is generated once per class from the
+serializer's own field list, so the output keeps its keys, key order and
+value types; a row then costs a dict literal plus the few conversions
+that actually change a value (datetimes, display labels, digits).
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+from myapp.middleware.timing import phase
+
+# DRF fields whose representation of a value loaded by .values() is that value
+PASSTHROUGH_FIELDS = (
+    drf_fields.CharField, drf_fields.ChoiceField, drf_fields.IntegerField, drf_fields.BooleanField,
+    drf_fields.ReadOnlyField, relations.PrimaryKeyRelatedField,
+)
+# Fields converted by the DRF field itself, bound once at compile time
+CONVERTED_FIELDS = (drf_fields.DateField, drf_fields.TimeField, drf_fields.DecimalField, drf_fields.FloatField)
+
+DISPLAY_SOURCE = re.compile(r'^get_(\w+)_display$')
+
+
+def index_serial(attr):
+    """Method field for `serial_number`: the row's position in the index map on the request, as the serializers compute it"""
+    def serial_number(row, context):
+        index_map = getattr(context.get('request'), attr, None)
+        return index_map.get(row['id'], 0) + 1 if index_map is not None else 0
+    return serial_number
+
+
+def iso_datetime(field):
+    """
+    DateTimeField.to_representation for aware datetimes in ISO 8601 with the
+    current timezone looked up once per page (`tz`) instead of once per value
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone'):
+        return lambda value, tz: field.to_representation(value)
+
+    def to_representation(value, tz):
+        if isinstance(value, str) or value.tzinfo is None or tz is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+class RowSerializer:
+    """
+    Subclasses set `serializer_class` and may set:
+
+    method_fields: {name: function(row, context)} for SerializerMethodFields
+    nested: {name: (RowSerializer subclass, foreign key name on the child)}
+        for many=True nested serializers, loaded with one query per page
+    convert: {name: function(value)} applied after the field's own conversion,
+        for serializers that post-process their representation
+    extra_fields: {name: (function(row, context), columns it reads)} appended
+        after the serializer's fields
+
+    `fields` limits the output to those names, as the serializer's own
+    `fields` argument does; every fieldset is compiled once.
+    """
+    serializer_class = None
+    method_fields = {}
+    nested = {}
+    convert = {}
+    extra_fields = {}
+
+    def __init__(self, context=None, fields=None):
+        self.context = context or {}
+        self.fields = tuple(fields) if fields is not None else None
+
+    @classmethod
+    def model(cls):
+        return cls.serializer_class.Meta.model
+
+    @classmethod
+    def compiled(cls, fields=None):
+        """(row_to_dict, columns) for a fieldset (None: every field), generated on first use"""
+        if '_compiled' not in cls.__dict__:
+            cls._compiled = {}
+        compiled = cls._compiled.get(fields)
+        if compiled is None:
+            compiled = cls._compiled[fields] = _compile(cls, fields)
+        return compiled
+
+    @classmethod
+    def columns(cls, fields=None):
+        return cls.compiled(fields)[1]
+
+    def queryset(self, queryset):
+        """`queryset` reduced to the columns the rows need"""
+        return queryset.prefetch_related(None).values(*self.columns(self.fields))
+
+    def nested_querysets(self, rows):
+        """(name, foreign key, queryset) of every nested list returned for `rows`"""
+        if not self.nested or not rows:
+            return
+        ids = [row['id'] for row in rows]
+        for name, (child, fk) in self.nested.items():
+            if self.fields is not None and name not in self.fields:
+                continue
+            yield name, fk, child.model()._default_manager.filter(**{f'{fk}__in': ids}).values(fk, *child.columns())
+
+    @staticmethod
+    def attach(rows, name, fk, children):
+        groups = {row['id']: [] for row in rows}
+        for child_row in children:
+            groups[child_row[fk]].append(child_row)
+        for row in rows:
+            row[name] = groups[row['id']]
+
+    def load_nested(self, rows):
+        """Attach the raw rows of every nested list, one query per nested field"""
+        for name, fk, children in self.nested_querysets(rows):
+            self.attach(rows, name, fk, children)
+
+    async def afetch(self, queryset):
+        """The rows of a `queryset()` with their nested lists, loaded through the async ORM"""
+        rows = [row async for row in queryset]
+        for name, fk, children in self.nested_querysets(rows):
+            self.attach(rows, name, fk, [child_row async for child_row in children])
+        return rows
+
+    def serialize(self, rows):
+        """The dicts the serializer would return for these rows"""
+        rows = list(rows)
+        self.load_nested(rows)
+        return self.represent(rows)
+
+    def represent(self, rows):
+        """The dicts for rows that already carry their nested lists"""
+        with phase('serializer'):
+            return self.to_representation(rows)
+
+    def to_representation(self, rows):
+        to_dict, _ = self.compiled(self.fields)
+        context = self.context
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [to_dict(row, context, tz) for row in rows]
+
+
+def _resolve(model, source):
+    """(column, model field, foreign key column or None) for a dotted source"""
+    parts = source.split('.')
+    fk_column = None
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None, None, None
+        if index < len(parts) - 1:
+            if not field.is_relation:
+                return None, None, None
+            fk_column = fk_column or part
+            model = field.related_model
+    return '__'.join(parts), field, fk_column
+
+
+def _compile(cls, selected):
+    model = cls.model()
+    fields = cls.serializer_class().fields
+    namespace = {}
+    columns = ['id']
+    items = []
+    nullable_parents = {}
+
+    def bind(value):
+        name = f'_f{len(namespace)}'
+        namespace[name] = value
+        return name
+
+    def use(column):
+        if column not in columns:
+            columns.append(column)
+        return f'row[{column!r}]'
+
+    for name, field in fields.items():
+        if field.write_only or (selected is not None and name not in selected):
+            continue
+        if name in cls.method_fields:
+            expr = f'{bind(cls.method_fields[name])}(row, context)'
+        elif name in cls.nested:
+            expr = f'[{bind(cls.nested[name][0].compiled()[0])}(child, context, tz) for child in row[{name!r}]]'
+        elif isinstance(field, serializers.BaseSerializer):
+            # Declared but absent from the model (like LetterSerializer.receiver): DRF skips it
+            if _resolve(model, field.source)[0] is None and not field.required:
+                continue
+            raise ImproperlyConfigured(f'{cls.__name__}: nested field {name!r} needs an entry in `nested`')
+        else:
+            display = DISPLAY_SOURCE.match(field.source)
+            if display:
+                model_field = model._meta.get_field(display.group(1))
+                labels = {value: str(label) for value, label in model_field.flatchoices}
+                expr = f'{bind(labels)}.get(v, v)'
+                column = display.group(1)
+                fk_column = None
+            else:
+                column, model_field, fk_column = _resolve(model, field.source)
+                if column is None:
+                    if field.required:
+                        raise ImproperlyConfigured(f'{cls.__name__}: cannot load {name!r} (source {field.source!r}) from a row')
+                    continue
+                if isinstance(field, drf_fields.DateTimeField):
+                    expr = f'{bind(iso_datetime(field))}(v, tz)'
+                elif isinstance(field, CONVERTED_FIELDS):
+                    expr = f'{bind(field.to_representation)}(v)'
+                elif isinstance(field, PASSTHROUGH_FIELDS):
+                    expr = 'v'
+                else:
+                    raise ImproperlyConfigured(f'{cls.__name__}: no row conversion for {type(field).__name__} {name!r}')
+            if expr == 'v':
+                expr = use(column)
+            else:
+                expr = f'(None if (v := {use(column)}) is None else {expr})'
+            if fk_column and not field.allow_null:
+                # DRF skips a dotted source whose relation is empty
+                if field.default is not drf_fields.empty:
+                    raise ImproperlyConfigured(f'{cls.__name__}: {name!r} has a default for an empty relation')
+                use(fk_column)
+                nullable_parents.setdefault(fk_column, []).append(name)
+        if name in cls.convert:
+            expr = f'{bind(cls.convert[name])}({expr})'
+        items.append(f'{name!r}: {expr}')
+
+    for name, (function, extra_columns) in cls.extra_fields.items():
+        if selected is not None and name not in selected:
+            continue
+        items.append(f'{name!r}: {bind(function)}(row, context)')
+        for column in extra_columns:
+            use(column)
+
+    lines = ['def to_dict(row, context, tz):', f"    data = {{{', '.join(items)}}}"]
+    for fk_column, names in nullable_parents.items():
+        lines.append(f'    if row[{fk_column!r}] is None:')
+        lines.extend(f'        del data[{name!r}]' for name in names)
+    lines.append('    return data')
+    exec(compile('\n'.join(lines), f'<{cls.__name__}>', 'exec'), namespace)
+    return namespace['to_dict'], tuple(columns)
+
+
+def row_serializer_for(view):
+    """
+    The view's `row_serializer_class` with its context and requested
+    fieldset, or None when the view has none or FAST_READ_PATH is off
+    """
+    row_serializer_class = getattr(view, 'row_serializer_class', None)
+    if row_serializer_class is None or not getattr(settings, 'FAST_READ_PATH', False):
+        return None
+    fields = view.requested_fields() if hasattr(view, 'requested_fields') else None
+    return row_serializer_class(context=view.get_serializer_context(), fields=fields)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from myapp.models import Letter, LetterItem, UnitOfMeasurement  
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer
 
 class LetterItemSerializer(serializers.ModelSerializer):
     unit_of_measurement = serializers.ChoiceField(
@@ -44,12 +46,13 @@ class LetterReceiverSerializer(serializers.Serializer):
             setattr(instance, attr, value)
         return instance
 
-class LetterSerializer(serializers.ModelSerializer):
+class LetterSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     items = LetterItemSerializer(many=True, required=False)
     receiver = LetterReceiverSerializer(required=False)
     
     class Meta:
         model = Letter
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'letter_count', 'chalani_no', 'voucher_no', 'date',
             'receiver_address', 'subject',
@@ -148,13 +151,10 @@ class LetterSerializer(serializers.ModelSerializer):
         """Convert English numerals back to Nepali in response and include receiver data"""
         representation = super().to_representation(instance)
         
-        # Convert numeric fields to Nepali
-        representation['letter_count'] = self._convert_english_to_nepali(representation['letter_count'])
-        representation['chalani_no'] = self._convert_english_to_nepali(representation['chalani_no'])
-        representation['voucher_no'] = self._convert_english_to_nepali(representation['voucher_no'])
-        representation['gatepass_no'] = self._convert_english_to_nepali(representation['gatepass_no'])
-        representation['request_chalani_number'] = self._convert_english_to_nepali(representation['request_chalani_number'])
-        representation['request_letter_count'] = self._convert_english_to_nepali(representation['request_letter_count'])
+        # Convert numeric fields to Nepali (those in the requested fieldset)
+        for field in ('letter_count', 'chalani_no', 'voucher_no', 'gatepass_no', 'request_chalani_number', 'request_letter_count'):
+            if field in representation:
+                representation[field] = self._convert_english_to_nepali(representation[field])
         
         # Convert items
         if 'items' in representation:
@@ -163,8 +163,10 @@ class LetterSerializer(serializers.ModelSerializer):
                 item['quantity'] = self._convert_english_to_nepali(item['quantity'])
         
         # Add receiver data to representation
+        if 'receiver' not in self.fields:
+            return representation
         representation['receiver'] = {
-            'id': representation['receiver_id'],
+            'id': instance.receiver_id,
             'name': instance.receiver_name,
             'post': instance.receiver_post,
             'id_card_number': instance.receiver_id_card_number,
@@ -181,10 +183,8 @@ class LetterSerializer(serializers.ModelSerializer):
         items_data = validated_data.pop('items', [])
         receiver_data = validated_data.pop('receiver', {})
         
-        # Create the letter instance with main fields
-        letter = Letter.objects.create(**validated_data)
-        
-        # Update receiver fields separately
+        # Create the letter instance with main and receiver fields in one insert
+        letter = Letter(**validated_data)
         if receiver_data:
             letter.receiver_name = receiver_data.get('name', '')
             letter.receiver_post = receiver_data.get('post', '')
@@ -194,12 +194,11 @@ class LetterSerializer(serializers.ModelSerializer):
             letter.receiver_office_address = receiver_data.get('office_address', '')
             letter.receiver_phone_number = receiver_data.get('phone_number', '')
             letter.receiver_vehicle_number = receiver_data.get('vehicle_number', '')
-            letter.save()
-        
-        # Create letter items
-        for item_data in items_data:
-            LetterItem.objects.create(letter=letter, **item_data)
-            
+        letter.save(force_insert=True)
+
+        # Create letter items with one insert however many there are
+        LetterItem.objects.bulk_create([LetterItem(letter=letter, **item_data) for item_data in items_data])
+
         return letter
     
     def update(self, instance, validated_data):
@@ -225,7 +224,55 @@ class LetterSerializer(serializers.ModelSerializer):
         # Update items if provided
         if items_data is not None:
             instance.items.all().delete()
-            for item_data in items_data:
-                LetterItem.objects.create(letter=instance, **item_data)
+            LetterItem.objects.bulk_create([LetterItem(letter=instance, **item_data) for item_data in items_data])
         
-        return instance
\ No newline at end of file
+        return instance
+
+
+ENGLISH_TO_NEPALI = str.maketrans('0123456789', '०१२३४५६७८९')
+
+# Letter columns behind the `receiver` object of a letter
+RECEIVER_COLUMNS = (
+    'receiver_id', 'receiver_name', 'receiver_post', 'receiver_id_card_number', 'receiver_id_card_type',
+    'receiver_office_name', 'receiver_office_address', 'receiver_phone_number', 'receiver_vehicle_number',
+)
+
+
+def _nepali(value):
+    """LetterSerializer._convert_english_to_nepali without the per-character dict lookups"""
+    if isinstance(value, str):
+        return value.translate(ENGLISH_TO_NEPALI)
+    if isinstance(value, (int, float)):
+        return str(value).translate(ENGLISH_TO_NEPALI)
+    return value
+
+
+def _receiver(row, context):
+    return {
+        'id': row['receiver_id'],
+        'name': row['receiver_name'],
+        'post': row['receiver_post'],
+        'id_card_number': row['receiver_id_card_number'],
+        'id_card_type': row['receiver_id_card_type'],
+        'office_name': row['receiver_office_name'],
+        'office_address': row['receiver_office_address'],
+        'phone_number': _nepali(row['receiver_phone_number']),
+        'vehicle_number': row['receiver_vehicle_number'],
+    }
+
+
+class LetterItemRowSerializer(RowSerializer):
+    serializer_class = LetterItemSerializer
+    convert = {'serial_number': _nepali, 'quantity': _nepali}
+
+
+class LetterRowSerializer(RowSerializer):
+    """LetterSerializer output, digits and receiver included, from `.values()` rows"""
+    serializer_class = LetterSerializer
+    nested = {'items': (LetterItemRowSerializer, 'letter')}
+    convert = {
+        field: _nepali for field in (
+            'letter_count', 'chalani_no', 'voucher_no', 'gatepass_no', 'request_chalani_number', 'request_letter_count'
+        )
+    }
+    extra_fields = {'receiver': (_receiver, RECEIVER_COLUMNS)}
@@ -1,12 +1,15 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from myapp.models import Office
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer, index_serial
 
-class OfficeSerializer(serializers.ModelSerializer):
+class OfficeSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     serial_number = serializers.SerializerMethodField()
     
     class Meta:
         model = Office
+        list_serializer_class = TimedListSerializer
         fields = [
             "serial_number",
             "id",
@@ -22,4 +25,9 @@ class OfficeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'office_index_map'):
             return request.office_index_map.get(obj.id, 0) + 1
-        return 0
\ No newline at end of file
+        return 0
+
+
+class OfficeRowSerializer(RowSerializer):
+    serializer_class = OfficeSerializer
+    method_fields = {'serial_number': index_serial('office_index_map')}
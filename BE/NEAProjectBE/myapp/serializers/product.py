@@ -1,12 +1,15 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from myapp.models import Product
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer, index_serial
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     serial_number = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
+        list_serializer_class = TimedListSerializer
         fields = "__all__"
 
     def validate(self, data):
@@ -35,4 +38,9 @@ class ProductSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'product_index_map'):
             return request.product_index_map.get(obj.id, 0) + 1
-        return 0
\ No newline at end of file
+        return 0
+
+
+class ProductRowSerializer(RowSerializer):
+    serializer_class = ProductSerializer
+    method_fields = {'serial_number': index_serial('product_index_map')}
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from myapp.models import Receiver
+from .base import SparseFieldsMixin, TimedSerializerMixin, TimedListSerializer
+from .fast import RowSerializer
 
-class ReceiverSerializer(serializers.ModelSerializer):
+class ReceiverSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     id_card_type_display = serializers.CharField(
         source="get_id_card_type_display",
         read_only=True
@@ -9,4 +11,9 @@ class ReceiverSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Receiver
-        fields = "__all__"
\ No newline at end of file
+        list_serializer_class = TimedListSerializer
+        fields = "__all__"
+
+
+class ReceiverRowSerializer(RowSerializer):
+    serializer_class = ReceiverSerializer
@@ -0,0 +1,14 @@
+from django.http import JsonResponse
+from django.urls import path
+
+from myapp.models import Employee
+
+
+def branch_names(request):
+    """Deliberately reads a foreign key per row without select_related"""
+    return JsonResponse({'names': [employee.branch.name for employee in Employee.objects.all()]})
+
+
+urlpatterns = [
+    path('branch-names/', branch_names),
+]
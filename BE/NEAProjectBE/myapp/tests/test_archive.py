@@ -0,0 +1,220 @@
+import io
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from myapp.archive import ArchiveError, archive_letters, archive_path, pending
+from myapp.backups import BackupStore
+from myapp.fiscal import current_fiscal_year, fiscal_year
+from myapp.models import Change, ChangeAction, Letter, LetterItem, User, UserRole
+from myapp.routers import ARCHIVE, ArchiveReadOnlyError
+from myapp.views import get_tokens_for_user
+
+# seed_db spreads the letters over the fiscal years 2078/79 to 2082/83
+LAST_FISCAL_YEAR = 2082
+
+
+def rows(model, using, **filters):
+    return list(model.objects.using(using).filter(**filters).order_by('pk').values())
+
+
+class FiscalYearTests(SimpleTestCase):
+    def test_current_fiscal_year(self):
+        # Shrawan 1 2082 was 17 July 2025; the days around it stay in 2081/82
+        self.assertEqual(current_fiscal_year(date(2025, 7, 1)), 2081)
+        self.assertEqual(current_fiscal_year(date(2025, 7, 16)), 2081)
+        self.assertEqual(current_fiscal_year(date(2025, 7, 17)), 2081)
+        self.assertEqual(current_fiscal_year(date(2025, 7, 18)), 2082)
+        self.assertEqual(current_fiscal_year(date(2026, 1, 1)), 2082)
+        self.assertEqual(current_fiscal_year(date(2026, 4, 20)), 2082)
+
+    def test_fiscal_year(self):
+        self.assertEqual(fiscal_year('2082-03-32'), 2081)
+        self.assertEqual(fiscal_year('2082-04-01'), 2082)
+        self.assertEqual(fiscal_year('2083-01-15'), 2082)
+
+
+class ArchiveTestCase(TransactionTestCase):
+    databases = {'default', ARCHIVE}
+
+    def setUp(self):
+        call_command('seed_db', scale=2, seed=3, last_fiscal_year=LAST_FISCAL_YEAR, stdout=io.StringIO())
+
+
+class ArchiveLettersTests(ArchiveTestCase):
+    def test_closed_fiscal_years_move_in_batches(self):
+        closed = Letter.objects.filter(date_key__lt=f'{LAST_FISCAL_YEAR}-04-01')
+        letters = rows(Letter, 'default', pk__in=closed)
+        items = rows(LetterItem, 'default', letter__in=closed)
+        live = set(Letter.objects.exclude(pk__in=closed).values_list('pk', flat=True))
+        self.assertEqual(sum(pending(LAST_FISCAL_YEAR).values()), len(letters))
+        self.assertEqual(set(pending(LAST_FISCAL_YEAR)), {fiscal_year(letter['date_key']) for letter in letters})
+
+        batches = []
+        totals = archive_letters(LAST_FISCAL_YEAR, batch_size=4, pause=0, progress=lambda *batch: batches.append(batch))
+        self.assertEqual(totals, {'letters': len(letters), 'items': len(items), 'batches': -(-len(letters) // 4)})
+        self.assertEqual(sum(letters for letters, _ in batches), len(letters))
+
+        # Every column is copied as it was, timestamps included
+        self.assertEqual(rows(Letter, ARCHIVE), letters)
+        self.assertEqual(rows(LetterItem, ARCHIVE), items)
+        self.assertEqual(set(Letter.objects.values_list('pk', flat=True)), live)
+        self.assertFalse(LetterItem.objects.filter(letter_id__in=[letter['id'] for letter in letters]).exists())
+        self.assertEqual(
+            set(Change.objects.filter(table='letters', action=ChangeAction.DELETED).values_list('object_id', flat=True)),
+            {letter['id'] for letter in letters},
+        )
+        self.assertEqual(archive_letters(LAST_FISCAL_YEAR, pause=0)['letters'], 0)
+
+    def test_archived_letters_are_read_only(self):
+        archive_letters(LAST_FISCAL_YEAR, pause=0)
+        letter = Letter.objects.using(ARCHIVE).first()
+        self.assertEqual(letter.items.count(), LetterItem.objects.using(ARCHIVE).filter(letter=letter).count())
+        letter.subject = 'changed'
+        with self.assertRaises(ArchiveReadOnlyError):
+            letter.save()
+        with self.assertRaises(ArchiveReadOnlyError):
+            letter.delete()
+        with self.assertRaises(ArchiveReadOnlyError):
+            letter.items.first().save()
+        self.assertNotEqual(Letter.objects.using(ARCHIVE).get(pk=letter.pk).subject, 'changed')
+
+    def test_not_inside_a_transaction(self):
+        with transaction.atomic(), self.assertRaisesMessage(ArchiveError, 'inside a transaction'):
+            archive_letters(LAST_FISCAL_YEAR)
+        self.assertFalse(Letter.objects.using(ARCHIVE).exists())
+
+    def test_open_fiscal_year_is_refused(self):
+        current = current_fiscal_year()
+        with self.assertRaisesMessage(ArchiveError, 'has not closed yet'):
+            archive_letters(current + 1)
+        with self.assertRaisesMessage(CommandError, 'has not closed yet'):
+            call_command('archive_letters', before=current + 1, stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, '--before'):
+            call_command('archive_letters', stdout=io.StringIO())
+        self.assertFalse(Letter.objects.using(ARCHIVE).exists())
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('archive_letters', before=LAST_FISCAL_YEAR, dry_run=True, stdout=out)
+        self.assertIn(f'{LAST_FISCAL_YEAR - 1}/{str(LAST_FISCAL_YEAR)[-2:]}:', out.getvalue())
+        self.assertFalse(Letter.objects.using(ARCHIVE).exists())
+
+        call_command('archive_letters', before=LAST_FISCAL_YEAR, batch_size=5, vacuum=True, stdout=out)
+        self.assertIn(f'Archived {Letter.objects.using(ARCHIVE).count()} letters', out.getvalue())
+        self.assertIn('Vacuumed the live database', out.getvalue())
+        call_command('archive_letters', before=LAST_FISCAL_YEAR, stdout=out)
+        self.assertIn('No live letters before fiscal year', out.getvalue())
+
+
+class IncludeArchivedTests(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        archive_letters(LAST_FISCAL_YEAR, pause=0)
+        self.archived = Letter.objects.using(ARCHIVE).order_by('-created_at', '-pk').first()
+        self.admin = User.objects.get(role=UserRole.ADMIN)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def letters(self, path):
+        """The letters on every page of `path`, in order"""
+        letters = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            letters.extend(response.json()['results']['data'])
+            path = response.json()['next']
+        return letters
+
+    def ids(self, path):
+        return [letter['id'] for letter in self.letters(path)]
+
+    def test_list(self):
+        live = list(Letter.objects.order_by('-created_at').values_list('pk', flat=True))
+        archived = list(Letter.objects.using(ARCHIVE).order_by('-created_at').values_list('pk', flat=True))
+        self.assertEqual(self.ids('/api/letters/?page_size=4'), live)
+        # The archived letters follow the live ones, across a page that holds both
+        self.assertNotEqual(len(live) % 4, 0)
+        self.assertEqual(self.ids('/api/letters/?page_size=4&include_archived=true'), live + archived)
+        self.assertEqual(self.ids('/api/letters/?fields=id&status=sent&include_archived=1'), [
+            *Letter.objects.filter(status='sent').order_by('-created_at').values_list('pk', flat=True),
+            *Letter.objects.using(ARCHIVE).filter(status='sent').order_by('-created_at').values_list('pk', flat=True),
+        ])
+
+        response = self.client.get('/api/letters/?include_archived=true&facets=status').json()
+        self.assertEqual(response['count'], len(live) + len(archived))
+        self.assertEqual(sum(facet['count'] for facet in response['facets']['status']), len(live) + len(archived))
+
+        # Each letter has its items, from its own database
+        letters = self.letters('/api/letters/?include_archived=true&page_size=7')
+        self.assertEqual(
+            [len(letter['items']) for letter in letters],
+            [Letter.objects.using(ARCHIVE if pk in archived else 'default').get(pk=pk).items.count() for pk in live + archived],
+        )
+
+    def test_retrieve_and_read_only(self):
+        path = f'/api/letters/{self.archived.pk}/'
+        self.assertEqual(self.client.get(path).status_code, 404)
+        response = self.client.get(f'{path}?include_archived=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['subject'], self.archived.subject)
+        self.assertEqual(len(response.json()['data']['items']), self.archived.items.count())
+
+        self.assertEqual(self.client.patch(path, {'subject': 'changed'}, format='json').status_code, 404)
+        response = self.client.patch(f'{path}?include_archived=true', {'subject': 'changed'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.delete(f'{path}?include_archived=true').status_code, 403)
+        self.assertEqual(self.client.post(f'{path}send/?include_archived=true').status_code, 403)
+        self.assertEqual(Letter.objects.using(ARCHIVE).get(pk=self.archived.pk).subject, self.archived.subject)
+
+    def test_async_views(self):
+        # The ASGI routes hand archive reads to the sync views
+        auth = {'Authorization': f"Bearer {get_tokens_for_user(self.admin)['access']}"}
+        for path in ('/api/letters/?include_archived=true&page=2', f'/api/letters/{self.archived.pk}/?include_archived=true'):
+            with self.settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+                response = async_to_sync(self.async_client.get)(path, headers=auth)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.json(), self.client.get(path).json())
+
+
+class ArchiveBackupTests(ArchiveTestCase):
+    def test_backup_and_restore_archived_letters(self):
+        archive_letters(LAST_FISCAL_YEAR, pause=0)
+        archived, archived_items = rows(Letter, ARCHIVE), rows(LetterItem, ARCHIVE)
+        self.assertTrue(archived)
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        # The test database is in memory: a file copy of it stands in for the live database
+        live = tmp / 'db.sqlite3'
+        connection.ensure_connection()
+        copy = sqlite3.connect(live)
+        connection.connection.backup(copy)
+        copy.close()
+        databases = {'default': live, ARCHIVE: archive_path()}
+        store = BackupStore(tmp / 'backups')
+        manifest = store.create(databases)
+        self.assertEqual(manifest['databases'][ARCHIVE]['source'], str(archive_path()))
+
+        db = sqlite3.connect(archive_path())
+        db.execute(f'DELETE FROM {LetterItem._meta.db_table}')
+        db.execute(f'DELETE FROM {Letter._meta.db_table}')
+        db.commit()
+        db.close()
+        self.assertFalse(Letter.objects.using(ARCHIVE).exists())
+
+        store.restore(manifest['id'], databases)
+        self.assertEqual(rows(Letter, ARCHIVE), archived)
+        self.assertEqual(rows(LetterItem, ARCHIVE), archived_items)
+        db = sqlite3.connect(live)
+        self.assertEqual(db.execute(f'SELECT count(*) FROM {Letter._meta.db_table}').fetchone()[0], Letter.objects.count())
+        db.close()
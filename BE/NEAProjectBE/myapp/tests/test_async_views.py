@@ -0,0 +1,111 @@
+import io
+from inspect import iscoroutinefunction
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import resolve
+from rest_framework.response import Response
+
+from myapp.models import Dashboard, Letter, User, UserRole
+from myapp.views import get_tokens_for_user
+
+ALL_ACTIVE = ('products', 'offices', 'branches', 'employees', 'receivers')
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class AsyncViewTests(TestCase):
+    """The async views return what the sync views return, through the ASGI URLconf"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=1, seed=12, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def setUp(self):
+        self.auth = f"Bearer {get_tokens_for_user(self.admin)['access']}"
+
+    def get_sync(self, path, data=None, **headers):
+        return self.client.get(path, data, headers={'Authorization': self.auth, **headers})
+
+    def get_async(self, path, data=None, **headers):
+        with self.settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+            return async_to_sync(self.async_client.get)(path, data, headers={'Authorization': self.auth, **headers})
+
+    def assertSameResponse(self, path, data=None, served_async=True, ignore=()):
+        expected = self.get_sync(path, data)
+        response = self.get_async(path, data)
+        # The async views return plain responses, rendered on the event loop
+        self.assertEqual(not isinstance(response, Response), served_async, path)
+        self.assertEqual(response.status_code, expected.status_code, (path, data, response.content))
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        body, expected_body = response.json(), expected.json()
+        for key in ignore:
+            body.pop(key), expected_body.pop(key)
+        self.assertEqual(body, expected_body)
+        return body
+
+    def test_routes(self):
+        for path in ('/api/letters/', f'/api/letters/{Letter.objects.first().pk}/', '/api/dashboard/', '/api/auth/me/',
+                     *(f'/api/{prefix}/all-active/' for prefix in ALL_ACTIVE)):
+            match = resolve(path, urlconf=settings.ASGI_URLCONF)
+            self.assertTrue(iscoroutinefunction(match.func), path)
+            self.assertEqual(match.url_name, resolve(path).url_name)
+        # Detail routes do not shadow extra actions
+        match = resolve('/api/letters/export_csv/', urlconf=settings.ASGI_URLCONF)
+        self.assertEqual(match.url_name, 'letter-export-csv')
+        self.assertFalse(iscoroutinefunction(match.func))
+
+    def test_letter_list(self):
+        for data in (
+            {}, {'page': 2}, {'status': 'draft'}, {'chalani_min': 3, 'chalani_max': 20},
+            {'fields': 'id,chalani_no,date'}, {'fields': 'id,items'}, {'expand': 'items', 'fields': 'id'},
+            {'facets': 'status,office_name'}, {'facets': 'status', 'status': 'sent'},
+            {'page': 999}, {'page': 'last'}, {'fields': 'nope'}, {'facets': 'nope'},
+        ):
+            self.assertSameResponse('/api/letters/', data)
+        with self.settings(FAST_READ_PATH=False):
+            self.assertSameResponse('/api/letters/', {'page': 2})
+
+    def test_letter_retrieve(self):
+        letter = Letter.objects.first()
+        body = self.assertSameResponse(f'/api/letters/{letter.pk}/')
+        self.assertEqual(body['data']['id'], letter.pk)
+        self.assertSameResponse(f'/api/letters/{letter.pk}/', {'fields': 'id,status'})
+        self.assertSameResponse('/api/letters/999999/')
+        self.assertSameResponse('/api/letters/abc/')
+
+    def test_all_active(self):
+        for prefix in ALL_ACTIVE:
+            body = self.assertSameResponse(f'/api/{prefix}/all-active/')
+            self.assertGreater(body['count'], 0)
+            self.assertSameResponse(f'/api/{prefix}/all-active/', {'fields': 'id'})
+        with self.settings(FAST_READ_PATH=False):
+            for prefix in ALL_ACTIVE:
+                self.assertSameResponse(f'/api/{prefix}/all-active/')
+
+    def test_dashboard_and_me(self):
+        # Both calls refresh the stored row
+        body = self.assertSameResponse('/api/dashboard/', ignore=('last_updated',))
+        self.assertEqual(body['total_letters'], Letter.objects.count())
+        self.assertEqual(Dashboard.objects.get().total_letters, Letter.objects.count())
+        self.assertEqual(self.assertSameResponse('/api/auth/me/')['email'], self.admin.email)
+
+    def test_unauthenticated(self):
+        self.auth = ''
+        for path in ('/api/letters/', '/api/dashboard/', '/api/auth/me/'):
+            self.assertSameResponse(path)
+            self.assertEqual(self.get_async(path).status_code, 401)
+
+    def test_other_methods_and_formats_use_the_sync_views(self):
+        with self.settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+            response = async_to_sync(self.async_client.post)(
+                '/api/letters/', {}, content_type='application/json', headers={'Authorization': self.auth})
+        self.assertEqual(response.status_code, 201)
+        self.assertIsInstance(response, Response)
+        self.assertTrue(self.get_async('/api/letters/export_csv/')['Content-Type'].startswith('text/csv'))
+
+        response = self.get_async('/api/letters/', Accept='text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
@@ -0,0 +1,320 @@
+import gzip
+import hashlib
+import io
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.backups import BackupError, BackupStore, retained
+from myapp.models import Product, User, UserRole
+from myapp.versions import data_version
+
+
+def make_database(path, rows=2000):
+    db = sqlite3.connect(path)
+    db.executescript(
+        'CREATE TABLE django_migrations (id INTEGER PRIMARY KEY, app TEXT, name TEXT, applied TEXT);'
+        'CREATE TABLE letter (id INTEGER PRIMARY KEY, body TEXT);'
+        "INSERT INTO django_migrations (app, name, applied) VALUES ('myapp', '0001_initial', ''), ('myapp', '0007_change', '');"
+    )
+    db.executemany('INSERT INTO letter (body) VALUES (?)', [(f'letter {i} ' * 20,) for i in range(rows)])
+    db.commit()
+    db.close()
+
+
+def count_letters(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute('SELECT count(*) FROM letter').fetchone()[0]
+    finally:
+        db.close()
+
+
+class TemporaryDatabaseMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.database = self.tmp / 'db.sqlite3'
+        make_database(self.database)
+        self.store = BackupStore(self.tmp / 'backups')
+
+
+@override_settings(BACKUP_PAGES_PER_STEP=8, BACKUP_STEP_PAUSE=0)
+class BackupStoreTests(TemporaryDatabaseMixin, SimpleTestCase):
+    def test_backup_round_trip(self):
+        manifest = self.store.create(self.database)
+        archive = self.store.archive_path(manifest['id'])
+        self.assertEqual(manifest['archive'], archive.name)
+        self.assertEqual(manifest['sha256'], hashlib.sha256(archive.read_bytes()).hexdigest())
+        self.assertLess(manifest['compressed_size'], manifest['size'])
+        self.assertEqual(manifest['migrations'], {'myapp': '0007_change'})
+        self.assertGreater(manifest['steps'], manifest['pages'] // 8 - 1)
+
+        copy = self.tmp / 'copy.sqlite3'
+        copy.write_bytes(gzip.decompress(archive.read_bytes()))
+        self.assertEqual(manifest['database_sha256'], hashlib.sha256(copy.read_bytes()).hexdigest())
+        self.assertEqual(count_letters(copy), 2000)
+        self.assertEqual([listed['id'] for listed in self.store.list()], [manifest['id']])
+        self.assertEqual(self.store.get(manifest['id'])['sha256'], manifest['sha256'])
+        self.assertEqual(list(self.store.directory.glob('.*.sqlite3*')), [])
+
+    @override_settings(BACKUP_PAGES_PER_STEP=1, BACKUP_STEP_PAUSE=0.002, BACKUP_MAX_RESTARTS=2)
+    def test_writers_commit_during_backup(self):
+        done = threading.Event()
+        waits = []
+
+        def writer():
+            db = sqlite3.connect(self.database, timeout=5)
+            while not done.is_set():
+                started = time.perf_counter()
+                db.execute("INSERT INTO letter (body) VALUES ('written during the backup')")
+                db.commit()
+                waits.append(time.perf_counter() - started)
+                time.sleep(0.01)
+            db.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            manifest = self.store.create(self.database)
+        finally:
+            done.set()
+            thread.join()
+        # Each commit restarted the page-by-page copy until it was finished in one step
+        self.assertGreater(len(waits), 2)
+        self.assertLess(max(waits), 1.0)
+        self.assertEqual(manifest['restarts'], 3)
+        copy = self.tmp / 'copy.sqlite3'
+        copy.write_bytes(gzip.decompress(self.store.archive_path(manifest['id']).read_bytes()))
+        self.assertGreaterEqual(count_letters(copy), 2000)
+
+    def test_restore(self):
+        manifest = self.store.create(self.database)
+        db = sqlite3.connect(self.database)
+        db.execute('DELETE FROM letter WHERE id > 10')
+        db.commit()
+        # A connection open across the restore reads the restored content
+        self.assertEqual(db.execute('SELECT count(*) FROM letter').fetchone()[0], 10)
+        self.assertEqual(self.store.restore(manifest['id'], self.database)['id'], manifest['id'])
+        self.assertEqual(db.execute('SELECT count(*) FROM letter').fetchone()[0], 2000)
+        db.close()
+
+        # An archive copied elsewhere restores by path, with its manifest when it is next to it
+        elsewhere = self.tmp / 'elsewhere'
+        elsewhere.mkdir()
+        archive = shutil.copy(self.store.archive_path(manifest['id']), elsewhere)
+        self.assertIsNone(self.store.restore(archive, self.database))
+        shutil.copy(self.store.directory / f"{manifest['id']}.json", elsewhere)
+        self.assertEqual(self.store.restore(archive, self.database)['id'], manifest['id'])
+
+    def test_archive_database(self):
+        archive = self.tmp / 'archive.sqlite3'
+        make_database(archive, rows=300)
+        databases = {'default': self.database, 'archive': archive}
+        manifest = self.store.create(databases)
+        self.assertEqual(list(manifest['databases']), ['archive'])
+        copy = manifest['databases']['archive']
+        self.assertEqual((copy['source'], copy['archive']), (str(archive), f"{manifest['id']}.archive.sqlite3.gz"))
+        self.assertEqual(copy['sha256'], hashlib.sha256(self.store.archive_path(manifest['id'], 'archive').read_bytes()).hexdigest())
+
+        for path in (self.database, archive):
+            db = sqlite3.connect(path)
+            db.execute('DELETE FROM letter')
+            db.commit()
+            db.close()
+        self.store.restore(manifest['id'], databases)
+        self.assertEqual((count_letters(self.database), count_letters(archive)), (2000, 300))
+
+        # A backup taken before there was an archive empties it: its live database has those letters
+        older = self.store.create(self.database)
+        self.assertEqual(older['databases'], {})
+        self.store.restore(older['id'], databases)
+        self.assertEqual((count_letters(self.database), count_letters(archive)), (2000, 0))
+
+        # A damaged archive copy stops the restore before either database is touched
+        self.store.archive_path(manifest['id'], 'archive').write_bytes(b'damaged')
+        with self.assertRaisesMessage(BackupError, 'checksum'):
+            self.store.restore(manifest['id'], databases)
+        self.assertEqual((count_letters(self.database), count_letters(archive)), (2000, 0))
+
+        self.assertEqual(self.store.prune({'last': 0}), [older['id'], manifest['id']])
+        self.assertEqual(list(self.store.directory.glob('*.gz')), [])
+
+    def test_damaged_backups_are_not_restored(self):
+        manifest = self.store.create(self.database)
+        archive = self.store.archive_path(manifest['id'])
+        data = bytearray(archive.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        archive.write_bytes(bytes(data))
+        db = sqlite3.connect(self.database)
+        db.execute('DELETE FROM letter')
+        db.commit()
+        db.close()
+        with self.assertRaisesMessage(BackupError, 'checksum'):
+            self.store.restore(manifest['id'], self.database)
+        with self.assertRaises(BackupError):
+            self.store.restore(str(archive), self.database)
+        self.assertEqual(count_letters(self.database), 0)
+        self.assertEqual(list(self.tmp.glob('.db.sqlite3.restore-*')), [])
+
+    def test_missing_database(self):
+        with self.assertRaisesMessage(BackupError, 'No database'):
+            self.store.create(self.tmp / 'missing.sqlite3')
+        self.assertFalse((self.tmp / 'missing.sqlite3').exists())
+
+    def test_retention(self):
+        now = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+        # One backup every 6 hours for 90 days
+        manifests = [
+            {'id': f'{(now - timedelta(hours=6 * n)):%Y%m%dT%H%M%S}-0000000{n % 10}',
+             'created_at': (now - timedelta(hours=6 * n)).isoformat()}
+            for n in range(360)
+        ]
+        keep = retained(manifests, {'last': 2, 'daily': 3, 'weekly': 2, 'monthly': 2})
+        kept = sorted(datetime.fromisoformat(m['created_at']) for m in manifests if m['id'] in keep)
+        self.assertEqual([f'{created:%m-%d %H}' for created in kept], [
+            '09-30 18',  # last month
+            '10-17 18',  # the third most recent day
+            '10-18 18',  # the day and the week before
+            '10-19 06', '10-19 12',  # the newest two; 10-19 12 is also this day, week and month
+        ])
+        self.assertEqual(retained(manifests, {}), set())
+
+    def test_prune(self):
+        ids = [self.store.create(self.database, prune=False)['id'] for _ in range(4)]
+        self.assertEqual(self.store.prune({'last': 2}), ids[1::-1])
+        self.assertEqual([manifest['id'] for manifest in self.store.list()], ids[:1:-1])
+        self.assertFalse(self.store.archive_path(ids[0]).exists())
+        with self.settings(BACKUP_RETENTION={'last': 1}):
+            self.assertEqual(self.store.create(self.database)['pruned'], ids[2:][::-1])
+
+
+@override_settings(BACKUP_STEP_PAUSE=0)
+class BackupCommandTests(TemporaryDatabaseMixin, TestCase):
+    def test_backup_and_restore_commands(self):
+        out = io.StringIO()
+        with mock.patch('myapp.backups.database_files', return_value={'default': self.database}):
+            call_command('backup_db', directory=str(self.store.directory), stdout=out)
+        self.assertIn('Backed up', out.getvalue())
+        backup_id = self.store.list()[0]['id']
+        call_command('backup_db', list=True, directory=str(self.store.directory), stdout=out)
+        self.assertIn(backup_id, out.getvalue())
+
+        db = sqlite3.connect(self.database)
+        db.execute('DELETE FROM letter')
+        db.commit()
+        db.close()
+        with mock.patch('myapp.management.commands.restore_db.database_files', return_value={'default': self.database}):
+            call_command('restore_db', 'latest', interactive=False, directory=str(self.store.directory), stdout=out)
+        self.assertIn(f'Restored {self.database} from backup {backup_id}', out.getvalue())
+        self.assertEqual(count_letters(self.database), 2000)
+        # The emptied content was backed up first
+        safety = self.store.list()[0]
+        self.assertEqual(safety['reason'], 'pre-restore')
+        self.assertNotEqual(safety['database_sha256'], self.store.get(backup_id)['database_sha256'])
+
+
+@override_settings(BACKUP_STEP_PAUSE=0, NPLUSONE_ENABLED=False)
+class RestoreChangeFeedTests(TransactionTestCase):
+    """restore_db run on a file copy of the test database, which is then copied back"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.database = self.tmp / 'db.sqlite3'
+        self.store = BackupStore(self.tmp / 'backups')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN))
+
+    def copy(self, to_file=True):
+        """Copy the test database to the file, or back"""
+        connection.ensure_connection()
+        db = sqlite3.connect(self.database)
+        try:
+            connection.connection.backup(db) if to_file else db.backup(connection.connection)
+        finally:
+            db.close()
+
+    def changes(self, since=None, status=200):
+        response = self.client.get('/api/changes/' if since is None else f'/api/changes/?since={since}')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def test_cursors_from_before_a_restore_are_gone(self):
+        Product.objects.create(name='Meter', company='NEA')
+        backup_cursor = self.changes()['cursor']
+        self.copy()
+        older = self.store.create(self.database)
+        Product.objects.create(name='Cable', company='NEA')
+        Product.objects.create(name='Pole', company='NEA')
+        cursor = self.changes()['cursor']
+        version = data_version(Product)
+
+        self.copy()
+        with mock.patch('myapp.management.commands.restore_db.database_files', return_value={'default': self.database}):
+            call_command('restore_db', older['id'], interactive=False, no_safety_backup=True,
+                         directory=str(self.store.directory), stdout=io.StringIO())
+        self.copy(to_file=False)
+        self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['Meter'])
+        self.assertNotEqual(data_version(Product), version)
+
+        # Both the cursor past the backup and the one it holds miss the restore
+        self.changes(cursor, status=410)
+        self.changes(backup_cursor, status=410)
+        # New entries never reuse the ids handed out before the restore
+        restored_cursor = self.changes()['cursor']
+        self.assertGreater(restored_cursor, cursor)
+        product = Product.objects.create(name='Transformer', company='NEA')
+        self.assertEqual(self.changes(restored_cursor)['data']['products']['upserted'][0]['id'], product.pk)
+
+
+class BackupEndpointTests(TemporaryDatabaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(BACKUP_DIR=self.store.directory, BACKUP_STEP_PAUSE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch('myapp.backups.database_files', return_value={'default': self.database})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN))
+
+    def test_create_list_and_download(self):
+        response = self.client.post('/api/backups/')
+        self.assertEqual(response.status_code, 201)
+        backup = response.json()['data']
+        self.assertEqual(backup['reason'], 'api')
+
+        listed = self.client.get('/api/backups/').json()
+        self.assertEqual((listed['count'], listed['data'][0]['id']), (1, backup['id']))
+        self.assertEqual(self.client.get(f"/api/backups/{backup['id']}/").json()['data']['sha256'], backup['sha256'])
+
+        download = self.client.get(f"/api/backups/{backup['id']}/download/")
+        self.assertEqual(download.status_code, 200)
+        self.assertIn(backup['archive'], download['Content-Disposition'])
+        body = b''.join(download.streaming_content)
+        self.assertEqual(hashlib.sha256(body).hexdigest(), backup['sha256'])
+        self.assertEqual(self.client.get(f"/api/backups/{backup['id']}/download/?database=archive").status_code, 404)
+        self.assertEqual(self.client.get('/api/backups/20250101T000000-0a/download/').status_code, 404)
+
+    def test_admins_only(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            email='creator@example.com', name='Creator', password='creator123', role=UserRole.CREATOR))
+        self.assertEqual(client.post('/api/backups/').status_code, 403)
+        self.assertEqual(client.get('/api/backups/').status_code, 403)
+        self.assertEqual(self.store.list(), [])
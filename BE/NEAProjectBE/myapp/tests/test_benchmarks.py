@@ -0,0 +1,113 @@
+from array import array
+from types import SimpleNamespace
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from myapp.benchmarks import Workload, compare, percentile, summarize
+from myapp.models import Letter, LetterItem, User, UserRole
+
+
+class ResultsTests(TestCase):
+    def test_percentile_interpolates(self):
+        values = [0.01 * i for i in range(1, 101)]
+        self.assertAlmostEqual(percentile(values, 0.5), 0.505)
+        self.assertAlmostEqual(percentile(values, 0.99), 0.9901)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_summarize_and_compare(self):
+        samples = [('letter_list', 0.010, 200, 500)] * 9 + [('letter_list', 0.100, 200, 500), ('dashboard', 0.020, 500, 50)]
+        summary = summarize(samples, wall_time=2.0)
+        self.assertEqual(summary['requests'], 11)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throughput_rps'], 5.5)
+        self.assertEqual(summary['operations']['letter_list']['p50_ms'], 10.0)
+        self.assertEqual(summary['operations']['dashboard']['errors'], 1)
+
+        faster = summarize([('letter_list', 0.005, 200, 500)] * 10, wall_time=1.0)
+        rows = compare({'runs': {'4': summary}}, {'runs': {'4': faster, '16': faster}})
+        p50 = [row for row in rows if row[1] == 'letter_list' and row[2] == 'p50_ms'][0]
+        self.assertEqual(p50, ('4', 'letter_list', 'p50_ms', 10.0, 5.0, -50.0))
+        self.assertFalse([row for row in rows if row[0] == '16'])
+
+
+class WorkloadTests(TestCase):
+    """The generated requests are accepted by the real endpoints"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.dataset = SimpleNamespace(
+            letter_ids=array('q', [1, 2, 3]),
+            bin_letters=0,
+            pages=1,
+            products=[(1, 'ट्रान्सफर्मर', 'सगरमाथा ट्रेडर्स', 'nos'), (2, 'तार', 'बुधनी सप्लायर्स', 'meter')],
+            receivers=[(1, 'Ram Thapa', 'Store Keeper', '12345', 'citizenship', 'NEA', 'Kathmandu', '9841234567', 'बा १ पा १२३४')],
+            offices=[(1, 'केन्द्रीय भण्डार')],
+        )
+
+    def send(self, request):
+        return self.client.generic(request.method, request.path, request.body or b'', content_type=request.content_type or 'application/octet-stream')
+
+    def test_same_seed_same_requests(self):
+        first = [Workload(self.dataset, seed=3).next() for _ in range(50)]
+        second = [Workload(self.dataset, seed=3).next() for _ in range(50)]
+        self.assertEqual([(r.op, r.path) for r in first], [(r.op, r.path) for r in second])
+
+    def test_letter_create_and_import_requests_succeed(self):
+        workload = Workload(self.dataset, seed=1, import_rows=6)
+
+        response = self.send(workload.letter_create())
+        self.assertEqual(response.status_code, 201, response.content)
+
+        response = self.send(workload.import_xlsx())
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['data']['total_rows_processed'], 6)
+        self.assertEqual(LetterItem.objects.count(), Letter.objects.get(status='sent').items.count() + 6)
+
+    def test_read_requests_succeed(self):
+        workload = Workload(self.dataset, seed=1)
+        for op in ('letter_list', 'all_active', 'dashboard', 'letter_creation_data', 'me'):
+            request = getattr(workload, op)()
+            self.assertEqual(self.send(request).status_code, 200, request.path)
+
+
+class MicroBenchmarkTests(TestCase):
+    def test_export_helpers(self):
+        from myapp.views.letter import normalize_date, to_number
+
+        self.assertEqual(to_number('१२३४५६'), 123456)
+        self.assertEqual(to_number('SN-००१२'), 12)
+        self.assertIsNone(to_number(''))
+        self.assertIsNone(to_number('-'))
+        self.assertEqual(normalize_date('२०८२-०७-१५'), '2082.07.15')
+        self.assertEqual(normalize_date('2082/7/15'), '2082/7/15')
+
+    def test_sample_payload_round_trips(self):
+        from myapp.benchmarks.micro import letter_payload, sample_letters
+        from myapp.serializers import LetterSerializer
+
+        letter = sample_letters(1, seed=1)[0]
+        payload = letter_payload(letter)
+        self.assertEqual(payload['chalani_no'], letter.chalani_no.translate(str.maketrans('0123456789', '०१२३४५६७८९')))
+        serializer = LetterSerializer(data=payload)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['chalani_no'], letter.chalani_no)
+        self.assertEqual(len(serializer.validated_data['items']), len(letter.items.all()))
+
+    def test_letter_rows_match_serializer(self):
+        from myapp.benchmarks.micro import letter_rows, sample_letters
+        from myapp.serializers import LetterRowSerializer, LetterSerializer
+
+        letters = sample_letters(5, seed=2)
+        self.assertEqual(LetterRowSerializer().to_representation(letter_rows(letters)), LetterSerializer(letters, many=True).data)
+
+    def test_run_benchmarks(self):
+        from myapp.benchmarks.micro import run_benchmarks
+
+        with self.assertNumQueries(0):
+            runs = run_benchmarks(['to_number', 'serialize_letters[10]'], min_time=0.001, repeat=3)
+        self.assertEqual(sorted(runs), ['serialize_letters[10]', 'to_number'])
+        self.assertGreater(runs['to_number']['median_us'], 0)
+        self.assertLessEqual(runs['to_number']['min_us'], runs['to_number']['median_us'])
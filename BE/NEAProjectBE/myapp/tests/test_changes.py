@@ -0,0 +1,100 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.models import Change, Letter, LetterStatus, Product, ProductStatus, Receiver, User, UserRole
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=1, seed=8, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def changes(self, since=None, status=200):
+        path = '/api/changes/' if since is None else f'/api/changes/?since={since}'
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def test_seeded_rows_are_logged(self):
+        self.assertEqual(Change.objects.filter(table='letters').count(), Letter.objects.count())
+        binned = Letter.objects.filter(status=LetterStatus.BIN).count()
+        self.assertEqual(Change.objects.filter(table='letters', action='deleted').count(), binned)
+
+    def test_deltas(self):
+        cursor = self.changes()['cursor']
+        self.assertEqual(cursor, Change.objects.latest('id').id)
+        self.assertEqual(self.changes(cursor)['data'], {})
+
+        product = self.client.post('/api/products/', {'name': 'मिटर', 'company': 'NEA'}, format='json').json()
+        self.client.patch(f"/api/products/{product['id']}/", {'remarks': 'updated'}, format='json')
+        letter = Letter.objects.exclude(status=LetterStatus.BIN).first()
+        self.client.delete(f'/api/letters/{letter.pk}/')
+        receiver = Receiver.objects.first()
+        self.client.delete(f'/api/receivers/{receiver.pk}/')
+
+        feed = self.changes(cursor)
+        self.assertGreater(feed['cursor'], cursor)
+        self.assertFalse(feed['has_more'])
+        self.assertEqual(set(feed['data']), {'products', 'letters', 'receivers'})
+        [row] = feed['data']['products']['upserted']
+        self.assertEqual((row['id'], row['remarks']), (product['id'], 'updated'))
+        self.assertNotIn('serial_number', row)
+        self.assertEqual(feed['data']['letters'], {'upserted': [], 'deleted': [letter.pk]})
+        self.assertEqual(feed['data']['receivers'], {'upserted': [], 'deleted': [receiver.pk]})
+        self.assertEqual(self.changes(feed['cursor'])['data'], {})
+
+        # Restored from the bin: back as an upsert with its items
+        self.client.post(f'/api/letters/{letter.pk}/restore/')
+        [row] = self.changes(feed['cursor'])['data']['letters']['upserted']
+        self.assertEqual(row['id'], letter.pk)
+        self.assertIn('items', row)
+
+    def test_bulk_writes_are_logged(self):
+        cursor = self.changes()['cursor']
+        ids = list(Product.objects.filter(status=ProductStatus.ACTIVE).values_list('id', flat=True)[:3])
+        self.client.post('/api/products/bulk_delete/', {'product_ids': ids}, format='json')
+        self.assertEqual(self.changes(cursor)['data']['products']['deleted'], sorted(ids))
+
+    def test_pages(self):
+        cursor = self.changes()['cursor']
+        products = list(Product.objects.order_by('id')[:5])
+        for product in products:
+            product.save()
+        seen = []
+        with self.settings(CHANGES_PAGE_SIZE=2):
+            while True:
+                feed = self.changes(cursor)
+                seen += [row['id'] for row in feed['data']['products']['upserted']]
+                cursor = feed['cursor']
+                if not feed['has_more']:
+                    break
+        self.assertEqual(seen, [product.pk for product in products])
+
+    def test_invalid_and_pruned_cursors(self):
+        self.changes('abc', status=400)
+        self.changes(-1, status=400)
+        # A cursor the log has not reached yet
+        self.changes(self.changes()['cursor'] + 1, status=410)
+        Product.objects.first().save()
+        call_command('prune_changes', days=0, stdout=io.StringIO())
+        self.assertEqual(Change.objects.count(), 1)
+        self.changes(0, status=410)
+        self.assertEqual(self.changes(Change.objects.get().id - 1)['data']['products']['upserted'][0]['id'], Product.objects.first().pk)
+
+    def test_cursor_reads_use_the_primary_key(self):
+        sql, params = Change.objects.filter(id__gt=10).order_by('id').values_list('id', 'table', 'object_id', 'action')[:501].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('PRIMARY KEY', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,158 @@
+import asyncio
+import gzip
+import io
+import json
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.middleware import CompressedCache, CompressionMiddleware, accepted_encoding
+from myapp.middleware import compression
+from myapp.models import User, UserRole
+
+BODY = json.dumps([{'id': i, 'name': 'ट्रान्सफर्मर', 'company': 'सगरमाथा ट्रेडर्स'} for i in range(200)], ensure_ascii=False)
+
+
+class AcceptedEncodingTests(SimpleTestCase):
+    def test_negotiation(self):
+        both = ('br', 'gzip')
+        self.assertEqual(accepted_encoding('gzip, deflate, br', both), 'br')
+        self.assertEqual(accepted_encoding('gzip, deflate, br', ('gzip',)), 'gzip')
+        self.assertEqual(accepted_encoding('br;q=0.5, gzip;q=0.8', both), 'gzip')
+        self.assertEqual(accepted_encoding('br;q=0, gzip', both), 'gzip')
+        self.assertEqual(accepted_encoding('x-gzip', both), 'gzip')
+        self.assertEqual(accepted_encoding('*', both), 'br')
+        self.assertEqual(accepted_encoding('*;q=0, identity', both), None)
+        self.assertEqual(accepted_encoding('deflate', both), None)
+        self.assertEqual(accepted_encoding('', both), None)
+        self.assertEqual(accepted_encoding('gzip;q=abc, br;q=0.1', both), 'br')
+
+
+class CompressedCacheTests(SimpleTestCase):
+    def test_least_recently_used_is_dropped(self):
+        cache = CompressedCache(max_bytes=10)
+        cache.set('a', b'1234')
+        cache.set('b', b'1234')
+        self.assertEqual(cache.get('a'), b'1234')
+        cache.set('c', b'1234')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'1234')
+        cache.set('d', b'x' * 11)
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual(cache.size, 8)
+
+
+@override_settings(COMPRESSION_CACHED_PATHS=[r'^/api/products/all-active/$'], COMPRESSION_MIN_BYTES=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, path='/api/letters/', accept='gzip', method='get'):
+        request = getattr(self.factory, method)(path, HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        response = self.run_middleware(HttpResponse(BODY, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(BODY.encode()) / 5)
+        self.assertEqual(gzip.decompress(response.content).decode(), BODY)
+
+    def test_sent_as_is(self):
+        small = '{"status": "ok"}'
+        cases = {
+            'small': (HttpResponse(small, content_type='application/json'), 'gzip', None),
+            'binary': (HttpResponse(BODY, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'), 'gzip', None),
+            'not accepted': (HttpResponse(BODY, content_type='application/json'), 'identity', None),
+            'encoded': (HttpResponse(BODY, content_type='application/json', headers={'Content-Encoding': 'br'}), 'gzip', 'br'),
+            'no-transform': (HttpResponse(BODY, content_type='application/json', headers={'Cache-Control': 'no-transform'}), 'gzip', None),
+        }
+        for name, (response, accept, encoding) in cases.items():
+            with self.subTest(name):
+                content = response.content
+                response = self.run_middleware(response, accept=accept)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response.content, content)
+        # Compressible but not accepted: caches still have to key on Accept-Encoding
+        self.assertEqual(self.run_middleware(HttpResponse(BODY, content_type='application/json'), accept='')['Vary'], 'Accept-Encoding')
+
+    def test_strong_etag_becomes_weak(self):
+        response = self.run_middleware(HttpResponse(BODY, content_type='application/json', headers={'ETag': '"abc"'}))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_streaming(self):
+        chunks = [f'{i},ट्रान्सफर्मर,सगरमाथा ट्रेडर्स\n'.encode() for i in range(500)]
+        response = self.run_middleware(StreamingHttpResponse(iter(chunks), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response.streaming_content)
+        # Every chunk is flushed, not buffered until the end
+        self.assertEqual(len(parts), len(chunks) + 1)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+    def test_async_streaming(self):
+        chunks = [b'data: %d\n\n' % i for i in range(3)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def read(response):
+            return [part async for part in response.streaming_content]
+
+        response = self.run_middleware(StreamingHttpResponse(stream(), content_type='text/plain'))
+        self.assertTrue(response.is_async)
+        self.assertEqual(gzip.decompress(b''.join(asyncio.run(read(response)))), b''.join(chunks))
+
+    def test_reference_data_is_compressed_once(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(BODY, content_type='application/json'))
+        codec = middleware.cache_codecs['gzip']
+        with mock.patch.object(codec, 'compress', wraps=codec.compress) as compress:
+            first = middleware(self.factory.get('/api/products/all-active/', HTTP_ACCEPT_ENCODING='gzip')).content
+            second = middleware(self.factory.get('/api/products/all-active/', HTTP_ACCEPT_ENCODING='gzip')).content
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(gzip.decompress(second).decode(), BODY)
+
+        # Other paths and changed content are compressed again
+        middleware(self.factory.get('/api/letters/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(len(middleware.cache.entries), 1)
+        middleware.get_response = lambda request: HttpResponse(BODY + ' ', content_type='application/json')
+        changed = middleware(self.factory.get('/api/products/all-active/', HTTP_ACCEPT_ENCODING='gzip')).content
+        self.assertEqual(gzip.decompress(changed).decode(), BODY + ' ')
+        self.assertEqual(len(middleware.cache.entries), 2)
+
+    @override_settings(COMPRESSION_ENABLED=False)
+    def test_disabled(self):
+        response = self.run_middleware(HttpResponse(BODY, content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli(self):
+        response = self.run_middleware(JsonResponse({'data': BODY}), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(compression.brotli.decompress(response.content))['data'], BODY)
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class CompressedEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=1, seed=2, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def test_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for path in ('/api/products/all-active/', '/api/letters/?page_size=10', '/api/letters/export_csv/'):
+            with self.subTest(path=path):
+                plain = client.get(path)
+                compressed = client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(compressed.status_code, 200)
+                self.assertEqual(compressed['Content-Encoding'], 'gzip')
+                self.assertIn('compress;dur=', compressed['Server-Timing'])
+                self.assertEqual(gzip.decompress(compressed.content), plain.content)
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import json
+import threading
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from myapp.events import Subscription, broadcaster
+from myapp.models import Letter, LetterStatus, Product, ProductStatus, User, UserRole
+from myapp.views import get_tokens_for_user
+from NEAProjectBE.asgi import application
+
+# Idle connections held open at once by the load test
+LOAD_CLIENTS = 300
+
+
+class EventStream:
+    """A GET /api/events/ driven straight through the ASGI application"""
+
+    def __init__(self, query, port, method='GET', headers=()):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': '/api/events/', 'raw_path': b'/api/events/',
+            'query_string': urlencode(query).encode(), 'root_path': '', 'headers': [(b'host', b'testserver'), *headers],
+            'client': ('127.0.0.1', port), 'server': ('testserver', 80),
+        }
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        self.buffer = b''
+
+    async def open(self):
+        """Send the request and return the response status"""
+        self.inbox.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        self.task = asyncio.create_task(application(self.scope, self.inbox.get, self.outbox.put))
+        start = await asyncio.wait_for(self.outbox.get(), 10)
+        self.headers = dict(start['headers'])
+        return start['status']
+
+    async def body(self):
+        while True:
+            message = await asyncio.wait_for(self.outbox.get(), 10)
+            self.buffer += message.get('body', b'')
+            if not message.get('more_body'):
+                return self.buffer
+
+    async def next_event(self):
+        """(event, data) of the next frame, or ('comment', text)"""
+        while b'\n\n' not in self.buffer:
+            message = await asyncio.wait_for(self.outbox.get(), 10)
+            self.buffer += message.get('body', b'')
+        frame, self.buffer = self.buffer.split(b'\n\n', 1)
+        fields = dict(line.split(': ', 1) for line in frame.decode().splitlines())
+        if '' in fields:
+            return 'comment', fields['']
+        return fields['event'], json.loads(fields['data'])
+
+    async def close(self):
+        self.inbox.put_nowait({'type': 'http.disconnect'})
+        await asyncio.wait_for(self.task, 10)
+
+
+@override_settings(NPLUSONE_ENABLED=False, SSE_POLL_INTERVAL=0.05)
+class ServerSentEventTests(TransactionTestCase):
+    """
+    Runs the event loop on the main thread as an ASGI server does, so the
+    ORM calls run in asgiref's worker thread and see only committed rows
+    """
+
+    def setUp(self):
+        call_command('seed_db', scale=1, seed=11, last_fiscal_year=2082, stdout=io.StringIO())
+        self.admin = User.objects.get(role=UserRole.ADMIN)
+        self.query = {'token': get_tokens_for_user(self.admin)['access']}
+
+    async def connect(self, port=1000, query=None, headers=()):
+        stream = EventStream(self.query if query is None else query, port, headers=headers)
+        self.assertEqual(await stream.open(), 200)
+        self.assertEqual(stream.headers[b'content-type'], b'text/event-stream')
+        return stream
+
+    async def next_event(self, stream, name):
+        while True:
+            event, data = await stream.next_event()
+            if event == name:
+                return data
+
+    def test_snapshot_then_letter_and_counter_events(self):
+        async def run():
+            stream = await self.connect()
+            event, counters = await stream.next_event()
+            self.assertEqual(event, 'counters')
+            self.assertEqual(counters['letters']['total'], await Letter.objects.acount())
+            self.assertEqual(counters['products']['active'], await Product.objects.filter(status=ProductStatus.ACTIVE).acount())
+
+            letter = await Letter.objects.filter(status=LetterStatus.DRAFT).afirst()
+            letter.status = LetterStatus.SENT
+            await sync_to_async(letter.save)()
+            self.assertEqual(await self.next_event(stream, 'letter'), {'id': letter.pk, 'action': 'updated', 'status': 'sent'})
+            changed = await self.next_event(stream, 'counters')
+            self.assertEqual(set(changed), {'letters'})
+            self.assertEqual(changed['letters']['sent'], counters['letters']['sent'] + 1)
+            self.assertEqual(changed['letters']['draft'], counters['letters']['draft'] - 1)
+            await stream.close()
+            self.assertEqual(broadcaster.subscribers, set())
+        asyncio.run(run())
+
+    def test_heartbeat(self):
+        async def run():
+            stream = await self.connect()
+            await stream.next_event()
+            self.assertEqual(await stream.next_event(), ('comment', 'ping'))
+            await stream.close()
+        with self.settings(SSE_HEARTBEAT=0.05):
+            asyncio.run(run())
+
+    def test_rejects_missing_tokens_and_wsgi(self):
+        async def run():
+            for query in ({}, {'token': 'not-a-token'}):
+                stream = EventStream(query, 1000)
+                self.assertEqual(await stream.open(), 401)
+                self.assertEqual(json.loads(await stream.body())['status'], 'error')
+        asyncio.run(run())
+        self.assertEqual(self.client.get('/api/events/', self.query).status_code, 503)
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=['http://localhost:5173'])
+    def test_cors_headers_match_the_api(self):
+        def api_headers(method, origin, **extra):
+            response = self.client.generic(method, '/api/letters/', HTTP_ORIGIN=origin, **extra)
+            return {name.lower(): value for name, value in response.items() if name.lower().startswith('access-control-')}
+
+        async def run():
+            for origin in ('http://localhost:5173', 'http://elsewhere.example'):
+                origin_header = [(b'origin', origin.encode())]
+                stream = await self.connect(headers=origin_header)
+                expected = await sync_to_async(api_headers)('GET', origin)
+                self.assertEqual({k.decode(): v.decode() for k, v in stream.headers.items() if k.startswith(b'access-control-')}, expected)
+                await stream.close()
+
+                preflight = EventStream({}, 1000, method='OPTIONS', headers=[
+                    *origin_header, (b'access-control-request-method', b'GET'), (b'access-control-request-headers', b'authorization'),
+                ])
+                self.assertEqual(await preflight.open(), 200)
+                expected = await sync_to_async(api_headers)('OPTIONS', origin, HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET',
+                                                            HTTP_ACCESS_CONTROL_REQUEST_HEADERS='authorization')
+                self.assertEqual({k.decode(): v.decode() for k, v in preflight.headers.items() if k.startswith(b'access-control-')}, expected)
+            self.assertEqual(stream.headers.get(b'access-control-allow-origin'), None)
+            self.assertEqual(preflight.headers[b'vary'], b'origin')
+
+            unauthenticated = EventStream({}, 1000, headers=[(b'origin', b'http://localhost:5173')])
+            self.assertEqual(await unauthenticated.open(), 401)
+            self.assertEqual(unauthenticated.headers[b'access-control-allow-origin'], b'http://localhost:5173')
+        asyncio.run(run())
+
+    def test_slow_subscribers_are_dropped(self):
+        subscription = Subscription(2)
+        for message in (b'1', b'2', b'3'):
+            subscription.put(message)
+        self.assertTrue(subscription.overflowed)
+
+    def test_load(self):
+        """Hundreds of idle streams share the event loop: no thread each, and every one gets the event"""
+        async def run():
+            first = await self.connect()
+            await first.next_event()
+            threads = threading.active_count()
+
+            streams = await asyncio.gather(*(self.connect(port=2000 + i) for i in range(LOAD_CLIENTS)))
+            await asyncio.gather(*(stream.next_event() for stream in streams))
+            self.assertEqual(len(broadcaster.subscribers), LOAD_CLIENTS + 1)
+            self.assertLess(threading.active_count() - threads, 5)
+
+            letter = await Letter.objects.filter(status=LetterStatus.DRAFT).afirst()
+            letter_id = letter.pk
+            await sync_to_async(letter.delete)()
+            received = await asyncio.gather(*(self.next_event(stream, 'letter') for stream in streams))
+            self.assertEqual(received, [{'id': letter_id, 'action': 'deleted', 'status': None}] * LOAD_CLIENTS)
+
+            await asyncio.gather(*(stream.close() for stream in [first, *streams]))
+            self.assertEqual(broadcaster.subscribers, set())
+        asyncio.run(run())
@@ -0,0 +1,121 @@
+import io
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.models import Employee, EmployeeStatus, Letter, LetterStatus, Product, ProductStatus, User, UserRole
+from myapp.versions import bump_version, data_version
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=2, seed=4, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries)
+
+    def counts(self, facet):
+        return {entry['value']: entry['count'] for entry in facet}
+
+    def test_counts_follow_the_filter(self):
+        data, _ = self.get('/api/letters/?status=draft&facets=office_name,status,sub_office')
+        drafts = Letter.objects.filter(status=LetterStatus.DRAFT)
+        self.assertEqual(data['count'], drafts.count())
+        self.assertEqual(self.counts(data['facets']['status']), {'draft': drafts.count()})
+        self.assertEqual(self.counts(data['facets']['office_name']), Counter(drafts.values_list('office_name', flat=True)))
+        self.assertEqual(self.counts(data['facets']['sub_office']), Counter(drafts.values_list('sub_office_name', flat=True)))
+        counts = [entry['count'] for entry in data['facets']['office_name']]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+    def test_replaces_the_stats_endpoints(self):
+        data, _ = self.get('/api/products/?facets=company')
+        company_stats = self.client.get('/api/products/company_stats/').json()
+        self.assertEqual(self.counts(data['facets']['company']), {row['company']: row['product_count'] for row in company_stats})
+
+        data, _ = self.get('/api/employees/?status=active&facets=role,branch')
+        active = Employee.objects.filter(status=EmployeeStatus.ACTIVE)
+        self.assertEqual(self.counts(data['facets']['role']), Counter(active.values_list('role', flat=True)))
+        self.assertEqual(self.counts(data['facets']['branch']), Counter(active.values_list('branch__name', flat=True)))
+
+    def test_one_query_then_cached(self):
+        self.assertGreater(Letter.objects.count(), 10)
+        _, plain = self.get('/api/letters/')
+        first, faceted = self.get('/api/letters/?facets=office_name,receiver_name')
+        self.assertEqual(faceted, plain + 1)
+        second, cached = self.get('/api/letters/?facets=office_name,receiver_name&page=2')
+        self.assertEqual(cached, plain)
+        self.assertEqual(first['facets'], second['facets'])
+        self.assertNotIn('facets', self.get('/api/letters/')[0])
+
+    def test_writes_invalidate(self):
+        data, _ = self.get('/api/products/?facets=status,unit_of_measurement')
+        before = self.counts(data['facets']['status'])[ProductStatus.ACTIVE]
+
+        product = Product.objects.filter(status=ProductStatus.ACTIVE).first()
+        self.client.delete(f'/api/products/{product.pk}/')
+        data, _ = self.get('/api/products/?facets=status,unit_of_measurement')
+        self.assertEqual(self.counts(data['facets']['status'])[ProductStatus.ACTIVE], before - 1)
+
+        ids = list(Product.objects.filter(status=ProductStatus.ACTIVE).values_list('pk', flat=True)[:3])
+        self.client.post('/api/products/bulk_delete/', {'product_ids': ids}, format='json')
+        data, _ = self.get('/api/products/?facets=status,unit_of_measurement')
+        self.assertEqual(self.counts(data['facets']['status'])[ProductStatus.ACTIVE], before - 4)
+
+    def test_related_table_versions(self):
+        employee = Employee.objects.filter(status=EmployeeStatus.ACTIVE).select_related('branch').first()
+        self.get('/api/employees/?facets=branch')
+        branch = employee.branch
+        branch.name = 'पुनः नामाकरण'
+        branch.save()
+        data, _ = self.get('/api/employees/?facets=branch')
+        self.assertIn('पुनः नामाकरण', self.counts(data['facets']['branch']))
+
+    def test_versions(self):
+        version = data_version(Letter)
+        bump_version(Letter)
+        self.assertGreater(data_version(Letter), version)
+        caches['versions'].clear()
+        self.assertNotEqual(data_version(Letter), version)
+
+    def test_versions_are_shared_between_processes(self):
+        plain = self.get('/api/letters/')[1]
+        before = self.get('/api/letters/?facets=status')[0]['facets']
+        self.assertEqual(self.get('/api/letters/?facets=status')[1], plain)
+        # Another worker process writes, and bumps the version this one reads
+        script = (
+            'import django; django.setup()\n'
+            'from myapp.models import Letter\n'
+            'from myapp.versions import bump_version\n'
+            'bump_version(Letter)\n'
+        )
+        subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, check=True, env=dict(
+            os.environ, DJANGO_SETTINGS_MODULE='NEAProjectBE.test_settings',
+            VERSIONS_CACHE_DIR=str(settings.CACHES['versions']['LOCATION'])))
+        data, queries = self.get('/api/letters/?facets=status')
+        self.assertEqual(queries, plain + 1)
+        self.assertEqual(data['facets'], before)
+
+    def test_unknown_facet(self):
+        response = self.client.get('/api/letters/?facets=status,subject')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('facets', response.json())
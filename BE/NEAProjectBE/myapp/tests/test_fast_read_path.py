@@ -0,0 +1,77 @@
+"""
+The row serializers behind FAST_READ_PATH return the same bytes as the DRF
+serializers they replace, on seeded data and on the edge cases seeding does
+not produce (null numbers, empty relations, letters without items).
+"""
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.models import Employee, Letter, LetterStatus, Receiver, User, UserRole
+from myapp.serializers import EmployeeRowSerializer, LetterRowSerializer
+
+PATHS = [
+    '/api/letters/',
+    '/api/letters/?page=2',
+    '/api/letters/?status=draft',
+    '/api/letters/?status=bin',
+    '/api/products/all-active/',
+    '/api/offices/all-active/',
+    '/api/receivers/all-active/',
+    '/api/branches/all-active/',
+    '/api/employees/all-active/',
+]
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class FastReadPathParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=2, seed=5, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+        # Values the seeder never writes
+        letter = Letter.objects.filter(status=LetterStatus.SENT).order_by('-created_at').first()
+        letter.chalani_no = None
+        letter.gatepass_no = None
+        letter.receiver_phone_number = ''
+        letter.save()
+        letter.items.all().delete()
+        Employee.objects.filter(pk=Employee.objects.filter(status='active').order_by('-created_at').first().pk).update(branch=None)
+        Receiver.objects.filter(pk=Receiver.objects.first().pk).update(id_card_type='passport')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, fast):
+        with self.settings(FAST_READ_PATH=fast):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content
+
+    def test_same_bytes(self):
+        for path in PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path, fast=True), self.get(path, fast=False))
+
+    def test_edge_cases_are_covered(self):
+        data = self.client.get('/api/letters/').json()['results']['data']
+        self.assertIn(None, [letter['chalani_no'] for letter in data])
+        self.assertIn([], [letter['items'] for letter in data])
+        employees = self.client.get('/api/employees/all-active/').json()['data']
+        self.assertTrue(any('organization_id' in employee for employee in employees))
+        self.assertTrue(any('organization_id' not in employee for employee in employees))
+
+    def test_fast_path_runs_fewer_queries(self):
+        with self.settings(FAST_READ_PATH=True), self.assertNumQueries(3):
+            # Count, page of letters, items of the page
+            self.client.get('/api/letters/?page=2')
+
+    def test_row_serializer_columns(self):
+        self.assertNotIn('items', LetterRowSerializer.columns())
+        self.assertIn('receiver_vehicle_number', LetterRowSerializer.columns())
+        self.assertNotIn('password', EmployeeRowSerializer.columns())
+        self.assertIn('branch', EmployeeRowSerializer.columns())
@@ -0,0 +1,146 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from myapp.frontend import brotli
+
+INDEX = '<!doctype html><html><head><script type="module" src="/assets/index-3f9a1c2b.js"></script></head>' \
+        '<body><div id="root"></div>' + '<!-- padding -->' * 100 + '</body></html>'
+SCRIPT = 'export const letters = [' + ','.join(f'{{"chalani_no": {n}}}' for n in range(500)) + '];\n'
+
+
+class FrontendTests(SimpleTestCase):
+    def setUp(self):
+        self.source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source)
+        self.build = self.source / 'dist'
+        (self.build / 'assets').mkdir(parents=True)
+        (self.build / 'fonts').mkdir()
+        (self.build / 'index.html').write_text(INDEX)
+        (self.build / 'assets' / 'index-3f9a1c2b.js').write_text(SCRIPT)
+        (self.build / 'vite.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+        (self.build / 'fonts' / 'kokila.ttf').write_bytes(bytes(4096))
+        (self.build / 'stale.js.gz').write_bytes(b'left over from an earlier build')
+        settings = self.settings(FRONTEND_DIR=self.source, FRONTEND_BUILD_DIR=self.build)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def build_frontend(self, *args):
+        out = io.StringIO()
+        call_command('build_frontend', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def get(self, path, encoding='gzip, deflate, br', **headers):
+        response = self.client.get(path, headers={'Accept-Encoding': encoding, **headers})
+        if response.streaming:
+            response.body = b''.join(response.streaming_content)
+            response.close()
+        return response
+
+    def test_precompress(self):
+        self.assertIn('Precompressed 4 files', self.build_frontend('--skip-npm'))
+        script = self.build / 'assets' / 'index-3f9a1c2b.js'
+        self.assertEqual(gzip.decompress(script.with_name(script.name + '.gz').read_bytes()).decode(), SCRIPT)
+        if brotli is not None:
+            self.assertEqual(brotli.decompress(script.with_name(script.name + '.br').read_bytes()).decode(), SCRIPT)
+        self.assertTrue((self.build / 'fonts' / 'kokila.ttf.gz').exists())
+        # Too small to be worth it
+        self.assertFalse((self.build / 'vite.svg.gz').exists())
+        self.assertFalse((self.build / 'stale.js.gz').exists())
+
+    def test_hashed_assets_are_immutable_and_precompressed(self):
+        self.build_frontend('--skip-npm')
+        for encoding, decompress in (('gzip', gzip.decompress), ('br', brotli and brotli.decompress)):
+            if decompress is None:
+                continue
+            response = self.get('/assets/index-3f9a1c2b.js', encoding=encoding)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertEqual(int(response['Content-Length']), len(response.body))
+            self.assertEqual(decompress(response.body).decode(), SCRIPT)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(response['Content-Type'], 'text/javascript; charset=utf-8')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertFalse(response.has_header('Content-Disposition'))
+
+        response = self.get('/assets/index-3f9a1c2b.js', encoding='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.body.decode(), SCRIPT)
+
+    def test_conditional_requests(self):
+        self.build_frontend('--skip-npm')
+        response = self.get('/', encoding='gzip')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        etag = response['ETag']
+        self.assertEqual(self.get('/', encoding='gzip', **{'If-None-Match': etag}).status_code, 304)
+        # Another representation has another ETag
+        self.assertEqual(self.get('/', encoding='identity', **{'If-None-Match': etag}).status_code, 200)
+
+    def test_single_page_app_fallback(self):
+        self.build_frontend('--skip-npm')
+        for path in ('/', '/letters/12', '/login/', '/reports/2082.83'):
+            response = self.get(path, encoding='identity', Accept='text/html')
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.body.decode(), INDEX)
+            self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+        self.assertEqual(self.get('/assets/index-00000000.js').status_code, 404)
+        self.assertEqual(self.get('/api/no-such-endpoint/').status_code, 404)
+        self.assertEqual(self.get('/admin').status_code, 301)
+        self.assertEqual(self.get('/healthz').json()['message'], 'Alive')
+
+    def test_small_files_are_sent_as_they_are(self):
+        self.build_frontend('--skip-npm')
+        response = self.get('/vite.svg')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertTrue(response.body.startswith(b'<svg'))
+
+    def test_new_build_is_picked_up(self):
+        self.build_frontend('--skip-npm')
+        self.assertEqual(self.get('/assets/index-3f9a1c2b.js').status_code, 200)
+        shutil.rmtree(self.build / 'assets')
+        (self.build / 'assets').mkdir()
+        (self.build / 'assets' / 'index-7d41e0aa.js').write_text(SCRIPT)
+        self.build_frontend('--skip-npm')
+        self.assertEqual(self.get('/assets/index-3f9a1c2b.js').status_code, 404)
+        self.assertEqual(self.get('/assets/index-7d41e0aa.js')['Content-Encoding'], 'br' if brotli else 'gzip')
+
+    def test_not_built(self):
+        shutil.rmtree(self.build)
+        self.assertEqual(self.get('/').status_code, 404)
+
+    def test_if_stale(self):
+        (self.source / 'src').mkdir()
+        (self.source / 'src' / 'main.tsx').write_text('')
+        past = (self.build / 'index.html').stat().st_mtime - 60
+        os.utime(self.source / 'src' / 'main.tsx', (past, past))
+        self.assertIn('up to date', self.build_frontend('--if-stale', '--skip-npm'))
+
+        os.utime(self.source / 'src' / 'main.tsx')
+        os.utime(self.build / 'index.html', (past, past))
+        self.assertIn('Precompressed', self.build_frontend('--if-stale', '--skip-npm'))
+
+    def test_static_files(self):
+        # The admin's and the browsable API's files, as collectstatic gathers them
+        static = self.source / 'static'
+        with self.settings(STATIC_ROOT=static):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            for path in ('/static/admin/css/base.css', '/static/rest_framework/css/bootstrap.min.css'):
+                response = self.get(path, encoding='identity', Accept='text/css')
+                self.assertEqual(response.status_code, 200, path)
+                self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+                self.assertEqual(response.body, (static / path.removeprefix('/static/')).read_bytes())
+                self.assertEqual(self.get(path, encoding='identity', **{'If-None-Match': response['ETag']}).status_code, 304)
+
+            self.assertEqual(self.get('/static/admin/css/missing.css').status_code, 404)
+            self.assertEqual(self.get('/static/../dist/index.html').status_code, 404)
+            self.assertEqual(self.get('/static/admin/css/', Accept='text/html').status_code, 404)
@@ -0,0 +1,146 @@
+import io
+import re
+from unittest import skipUnless
+from urllib.parse import quote
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.models import Letter, User, UserRole
+from myapp.models.letter import letter_date, letter_number
+
+NEPALI_DIGITS = str.maketrans('0123456789', '०१२३४५६७८९')
+
+# A read of the letter table that walks every row instead of an index
+FULL_SCAN = re.compile(r'\bSCAN myapp_letter\b(?! USING)')
+
+
+class NormalizedFieldTests(TestCase):
+    def test_keys(self):
+        self.assertEqual(letter_number('१२३'), 123)
+        self.assertEqual(letter_number('CH-०४५'), 45)
+        self.assertIsNone(letter_number(''))
+        self.assertIsNone(letter_number('९' * 30))
+        self.assertEqual(letter_date('२०८२-०७-१५'), '2082-07-15')
+        self.assertEqual(letter_date(' 2082-07-15 '), '2082-07-15')
+        self.assertEqual(letter_date('2082.07.15'), '')
+
+    def test_save_keeps_normalized_fields_in_step(self):
+        letter = Letter.objects.create(chalani_no='१२', voucher_no='7', date='२०८२-०१-०२')
+        letter.refresh_from_db()
+        self.assertEqual((letter.chalani_number, letter.voucher_number, letter.gatepass_number), (12, 7, None))
+        self.assertEqual(letter.date_key, '2082-01-02')
+        letter.chalani_no = '१३'
+        letter.save(update_fields=['chalani_no'])
+        letter.refresh_from_db()
+        self.assertEqual(letter.chalani_number, 13)
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class LetterFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=2, seed=9, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+        cls.letter = Letter.objects.order_by('pk')[5]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, path):
+        """Ids of the letters on every page of `path`"""
+        ids = set()
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids.update(letter['id'] for letter in response.json()['results']['data'])
+            path = response.json()['next']
+        return ids
+
+    def test_seeded_letters_are_normalized(self):
+        self.assertFalse(Letter.objects.filter(chalani_number__isnull=True).exists())
+        self.assertFalse(Letter.objects.filter(date_key='').exists())
+
+    def test_filters(self):
+        letter = self.letter
+        low, high = letter.chalani_number - 2, letter.chalani_number + 2
+        cases = {
+            f'office={letter.office_id}': Letter.objects.filter(office_id=letter.office_id),
+            f'sub_office={letter.sub_office_name}': Letter.objects.filter(sub_office_name=letter.sub_office_name),
+            f'receiver={letter.receiver_id}': Letter.objects.filter(receiver_id=letter.receiver_id),
+            f'receiver_name={letter.receiver_name}': Letter.objects.filter(receiver_name=letter.receiver_name),
+            f'chalani_min={low}&chalani_max={high}': Letter.objects.filter(chalani_number__range=(low, high)),
+            f'chalani_min={quote(str(low).translate(NEPALI_DIGITS))}': Letter.objects.filter(chalani_number__gte=low),
+            f'voucher_max={letter.voucher_number}&status=draft': Letter.objects.filter(voucher_number__lte=letter.voucher_number, status='draft'),
+            f'gatepass_min={letter.gatepass_number}': Letter.objects.filter(gatepass_number__gte=letter.gatepass_number),
+            f'date_from={letter.date}&date_to={letter.date_key}': Letter.objects.filter(date_key=letter.date_key),
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                expected = set(expected.values_list('id', flat=True))
+                self.assertTrue(expected)
+                self.assertEqual(self.ids(f'/api/letters/?fields=id&{query}'), expected)
+
+    def test_invalid_values(self):
+        for query in ('date_from=2082/01/01', 'chalani_min=abc', 'status=archived'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/letters/?{query}').status_code, 400)
+
+    def test_date_range_actions_match_the_python_comparison(self):
+        start, end = '2081-10-01', '2082-03-30'
+        expected = {
+            letter.id for letter in Letter.objects.all()
+            if start <= letter.date.translate(str.maketrans('०१२३४५६७८९', '0123456789')) <= end
+        }
+        self.assertEqual(self.ids(f'/api/letters/by-date-range/?start_date={start}&end_date={end}'), expected)
+        response = self.client.get(f'/api/letters/export_csv/?from={start}&to={end}')
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_every_frontend_filter_uses_an_index(self):
+        letter = self.letter
+        date = letter.date_key
+        requests = [
+            # AllLetters, LettersBin and the letter form
+            ('get', '/api/letters/?page=1', None),
+            ('get', '/api/letters/?page=1&status=bin', None),
+            ('get', f'/api/letters/by-date-range/?start_date={date}&end_date={date}', None),
+            ('get', '/api/letters/export_csv/?status=bin', None),
+            ('get', '/api/letters/export_xlsx/', None),
+            ('post', '/api/letters/export_xlsx_by_date/', {'start_date': date, 'end_date': date}),
+            ('get', '/api/letters/letter-creation-data/', None),
+            ('get', '/api/dashboard/', None),
+        ] + [
+            # Every LetterFilter filter, alone and with a status
+            ('get', f'/api/letters/?{query}{status}', None)
+            for query in (
+                f'office={letter.office_id}', f'office_name={letter.office_name}',
+                f'sub_office={letter.sub_office_name}', f'receiver={letter.receiver_id}',
+                f'receiver_name={letter.receiver_name}', 'chalani_min=5&chalani_max=10',
+                'voucher_min=5', 'gatepass_max=10', f'date_from={date}', f'date_to={date}',
+            )
+            for status in ('', '&status=draft')
+        ]
+        for method, path, body in requests:
+            with self.subTest(path=path):
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.client, method)(path, body, format='json')
+                self.assertIn(response.status_code, (200, 404), response.content)
+                letter_queries = [query['sql'] for query in queries if 'FROM "myapp_letter"' in query['sql']]
+                self.assertTrue(letter_queries)
+                for sql in letter_queries:
+                    plan = self.explain(sql)
+                    self.assertIsNone(FULL_SCAN.search(plan), f'{sql}\n{plan}')
+
+        # import-xlsx looks letters up by chalani_no
+        sql, params = Letter.objects.filter(chalani_no__in=['१', '२']).query.sql_with_params()
+        self.assertIn('letter_chalani_no_idx', self.explain(sql, params))
+
+    def explain(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
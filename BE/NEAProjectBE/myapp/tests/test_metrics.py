@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from myapp.middleware.metrics import BUCKETS, MetricsStore, quantile, render_prometheus
+from myapp.models import User, UserRole
+
+
+class MetricsStoreTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_aggregates_across_worker_files(self):
+        store = MetricsStore(self.directory.name, flush_interval=0)
+        store.inc('db_queries_total', {'route': 'letter-list'}, 3)
+        store.observe('http_request_duration_seconds', {'route': 'letter-list', 'method': 'GET', 'status': '200'}, 0.02)
+
+        # Another worker's file
+        other = [0] * (len(BUCKETS) + 1)
+        other[BUCKETS.index(0.5)] = 1
+        Path(self.directory.name, '99999.json').write_text(json.dumps({
+            'counters': [['db_queries_total', [['route', 'letter-list']], 4]],
+            'histograms': [['http_request_duration_seconds',
+                            [['method', 'GET'], ['route', 'letter-list'], ['status', '200']],
+                            {'buckets': other, 'sum': 0.4, 'count': 1}]],
+        }))
+
+        counters, histograms = store.collect()
+        self.assertEqual(counters[('db_queries_total', (('route', 'letter-list'),))], 7)
+        histogram = histograms[('http_request_duration_seconds', (('method', 'GET'), ('route', 'letter-list'), ('status', '200')))]
+        self.assertEqual(histogram['count'], 2)
+        self.assertLessEqual(quantile(histogram, 0.99), 0.5)
+
+        text = render_prometheus(counters, histograms)
+        self.assertIn('db_queries_total{route="letter-list"} 7', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="letter-list",status="200",le="+Inf"} 2', text)
+
+    def test_workers_with_the_same_pid_keep_their_counts(self):
+        first = MetricsStore(self.directory.name, flush_interval=0)
+        first.inc('db_queries_total', {'route': 'letter-list'}, 3)
+        first.flush()
+        # A later worker that was given the same pid
+        second = MetricsStore(self.directory.name, flush_interval=0)
+        second.inc('db_queries_total', {'route': 'letter-list'}, 1)
+        counters, _ = second.collect()
+        self.assertEqual(counters[('db_queries_total', (('route', 'letter-list'),))], 4)
+
+    def test_exited_workers_are_folded(self):
+        script = (
+            'import django; django.setup()\n'
+            'from myapp.middleware.metrics import MetricsStore\n'
+            f'store = MetricsStore({self.directory.name!r}, flush_interval=0)\n'
+            "store.inc('db_queries_total', {'route': 'letter-list'}, 2)\n"
+            'store.flush()\n'
+        )
+        store = MetricsStore(self.directory.name, flush_interval=0)
+        for _ in range(3):
+            subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, check=True,
+                           env=dict(os.environ, DJANGO_SETTINGS_MODULE='NEAProjectBE.test_settings'))
+            counters, _ = store.collect()
+            self.assertEqual(sorted(path.name for path in Path(self.directory.name).glob('*.json')),
+                             sorted(['exited.json', f'{store.name}.json']))
+        self.assertEqual(counters[('db_queries_total', (('route', 'letter-list'),))], 6)
+
+
+class MetricsEndpointTests(TestCase):
+    def test_requests_show_up_on_metrics_endpoint(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN)
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.get('/api/letters/')
+        client.get('/api/dashboard/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('route="letter-list"', body)
+        self.assertIn('route="dashboard-list"', body)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
@@ -0,0 +1,76 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.middleware import NPlusOneError, detect_n_plus_one, fingerprint
+from myapp.models import Branch, Employee, Letter, LetterItem, LetterStatus, User, UserRole
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_placeholders_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'O''Brien'"),
+            fingerprint('SELECT  *  FROM t WHERE id = %s AND name = %s'),
+        )
+
+    def test_in_lists_of_any_length_match(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+
+class NPlusOneDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN
+        )
+        for b in range(6):
+            branch = Branch.objects.create(name=f'Branch {b}', email=f'branch{b}@example.com')
+            Employee.objects.create(
+                branch=branch, first_name='Ram', last_name=f'Thapa {b}', email=f'ram{b}@example.com'
+            )
+            letter = Letter.objects.create(chalani_no=str(b), subject=f'Letter {b}')
+            LetterItem.objects.create(letter=letter, name='Meter', company='NEA', serial_number=str(b), quantity='1')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_detects_lazy_foreign_key_loop(self):
+        with self.assertRaises(NPlusOneError) as ctx:
+            with detect_n_plus_one(threshold=3):
+                [employee.branch.name for employee in Employee.objects.all()]
+        self.assertIn('test_nplusone.py', str(ctx.exception))
+
+    def test_select_related_passes(self):
+        with detect_n_plus_one(threshold=3) as collector:
+            [employee.branch.name for employee in Employee.objects.select_related('branch')]
+        self.assertEqual(collector.offenders(), [])
+
+    def test_middleware_fails_repeated_queries(self):
+        with self.assertRaises(NPlusOneError):
+            with override_settings(ROOT_URLCONF='myapp.tests.nplusone_urls'):
+                self.client.get('/branch-names/')
+
+    def test_employee_endpoints(self):
+        for url in [
+            '/api/employees/',
+            '/api/employees/all-active/',
+            '/api/employees/export_csv/',
+            '/api/employees/export_csv_simple/',
+            '/api/employees/search/?q=Ram',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_letter_status_actions(self):
+        letter = Letter.objects.first()
+        for action in ['send', 'draft', 'restore']:
+            with self.subTest(action=action):
+                if action == 'restore':
+                    # Only a letter in the bin can be restored
+                    Letter.objects.filter(pk=letter.pk).update(status=LetterStatus.BIN)
+                response = self.client.post(f'/api/letters/{letter.id}/{action}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['data']['items']), 1)
@@ -0,0 +1,58 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.models import User, UserRole
+from myapp.views import get_tokens_for_user
+
+
+class RequestProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN
+        )
+        cls.viewer = User.objects.create_user(
+            email='viewer@example.com', name='Viewer', password='viewer123', role=UserRole.VIEWER
+        )
+
+    def setUp(self):
+        self.report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.report_dir.cleanup)
+        overrides = override_settings(PROFILER_REPORT_DIR=self.report_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+        return client
+
+    def test_admin_gets_report_and_can_list_it(self):
+        client = self.client_for(self.admin)
+        for mode in ['1', 'cprofile', 'sample']:
+            with self.subTest(mode=mode):
+                data = client.get(f'/api/letters/?profile={mode}').json()['data']
+                self.assertEqual(data['status_code'], 200)
+                self.assertGreater(data['query_count'], 0)
+                self.assertTrue(data['profile'])
+
+        listing = client.get('/api/profiles/').json()
+        self.assertEqual(listing['count'], 3)
+        report_id = listing['data'][0]['id']
+        self.assertEqual(client.get(f'/api/profiles/{report_id}/').json()['data']['id'], report_id)
+
+    def test_other_values_leave_profiling_off(self):
+        client = self.client_for(self.admin)
+        for mode in ['0', 'false', 'off', '']:
+            with self.subTest(mode=mode):
+                response = client.get(f'/api/letters/?profile={mode}')
+                self.assertEqual(response.json()['results']['message'], 'Letters retrieved successfully')
+        self.assertEqual(client.get('/api/profiles/').json()['count'], 0)
+
+    def test_non_admin_gets_normal_response(self):
+        client = self.client_for(self.viewer)
+        response = client.get('/api/letters/?profile=1')
+        self.assertEqual(response.json()['results']['message'], 'Letters retrieved successfully')
+        self.assertEqual(client.get('/api/profiles/').status_code, 403)
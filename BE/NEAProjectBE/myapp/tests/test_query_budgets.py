@@ -0,0 +1,372 @@
+"""
+Query budgets for every router endpoint and custom action.
+
+Each case names a request, the status expected for the admin, creator and
+viewer roles and the most queries the request may run. One test checks the
+budget for every role; the other replays the admin requests against a
+larger database, a larger page size and larger request bodies and fails
+when any query count changed, with a diff of the queries that were added.
+"""
+import difflib
+import io
+import json
+import re
+from collections import Counter, namedtuple
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.client import MULTIPART_CONTENT, encode_multipart, BOUNDARY
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from myapp.middleware import fingerprint
+from myapp.models import (
+    Branch, BranchStatus, Change, ChangeAction, Employee, EmployeeStatus, Letter, LetterStatus, Office, OfficeStatus,
+    Product, ProductStatus, Receiver, User, UserRole,
+)
+from myapp.versions import data_version
+from myapp.views.auth import get_tokens_for_user
+
+# Savepoint names carry a per-transaction counter and a multi-row insert has
+# one VALUES group per row: neither should make two statements look different
+SAVEPOINT_ID = re.compile(r'"s\d+_x\d+"')
+VALUES_ROWS = re.compile(r'\(\.\.\.\)(, \(\.\.\.\))+')
+
+NEPALI_DIGITS = str.maketrans('0123456789', '०१२३४५६७८९')
+
+ROLES = ('admin', 'creator', 'viewer')
+
+# Body sizes and page sizes of the small and the large replay
+SMALL, LARGE = 2, 20
+SMALL_PAGE, LARGE_PAGE = 5, 50
+
+Case = namedtuple('Case', 'method path statuses budget body', defaults=(None,))
+
+
+def expect(admin, creator=None, viewer=None):
+    """Expected status per role; creator defaults to admin's and viewer to 403"""
+    return {'admin': admin, 'creator': admin if creator is None else creator, 'viewer': 403 if viewer is None else viewer}
+
+
+READ = expect(200, 200, 200)
+ADMIN_ONLY = expect(200, 403)
+
+
+def json_body(data):
+    return {'data': json.dumps(data), 'content_type': 'application/json'}
+
+
+def file_body(name, content, content_type):
+    upload = SimpleUploadedFile(name, content, content_type=content_type)
+    return {'data': encode_multipart(BOUNDARY, {'file': upload}), 'content_type': MULTIPART_CONTENT}
+
+
+def letter_body(ids, size):
+    from myapp.benchmarks.micro import letter_payload, sample_letters
+
+    payload = letter_payload(sample_letters(1, seed=5)[0])
+    item = payload['items'][0]
+    payload['items'] = [dict(item, serial_number=str(700000 + i).translate(NEPALI_DIGITS)) for i in range(size)]
+    return json_body(payload)
+
+
+def import_xlsx_body(ids, size):
+    from myapp.benchmarks import Workload
+
+    request = Workload(ids.dataset, seed=size, import_rows=size).import_xlsx()
+    return {'data': request.body, 'content_type': request.content_type}
+
+
+def import_csv_body(ids, size):
+    rows = ['name,company,remarks,unit_of_measurement,status,sku']
+    rows += [f'Imported {i},NEA,,nos,active,IMP{i:06d}' for i in range(size)]
+    return file_body('products.csv', '\n'.join(rows).encode(), 'text/csv')
+
+
+def crud(resource, body, budgets, destroy=200, creator_writes=True):
+    """
+    Cases for the ModelViewSet routes of `resource`, whose detail id is
+    `{resource}`; `budgets` are for list, create, retrieve, update and destroy.
+    """
+    list_, create, retrieve, update, delete = budgets
+    write = lambda ok: expect(ok, ok if creator_writes else 403)
+    return {
+        f'{resource}-list': Case('GET', f'/api/{resource}/', READ, list_),
+        f'{resource}-create': Case('POST', f'/api/{resource}/', write(201), create, body),
+        f'{resource}-retrieve': Case('GET', f'/api/{resource}/{{{resource}}}/', READ, retrieve),
+        f'{resource}-update': Case('PUT', f'/api/{resource}/{{{resource}}}/', write(200), update, body),
+        f'{resource}-partial-update': Case('PATCH', f'/api/{resource}/{{{resource}}}/', write(200), update, body),
+        f'{resource}-destroy': Case('DELETE', f'/api/{resource}/{{{resource}}}/', write(destroy), delete),
+    }
+
+
+def product_body(ids, size):
+    return json_body({'name': f'Meter {size}', 'company': 'NEA', 'unit_of_measurement': 'nos'})
+
+
+def office_body(ids, size):
+    return json_body({'name': f'Office {size}', 'address': 'Kathmandu', 'email': f'office-{size}@example.com', 'phone_number': '01-4412345'})
+
+
+def receiver_body(ids, size):
+    return json_body({'name': f'Ram Thapa {size}', 'post': 'Store Keeper', 'phone_number': '9841234567'})
+
+
+def branch_body(ids, size):
+    return json_body({'name': f'Branch {size}', 'email': f'branch-{size}@example.com', 'address': 'Pokhara', 'phone_number': '061-123456'})
+
+
+def employee_body(ids, size):
+    return json_body({'first_name': 'Sita', 'last_name': f'Sharma {size}', 'email': f'sita-{size}@example.com', 'role': 'creator', 'organization_id': ids.organization})
+
+
+def user_body(ids, size):
+    return json_body({'email': f'user-{size}@example.com', 'name': f'User {size}', 'role': 'viewer'})
+
+
+# Every request runs one query to load the user of the JWT; saves add a
+# SAVEPOINT/RELEASE pair where the view is atomic and one change log insert
+# per write to a synced table. Deleting a user also clears the seven tables
+# that reference it.
+CASES = {
+    **crud('letters', letter_body, (4, 7, 3, 10, 5)),
+    'letters-send': Case('POST', '/api/letters/{draft_letter}/send/', expect(200), 5),
+    'letters-draft': Case('POST', '/api/letters/{sent_letter}/draft/', expect(200), 5),
+    'letters-restore': Case('POST', '/api/letters/{bin_letter}/restore/', expect(200), 5),
+    'letters-stats': Case('GET', '/api/letters/stats/', READ, 5),
+    'letters-by-date-range': Case('GET', '/api/letters/by-date-range/?start_date=2000-01-01&end_date=2100-12-30', READ, 6),
+    'letters-letter-creation-data': Case('GET', '/api/letters/letter-creation-data/', READ, 2),
+    'letters-export-csv': Case('GET', '/api/letters/export_csv/', READ, 3),
+    'letters-export-xlsx': Case('GET', '/api/letters/export_xlsx/', READ, 3),
+    'letters-export-xlsx-by-date': Case('POST', '/api/letters/export_xlsx_by_date/', expect(200), 3,
+                                        lambda ids, size: json_body({'start_date': '2000-01-01', 'end_date': '2100-12-30'})),
+    'letters-letter-template': Case('GET', '/api/letters/letter-template/', ADMIN_ONLY, 1),
+    'letters-import-xlsx': Case('POST', '/api/letters/import-xlsx/', expect(201, 403), 7, import_xlsx_body),
+
+    **crud('products', product_body, (2, 5, 2, 5, 4)),
+    'products-restore': Case('POST', '/api/products/{bin_product}/restore/', expect(200), 5),
+    'products-active-count': Case('GET', '/api/products/active_count/', READ, 2),
+    'products-bin-count': Case('GET', '/api/products/bin_count/', READ, 2),
+    'products-company-stats': Case('GET', '/api/products/company_stats/', READ, 2),
+    'products-all-active': Case('GET', '/api/products/all-active/', READ, 2),
+    'products-export-csv': Case('GET', '/api/products/export_csv/', READ, 2),
+    'products-export-csv-simple': Case('GET', '/api/products/export_csv_simple/', READ, 2),
+    'products-import-template': Case('GET', '/api/products/import_template/', READ, 1),
+    'products-import-csv': Case('POST', '/api/products/import_csv/', expect(201), 7, import_csv_body),
+    'products-bulk-delete': Case('POST', '/api/products/bulk_delete/', expect(200), 6,
+                                 lambda ids, size: json_body({'product_ids': ids.product_ids[:size]})),
+
+    **crud('offices', office_body, (2, 3, 2, 4, 4)),
+    'offices-restore': Case('POST', '/api/offices/{bin_office}/restore/', expect(200), 4),
+    'offices-all-active': Case('GET', '/api/offices/all-active/', READ, 2),
+    'offices-export-csv': Case('GET', '/api/offices/export_csv/', READ, 2),
+
+    **crud('receivers', receiver_body, (3, 3, 2, 4, 4), destroy=204),
+    'receivers-all-active': Case('GET', '/api/receivers/all-active/', READ, 3),
+    'receivers-export-csv': Case('GET', '/api/receivers/export_csv/', READ, 2),
+
+    **crud('branches', branch_body, (2, 5, 2, 5, 4)),
+    'branches-restore': Case('POST', '/api/branches/{bin_branch}/restore/', expect(200), 4),
+    'branches-all-active': Case('GET', '/api/branches/all-active/', READ, 2),
+    'branches-export-csv': Case('GET', '/api/branches/export_csv/', READ, 2),
+
+    **crud('employees', employee_body, (2, 8, 2, 8, 4), creator_writes=False),
+    'employees-restore': Case('POST', '/api/employees/{bin_employee}/restore/', expect(200, 403), 4),
+    'employees-active-count': Case('GET', '/api/employees/active_count/', READ, 2),
+    'employees-bin-count': Case('GET', '/api/employees/bin_count/', READ, 2),
+    'employees-role-stats': Case('GET', '/api/employees/role_stats/', READ, 2),
+    'employees-branch-stats': Case('GET', '/api/employees/branch_stats/', READ, 2),
+    'employees-search': Case('GET', '/api/employees/search/?q=a', READ, 2),
+    'employees-all-active': Case('GET', '/api/employees/all-active/', READ, 2),
+    'employees-export-csv': Case('GET', '/api/employees/export_csv/', READ, 2),
+    'employees-export-csv-simple': Case('GET', '/api/employees/export_csv_simple/', READ, 2),
+    'employees-by-organization': Case('GET', '/api/employees/by-organization-id/{organization}/', READ, 3),
+    'employees-export-by-organization': Case('GET', '/api/employees/export-by-organization/{organization}/', READ, 3),
+
+    **crud('users', user_body, (3, 3, 2, 4, 9), destroy=204, creator_writes=False),
+
+    'dashboard-list': Case('GET', '/api/dashboard/', READ, 11),
+    'dashboard-export-csv': Case('GET', '/api/dashboard/export_csv/', READ, 11),
+    'profiles-list': Case('GET', '/api/profiles/', ADMIN_ONLY, 1),
+    'profiles-retrieve': Case('GET', '/api/profiles/20250101T000000-0a/', expect(404, 403), 1),
+    'slow-queries-list': Case('GET', '/api/slow-queries/', ADMIN_ONLY, 1),
+    'backups-list': Case('GET', '/api/backups/', ADMIN_ONLY, 1),
+    'backups-retrieve': Case('GET', '/api/backups/20250101T000000-0a/', expect(404, 403), 1),
+    'changes-list': Case('GET', '/api/changes/?since=0', READ, 9),
+}
+
+
+def statement(sql):
+    return VALUES_ROWS.sub('(...)', SAVEPOINT_ID.sub('"s_x"', fingerprint(sql)))
+
+
+def describe(queries):
+    """'count x fingerprint' lines in the order the statements first ran"""
+    counts = Counter(statement(query['sql']) for query in queries)
+    return [f'{count:3d} x {sql}' for sql, count in counts.items()]
+
+
+@override_settings(NPLUSONE_ENABLED=False, SLOW_QUERY_THRESHOLD_MS=60_000)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=2, seed=3, last_fiscal_year=2082, stdout=io.StringIO())
+        User.objects.filter(email='admin@example.com').update(is_staff=True)
+        cls.users = {role: User.objects.get(email=f'{role}@example.com') for role in ROLES}
+
+        def pair(model, bin_status):
+            first, second = model.objects.filter(status='active').order_by('id')[:2]
+            model.objects.filter(pk=second.pk).update(status=bin_status)
+            return first.pk, second.pk
+
+        letters = Letter.objects.order_by('id')
+        Letter.objects.filter(pk=letters[0].pk).update(status=LetterStatus.DRAFT)
+        Letter.objects.filter(pk=letters[1].pk).update(status=LetterStatus.SENT)
+        Letter.objects.filter(pk=letters[2].pk).update(status=LetterStatus.BIN)
+        product, bin_product = pair(Product, ProductStatus.BIN)
+        office, bin_office = pair(Office, OfficeStatus.BIN)
+        branch, bin_branch = pair(Branch, BranchStatus.BIN)
+        employee, bin_employee = pair(Employee, EmployeeStatus.BIN)
+        other = User.objects.create_user(email='other@example.com', name='Other', password='other123', role=UserRole.VIEWER)
+
+        cls.ids = SimpleNamespace(
+            letters=letters[1].pk, draft_letter=letters[0].pk, sent_letter=letters[1].pk, bin_letter=letters[2].pk,
+            products=product, bin_product=bin_product, offices=office, bin_office=bin_office,
+            branches=branch, bin_branch=bin_branch, employees=employee, bin_employee=bin_employee,
+            receivers=Receiver.objects.order_by('id').first().pk, users=other.pk,
+            organization=Branch.objects.get(pk=branch).organization_id,
+            product_ids=list(Product.objects.filter(status=ProductStatus.ACTIVE).values_list('id', flat=True)[:LARGE]),
+            # import-xlsx draws products and receivers from a benchmark dataset
+            dataset=SimpleNamespace(
+                products=list(Product.objects.values_list('id', 'name', 'company', 'unit_of_measurement')[:20]),
+                receivers=list(Receiver.objects.values_list(
+                    'id', 'name', 'post', 'id_card_number', 'id_card_type', 'office_name', 'office_address',
+                    'phone_number', 'vehicle_number')[:20]),
+            ),
+        )
+
+    def setUp(self):
+        self.clients = {}
+        for role, user in self.users.items():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+            self.clients[role] = client
+
+    def path(self, case):
+        return case.path.format(**vars(self.ids))
+
+    def request(self, role, case, size):
+        """Run `case` as `role` in a rolled back transaction; return the response and its queries"""
+        path = self.path(case)
+        body = case.body(self.ids, size) if case.body else {}
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                response = self.clients[role].generic(case.method, path, **body)
+            transaction.set_rollback(True)
+        return response, captured.captured_queries
+
+    def test_requests_stay_within_budget(self):
+        for name, case in CASES.items():
+            for role in ROLES:
+                with self.subTest(name, role=role):
+                    response, queries = self.request(role, case, SMALL)
+                    self.assertEqual(response.status_code, case.statuses[role], response.content[:500])
+                    if len(queries) > case.budget:
+                        extra = '\n'.join(f'  {query["sql"][:300]}' for query in queries[case.budget:])
+                        self.fail(
+                            f'{case.method} {self.path(case)} as {role} ran {len(queries)} queries, budget {case.budget}:\n'
+                            + '\n'.join(describe(queries)) + f'\nqueries over budget:\n{extra}'
+                        )
+
+    def test_query_counts_do_not_grow(self):
+        with mock.patch.object(PageNumberPagination, 'page_size', SMALL_PAGE):
+            small = {name: self.request('admin', case, SMALL)[1] for name, case in CASES.items()}
+
+        call_command('seed_db', scale=8, seed=4, last_fiscal_year=2082, stdout=io.StringIO())
+        with mock.patch.object(PageNumberPagination, 'page_size', LARGE_PAGE):
+            large = {name: self.request('admin', case, LARGE)[1] for name, case in CASES.items()}
+
+        failures = []
+        for name, case in CASES.items():
+            before, after = describe(small[name]), describe(large[name])
+            if before != after:
+                diff = difflib.unified_diff(before, after, f'{name} ({len(small[name])} queries)',
+                                            f'{name} grown ({len(large[name])} queries)', lineterm='')
+                failures.append('\n'.join(diff))
+        if failures:
+            self.fail(
+                'Query counts grew with page size, data or body size:\n\n' + '\n\n'.join(failures)
+            )
+
+
+class BatchedImportTests(TestCase):
+    """The imports look rows up in bulk but skip duplicates as they did row by row"""
+
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def import_xlsx(self, rows):
+        from openpyxl import Workbook
+        from myapp.benchmarks.workload import IMPORT_HEADERS
+
+        wb = Workbook()
+        wb.active.append(IMPORT_HEADERS)
+        for chalani, name, serial, quantity in rows:
+            wb.active.append([1, chalani, chalani, '2082.04.01', chalani, '-', 'केन्द्रीय भण्डार', '', name, 'NEA', serial, 'nos', '-',
+                              quantity, 'Ram Thapa', 'Thapa', 'Store Keeper', '९८४१२३४५६७', '', '', ''])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        upload = SimpleUploadedFile('letters.xlsx', buffer.getvalue())
+        response = self.client.post('/api/letters/import-xlsx/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['data']
+
+    def test_import_xlsx_skips_duplicate_items(self):
+        rows = [('11', 'Meter', 'SN1', '1'), ('11', 'Meter', 'SN1', '5'), ('11', 'Cable', '-', '2'), ('11', 'Cable', '-', '2'), ('12', 'Meter', 'SN1', '1')]
+        data = self.import_xlsx(rows)
+        self.assertEqual((data['inserted_letters'], data['inserted_items'], data['skipped_rows']), (2, 3, 2))
+        self.assertEqual(Letter.objects.get(chalani_no='11').receiver_phone_number, '9841234567')
+
+        letter = Letter.objects.get(chalani_no='11')
+        version = data_version(Letter)
+        data = self.import_xlsx(rows + [('11', 'Cable', '-', '3')])
+        self.assertEqual((data['inserted_letters'], data['inserted_items'], data['skipped_rows']), (0, 1, 5))
+        self.assertEqual(letter.items.count(), 3)
+        # The letter that got an item is logged as updated and the cached letter pages go stale
+        self.assertEqual(Change.objects.filter(object_id=letter.pk, action=ChangeAction.UPDATED).count(), 1)
+        self.assertNotEqual(data_version(Letter), version)
+
+    def test_import_csv_skips_duplicates_and_taken_skus(self):
+        Product.objects.create(name='Meter', company='NEA', sku='SKU1')
+        rows = 'name,company,status,sku\nMeter,NEA,active,\nCable,NEA,active,SKU1\nCable,NEA,active,SKU2\nCable,NEA,active,\nPole,NEA,bin,\nPole,NEA,active,\n'
+        upload = SimpleUploadedFile('products.csv', rows.encode(), content_type='text/csv')
+        response = self.client.post('/api/products/import_csv/', {'file': upload}, format='multipart')
+
+        results = response.json()['results']
+        self.assertEqual((results['successful'], results['failed'], results['duplicates_skipped']), (3, 1, 2))
+        self.assertEqual(Product.objects.filter(name='Pole').count(), 2)
+        self.assertFalse(Product.objects.filter(sku__isnull=True).exists())
+
+    def test_import_csv_keeps_the_rows_around_a_failing_one(self):
+        # A row the database refuses, which the checks before the insert do not catch
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TRIGGER refuse_broken BEFORE INSERT ON {Product._meta.db_table} "
+                "WHEN NEW.name = 'Broken' BEGIN SELECT RAISE(ABORT, 'broken row'); END"
+            )
+        rows = 'name,company\nMeter,NEA\nBroken,NEA\nCable,NEA\n'
+        upload = SimpleUploadedFile('products.csv', rows.encode(), content_type='text/csv')
+        response = self.client.post('/api/products/import_csv/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        results = response.json()['results']
+        self.assertEqual((results['successful'], results['failed']), (2, 1))
+        self.assertEqual(results['errors'], ['Row 3: broken row'])
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['Cable', 'Meter'])
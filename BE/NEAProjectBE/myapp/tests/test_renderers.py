@@ -0,0 +1,106 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from myapp import renderers
+from myapp.models import User, UserRole
+from myapp.renderers import FastJSONParser, FastJSONRenderer, json_backend
+
+PAYLOAD = {
+    'status': 'success',
+    'data': [
+        ReturnDict({
+            'id': 1,
+            'chalani_no': '१२३४',
+            'subject': 'विद्युत सामग्री खरिद "quoted" \\ /',
+            'created_at': datetime.datetime(2025, 7, 1, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2025, 7, 1),
+            'time': datetime.time(10, 30, 15, 500000),
+            'amount': Decimal('12.50'),
+            'label': gettext_lazy('Active'),
+            'items': (1, 2.5, None, True),
+            'control': '\x00\t\n\u2028\u2029',
+        }, serializer=None),
+    ],
+    7: 'integer key',
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_bytes_as_drf(self):
+        self.assertEqual(json_backend(), 'orjson')
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+        self.assertIn('विद्युत'.encode(), FastJSONRenderer().render(PAYLOAD))
+
+    def test_falls_back_to_drf(self):
+        big = {'id': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(big), b'{"id":1180591620717411303424}')
+        indented = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(indented, b'{\n  "a": 1\n}')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+    def test_backend_setting(self):
+        with override_settings(JSON_BACKEND='json'), mock.patch.object(renderers, '_orjson_dumps') as dumps:
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+        dumps.assert_not_called()
+        with override_settings(JSON_BACKEND='simplejson'), self.assertRaises(ImproperlyConfigured):
+            json_backend()
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(json_backend(), 'json')
+            with override_settings(JSON_BACKEND='orjson'), self.assertRaises(ImproperlyConfigured):
+                json_backend()
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, body, parser=FastJSONParser):
+        return parser().parse(io.BytesIO(body), 'application/json', {})
+
+    def test_same_data_as_drf(self):
+        body = '{"chalani_no": "१२३४", "items": [{"quantity": 2, "price": 1.5}], "big": 1180591620717411303424}'.encode()
+        self.assertEqual(self.parse(body), self.parse(body, JSONParser))
+
+    def test_invalid_json(self):
+        for body in (b'{"a": ', b'{"a": NaN}', b'\xff'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self.parse(body)
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class ResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=1, seed=2, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def test_backends_return_same_bytes(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for path in ('/api/letters/', '/api/products/all-active/', '/api/receivers/all-active/'):
+            with self.subTest(path=path):
+                fast = client.get(path)
+                with self.settings(JSON_BACKEND='json'):
+                    stdlib = client.get(path)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, stdlib.content)
+
+    def test_request_bodies(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post('/api/offices/', {'name': 'केन्द्रीय भण्डार', 'address': 'काठमाडौं'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['name'], 'केन्द्रीय भण्डार')
+        response = client.generic('POST', '/api/offices/', b'{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+import yaml
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from myapp import openapi
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """The schema and docs endpoints serve bytes generated once per deploy"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.directory)
+        settings = override_settings(SCHEMA_CACHE_DIR=cls.directory)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+        openapi.reset()
+        cls.addClassCleanup(openapi.reset)
+        from drf_spectacular.generators import SchemaGenerator
+
+        cls.expected = json.loads(json.dumps(SchemaGenerator().get_schema(request=None, public=True)))
+
+    def test_schema_formats(self):
+        response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertEqual(yaml.safe_load(response.content), self.expected)
+        self.assertIn('/api/letters/', self.expected['paths'])
+
+        for request in ({'data': {'format': 'json'}}, {'data': {'format': 'openapi-json'}},
+                        {'headers': {'Accept': 'application/json, */*'}}):
+            response = self.client.get('/api/schema/', **request)
+            self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi+json')
+            self.assertEqual(json.loads(response.content), self.expected)
+        self.assertEqual(self.client.get('/api/schema/', {'format': 'xml'}).status_code, 404)
+        self.assertEqual(self.client.post('/api/schema/').status_code, 405)
+
+    def test_etag_and_precompressed_copies(self):
+        identity = self.client.get('/api/schema/', headers={'Accept-Encoding': 'identity'})
+        response = self.client.get('/api/schema/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertNotEqual(response['ETag'], identity['ETag'])
+
+        cached = self.client.get('/api/schema/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_docs_pages(self):
+        swagger = self.client.get('/api/docs/')
+        self.assertEqual(swagger.status_code, 200)
+        self.assertEqual(swagger['Content-Type'], 'text/html; charset=utf-8')
+        self.assertContains(swagger, 'SwaggerUIBundle')
+        self.assertContains(swagger, 'url: "/api/schema/"')
+        # No request, no CSRF token baked into the shared page
+        self.assertContains(swagger, '= "";')
+        self.assertEqual(swagger['Cross-Origin-Opener-Policy'], 'unsafe-none')
+        self.assertContains(self.client.get('/api/redoc/'), '/api/schema/')
+
+    def test_generated_once_per_code_change(self):
+        self.client.get('/api/schema/')
+        with mock.patch.object(openapi, 'generate', wraps=openapi.generate) as generate:
+            for path in ('/api/schema/', '/api/docs/', '/api/redoc/'):
+                self.client.get(path)
+            # A restart reads the files back
+            openapi.reset()
+            self.client.get('/api/schema/')
+            self.assertEqual(generate.call_count, 0)
+
+            # A deploy that changed the code regenerates them
+            openapi.reset()
+            with mock.patch.object(openapi, 'fingerprint', return_value='changed'):
+                self.assertEqual(self.client.get('/api/schema/', {'format': 'json'}).json(), self.expected)
+                self.assertEqual(generate.call_count, 1)
+                self.assertIsNotNone(openapi.load(stamp='changed'))
+        self.assertIsNone(openapi.load())
+
+    def test_build_schema_command(self):
+        out = io.StringIO()
+        call_command('build_schema', stdout=out)
+        self.assertIn('schema.json', out.getvalue())
+        call_command('build_schema', if_stale=True, stdout=out)
+        self.assertIn('up to date', out.getvalue())
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from myapp.models import Branch, Employee, Letter, LetterItem, Office, Product, Receiver
+
+
+def _snapshot():
+    letters = list(Letter.objects.order_by('id').values_list(
+        'date', 'chalani_no', 'voucher_no', 'gatepass_no', 'subject', 'receiver_name', 'status'
+    ))
+    items = list(LetterItem.objects.order_by('id').values_list('name', 'serial_number', 'quantity', 'unit_of_measurement'))
+    return letters, items
+
+
+class SeedDbTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_db', scale=20, last_fiscal_year=2082, batch_size=64, stdout=StringIO(), **options)
+
+    def test_same_seed_produces_same_data(self):
+        self.seed(seed=7)
+        first = _snapshot()
+        for model in (LetterItem, Letter, Product, Receiver, Employee, Branch, Office):
+            model.objects.all().delete()
+
+        self.seed(seed=7)
+        self.assertEqual(_snapshot(), first)
+
+        for model in (LetterItem, Letter):
+            model.objects.all().delete()
+        self.seed(seed=8)
+        self.assertNotEqual(_snapshot(), first)
+
+    def test_distributions(self):
+        self.seed(seed=1)
+        self.assertEqual(Letter.objects.count(), 300)
+
+        dates = list(Letter.objects.values_list('date', flat=True))
+        self.assertTrue(all(date[:4] in ('२०७८', '२०७९', '२०८०', '२०८१', '२०८२', '२०८३') for date in dates))
+        self.assertGreaterEqual(len({date[:7] for date in dates}), 24)
+
+        # Chalani numbers restart every fiscal year
+        self.assertEqual(Letter.objects.filter(chalani_no='1').count(), 5)
+
+        counts = [letter.items.count() for letter in Letter.objects.prefetch_related('items')]
+        self.assertEqual(min(counts), 1)
+        self.assertGreater(max(counts), 5)
+        serials = LetterItem.objects.values_list('serial_number', flat=True)
+        self.assertTrue(any('-' in s and s != '-' for s in serials))
+        self.assertIn('-', serials)
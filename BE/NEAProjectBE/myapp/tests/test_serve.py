@@ -0,0 +1,154 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from importlib.util import find_spec
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+
+from myapp import warmup
+from myapp.management.commands.serve import Command, cpu_count
+from myapp.serializers import LetterRowSerializer
+
+
+class ServeCommandTests(SimpleTestCase):
+    def argv(self, interface='asgi', **options):
+        return Command().gunicorn_argv(interface, options)
+
+    def option(self, argv, name):
+        return argv[argv.index(name) + 1] if name in argv else None
+
+    def test_gunicorn_command_line(self):
+        argv = self.argv()
+        self.assertEqual(argv[1:4], ['-m', 'gunicorn', 'NEAProjectBE.asgi:application'])
+        self.assertEqual(self.option(argv, '--workers'), str(cpu_count()))
+        self.assertEqual(self.option(argv, '--worker-class'), 'uvicorn.workers.UvicornWorker')
+        self.assertEqual(self.option(self.argv('wsgi'), '--worker-class'), 'myapp.workers.ThreadWorker')
+        self.assertEqual(self.option(argv, '--bind'), settings.SERVE_BIND)
+        self.assertEqual(self.option(argv, '--max-requests-jitter'), str(settings.SERVE_MAX_REQUESTS // 10))
+        self.assertIsNone(self.option(argv, '--threads'))
+
+        argv = self.argv('wsgi', workers=3, threads=2, bind='127.0.0.1:9000')
+        self.assertEqual(argv[3], 'NEAProjectBE.wsgi:application')
+        self.assertEqual((self.option(argv, '--workers'), self.option(argv, '--threads'), self.option(argv, '--bind')), ('3', '2', '127.0.0.1:9000'))
+
+        with self.settings(SERVE_WORKERS=5, SERVE_MAX_REQUESTS=0):
+            argv = self.argv()
+        self.assertEqual(self.option(argv, '--workers'), '5')
+        self.assertNotIn('--max-requests', argv)
+
+
+class HealthTests(TestCase):
+    def test_liveness(self):
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['pid'], os.getpid())
+
+    def test_readiness_warms_up_first(self):
+        with mock.patch.object(warmup, '_warm', False):
+            LetterRowSerializer.__dict__.get('_compiled', {}).clear()
+            response = self.client.get('/readyz')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(warmup.is_warm())
+        self.assertIn(None, LetterRowSerializer._compiled)
+
+    def test_readiness_fails_without_database(self):
+        with mock.patch.object(warmup, '_warm', True), \
+                mock.patch('myapp.views.health.check_database', side_effect=DatabaseError('unable to open database file')):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('unable to open database file', response.json()['message'])
+
+
+@skipUnless(find_spec('gunicorn') and find_spec('uvicorn'), 'gunicorn and uvicorn are not installed')
+class ServeProcessTests(SimpleTestCase):
+    """A real server: warmed-up workers answer the probes, and a reload replaces them"""
+
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.env = dict(os.environ, DATABASE_PATH=str(tmp / 'db.sqlite3'), SERVE_PIDFILE=str(tmp / 'serve.pid'))
+        self.env.pop('DJANGO_DEBUG', None)
+        self.manage = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')]
+
+    def pids(self, path='/healthz', attempts=20):
+        """Worker pids seen over `attempts` fresh connections"""
+        seen = set()
+        for _ in range(attempts):
+            with urllib.request.urlopen(f'http://127.0.0.1:{self.port}{path}', timeout=5) as response:
+                seen.add(json.loads(response.read())['data']['pid'])
+        return seen
+
+    def wait_for_server(self, server):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                self.fail(f'The server exited: {server.stdout.read()}')
+            try:
+                return self.pids(attempts=1)
+            except OSError:
+                time.sleep(0.2)
+        self.fail('The server did not start')
+
+    def serve(self, interface, workers=2, **env):
+        return subprocess.Popen(
+            self.manage + ['serve', '--bind', f'127.0.0.1:{self.port}', '--workers', str(workers), '--interface', interface],
+            env=dict(self.env, **env), cwd=settings.BASE_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+
+    def test_serve_and_reload(self):
+        for interface in ('asgi', 'wsgi'):
+            with self.subTest(interface=interface):
+                server = self.serve(interface)
+                try:
+                    self.wait_for_server(server)
+                    before = self.pids('/readyz')
+                    subprocess.run(self.manage + ['serve', '--reload'], env=self.env, cwd=settings.BASE_DIR, check=True, capture_output=True)
+                    deadline = time.monotonic() + 30
+                    after = before
+                    while after & before and time.monotonic() < deadline:
+                        time.sleep(0.2)
+                        after = self.pids()
+                    self.assertFalse(after & before)
+                finally:
+                    server.terminate()
+                    output = server.communicate(timeout=30)[0]
+                self.assertIn('DEBUG=False', output)
+                self.assertNotIn('Warm-up of worker', output)
+
+    def test_recycled_workers_serve_what_they_accepted(self):
+        # A worker recycled every 20 requests under 8 concurrent clients: each stop
+        # catches connections it accepted and had not read yet
+        server = self.serve('wsgi', workers=1, SERVE_MAX_REQUESTS='20')
+        errors, pids = [], set()
+
+        def client():
+            for _ in range(30):
+                try:
+                    pids.update(self.pids(attempts=1))
+                except OSError as e:
+                    errors.append(e)
+
+        try:
+            self.wait_for_server(server)
+            clients = [threading.Thread(target=client) for _ in range(8)]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+        finally:
+            server.terminate()
+            server.communicate(timeout=30)
+        self.assertEqual(errors, [])
+        self.assertGreater(len(pids), 5)
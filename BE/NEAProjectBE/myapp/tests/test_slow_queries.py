@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from myapp.middleware.slow_queries import SlowQueryLog, redact
+from myapp.models import Letter, User, UserRole
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = Path(directory.name) / 'slow.log'
+        overrides = override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=self.log_path)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_redact_keeps_numbers_only(self):
+        self.assertEqual(redact(['secret', 5, None, b'ab']), ['<str:6>', 5, None, '<bytes:2>'])
+
+    def test_workers_share_the_rotation(self):
+        script = (
+            'import time, django; django.setup()\n'
+            'from myapp.middleware.slow_queries import SlowQueryLog\n'
+            f'log = SlowQueryLog({str(self.log_path)!r})\n'
+            'log.max_bytes, log.backups = 2000, 200\n'
+            # Start writing together, once every worker is set up
+            f'time.sleep(max(0, {time.time() + 2} - time.time()))\n'
+            'for i in range(300):\n'
+            "    log.write({'fingerprint': 'SELECT ?', 'duration_ms': 1.0, 'at': '', 'params': [i], 'plan': None})\n"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='NEAProjectBE.test_settings')
+        workers = [subprocess.Popen([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env) for _ in range(3)]
+        for worker in workers:
+            self.assertEqual(worker.wait(), 0)
+
+        log = SlowQueryLog(self.log_path)
+        log.backups = 200
+        # No rotation wrote over another one's backup
+        self.assertEqual(len(list(log.entries())), 900)
+        self.assertTrue(Path(f'{self.log_path}.1').is_file())
+        for path in self.log_path.parent.glob('slow.log.*[0-9]'):
+            self.assertLess(path.stat().st_size, 2200)
+
+    def test_logs_plan_origin_and_groups_by_fingerprint(self):
+        admin = User.objects.create_user(email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN)
+        Letter.objects.create(chalani_no='1', subject='Letter')
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.get('/api/letters/')
+        client.get('/api/letters/')
+
+        top = SlowQueryLog(self.log_path).top()
+        letter_select = next(g for g in top if g['fingerprint'].startswith('SELECT "myapp_letter"."id"'))
+        self.assertEqual(letter_select['count'], 2)
+        self.assertIn('LetterViewSet.list', letter_select['views'])
+        self.assertTrue(any('SCAN' in step or 'SEARCH' in step for step in letter_select['plan']))
+
+        client.post('/api/products/', {'name': 'Meter', 'company': 'NEA'})
+        top = SlowQueryLog(self.log_path).top()
+        self.assertTrue(any('ProductSerializer' in g['serializers'] for g in top))
+
+        response = client.get('/api/slow-queries/?limit=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(response.json()['count'], 5)
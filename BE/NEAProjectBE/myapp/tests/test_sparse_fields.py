@@ -0,0 +1,99 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.models import Letter, LetterStatus, User, UserRole
+
+LIST_FIELDS = 'id,chalani_no,date,subject,status,office_name'
+
+
+@override_settings(NPLUSONE_ENABLED=False)
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_db', scale=1, seed=6, last_fiscal_year=2082, stdout=io.StringIO())
+        cls.admin = User.objects.get(role=UserRole.ADMIN)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, fast=True):
+        with self.settings(FAST_READ_PATH=fast), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response, [query['sql'] for query in queries]
+
+    def test_letter_list_loads_only_requested_columns(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast):
+                response, queries = self.get(f'/api/letters/?fields={LIST_FIELDS}', fast)
+                letters = response.json()['results']['data']
+                self.assertEqual(list(letters[0]), LIST_FIELDS.split(','))
+                letter = Letter.objects.get(pk=letters[0]['id'])
+                self.assertEqual(letters[0]['chalani_no'], letter.chalani_no.translate(str.maketrans('0123456789', '०१२३४५६७८९')))
+                # Count and page; no items query and no receiver columns
+                self.assertEqual(len(queries), 2, queries)
+                self.assertNotIn('receiver_vehicle_number', queries[-1])
+                self.assertNotIn('letteritem', ' '.join(queries))
+
+    def test_expand_items(self):
+        full, _ = self.get('/api/letters/')
+        for path in (f'/api/letters/?fields={LIST_FIELDS}&expand=items', f'/api/letters/?fields={LIST_FIELDS},items'):
+            for fast in (True, False):
+                with self.subTest(path=path, fast=fast):
+                    response, queries = self.get(path, fast)
+                    letters = response.json()['results']['data']
+                    self.assertIn('items', letters[0])
+                    self.assertEqual(len(queries), 3)
+                    self.assertEqual(
+                        [letter['items'] for letter in letters],
+                        [letter['items'] for letter in full.json()['results']['data']],
+                    )
+
+    def test_fast_and_serializer_paths_agree(self):
+        paths = [
+            '/api/letters/?fields=receiver,chalani_no,created_at',
+            '/api/letters/?fields=id,items,gatepass_no',
+            '/api/letters/?expand=items',
+            '/api/employees/all-active/?fields=first_name,branch_name,serial_number',
+            '/api/employees/all-active/?fields=id,email',
+            '/api/receivers/all-active/?fields=id,name,id_card_type_display',
+            '/api/products/all-active/?fields=serial_number,name,sku',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path, True)[0].content, self.get(path, False)[0].content)
+
+    def test_other_viewsets(self):
+        response, queries = self.get('/api/products/?fields=serial_number,name')
+        self.assertEqual(list(response.json()['results'][0]), ['serial_number', 'name'])
+        self.assertNotIn('"remarks"', queries[-1])
+        response, _ = self.get('/api/employees/all-active/?fields=id,email', fast=False)
+        self.assertEqual(list(response.json()['data'][0]), ['id', 'email'])
+        letter = Letter.objects.first()
+        response, queries = self.get(f'/api/letters/{letter.pk}/?fields=id,subject')
+        self.assertEqual(response.json()['data'], {'id': letter.pk, 'subject': letter.subject})
+
+    def test_default_response_is_unchanged(self):
+        response, _ = self.get('/api/letters/')
+        letter = response.json()['results']['data'][0]
+        self.assertIn('items', letter)
+        self.assertEqual(list(letter)[-1], 'receiver')
+
+    def test_invalid_parameters(self):
+        for path in ('/api/letters/?fields=id,password', '/api/letters/?expand=receiver', '/api/products/all-active/?expand=items'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 400)
+
+    def test_writes_ignore_fields(self):
+        letter = Letter.objects.filter(status=LetterStatus.DRAFT).first()
+        response = self.client.patch(f'/api/letters/{letter.pk}/?fields=id', {'subject': 'नयाँ विषय'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['data']['subject'], 'नयाँ विषय')
+        self.assertIn('items', response.json()['data'])
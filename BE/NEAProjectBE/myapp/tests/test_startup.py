@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from myapp.benchmarks.startup import LAZY_MODULES, cold_start, import_times
+
+# A worker imports ~400 ms worth of modules (-X importtime) and ~900 modules
+# in all before its first response; the budgets leave room for noise, not
+# for another eagerly imported library. The time depends on the machine, so
+# it is only checked with CHECK_STARTUP_TIME=1 (`manage.py benchmark_startup`
+# reports it anywhere); the module count is checked always
+IMPORT_BUDGET_MS = 600
+MODULE_BUDGET = 950
+
+
+class StartupBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.probe = cold_start(settings.BASE_DIR, importtime=True)
+
+    def test_first_requests(self):
+        self.assertEqual(self.probe['statuses'], {'/healthz': 200, '/api/letters/': 401})
+
+    def test_heavy_modules_load_lazily(self):
+        self.assertEqual(self.probe['lazy_modules_loaded'], [])
+        self.assertNotIn('openpyxl', self.probe['imports'])
+
+    def test_module_budget(self):
+        self.assertLess(self.probe['module_count'], MODULE_BUDGET)
+
+    @skipUnless(os.environ.get('CHECK_STARTUP_TIME') == '1', 'set CHECK_STARTUP_TIME=1 to check the import time')
+    def test_import_time_budget(self):
+        self.assertLess(self.probe['import_ms'], IMPORT_BUDGET_MS, self.slowest())
+
+    def slowest(self):
+        top = sorted((cumulative, module) for module, (_, cumulative, depth) in self.probe['imports'].items() if depth == 0)[-10:]
+        return ', '.join(f'{module} {cumulative / 1000:.0f} ms' for cumulative, module in reversed(top))
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_import_times(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _io\n'
+            'import time:      1500 |       2000 | myapp.views\n'
+            'import time:       100 |        100 | myapp.views\n'
+        )
+        self.assertEqual(import_times(stderr), {'_io': (120, 120, 1), 'myapp.views': (1500, 2000, 0)})
+
+    def test_lazy_modules_are_importable(self):
+        for module in LAZY_MODULES:
+            __import__(module)
+
+
+class BenchmarkStartupTests(SimpleTestCase):
+    def test_command_writes_results(self):
+        output = Path(tempfile.mkdtemp()) / 'startup.json'
+        out = io.StringIO()
+        call_command('benchmark_startup', repeat=1, top=3, output=str(output), stdout=out)
+        results = json.loads(output.read_text())
+        summary = results['runs']['cold_start']
+        self.assertGreater(summary['ready_ms'], summary['setup_ms'])
+        self.assertEqual(len(summary['slowest_imports_ms']), 3)
+        self.assertIn('Slowest top-level imports', out.getvalue())
+
+        call_command('benchmark_startup', repeat=1, output=str(output.with_name('again.json')), compare=str(output),
+                     threshold=1000, fail_on_regression=True, stdout=out)
+        self.assertIn('ready_ms', out.getvalue().split('Change against')[1])
@@ -0,0 +1,161 @@
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from myapp.models import User
+from myapp.throttling import LoginThrottle, parse_rate
+
+RATES = {
+    'login_ip': '5/min',
+    'login_email': '3/15min',
+    'password_reset_ip': '5/hour',
+    'password_reset_email': '2/hour',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES})
+class CredentialThrottleTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.addCleanup(caches['throttle'].clear)
+        # Every failed attempt logs a warning
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        User.objects.create_user(email='clerk@example.com', name='Clerk', password='right-password')
+
+    def login(self, email, password='wrong-password', ip='10.0.0.1'):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password},
+                                content_type='application/json', REMOTE_ADDR=ip)
+
+    def reset(self, email, ip='10.0.0.1'):
+        return self.client.post('/api/auth/reset-password-request/', {'email': email},
+                                content_type='application/json', REMOTE_ADDR=ip)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('20/min'), (20, 60))
+        self.assertEqual(parse_rate('10/15min'), (10, 900))
+        self.assertEqual(parse_rate('3/hour'), (3, 3600))
+        self.assertEqual(parse_rate('100/2d'), (100, 172800))
+        self.assertIsNone(parse_rate(None))
+        with self.assertRaises(ImproperlyConfigured):
+            parse_rate('often')
+
+    def test_per_ip_limit(self):
+        for n in range(5):
+            self.assertEqual(self.login(f'guess{n}@example.com').status_code, 401)
+        response = self.login('guess5@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 60)
+        # X-Forwarded-For is ignored without NUM_PROXIES
+        self.assertEqual(self.client.post('/api/auth/login/', {'email': 'guess6@example.com', 'password': 'x'},
+                                          content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                                          HTTP_X_FORWARDED_FOR='10.9.9.9').status_code, 429)
+        self.assertEqual(self.login('guess7@example.com', ip='10.0.0.2').status_code, 401)
+
+    def test_per_email_limit(self):
+        for n in range(3):
+            self.assertEqual(self.login('clerk@example.com', ip=f'10.0.1.{n}').status_code, 401)
+        # Locked out from any address, whatever the case and spacing of the email
+        self.assertEqual(self.login(' Clerk@Example.com', 'right-password', ip='10.0.1.9').status_code, 429)
+        self.assertEqual(self.login('other@example.com', ip='10.0.1.9').status_code, 401)
+
+    def test_sliding_window(self):
+        with mock.patch.object(LoginThrottle, 'timer', return_value=1000.0) as timer:
+            for n in range(5):
+                self.login(f'guess{n}@example.com')
+            timer.return_value = 1059.0
+            self.assertEqual(self.login('guess5@example.com').status_code, 429)
+            # The attempts at 1000 leave the window a minute later
+            timer.return_value = 1060.5
+            self.assertEqual(self.login('guess6@example.com').status_code, 401)
+
+    def test_rejected_before_hashing(self):
+        for n in range(3):
+            self.login('clerk@example.com', ip=f'10.0.2.{n}')
+        with mock.patch.object(MD5PasswordHasher, 'encode', autospec=True, side_effect=MD5PasswordHasher.encode) as encode, \
+                mock.patch.object(MD5PasswordHasher, 'verify', autospec=True, side_effect=MD5PasswordHasher.verify) as verify:
+            self.assertEqual(self.login('clerk@example.com', ip='10.0.2.9').status_code, 429)
+            self.assertEqual((encode.call_count, verify.call_count), (0, 0))
+            self.assertEqual(self.login('someone@example.com', ip='10.0.2.9').status_code, 401)
+            self.assertGreater(encode.call_count + verify.call_count, 0)
+
+    def test_successful_login_clears_email_attempts(self):
+        for _ in range(2):
+            self.login('clerk@example.com')
+        response = self.login('clerk@example.com', 'right-password')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        for _ in range(2):
+            self.assertEqual(self.login('clerk@example.com', ip='10.0.0.2').status_code, 401)
+
+    def test_password_reset_limits(self):
+        for _ in range(2):
+            self.assertEqual(self.reset('clerk@example.com').status_code, 200)
+        self.assertEqual(self.reset('clerk@example.com', ip='10.0.0.2').status_code, 429)
+        # Login attempts are counted separately
+        self.assertEqual(self.login('clerk@example.com').status_code, 401)
+
+    @override_settings(AUTH_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        for n in range(8):
+            self.assertEqual(self.login('clerk@example.com').status_code, 401)
+
+    def test_counts_are_shared_between_processes(self):
+        # Another worker process records the attempts...
+        script = (
+            'import time, django; django.setup()\n'
+            'from django.core.cache import caches\n'
+            'from myapp.throttling import LoginThrottle, record\n'
+            'for _ in range(5):\n'
+            '    record("throttle", LoginThrottle.key("ip", "10.0.3.1"), 5, 60, time.time())\n'
+        )
+        subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, check=True, env=self.env())
+        # ...and this one rejects the next
+        self.assertEqual(self.login('guess@example.com', ip='10.0.3.1').status_code, 429)
+
+    def test_concurrent_attempts_never_exceed_the_limit(self):
+        # Four processes record 10 attempts each at the same moment, against a limit of 15
+        script = (
+            'import sys, time, django; django.setup()\n'
+            'from myapp.throttling import LoginThrottle, record\n'
+            'start = float(sys.argv[1])\n'
+            'time.sleep(max(start - time.time(), 0))\n'
+            'key = LoginThrottle.key("ip", "10.0.4.1")\n'
+            'print(sum(record("throttle", key, 15, 60, time.time()) is None for _ in range(10)))\n'
+        )
+        start = str(time.time() + 3)
+        workers = [
+            subprocess.Popen([sys.executable, '-c', script, start], cwd=settings.BASE_DIR, env=self.env(),
+                             stdout=subprocess.PIPE, text=True)
+            for _ in range(4)
+        ]
+        self.assertEqual(sum(int(worker.communicate()[0]) for worker in workers), 15)
+
+    def env(self):
+        return dict(os.environ, DJANGO_SETTINGS_MODULE='NEAProjectBE.test_settings',
+                    THROTTLE_CACHE_DIR=str(settings.CACHES['throttle']['LOCATION']))
+
+
+class BenchmarkLoginTests(SimpleTestCase):
+    def test_logins_under_attack(self):
+        output = os.path.join(settings.BASE_DIR, 'var', 'bench', 'test-login.json')
+        call_command('benchmark_login', scale=1, seed=7, duration=4, attackers=2, interval=1, scenario=['attack'],
+                     output=output, stdout=io.StringIO())
+        with open(output) as f:
+            run = json.load(f)['runs']['attack']['operations']
+        limit, _ = parse_rate(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['login_ip'])
+        self.assertEqual(set(run['login']['statuses']), {'200'})
+        self.assertGreater(run['attack']['statuses']['429'], 0)
+        self.assertLessEqual(run['attack']['statuses'].get('401', 0), limit)
@@ -0,0 +1,84 @@
+import json
+import re
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.middleware import RequestTimings, current_timings, phase
+from myapp.middleware import timing
+from myapp.models import Product, User, UserRole
+
+
+def parse(header):
+    """{metric: {'dur': ms, 'desc': text}} of a Server-Timing header"""
+    metrics = {}
+    for part in header.split(', '):
+        name, *params = part.split(';')
+        metrics[name] = {key: value.strip('"') for key, value in (param.split('=', 1) for param in params)}
+    return metrics
+
+
+class PhaseTests(SimpleTestCase):
+    def test_nested_phases_count_once(self):
+        timings = RequestTimings()
+        token = timing._current_timings.set(timings)
+        try:
+            self.assertIs(current_timings(), timings)
+            with mock.patch.object(timing.time, 'perf_counter', side_effect=[1.0, 2.0, 3.0, 5.0]):
+                with phase('serializer'):
+                    with phase('serializer'):
+                        pass
+                    with phase('render'):
+                        pass
+        finally:
+            timing._current_timings.reset(token)
+        self.assertEqual(timings.phases, {'render': 1.0, 'serializer': 4.0})
+
+    def test_phase_outside_a_request(self):
+        self.assertIsNone(current_timings())
+        with phase('serializer') as block:
+            self.assertIsNone(block.timings)
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', name='Admin', password='admin123', role=UserRole.ADMIN)
+        for i in range(3):
+            Product.objects.create(name=f'Meter {i}', company='NEA')
+
+    def get(self):
+        # A new client loads the middleware, and so reads the settings, again
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.get('/api/products/', HTTP_ACCEPT_ENCODING='identity')
+
+    def test_header_has_every_phase(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        metrics = parse(response['Server-Timing'])
+        self.assertEqual(list(metrics), ['db', 'serializer', 'render', 'total'])
+        self.assertEqual(metrics['db']['desc'], f'{len(queries)} queries')
+        for name in ('serializer', 'render', 'db'):
+            self.assertLessEqual(float(metrics[name]['dur']), float(metrics['total']['dur']))
+
+    def test_sample_rate(self):
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=0.0):
+            self.assertNotIn('Server-Timing', self.get())
+        with self.settings(SERVER_TIMING_SAMPLE_RATE=0.5):
+            with mock.patch.object(timing.random, 'random', return_value=0.7):
+                self.assertNotIn('Server-Timing', self.get())
+            with mock.patch.object(timing.random, 'random', return_value=0.2):
+                self.assertIn('Server-Timing', self.get())
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_log_line(self):
+        with self.assertLogs('myapp.middleware.timing', 'INFO') as logs:
+            response = self.get()
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((line['method'], line['path'], line['status']), ('GET', '/api/products/', 200))
+        self.assertEqual(line['queries'], int(re.search(r'(\d+) queries', response['Server-Timing']).group(1)))
+        self.assertGreater(line['serializer_ms'] + line['render_ms'], 0)
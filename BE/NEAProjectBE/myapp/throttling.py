@@ -0,0 +1,123 @@
+"""
+Sliding-window throttles for the unauthenticated credential endpoints.
+
+login_view and reset_password_request are AllowAny, and a login attempt
+costs several PBKDF2 hashes, so one script can keep every worker busy.
+The throttles here limit attempts per client IP and per submitted email,
+at the '<scope>_ip' and '<scope>_email' rates of DEFAULT_THROTTLE_RATES.
+DRF checks throttles in APIView.initial(), before the view runs: an
+attempt over either limit gets a 429 with Retry-After and costs one cache
+read, never a hash. The IP window is checked first, so a blocked client
+cannot use up the attempts of the emails it sprays.
+
+A window is the list of attempt times within the last period, the log
+DRF's SimpleRateThrottle keeps, stored in the 'throttle' cache. That
+cache is a directory of files every worker process on the host shares.
+record() reads and rewrites a window under a file lock in that directory
+(myapp/locks.py), so concurrent attempts from any worker are counted one
+after the other and no more than the limit get through.
+"""
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .locks import cache_lock
+
+# '20/min', '10/15min', '3/hour', '100/d': requests per (multiplier x) unit
+RATE = re.compile(r'^(\d+)/(\d*)([smhd])')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """(requests, seconds) of a rate string, or None for no limit"""
+    if rate is None:
+        return None
+    match = RATE.match(rate)
+    if match is None:
+        raise ImproperlyConfigured(f'Invalid throttle rate: {rate!r}')
+    requests, multiplier, unit = match.groups()
+    return int(requests), int(multiplier or 1) * UNIT_SECONDS[unit]
+
+
+def record(alias, key, limit, duration, now):
+    """
+    Add an attempt at `now` to the window at `key` of the cache `alias`
+    unless it already holds `limit` attempts. Returns None when it was
+    added, else the seconds until the oldest attempt leaves the window.
+    Rejected attempts are not added.
+    """
+    cache = caches[alias]
+    with cache_lock(alias):
+        history = [at for at in cache.get(key, ()) if at > now - duration]
+        if len(history) >= limit:
+            return history[0] + duration - now
+        history.append(now)
+        cache.set(key, history, duration)
+    return None
+
+
+def submitted_email(request):
+    """The normalized email of a credential request, or None"""
+    email = request.data.get('email') if hasattr(request.data, 'get') else None
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return email.strip().lower()
+
+
+class CredentialThrottle(BaseThrottle):
+    """Limits per client IP, then per submitted email, at the rates of `scope`"""
+    scope = None
+    cache_alias = 'throttle'
+    timer = time.time
+
+    def __init__(self):
+        self.retry_after = None
+
+    @classmethod
+    def key(cls, kind, ident):
+        # Emails are arbitrary text: hashed to a key every cache backend accepts
+        return f'throttle:{cls.scope}:{kind}:{hashlib.blake2b(ident.encode(), digest_size=16).hexdigest()}'
+
+    def identities(self, request):
+        yield 'ip', self.get_ident(request)
+        email = submitted_email(request)
+        if email is not None:
+            yield 'email', email
+
+    def allow_request(self, request, view):
+        if not settings.AUTH_THROTTLE_ENABLED:
+            return True
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        now = self.timer()
+        for kind, ident in self.identities(request):
+            limit = parse_rate(rates.get(f'{self.scope}_{kind}'))
+            if limit is None:
+                continue
+            wait = record(self.cache_alias, self.key(kind, ident), *limit, now)
+            if wait is not None:
+                self.retry_after = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+    @classmethod
+    def reset(cls, kind, ident):
+        """Forget the attempts of one IP or email (a login that succeeded)"""
+        with cache_lock(cls.cache_alias):
+            caches[cls.cache_alias].delete(cls.key(kind, ident))
+
+
+class LoginThrottle(CredentialThrottle):
+    scope = 'login'
+
+
+class PasswordResetThrottle(CredentialThrottle):
+    scope = 'password_reset'
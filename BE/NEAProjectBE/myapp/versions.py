@@ -0,0 +1,62 @@
+"""
+Data versions: one counter per model, bumped on every write, for caching
+results derived from a table (list facet counts, ...). An entry keyed on
+the versions it was computed from is never served after one of those
+tables changed, by any worker: the counters are in the 'versions' cache,
+a directory of files every worker process on the host shares, and each
+bump rewrites its counter under that cache's lock (myapp/locks.py).
+
+save() and delete() bump through signals; writes that skip them
+(bulk_create, QuerySet.update) call bump_version() themselves.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .locks import cache_lock
+
+ALIAS = 'versions'
+# Every model track() was given
+TRACKED = []
+
+
+def _key(model):
+    return f'data-version:{model._meta.label_lower}'
+
+
+def data_version(model):
+    key = _key(model)
+    version = caches[ALIAS].get(key)
+    if version is None:
+        _increment(key)
+        version = caches[ALIAS].get(key)
+    return version
+
+
+def bump_version(model):
+    _increment(_key(model))
+    # Once more on commit: a reader may have cached the uncommitted state under the first bump
+    transaction.on_commit(lambda: _increment(_key(model)))
+
+
+def _increment(key):
+    cache = caches[ALIAS]
+    with cache_lock(ALIAS):
+        version = cache.get(key)
+        # Start from the clock, so a lost counter never repeats an old version
+        cache.set(key, time.time_ns() if version is None else version + 1, timeout=None)
+
+
+def _bump_on_write(sender, **kwargs):
+    bump_version(sender)
+
+
+def track(*models):
+    """Bump the version of each of `models` whenever a row is saved or deleted"""
+    for model in models:
+        TRACKED.append(model)
+        uid = f'data-version:{model._meta.label_lower}'
+        post_save.connect(_bump_on_write, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_on_write, sender=model, dispatch_uid=uid)
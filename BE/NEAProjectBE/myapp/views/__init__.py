@@ -5,7 +5,8 @@ from .auth import (
     logout_view,
     change_password,
     reset_password_request,
-    get_me_view
+    get_me_view,
+    CurrentUserView
 )
 from .user import UserViewSet
 from .office import OfficeViewSet
@@ -16,6 +17,16 @@ from .letter import LetterViewSet
 from .product import ProductViewSet
 from .dashboard import DashboardViewSet
 from .utils import SeedDatabaseView
+from .profiling import ProfileReportViewSet
+from .metrics import metrics_view
+from .slow_queries import SlowQueryViewSet
+from .backups import BackupViewSet
+from .changes import ChangeFeedViewSet
+from .events import events_view
+from .health import liveness_view, readiness_view
+from .frontend import frontend_view, static_view
+from .schema import schema_view, swagger_view, redoc_view
+from .asynchronous import AsyncReadMixin, async_routes
 
 __all__ = [
     'get_tokens_for_user',
@@ -25,6 +36,7 @@ __all__ = [
     'change_password',
     'reset_password_request',
     'get_me_view',
+    'CurrentUserView',
     'UserViewSet',
     'OfficeViewSet',
     'BranchViewSet',
@@ -34,4 +46,19 @@ __all__ = [
     'ProductViewSet',
     'DashboardViewSet',
     'SeedDatabaseView',
+    'ProfileReportViewSet',
+    'metrics_view',
+    'SlowQueryViewSet',
+    'BackupViewSet',
+    'ChangeFeedViewSet',
+    'events_view',
+    'liveness_view',
+    'readiness_view',
+    'frontend_view',
+    'static_view',
+    'schema_view',
+    'swagger_view',
+    'redoc_view',
+    'AsyncReadMixin',
+    'async_routes',
 ]
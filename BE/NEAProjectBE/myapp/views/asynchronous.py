@@ -0,0 +1,185 @@
+"""
+Async twins of the read-heavy views, for the ASGI application.
+
+A view with AsyncReadMixin serves an action asynchronously when it defines
+``a<action>`` next to it (``alist`` for ``list``, ``aget`` for an APIView's
+``get``): ``as_async_view()`` returns an async view function that runs
+DRF's dispatch on the event loop and awaits the handler, which reads
+through Django's async ORM interface (``acount()``, ``aget()``,
+``async for``). Every other method on the same route (POST, PUT, ...) goes
+to the regular sync view, so NEAProjectBE.urls_async can put these routes
+ahead of the regular URLconf without changing what they accept.
+
+The JSON output is the sync action's: the handlers share the viewset's
+querysets, serializers and row serializers, and authentication,
+permissions, throttles and exception handling are DRF's own. What stays
+sync runs in a thread through sync_to_async: authentication (one user
+lookup), facet counts and the browsable API, whose forms query the
+database.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
+from django.urls import re_path
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from ..middleware.timing import phase
+
+
+class AsyncReadMixin:
+    @classmethod
+    def serves_async(cls, name):
+        """Whether the action or method handler `name` has an async twin"""
+        return name is not None and callable(getattr(cls, f'a{name}', None))
+
+    @classmethod
+    def as_async_view(cls, actions=None, **initkwargs):
+        """
+        The async view of `cls`: `actions` maps methods to actions as in
+        ViewSet.as_view(), and is left out for an APIView
+        """
+        if actions is not None:
+            actions = dict(actions)
+            if 'get' in actions:
+                actions.setdefault('head', actions['get'])
+            sync_view = sync_to_async(cls.as_view(dict(actions), **initkwargs))
+        else:
+            sync_view = sync_to_async(cls.as_view(**initkwargs))
+
+        async def view(request, *args, **kwargs):
+            method = request.method.lower()
+            if actions is not None:
+                name = actions.get(method)
+            else:
+                name = 'get' if method == 'head' else method
+            if not cls.serves_async(name):
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            if actions is not None:
+                self.action_map = actions
+            self.request = request
+            return await self.adispatch(request, name, *args, **kwargs)
+
+        view.__name__ = view.__qualname__ = cls.__name__
+        view.__doc__ = cls.__doc__
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, name, *args, **kwargs):
+        """APIView.dispatch() with the handler `a<name>` awaited"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # The user lookup of the token is the only query before the handler
+            await sync_to_async(request._authenticate)()
+            self.initial(request, *args, **kwargs)
+            if request.accepted_renderer.format == 'json':
+                response = await getattr(self, f'a{name}')(request, *args, **kwargs)
+            else:
+                # The browsable API's forms query the database while rendering
+                response = await sync_to_async(self.sync_response)(name, request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        if isinstance(self.response, Response) and request.accepted_renderer.format == 'json':
+            return rendered(self.response)
+        return self.response
+
+    def sync_response(self, name, request, *args, **kwargs):
+        """The sync handler's response, rendered in the same thread"""
+        response = getattr(self, name)(request, *args, **kwargs)
+        response = self.finalize_response(request, response, *args, **kwargs)
+        return response.render() if isinstance(response, Response) else response
+
+    async def apaginate_queryset(self, queryset):
+        """
+        paginate_queryset() with the count and the facets of `queryset`
+        loaded first: the page it returns is a lazy queryset for the
+        handler to iterate, or None without a paginator
+        """
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if getattr(self, 'action', None) == 'list' and hasattr(self, 'facet_counts'):
+            self.facets = await sync_to_async(self.facet_counts)(queryset) if self.requested_facets() else None
+
+        request = self.request
+        page_size = paginator.get_page_size(request)
+        if not page_size:
+            return None
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(request, django_paginator)
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if django_paginator.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        paginator.request = request
+        # get_paginated_response() reads the count and the links from paginator.page
+        return paginator.page.object_list
+
+    async def aget_object(self):
+        """get_object() through the async ORM"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+def rendered(response):
+    """
+    A DRF response rendered here, as a plain HttpResponse: Django's async
+    handler renders a template response through sync_to_async
+    """
+    with phase('render'):
+        response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    return plain
+
+
+def async_routes(router):
+    """
+    URL patterns for the viewsets of `router` with AsyncReadMixin, built as
+    SimpleRouter.get_urls() builds them: every route of such a viewset is
+    listed, in the router's order, so a detail route cannot shadow an extra
+    action's; routes without an async GET get the regular view
+    """
+    urls = []
+    for prefix, viewset, basename in router.registry:
+        if not issubclass(viewset, AsyncReadMixin):
+            continue
+        lookup = router.get_lookup_regex(viewset)
+        for route in router.get_routes(viewset):
+            mapping = router.get_method_map(viewset, route.mapping)
+            if not mapping:
+                continue
+            regex = route.url.format(prefix=prefix, lookup=lookup, trailing_slash=router.trailing_slash)
+            initkwargs = {**route.initkwargs, 'basename': basename, 'detail': route.detail}
+            if viewset.serves_async(mapping.get('get')):
+                view = viewset.as_async_view(mapping, **initkwargs)
+            else:
+                view = viewset.as_view(mapping, **initkwargs)
+            urls.append(re_path(regex, view, name=route.name.format(basename=basename)))
+    return urls
@@ -1,7 +1,8 @@
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import authenticate
@@ -15,6 +16,8 @@ from ..serializers import (
     UserSerializer, 
     CurrentUserSerializer
 )
+from ..throttling import LoginThrottle, PasswordResetThrottle, submitted_email
+from .asynchronous import AsyncReadMixin
 import logging
 from django.utils import timezone
 
@@ -172,6 +175,18 @@ def signup_view(request):
                     }
                 )
             ]
+        ),
+        429: OpenApiResponse(
+            response=OpenApiTypes.OBJECT,
+            description='Too many attempts from this address or for this email',
+            examples=[
+                OpenApiExample(
+                    'Error Response',
+                    value={
+                        'detail': 'Request was throttled. Expected available in 42 seconds.'
+                    }
+                )
+            ]
         )
     },
     description='Authenticate user and return JWT tokens',
@@ -179,6 +194,7 @@ def signup_view(request):
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginThrottle])
 def login_view(request):
     """User login endpoint"""
     serializer = UserLoginSerializer(data=request.data)
@@ -228,6 +244,9 @@ def login_view(request):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
+        # The right password clears the email's failed attempts
+        LoginThrottle.reset('email', submitted_email(request))
+
         # Generate JWT tokens
         tokens = get_tokens_for_user(user)
         
@@ -425,6 +444,18 @@ def change_password(request):
                     }
                 )
             ]
+        ),
+        429: OpenApiResponse(
+            response=OpenApiTypes.OBJECT,
+            description='Too many attempts from this address or for this email',
+            examples=[
+                OpenApiExample(
+                    'Error Response',
+                    value={
+                        'detail': 'Request was throttled. Expected available in 42 seconds.'
+                    }
+                )
+            ]
         )
     },
     description='Request password reset email',
@@ -432,6 +463,7 @@ def change_password(request):
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PasswordResetThrottle])
 def reset_password_request(request):
     """Request password reset - placeholder for email sending logic"""
     email = request.data.get('email')
@@ -486,3 +518,16 @@ def get_me_view(request):
     """Get current logged in user details"""
     serializer = CurrentUserSerializer(request.user)
     return Response(serializer.data)
+
+
+class CurrentUserView(AsyncReadMixin, APIView):
+    """get_me_view for the ASGI application (NEAProjectBE.urls_async)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = CurrentUserSerializer(request.user)
+        return Response(serializer.data)
+
+    async def aget(self, request):
+        # Authentication loaded the user: nothing left to query
+        return self.get(request)
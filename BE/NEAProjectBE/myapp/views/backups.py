@@ -0,0 +1,94 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.http import FileResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+
+from ..backups import BackupError, BackupStore
+from ..permissions import IsAdmin
+
+
+class BackupViewSet(viewsets.ViewSet):
+    """Online database backups (myapp/backups.py); restore one with `manage.py restore_db`"""
+    permission_classes = [IsAdmin]
+    lookup_value_regex = r'[0-9T]+-[0-9a-f]+'
+
+    @extend_schema(
+        operation_id='backups_list',
+        responses={200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Backup manifests, newest first')},
+    )
+    def list(self, request):
+        backups = BackupStore().list()
+        return Response({
+            "status": "success",
+            "message": "Backups retrieved successfully",
+            "count": len(backups),
+            "data": backups
+        })
+
+    @extend_schema(
+        operation_id='backups_create',
+        request=None,
+        responses={
+            201: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Manifest of the new backup'),
+            500: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Backup failed'),
+        },
+    )
+    def create(self, request):
+        try:
+            backup = BackupStore().create(reason='api')
+        except BackupError as e:
+            return Response({
+                "status": "error",
+                "message": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({
+            "status": "success",
+            "message": "Backup created successfully",
+            "data": backup
+        }, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        operation_id='backups_retrieve',
+        responses={
+            200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Backup manifest'),
+            404: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Backup not found'),
+        },
+    )
+    def retrieve(self, request, pk=None):
+        backup = BackupStore().get(pk)
+        if backup is None:
+            return self.not_found()
+        return Response({
+            "status": "success",
+            "message": "Backup retrieved successfully",
+            "data": backup
+        })
+
+    @extend_schema(
+        operation_id='backups_download',
+        parameters=[OpenApiParameter('database', OpenApiTypes.STR, description="Alias of the database ('archive'); default the live one")],
+        responses={
+            200: OpenApiResponse(response=OpenApiTypes.BINARY, description='Gzip-compressed SQLite database'),
+            404: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Backup not found'),
+        },
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The archive of the default database, or of ?database=<alias> (the letter archive)"""
+        store = BackupStore()
+        backup = store.get(pk)
+        alias = request.query_params.get('database', DEFAULT_DB_ALIAS)
+        if backup is None or (alias != DEFAULT_DB_ALIAS and alias not in backup.get('databases', {})):
+            return self.not_found()
+        filename = backup['archive'] if alias == DEFAULT_DB_ALIAS else backup['databases'][alias]['archive']
+        return FileResponse(open(store.archive_path(pk, alias), 'rb'), as_attachment=True,
+                            filename=filename, content_type='application/gzip')
+
+    def not_found(self):
+        return Response({
+            "status": "error",
+            "message": "Backup not found"
+        }, status=status.HTTP_404_NOT_FOUND)
@@ -6,12 +6,18 @@ from datetime import datetime
 import csv
 
 from ..models import Branch, BranchStatus
-from ..serializers import BranchSerializer
+from ..serializers import BranchSerializer, BranchRowSerializer
 from ..permissions import StrictViewerOrCreatorOrAdmin
+from .asynchronous import AsyncReadMixin
+from .mixins import ActiveListMixin, FacetedListMixin, SparseFieldsetMixin
 
-class BranchViewSet(viewsets.ModelViewSet):
+class BranchViewSet(AsyncReadMixin, ActiveListMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
+    active_index_map = 'branch_index_map'
+    active_message = "Active branches retrieved successfully"
     queryset = Branch.objects.all().order_by("-created_at")
     serializer_class = BranchSerializer
+    row_serializer_class = BranchRowSerializer
+    facet_fields = {'status': 'status'}
     permission_classes = [StrictViewerOrCreatorOrAdmin]
     filterset_fields = ["status"]
 
@@ -87,19 +93,6 @@ class BranchViewSet(viewsets.ModelViewSet):
             ])
         return response
  
-    @action(detail=False, methods=['get'], url_path='all-active')
-    def all_active(self, request):
-        """Get all active branches without pagination"""
-        queryset = Branch.objects.filter(status=BranchStatus.ACTIVE).order_by("-created_at")
-        
-        # Create index map for serial numbers
-        branch_index_map = {obj.id: idx for idx, obj in enumerate(queryset)}
-        request.branch_index_map = branch_index_map
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "status": "success",
-            "message": "Active branches retrieved successfully",
-            "count": queryset.count(),
-            "data": serializer.data
-        })
\ No newline at end of file
+    def active_queryset(self):
+        """Active branches for the dropdowns, without pagination"""
+        return Branch.objects.filter(status=BranchStatus.ACTIVE).order_by("-created_at")
\ No newline at end of file
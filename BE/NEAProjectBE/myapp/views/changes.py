@@ -0,0 +1,129 @@
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+
+from ..changes import TABLES
+from ..models import Change, ChangeAction
+from ..serializers import (
+    BranchRowSerializer, EmployeeRowSerializer, LetterRowSerializer, OfficeRowSerializer,
+    ProductRowSerializer, ReceiverRowSerializer,
+)
+
+ROW_SERIALIZERS = {
+    'products': ProductRowSerializer,
+    'offices': OfficeRowSerializer,
+    'branches': BranchRowSerializer,
+    'receivers': ReceiverRowSerializer,
+    'employees': EmployeeRowSerializer,
+    'letters': LetterRowSerializer,
+}
+
+
+class ChangeFeedViewSet(viewsets.ViewSet):
+    """
+    Rows created, updated or deleted since a cursor, read from the change log.
+
+    Without ``since`` only the current cursor is returned: fetch the tables
+    in full, then poll with ``?since=<cursor>``. Each response carries the
+    current state of every changed row under ``upserted`` and the ids of
+    deleted or binned rows under ``deleted``, per table, and the cursor to
+    pass next; ``has_more`` means the next page is already waiting. A cursor
+    older than the pruned log, taken before a restore from a backup, or newer
+    than the log gets 410 and the client starts over.
+    """
+
+    @extend_schema(
+        operation_id='changes_list',
+        parameters=[OpenApiParameter('since', OpenApiTypes.INT, description='Cursor returned by the previous call')],
+        responses={
+            200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Changed rows per table and the next cursor'),
+            400: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Invalid cursor'),
+            410: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Stale cursor: fetch the tables again'),
+        },
+    )
+    def list(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            latest = Change.objects.order_by('-id').values_list('id', flat=True).first()
+            return self.changes_response(latest or 0, False, {})
+        try:
+            since = int(since)
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response({
+                "status": "error",
+                "message": "'since' must be a cursor returned by this endpoint"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = getattr(settings, 'CHANGES_PAGE_SIZE', 500)
+        entries = list(
+            Change.objects.filter(id__gt=since).order_by('id')
+            .values_list('id', 'table', 'object_id', 'action')[:page_size + 1]
+        )
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+        if entries and entries[0][0] > since + 1 and self.pruned(since):
+            return Response({
+                "status": "error",
+                "message": "The change log no longer reaches back to this cursor; fetch the tables again"
+            }, status=status.HTTP_410_GONE)
+        if any(action == ChangeAction.RESTORED for _, _, _, action in entries):
+            return Response({
+                "status": "error",
+                "message": "The database was restored from a backup after this cursor; fetch the tables again"
+            }, status=status.HTTP_410_GONE)
+        if not entries and self.ahead(since):
+            return Response({
+                "status": "error",
+                "message": "The change log has not reached this cursor (the database was restored); fetch the tables again"
+            }, status=status.HTTP_410_GONE)
+
+        # The last action per row wins
+        latest = {}
+        for _, table, object_id, action in entries:
+            latest[table, object_id] = action
+        changed = {}
+        for (table, object_id), action in latest.items():
+            upserted, deleted = changed.setdefault(table, (set(), set()))
+            (deleted if action == ChangeAction.DELETED else upserted).add(object_id)
+
+        data = {}
+        for table, (upserted, deleted) in changed.items():
+            rows = self.rows(table, upserted)
+            # Deleted again after this page was logged
+            deleted |= upserted - {row['id'] for row in rows}
+            data[table] = {"upserted": rows, "deleted": sorted(deleted)}
+        return self.changes_response(entries[-1][0] if entries else since, has_more, data)
+
+    def pruned(self, since):
+        oldest = Change.objects.order_by('id').values_list('id', flat=True).first()
+        return oldest is not None and oldest > since + 1
+
+    def ahead(self, since):
+        latest = Change.objects.order_by('-id').values_list('id', flat=True).first()
+        return since > (latest or 0)
+
+    def rows(self, table, ids):
+        if not ids:
+            return []
+        row_serializer = ROW_SERIALIZERS[table]
+        # A serial number is a position in a full list and means nothing in a delta
+        fields = [
+            name for name, field in row_serializer.serializer_class().fields.items()
+            if not field.write_only and name != 'serial_number'
+        ]
+        rows = row_serializer(context={'request': self.request}, fields=fields)
+        model = next(model for model, name in TABLES.items() if name == table)
+        return rows.serialize(rows.queryset(model.objects.filter(pk__in=ids).order_by('pk')))
+
+    def changes_response(self, cursor, has_more, data):
+        return Response({
+            "status": "success",
+            "message": "Changes retrieved successfully",
+            "cursor": cursor,
+            "has_more": has_more,
+            "data": data
+        })
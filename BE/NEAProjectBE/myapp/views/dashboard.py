@@ -8,8 +8,9 @@ import csv
 from ..models import Dashboard
 from ..serializers import DashboardSerializer
 from ..permissions import IsViewerOrCreatorOrAdmin
+from .asynchronous import AsyncReadMixin
 
-class DashboardViewSet(viewsets.ViewSet):
+class DashboardViewSet(AsyncReadMixin, viewsets.ViewSet):
     permission_classes = [IsViewerOrCreatorOrAdmin]
 
     def list(self, request):
@@ -17,6 +18,11 @@ class DashboardViewSet(viewsets.ViewSet):
         serializer = DashboardSerializer(dashboard)
         return Response(serializer.data)
 
+    async def alist(self, request):
+        dashboard = await Dashboard.aget_current_stats()
+        serializer = DashboardSerializer(dashboard)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
         dashboard = Dashboard.get_current_stats()
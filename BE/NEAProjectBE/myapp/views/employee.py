@@ -7,12 +7,18 @@ from django.db.models import Count, Q
 import csv
 
 from ..models import Employee, EmployeeStatus, Branch, EmployeeRole
-from ..serializers import EmployeeSerializer
+from ..serializers import EmployeeSerializer, EmployeeRowSerializer
 from ..permissions import StrictViewerOrCreatorOrAdmin
+from .asynchronous import AsyncReadMixin
+from .mixins import ActiveListMixin, FacetedListMixin, SparseFieldsetMixin
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all().order_by("-created_at")
+class EmployeeViewSet(AsyncReadMixin, ActiveListMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
+    active_index_map = 'employee_index_map'
+    active_message = "Active employees retrieved successfully"
+    queryset = Employee.objects.select_related("branch").order_by("-created_at")
     serializer_class = EmployeeSerializer
+    row_serializer_class = EmployeeRowSerializer
+    facet_fields = {'status': 'status', 'role': 'role', 'branch': 'branch__name'}
     permission_classes = [StrictViewerOrCreatorOrAdmin]
     filterset_fields = ["status"]
 
@@ -125,7 +131,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        employees = Employee.objects.filter(branch=branch).order_by("-created_at")
+        employees = Employee.objects.filter(branch=branch).select_related("branch").order_by("-created_at")
         status_param = request.query_params.get("status")
         if status_param:
             employees = employees.filter(status=status_param)
@@ -295,7 +301,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         employees = Employee.objects.filter(status=EmployeeStatus.ACTIVE).filter(
             Q(first_name__icontains=search_query) | Q(last_name__icontains=search_query) | Q(email__icontains=search_query) | Q(middle_name__icontains=search_query)
-        ).order_by("-created_at")
+        ).select_related("branch").order_by("-created_at")
         
         employee_index_map = {obj.id: idx for idx, obj in enumerate(employees)}
         request.employee_index_map = employee_index_map
@@ -308,19 +314,6 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(employees, many=True)
         return Response(serializer.data)
     
-    @action(detail=False, methods=['get'], url_path='all-active')
-    def all_active(self, request):
-        """Get all active employees without pagination"""
-        queryset = Employee.objects.filter(status=EmployeeStatus.ACTIVE).order_by("-created_at")
-        
-        # Create index map for serial numbers
-        employee_index_map = {obj.id: idx for idx, obj in enumerate(queryset)}
-        request.employee_index_map = employee_index_map
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "status": "success",
-            "message": "Active employees retrieved successfully",
-            "count": queryset.count(),
-            "data": serializer.data
-        })
\ No newline at end of file
+    def active_queryset(self):
+        """Active employees for the dropdowns, without pagination"""
+        return Employee.objects.filter(status=EmployeeStatus.ACTIVE).select_related("branch").order_by("-created_at")
\ No newline at end of file
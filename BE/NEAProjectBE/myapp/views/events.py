@@ -0,0 +1,14 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+
+@require_GET
+def events_view(request):
+    """
+    /api/events/ streams from myapp.events.events_application, which the ASGI
+    application mounts in front of Django; a WSGI server only gets here
+    """
+    return JsonResponse({
+        "status": "error",
+        "message": "Server-sent events are only served by the ASGI application (NEAProjectBE.asgi)"
+    }, status=503)
@@ -0,0 +1,57 @@
+from pathlib import PurePosixPath
+
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from ..frontend import frontend_build, static_file
+from ..middleware.compression import accepted_encoding
+
+
+@require_safe
+def frontend_view(request, path=''):
+    """
+    A file of the frontend build, precompressed when the client accepts it;
+    any other path without a file extension gets index.html, for the
+    client-side router
+    """
+    build = frontend_build()
+    if build is None:
+        raise Http404('The frontend is not built: run `python manage.py build_frontend`')
+    built = build.get(path)
+    if built is None:
+        if PurePosixPath(path).suffix and 'text/html' not in request.headers.get('Accept', ''):
+            raise Http404(f'No file {path} in the frontend build')
+        built = build.index
+    return file_response(request, built, path)
+
+
+@require_safe
+def static_view(request, path):
+    """A file of STATIC_ROOT (`manage.py collectstatic`): the admin's and the browsable API's"""
+    built = static_file(path)
+    if built is None:
+        raise Http404(f'No static file {path}: run `python manage.py collectstatic`')
+    return file_response(request, built, path)
+
+
+def file_response(request, built, path):
+    coding = accepted_encoding(request.headers.get('Accept-Encoding', ''), built.codings)
+    file_path, size, etag, mtime = built.representations[coding]
+    response = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if response is None:
+        try:
+            # Served with the server's sendfile() where it has one
+            response = FileResponse(open(file_path, 'rb'), content_type=built.content_type)
+        except OSError:
+            raise Http404(f'No file {path}')
+        del response.headers['Content-Disposition']
+        response.headers['Last-Modified'] = http_date(mtime)
+        if coding is not None:
+            response.headers['Content-Encoding'] = coding
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = built.cache_control
+    if built.codings:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
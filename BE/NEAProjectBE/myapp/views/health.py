@@ -0,0 +1,26 @@
+import os
+
+from django.db import DatabaseError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from ..warmup import check_database, is_warm, warm_up
+
+
+@require_GET
+def liveness_view(request):
+    """The process answers requests; nothing else is checked"""
+    return JsonResponse({"status": "success", "message": "Alive", "data": {"pid": os.getpid()}})
+
+
+@require_GET
+def readiness_view(request):
+    """The process is warmed up and reaches the database"""
+    try:
+        if is_warm():
+            check_database()
+        else:
+            warm_up()
+    except DatabaseError as e:
+        return JsonResponse({"status": "error", "message": f"Database unavailable: {e}"}, status=503)
+    return JsonResponse({"status": "success", "message": "Ready", "data": {"pid": os.getpid()}})
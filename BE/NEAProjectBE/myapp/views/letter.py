@@ -1,33 +1,113 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser, SAFE_METHODS
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from asgiref.sync import sync_to_async
 from datetime import datetime
 from django.db import transaction
 import csv
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.worksheet.datavalidation import DataValidation
 
-from ..models import Letter, LetterStatus, LetterItem
-from ..serializers import LetterSerializer
+from ..models import ChangeAction, Letter, LetterStatus, LetterItem
+from ..archive import WithArchived, archive_ready
+from ..fiscal import current_fiscal_year, fiscal_year_label
+from ..routers import ARCHIVE
+from ..serializers import LetterSerializer, LetterRowSerializer, row_serializer_for
 from ..permissions import IsViewerOrCreatorOrAdminWithCreateForLetters
+from ..filters import LetterFilter
+from ..changes import record as record_changes, record_created
+from ..versions import bump_version
+from .asynchronous import AsyncReadMixin
+from .mixins import FacetedListMixin, SparseFieldsetMixin
 
-class LetterViewSet(viewsets.ModelViewSet):
+
+def nepali_digits(s):
+    m = {'0':'०','1':'१','2':'२','3':'३','4':'४','5':'५','6':'६','7':'७','8':'८','9':'९'}
+    return ''.join(m.get(ch, ch) for ch in (s or ''))
+
+
+def english_digits(s):
+    m = {'०':'0','१':'1','२':'2','३':'3','४':'4','५':'5','६':'6','७':'7','८':'8','९':'9'}
+    return ''.join(m.get(ch, ch) for ch in (s or ''))
+
+
+def normalize_date(d):
+    """'२०८२-०७-१५' or '2082-07-15' -> '2082.07.15' as written in the export sheets"""
+    dn = english_digits(d)
+    if dn and dn.count('-') == 2 and len(dn) == 10:
+        return dn.replace('-', '.')
+    return d or ''
+
+
+def to_number(s):
+    """Extract digits from string and convert to number, return None if empty"""
+    if not s:
+        return None
+    # Convert Nepali digits to English first
+    converted = english_digits(str(s))
+    # Extract only digits
+    digits = ''.join(ch for ch in converted if ch.isdigit())
+    if digits:
+        try:
+            return int(digits)
+        except ValueError:
+            return None
+    return None
+
+
+# Letter fields that identify a letter in an imported XLSX file, in column order
+IMPORT_LETTER_FIELDS = (
+    "chalani_no", "voucher_no", "date", "gatepass_no", "office_name", "sub_office_name",
+    "receiver_name", "receiver_post", "receiver_phone_number", "receiver_vehicle_number",
+)
+
+
+def _import_item_keys(name, company, serial_number, unit, quantity):
+    """Keys import-xlsx uses to spot an item the letter already has"""
+    return {('serial', name, serial_number), ('exact', name, company, serial_number, unit, quantity)}
+
+
+class LetterViewSet(AsyncReadMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
     queryset = Letter.objects.all().order_by("-created_at")
     serializer_class = LetterSerializer
+    row_serializer_class = LetterRowSerializer
+    expandable_fields = ('items',)
+    facet_fields = {'status': 'status', 'office_name': 'office_name', 'sub_office': 'sub_office_name', 'receiver_name': 'receiver_name'}
     permission_classes = [IsViewerOrCreatorOrAdminWithCreateForLetters]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["status"]
+    filterset_class = LetterFilter
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        # Prefetch related items for better performance
-        return queryset.prefetch_related('items')
+        # Prefetch related items for better performance, when they are returned
+        if self.returns('items'):
+            queryset = queryset.prefetch_related('items')
+        return queryset
+
+    def include_archived(self):
+        """Whether ?include_archived=true asks for the archived letters of closed fiscal years too"""
+        flag = self.request.query_params.get('include_archived', '')
+        return flag.lower() in ('1', 'true', 'yes') and archive_ready()
+
+    def get_object(self):
+        """The live letter, or with ?include_archived=true an archived one, which is read-only"""
+        try:
+            return super().get_object()
+        except Http404:
+            if not self.include_archived():
+                raise
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).using(ARCHIVE)
+        obj = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, obj)
+        if self.request.method not in SAFE_METHODS:
+            raise PermissionDenied("Archived letters are read-only")
+        return obj
     
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -45,23 +125,51 @@ class LetterViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """Get list of letters with proper response"""
         queryset = self.filter_queryset(self.get_queryset())
+        if self.include_archived():
+            # The archived letters follow the live ones; each is serialized from its own database
+            queryset, rows = WithArchived(queryset), None
+        else:
+            rows = row_serializer_for(self)
+        if rows is not None:
+            queryset = rows.queryset(queryset)
         
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            data = rows.serialize(page) if rows is not None else self.get_serializer(page, many=True).data
             return self.get_paginated_response({
                 "status": "success",
                 "message": "Letters retrieved successfully",
-                "data": serializer.data
+                "data": data
             })
 
-        serializer = self.get_serializer(queryset, many=True)
+        data = rows.serialize(queryset) if rows is not None else self.get_serializer(queryset, many=True).data
         return Response({
             "status": "success",
             "message": "Letters retrieved successfully",
-            "data": serializer.data
+            "data": data
         })
 
+    async def alist(self, request, *args, **kwargs):
+        """list() through the async ORM"""
+        if self.include_archived():
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = row_serializer_for(self)
+        if rows is not None:
+            queryset = rows.queryset(queryset)
+
+        page = await self.apaginate_queryset(queryset)
+        if rows is not None:
+            data = rows.represent(await rows.afetch(queryset if page is None else page))
+        else:
+            data = self.get_serializer([obj async for obj in (queryset if page is None else page)], many=True).data
+        body = {
+            "status": "success",
+            "message": "Letters retrieved successfully",
+            "data": data
+        }
+        return Response(body) if page is None else self.get_paginated_response(body)
+
     def retrieve(self, request, *args, **kwargs):
         """Get single letter details"""
         instance = self.get_object()
@@ -72,6 +180,18 @@ class LetterViewSet(viewsets.ModelViewSet):
             "data": serializer.data
         })
 
+    async def aretrieve(self, request, *args, **kwargs):
+        """retrieve() through the async ORM"""
+        if self.include_archived():
+            return await sync_to_async(self.retrieve)(request, *args, **kwargs)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response({
+            "status": "success",
+            "message": "Letter retrieved successfully",
+            "data": serializer.data
+        })
+
     @transaction.atomic
     def update(self, request, *args, **kwargs):
         """Update a letter with items"""
@@ -119,7 +239,6 @@ class LetterViewSet(viewsets.ModelViewSet):
         start_date = request.query_params.get('from')
         end_date = request.query_params.get('to')
 
-        records = list(queryset)
         if start_date or end_date:
             if not start_date or not end_date:
                 return Response({
@@ -136,18 +255,9 @@ class LetterViewSet(viewsets.ModelViewSet):
                     "message": "Invalid date format. Use YYYY-MM-DD for 'from' and 'to'"
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            start_norm = start_date
-            end_norm = end_date
-            filtered = []
-            for letter in records:
-                d_norm = nepali_to_english_digits(letter.date)
-                if not d_norm:
-                    continue
-                if len(d_norm) != 10 or d_norm.count('-') != 2:
-                    continue
-                if start_norm <= d_norm <= end_norm:
-                    filtered.append(letter)
-            records = filtered
+            records = list(queryset.filter(date_key__range=(start_date, end_date)))
+        else:
+            records = list(queryset)
 
         if not records:
             return Response({
@@ -404,16 +514,10 @@ class LetterViewSet(viewsets.ModelViewSet):
         # Get base queryset
         queryset = self.filter_queryset(self.get_queryset())
         
-        # Filter by date range
-        filtered_letters = []
-        for letter in queryset:
-            letter_date_norm = nepali_to_english_digits(letter.date)
-            if letter_date_norm and len(letter_date_norm) == 10 and letter_date_norm.count('-') == 2:
-                if start_norm <= letter_date_norm <= end_norm:
-                    filtered_letters.append(letter.id)
-        
-        # Apply the filter
-        queryset = queryset.filter(id__in=filtered_letters)
+        # Filter by date range on the indexed date_key
+        queryset = queryset.filter(date_key__range=(start_norm, end_norm))
+        if self.include_archived():
+            queryset = WithArchived(queryset)
         
         # Paginate and return response
         page = self.paginate_queryset(queryset)
@@ -448,13 +552,7 @@ class LetterViewSet(viewsets.ModelViewSet):
         if last:
             next_chalani = to_int(nepali_to_english_digits(last.chalani_no)) + 1 if last.chalani_no else 1
             next_voucher = to_int(nepali_to_english_digits(last.voucher_no)) + 1 if last.voucher_no else 1
-        today = datetime.now()
-        ad_year = today.year
-        ad_month = today.month
-        bs_year = ad_year + 57
-        if ad_month < 7:
-            bs_year -= 1
-        fy_label = f"{bs_year}/{str(bs_year+1)[-2:]}"
+        fy_label = fiscal_year_label(current_fiscal_year())
         return Response({
             "chalani_no": str(next_chalani),
             "chalani_no_nepali": english_to_nepali_digits(str(next_chalani)),
@@ -465,37 +563,15 @@ class LetterViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='export_xlsx')
     def export_xlsx(self, request):
-        def nepali_digits(s):
-            m = {'0':'०','1':'१','2':'२','3':'३','4':'४','5':'५','6':'६','7':'७','8':'८','9':'९'}
-            return ''.join(m.get(ch, ch) for ch in (s or ''))
-
-        def normalize_date(d):
-            dn = ''.join({'०':'0','१':'1','२':'2','३':'3','४':'4','५':'5','६':'6','७':'7','८':'8','९':'9'}.get(ch, ch) for ch in (d or ''))
-            if dn and dn.count('-') == 2 and len(dn) == 10:
-                return dn.replace('-', '.')
-            return d or ''
-        
-        def to_number(s):
-            """Extract digits from string and convert to number, return None if empty"""
-            if not s:
-                return None
-            # Convert Nepali digits to English first
-            m = {'०':'0','१':'1','२':'2','३':'3','४':'4','५':'5','६':'6','७':'7','८':'8','९':'9'}
-            converted = ''.join(m.get(ch, ch) for ch in str(s))
-            # Extract only digits
-            digits = ''.join(ch for ch in converted if ch.isdigit())
-            if digits:
-                try:
-                    return int(digits)
-                except ValueError:
-                    return None
-            return None
-
         queryset = self.filter_queryset(self.get_queryset())
         records = list(queryset.prefetch_related('items'))
         if not records:
             return Response({"status": "error", "message": "No letters found to export"}, status=status.HTTP_404_NOT_FOUND)
 
+        # openpyxl is loaded on the first export, not by every worker
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+
         wb = Workbook()
         ws = wb.active
         ws.title = 'Letters'
@@ -627,26 +703,6 @@ class LetterViewSet(viewsets.ModelViewSet):
         def np_digits(s):
             m = {'0':'०','1':'१','2':'२','3':'३','4':'४','5':'५','6':'६','7':'७','8':'८','9':'९'}
             return ''.join(m.get(ch, ch) for ch in (s or ''))
-        def normalize_date(d):
-            dn = en_digits(d)
-            if dn and dn.count('-') == 2 and len(dn) == 10:
-                return dn.replace('-', '.')
-            return d or ''
-        
-        def to_number(s):
-            """Extract digits from string and convert to number, return None if empty"""
-            if not s:
-                return None
-            # Convert Nepali digits to English first
-            converted = en_digits(str(s))
-            # Extract only digits
-            digits = ''.join(ch for ch in converted if ch.isdigit())
-            if digits:
-                try:
-                    return int(digits)
-                except ValueError:
-                    return None
-            return None
 
         start_date = request.data.get('start_date')
         end_date = request.data.get('end_date')
@@ -667,15 +723,7 @@ class LetterViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         queryset = self.filter_queryset(self.get_queryset())
-        records = []
-        for letter in queryset.prefetch_related('items'):
-            d_norm = en_digits(letter.date)
-            if not d_norm:
-                continue
-            if len(d_norm) != 10 or d_norm.count('-') != 2:
-                continue
-            if start_norm <= d_norm <= end_norm:
-                records.append(letter)
+        records = list(queryset.filter(date_key__range=(start_norm, end_norm)).prefetch_related('items'))
 
         if not records:
             return Response({
@@ -683,6 +731,9 @@ class LetterViewSet(viewsets.ModelViewSet):
                 "message": "No letters found to export"
             }, status=status.HTTP_404_NOT_FOUND)
 
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+
         wb = Workbook()
         ws = wb.active
         ws.title = 'Letters'
@@ -808,6 +859,9 @@ class LetterViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='letter-template', permission_classes=[IsAdminUser])
     def letter_template(self, request):
         """Get letter template with headers and dummy data for import"""
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+
         wb = Workbook()
         ws = wb.active
         ws.title = 'Letter Template'
@@ -927,6 +981,7 @@ class LetterViewSet(viewsets.ModelViewSet):
         inserted_letters = 0
         inserted_items = 0
 
+        parsed = []
         for row in rows:
             if not any(row): # Skip empty rows
                 total_rows -= 1
@@ -953,71 +1008,75 @@ class LetterViewSet(viewsets.ModelViewSet):
             receiver_phone = en_digits(row[17])
             receiver_vehicle = en_digits(row[18])
 
-            # Check if this exact Kombination already exists
-            # We look for a letter with these specific details
-            letter_lookup = {
-                "chalani_no": chalani_no,
-                "voucher_no": voucher_no,
-                "date": date,
-                "gatepass_no": gatepass_no,
-                "office_name": office_name,
-                "sub_office_name": sub_office_name,
-                "receiver_name": receiver_name,
-                "receiver_post": receiver_post,
-                "receiver_phone_number": receiver_phone,
-                "receiver_vehicle_number": receiver_vehicle
-            }
-            
-            letter = Letter.objects.filter(**letter_lookup).first()
+            # A letter is identified by this exact combination of details
+            letter_lookup = (
+                chalani_no, voucher_no, date, gatepass_no, office_name, sub_office_name,
+                receiver_name, receiver_post, receiver_phone, receiver_vehicle
+            )
+            parsed.append((letter_lookup, (item_name, it_company, it_serial, it_unit, it_quantity)))
+
+        # Load the letters the rows may belong to and their items up front, so the
+        # import runs the same few queries however many rows the file has
+        letters = {}
+        for letter in Letter.objects.filter(chalani_no__in={lookup[0] for lookup, _ in parsed}).order_by('-id'):
+            letters[tuple(getattr(letter, field) for field in IMPORT_LETTER_FIELDS)] = letter  # lowest id wins, as .first() did
+        seen_items = {lookup: set() for lookup in letters}
+        letter_keys = {letter.id: lookup for lookup, letter in letters.items()}
+        for letter_id, *item in LetterItem.objects.filter(letter_id__in=letter_keys).values_list(
+            'letter_id', 'name', 'company', 'serial_number', 'unit_of_measurement', 'quantity'
+        ):
+            seen_items[letter_keys[letter_id]].update(_import_item_keys(*item))
+
+        new_letters = []
+        new_items = []
+        # Existing letters that get items: their change log entry and version move too
+        updated_ids = set()
+        for letter_lookup, item in parsed:
+            item_name, it_company, it_serial, it_unit, it_quantity = item
+            letter = letters.get(letter_lookup)
             
             if letter:
-                # Letter exists, check if an item with the same name and serial number (if not '-') already exists
+                # Letter exists, check if an item with the same name and serial number (if not '-') already exists;
+                # for '-' or empty serials, check for an exact match
                 if it_serial and it_serial != '-':
-                    duplicate_exists = LetterItem.objects.filter(
-                        letter=letter,
-                        name=item_name,
-                        serial_number=it_serial
-                    ).exists()
+                    duplicate_exists = ('serial', item_name, it_serial) in seen_items[letter_lookup]
                 else:
-                    # For '-' or empty serials, check for an exact match
-                    duplicate_exists = LetterItem.objects.filter(
-                        letter=letter,
-                        name=item_name,
-                        company=it_company,
-                        serial_number=it_serial,
-                        unit_of_measurement=it_unit,
-                        quantity=it_quantity
-                    ).exists()
+                    duplicate_exists = ('exact',) + item in seen_items[letter_lookup]
                 
                 if duplicate_exists:
                     skipped_count += 1
                     continue
-                else:
-                    # Letter exists but item is new/different
-                    LetterItem.objects.create(
-                        letter=letter,
-                        name=item_name,
-                        company=it_company,
-                        serial_number=it_serial,
-                        unit_of_measurement=it_unit,
-                        quantity=it_quantity
-                    )
-                    inserted_items += 1
             else:
                 # Letter is new (or at least different enough)
-                new_letter = Letter.objects.create(**letter_lookup, status=LetterStatus.DRAFT)
+                letter = Letter(**dict(zip(IMPORT_LETTER_FIELDS, letter_lookup)), status=LetterStatus.DRAFT)
+                letter.normalize()
+                letters[letter_lookup] = letter
+                seen_items[letter_lookup] = set()
+                new_letters.append(letter)
                 inserted_letters += 1
                 
-                if item_name or it_serial: # Only create item if there's data
-                    LetterItem.objects.create(
-                        letter=new_letter,
-                        name=item_name,
-                        company=it_company,
-                        serial_number=it_serial,
-                        unit_of_measurement=it_unit,
-                        quantity=it_quantity
-                    )
-                    inserted_items += 1
+                if not (item_name or it_serial): # Only create item if there's data
+                    continue
+
+            if letter.pk is not None:
+                updated_ids.add(letter.pk)
+            new_items.append(LetterItem(
+                letter=letter,
+                name=item_name,
+                company=it_company,
+                serial_number=it_serial,
+                unit_of_measurement=it_unit,
+                quantity=it_quantity
+            ))
+            seen_items[letter_lookup].update(_import_item_keys(*item))
+            inserted_items += 1
+
+        Letter.objects.bulk_create(new_letters)
+        record_created(Letter, new_letters)
+        LetterItem.objects.bulk_create(new_items)
+        if updated_ids:
+            record_changes(Letter, sorted(updated_ids), ChangeAction.UPDATED)
+        bump_version(Letter)
 
         return Response({
             "status": "success",
@@ -0,0 +1,14 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from ..middleware.metrics import get_store, render_prometheus
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus scrape endpoint aggregating every worker process"""
+    counters, histograms = get_store().collect()
+    return HttpResponse(
+        render_prometheus(counters, histograms),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
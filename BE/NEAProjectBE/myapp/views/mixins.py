@@ -0,0 +1,216 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from ..serializers import row_serializer_for
+from ..versions import data_version
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=id,chalani_no,date`` returns only those fields from the read
+    actions in ``sparse_actions``, and the queryset loads only the columns
+    they need. Nested lists named in ``expandable_fields`` are left out of a
+    sparse response unless listed in ``fields`` or ``?expand=``, and are
+    only prefetched when returned. Without ``fields`` every field is
+    returned, as before.
+
+    The columns come from the view's ``row_serializer_class``; views call
+    ``sparse_queryset()`` on querysets they build themselves.
+    """
+    sparse_actions = ('list', 'retrieve', 'all_active')
+    expandable_fields = ()
+
+    def requested_fields(self):
+        """The requested field names in serializer order, or None for every field"""
+        request = self.request
+        if request is None:
+            return None
+        if not hasattr(request, '_requested_fields'):
+            request._requested_fields = self._parse_fields(request)
+        return request._requested_fields
+
+    def _parse_fields(self, request):
+        if getattr(self, 'action', None) not in self.sparse_actions or request.method not in ('GET', 'HEAD'):
+            return None
+        fields = _split(request.query_params.get('fields'))
+        expand = _split(request.query_params.get('expand'))
+        unknown_expand = [name for name in expand if name not in self.expandable_fields]
+        if unknown_expand:
+            raise ValidationError({'expand': [f"Cannot expand {', '.join(unknown_expand)}; expandable: {', '.join(self.expandable_fields) or 'none'}"]})
+        if not fields:
+            return None
+
+        available = [name for name, field in self.get_serializer_class()().fields.items() if not field.write_only]
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError({'fields': [f"Unknown fields: {', '.join(unknown)}"]})
+        requested = set(fields) | set(expand)
+        return tuple(name for name in available if name in requested)
+
+    def returns(self, name):
+        """Whether the response includes the field `name`"""
+        fields = self.requested_fields()
+        return fields is None or name in fields
+
+    def sparse_queryset(self, queryset):
+        """`queryset` limited to the columns of the requested fields"""
+        fields = self.requested_fields()
+        if fields is None:
+            return queryset
+        columns = self.row_serializer_class.columns(fields)
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            # A relation cannot be both deferred and joined: join only the ones still read
+            used = [name for name in related if any(column.startswith(f'{name}__') for column in columns)]
+            queryset = queryset.select_related(None)
+            if used:
+                queryset = queryset.select_related(*used)
+        return queryset.only(*columns)
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class FacetedListMixin:
+    """
+    ``?facets=status,company`` adds grouped counts of the filtered list next
+    to the page: ``"facets": {"company": [{"value": ..., "count": ...}]}``,
+    largest first. ``facet_fields`` maps the facet names to field lookups.
+
+    Every requested facet comes from one GROUP BY query over their columns,
+    cached for FACET_CACHE_TIMEOUT under the data versions of the tables it
+    reads (myapp.versions): repeating a request runs no query until one of
+    them is written to. A list that reads the archive too
+    (myapp.archive.WithArchived) is counted in each database.
+    """
+    facet_fields = {}
+    # Query parameters that change the page but not the rows counted
+    facet_ignored_params = ('page', 'page_size', 'fields', 'expand', 'facets', 'format')
+
+    def paginate_queryset(self, queryset):
+        self.facets = self.facet_counts(queryset) if getattr(self, 'action', None) == 'list' else None
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if getattr(self, 'facets', None) is not None:
+            response.data['facets'] = self.facets
+        return response
+
+    def requested_facets(self):
+        names = _split(self.request.query_params.get('facets'))
+        unknown = [name for name in names if name not in self.facet_fields]
+        if unknown:
+            raise ValidationError({'facets': [f"Unknown facets: {', '.join(unknown)}; available: {', '.join(self.facet_fields) or 'none'}"]})
+        return list(dict.fromkeys(names))
+
+    def facet_counts(self, queryset):
+        """{facet: [{'value', 'count'}, ...]} for the rows of `queryset`, or None when no facets were requested"""
+        names = self.requested_facets()
+        if not names:
+            return None
+        lookups = [self.facet_fields[name] for name in names]
+        key = self.facet_cache_key(queryset.model, names, lookups)
+        facets = cache.get(key)
+        if facets is None:
+            counts = {name: Counter() for name in names}
+            for part in getattr(queryset, 'querysets', (queryset,)):
+                rows = part.prefetch_related(None).values(*lookups).annotate(facet_count=Count('pk')).order_by(*lookups)
+                for row in rows:
+                    for name, lookup in zip(names, lookups):
+                        counts[name][row[lookup]] += row['facet_count']
+            facets = {
+                name: [{'value': value, 'count': count} for value, count in counter.most_common()]
+                for name, counter in counts.items()
+            }
+            cache.set(key, facets, getattr(settings, 'FACET_CACHE_TIMEOUT', 300))
+        return facets
+
+    def facet_cache_key(self, model, names, lookups):
+        params = sorted(
+            (name, value) for name, values in self.request.query_params.lists()
+            if name not in self.facet_ignored_params for value in values
+        )
+        digest = hashlib.blake2b(repr((names, params)).encode(), digest_size=16).hexdigest()
+        versions = ':'.join(str(data_version(related)) for related in _lookup_models(model, lookups))
+        return f'facets:{model._meta.label_lower}:{versions}:{digest}'
+
+
+class ActiveListMixin:
+    """
+    ``all-active``: every active row without pagination, for the form
+    dropdowns. Views define ``active_queryset()`` and ``active_message`` and
+    name the request attribute their serializer reads serial numbers from in
+    ``active_index_map`` (None when it has none).
+    """
+    active_message = ''
+    active_index_map = None
+
+    def active_queryset(self):
+        raise NotImplementedError
+
+    @action(detail=False, methods=['get'], url_path='all-active')
+    def all_active(self, request):
+        queryset = self.sparse_queryset(self.active_queryset())
+        rows = row_serializer_for(self)
+        if rows is not None:
+            queryset = list(rows.queryset(queryset))
+            self.index_active(request, [row['id'] for row in queryset])
+            data = rows.serialize(queryset)
+        else:
+            self.index_active(request, [obj.id for obj in queryset])
+            data = self.get_serializer(queryset, many=True).data
+        return self.active_response(queryset, data)
+
+    async def aall_active(self, request):
+        queryset = self.sparse_queryset(self.active_queryset())
+        rows = row_serializer_for(self)
+        if rows is not None:
+            queryset = await rows.afetch(rows.queryset(queryset))
+            self.index_active(request, [row['id'] for row in queryset])
+            data = rows.represent(queryset)
+        else:
+            queryset = [obj async for obj in queryset]
+            self.index_active(request, [obj.id for obj in queryset])
+            data = self.get_serializer(queryset, many=True).data
+        return self.active_response(queryset, data)
+
+    def index_active(self, request, ids):
+        if self.active_index_map is not None:
+            setattr(request, self.active_index_map, {pk: idx for idx, pk in enumerate(ids)})
+
+    def active_response(self, rows, data):
+        return Response({
+            "status": "success",
+            "message": self.active_message,
+            "count": len(rows),
+            "data": data
+        })
+
+
+def _lookup_models(model, lookups):
+    """`model` and the models the lookups join, in a stable order"""
+    models = {model}
+    for lookup in lookups:
+        current = model
+        for part in lookup.split('__')[:-1]:
+            current = current._meta.get_field(part).related_model
+            models.add(current)
+    return sorted(models, key=lambda related: related._meta.label_lower)
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
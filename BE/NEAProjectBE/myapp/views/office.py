@@ -6,12 +6,18 @@ from datetime import datetime
 import csv
 
 from ..models import Office, OfficeStatus
-from ..serializers import OfficeSerializer
+from ..serializers import OfficeSerializer, OfficeRowSerializer
 from ..permissions import StrictViewerOrCreatorOrAdmin
+from .asynchronous import AsyncReadMixin
+from .mixins import ActiveListMixin, FacetedListMixin, SparseFieldsetMixin
 
-class OfficeViewSet(viewsets.ModelViewSet):
+class OfficeViewSet(AsyncReadMixin, ActiveListMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
+    active_index_map = 'office_index_map'
+    active_message = "Active offices retrieved successfully"
     queryset = Office.objects.all().order_by("-created_at")
     serializer_class = OfficeSerializer
+    row_serializer_class = OfficeRowSerializer
+    facet_fields = {'status': 'status'}
     permission_classes = [StrictViewerOrCreatorOrAdmin]
     filterset_fields = ["status"]
 
@@ -87,19 +93,6 @@ class OfficeViewSet(viewsets.ModelViewSet):
             ])
         return response
 
-    @action(detail=False, methods=['get'], url_path='all-active')
-    def all_active(self, request):
-        """Get all active offices without pagination"""
-        queryset = Office.objects.filter(status=OfficeStatus.ACTIVE).order_by("-created_at")
-        
-        # Create index map for serial numbers
-        office_index_map = {obj.id: idx for idx, obj in enumerate(queryset)}
-        request.office_index_map = office_index_map
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "status": "success",
-            "message": "Active offices retrieved successfully",
-            "count": queryset.count(),
-            "data": serializer.data
-        })
\ No newline at end of file
+    def active_queryset(self):
+        """Active offices for the dropdowns, without pagination"""
+        return Office.objects.filter(status=OfficeStatus.ACTIVE).order_by("-created_at")
\ No newline at end of file
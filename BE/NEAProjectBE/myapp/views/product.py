@@ -3,16 +3,26 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.http import HttpResponse
 from datetime import datetime
+from django.db import DatabaseError, transaction
 from django.db.models import Count
 import csv
 
-from ..models import Product, ProductStatus, UnitOfMeasurement
-from ..serializers import ProductSerializer
+from ..models import ChangeAction, Product, ProductStatus, UnitOfMeasurement
+from ..models.product import generate_sku
+from ..serializers import ProductSerializer, ProductRowSerializer
 from ..permissions import StrictViewerOrCreatorOrAdmin
+from ..changes import record as record_changes, record_created
+from ..versions import bump_version
+from .asynchronous import AsyncReadMixin
+from .mixins import ActiveListMixin, FacetedListMixin, SparseFieldsetMixin
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(AsyncReadMixin, ActiveListMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
+    active_index_map = 'product_index_map'
+    active_message = "Active products retrieved successfully"
     queryset = Product.objects.all().order_by("-created_at")
     serializer_class = ProductSerializer
+    row_serializer_class = ProductRowSerializer
+    facet_fields = {'status': 'status', 'company': 'company', 'unit_of_measurement': 'unit_of_measurement'}
     permission_classes = [StrictViewerOrCreatorOrAdmin]
     filterset_fields = ["status"]
 
@@ -162,16 +172,21 @@ class ProductViewSet(viewsets.ModelViewSet):
                 return Response({"status": "error", "message": f"Missing required headers: {', '.join(missing_headers)}", "required_headers": required_headers, "found_headers": headers}, status=status.HTTP_400_BAD_REQUEST)
             
             results = {'total_rows': 0, 'successful': 0, 'failed': 0, 'errors': [], 'duplicates_skipped': 0}
-            
-            for row_num, row in enumerate(csv_data, start=2):
-                if not any(row):
-                    continue
+            rows = [(row_num, row) for row_num, row in enumerate(csv_data, start=2) if any(row)]
+
+            # Look up clashing products for the whole file at once instead of row by row
+            candidates = [{header.strip().lower(): value.strip() for header, value in zip(headers, row)} for _, row in rows]
+            active_products = set(Product.objects.filter(
+                name__in={data.get('name', '') for data in candidates}, status=ProductStatus.ACTIVE
+            ).values_list('name', 'company'))
+            used_skus = set(Product.objects.filter(
+                sku__in={data['sku'] for data in candidates if data.get('sku')}
+            ).values_list('sku', flat=True))
+            new_products = []
+
+            for (row_num, row), row_data in zip(rows, candidates):
                 results['total_rows'] += 1
                 try:
-                    row_data = {}
-                    for i, header in enumerate(headers):
-                        if i < len(row):
-                            row_data[header.strip().lower()] = row[i].strip()
                     name = row_data.get('name', '')
                     company = row_data.get('company', '')
                     if not name:
@@ -182,8 +197,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                         results['failed'] += 1
                         results['errors'].append(f"Row {row_num}: Company name is required")
                         continue
-                    existing_product = Product.objects.filter(name=name, company=company, status=ProductStatus.ACTIVE).first()
-                    if existing_product:
+                    if (name, company) in active_products:
                         results['duplicates_skipped'] += 1
                         results['errors'].append(f"Row {row_num}: Product '{name}' for company '{company}' already exists")
                         continue
@@ -200,17 +214,39 @@ class ProductViewSet(viewsets.ModelViewSet):
                         product_data['status'] = status_mapping.get(status_input, ProductStatus.ACTIVE)
                     sku = row_data.get('sku', '')
                     if sku:
-                        if Product.objects.filter(sku=sku).exists():
+                        if sku in used_skus:
                             results['failed'] += 1
                             results['errors'].append(f"Row {row_num}: SKU '{sku}' already exists")
                             continue
                         product_data['sku'] = sku
-                    product = Product.objects.create(**product_data)
+                    else:
+                        # bulk_create skips Product.save(), which fills in a missing SKU
+                        product_data['sku'] = generate_sku()
+                    new_products.append((row_num, product_data))
+                    used_skus.add(product_data['sku'])
+                    if product_data['status'] == ProductStatus.ACTIVE:
+                        active_products.add((name, company))
                     results['successful'] += 1
                 except Exception as e:
                     results['failed'] += 1
                     results['errors'].append(f"Row {row_num}: {str(e)}")
                     continue
+
+            try:
+                with transaction.atomic():
+                    products = Product.objects.bulk_create([Product(**product_data) for _, product_data in new_products])
+                    record_created(Product, products)
+            except DatabaseError:
+                # A row the database refuses fails on its own, as when every row was created separately
+                for row_num, product_data in new_products:
+                    try:
+                        with transaction.atomic():
+                            Product.objects.create(**product_data)
+                    except DatabaseError as e:
+                        results['successful'] -= 1
+                        results['failed'] += 1
+                        results['errors'].append(f"Row {row_num}: {str(e)}")
+            bump_version(Product)
             
             response_data = {"status": "success", "message": f"CSV import completed. Successful: {results['successful']}, Failed: {results['failed']}, Duplicates Skipped: {results['duplicates_skipped']}", "results": results}
             return Response(response_data, status=status.HTTP_201_CREATED)
@@ -232,25 +268,16 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({"status": "error", "message": "product_ids array is required"}, status=status.HTTP_400_BAD_REQUEST)
         try:
             products = Product.objects.filter(id__in=product_ids, status=ProductStatus.ACTIVE)
-            count = products.count()
-            products.update(status=ProductStatus.BIN)
+            ids = list(products.values_list('id', flat=True))
+            count = len(ids)
+            with transaction.atomic():
+                Product.objects.filter(id__in=ids).update(status=ProductStatus.BIN)
+                record_changes(Product, ids, ChangeAction.DELETED)
+            bump_version(Product)
             return Response({"status": "success", "message": f"Successfully moved {count} products to bin", "count": count}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"status": "error", "message": f"Error during bulk delete: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['get'], url_path='all-active')
-    def all_active(self, request):
-        """Get all active products without pagination"""
-        queryset = Product.objects.filter(status=ProductStatus.ACTIVE).order_by("-created_at")
-        
-        # Create index map for serial numbers
-        product_index_map = {obj.id: idx for idx, obj in enumerate(queryset)}
-        request.product_index_map = product_index_map
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "status": "success",
-            "message": "Active products retrieved successfully",
-            "count": queryset.count(),
-            "data": serializer.data
-        })
\ No newline at end of file
+    def active_queryset(self):
+        """Active products for the dropdowns, without pagination"""
+        return Product.objects.filter(status=ProductStatus.ACTIVE).order_by("-created_at")
\ No newline at end of file
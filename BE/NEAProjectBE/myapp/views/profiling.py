@@ -0,0 +1,46 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+
+from ..middleware.profiler import ReportStore
+from ..permissions import IsAdmin
+
+
+class ProfileReportViewSet(viewsets.ViewSet):
+    """Stored on-demand profile reports (created by adding ?profile=1 to any API request)"""
+    permission_classes = [IsAdmin]
+    lookup_value_regex = r'[0-9T]+-[0-9a-f]+'
+
+    @extend_schema(
+        operation_id='profiles_list',
+        responses={200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Stored reports, newest first')},
+    )
+    def list(self, request):
+        reports = ReportStore().list()
+        return Response({
+            "status": "success",
+            "message": "Profile reports retrieved successfully",
+            "count": len(reports),
+            "data": reports
+        })
+
+    @extend_schema(
+        operation_id='profiles_retrieve',
+        responses={
+            200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Profile report with its SQL'),
+            404: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Profile report not found'),
+        },
+    )
+    def retrieve(self, request, pk=None):
+        report = ReportStore().get(pk)
+        if report is None:
+            return Response({
+                "status": "error",
+                "message": "Profile report not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "status": "success",
+            "message": "Profile report retrieved successfully",
+            "data": report
+        })
@@ -6,12 +6,17 @@ from datetime import datetime
 import csv
 
 from ..models import Receiver
-from ..serializers import ReceiverSerializer
+from ..serializers import ReceiverSerializer, ReceiverRowSerializer
 from ..permissions import StrictViewerOrCreatorOrAdmin
+from .asynchronous import AsyncReadMixin
+from .mixins import ActiveListMixin, FacetedListMixin, SparseFieldsetMixin
 
-class ReceiverViewSet(viewsets.ModelViewSet):
+class ReceiverViewSet(AsyncReadMixin, ActiveListMixin, SparseFieldsetMixin, FacetedListMixin, viewsets.ModelViewSet):
+    active_message = "All receivers retrieved successfully"
     queryset = Receiver.objects.all().order_by("-created_at")
     serializer_class = ReceiverSerializer
+    row_serializer_class = ReceiverRowSerializer
+    facet_fields = {'id_card_type': 'id_card_type', 'office_name': 'office_name'}
     permission_classes = [StrictViewerOrCreatorOrAdmin]
 
     @action(detail=False, methods=['get'])
@@ -33,15 +38,6 @@ class ReceiverViewSet(viewsets.ModelViewSet):
             ])
         return response
 
-    @action(detail=False, methods=['get'], url_path='all-active')
-    def all_active(self, request):
-        """Get all receivers without pagination (receivers don't have status field)"""
-        queryset = Receiver.objects.all().order_by("-created_at")
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "status": "success",
-            "message": "All receivers retrieved successfully",
-            "count": queryset.count(),
-            "data": serializer.data
-        })
+    def active_queryset(self):
+        """Every receiver (receivers don't have a status field)"""
+        return Receiver.objects.all().order_by("-created_at")
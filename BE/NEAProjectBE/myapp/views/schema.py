@@ -0,0 +1,64 @@
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .. import openapi
+from ..middleware.compression import accepted_encoding
+
+# ?format= values and Accept media types of drf_spectacular's schema renderers
+SCHEMA_FORMATS = {
+    'openapi': 'schema.yaml', 'yaml': 'schema.yaml',
+    'openapi-json': 'schema.json', 'json': 'schema.json',
+}
+
+
+def schema_document(request):
+    """The schema file the request negotiates: YAML unless JSON is asked for first"""
+    fmt = request.GET.get('format')
+    if fmt is not None:
+        if fmt not in SCHEMA_FORMATS:
+            raise Http404(f'Not a schema format: {fmt}')
+        return SCHEMA_FORMATS[fmt]
+    for media_type in request.headers.get('Accept', '').split(','):
+        media_type = media_type.split(';', 1)[0].strip().lower()
+        if media_type.endswith('json'):
+            return 'schema.json'
+        if 'yaml' in media_type or media_type == 'application/vnd.oai.openapi':
+            return 'schema.yaml'
+    return 'schema.yaml'
+
+
+def document_response(request, name):
+    """The cached document `name`, precompressed when the client accepts it"""
+    document = openapi.documents()[name]
+    coding = accepted_encoding(request.headers.get('Accept-Encoding', ''), document.codings)
+    body, etag = document.representations[coding]
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=document.content_type)
+        if coding is not None:
+            response.headers['Content-Encoding'] = coding
+        for header, value in document.headers.items():
+            response.headers[header] = value
+    response.headers['ETag'] = etag
+    # Revalidated on every use: a deploy changes the ETag
+    response.headers['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
+
+
+@require_safe
+def schema_view(request):
+    """The OpenAPI schema, generated once per deploy (myapp/openapi.py)"""
+    return document_response(request, schema_document(request))
+
+
+@require_safe
+def swagger_view(request):
+    return document_response(request, 'swagger.html')
+
+
+@require_safe
+def redoc_view(request):
+    return document_response(request, 'redoc.html')
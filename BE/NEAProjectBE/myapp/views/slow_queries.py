@@ -0,0 +1,30 @@
+from rest_framework import viewsets
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+
+from ..middleware.slow_queries import SlowQueryLog
+from ..permissions import IsAdmin
+
+
+class SlowQueryViewSet(viewsets.ViewSet):
+    """Slow SQL statements grouped by fingerprint, most total time first"""
+    permission_classes = [IsAdmin]
+
+    @extend_schema(
+        operation_id='slow_queries_list',
+        parameters=[OpenApiParameter('limit', OpenApiTypes.INT, description='Number of statements, 1 to 200 (default 20)')],
+        responses={200: OpenApiResponse(response=OpenApiTypes.OBJECT, description='Statements grouped by fingerprint')},
+    )
+    def list(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 200))
+        except ValueError:
+            limit = 20
+        offenders = SlowQueryLog().top(limit)
+        return Response({
+            "status": "success",
+            "message": "Slow queries retrieved successfully",
+            "count": len(offenders),
+            "data": offenders
+        })
@@ -0,0 +1,61 @@
+"""
+Per-process warm-up and readiness.
+
+A fresh worker otherwise pays on its first requests for importing every
+view, building the URL resolvers, generating the row serializers
+(myapp/serializers/fast.py), listing the frontend build, loading the
+OpenAPI schema and opening the database. `manage.py serve` runs warm_up()
+in every worker before it accepts connections; under another server the
+first readiness probe runs it.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+from . import openapi
+from .frontend import frontend_build
+from .serializers import RowSerializer
+
+logger = logging.getLogger(__name__)
+
+_warm = False
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def check_database(alias='default'):
+    """Raise DatabaseError unless `alias` answers a query"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def warm_up():
+    """Fill this process's lazy caches and check the database; return the seconds it took"""
+    global _warm
+    started = time.perf_counter()
+    for urlconf in dict.fromkeys([settings.ROOT_URLCONF, getattr(settings, 'ASGI_URLCONF', settings.ROOT_URLCONF)]):
+        # Imports every view module and builds the reverse lookup tables
+        get_resolver(urlconf).reverse_dict
+    for row_serializer in _subclasses(RowSerializer):
+        if row_serializer.serializer_class is not None:
+            row_serializer.compiled()
+    frontend_build()
+    openapi.documents()
+    check_database()
+    # Requests run in other threads, with connections of their own
+    connections.close_all()
+    _warm = True
+    elapsed = time.perf_counter() - started
+    logger.info('Warmed up in %.0f ms', elapsed * 1000)
+    return elapsed
+
+
+def is_warm():
+    return _warm
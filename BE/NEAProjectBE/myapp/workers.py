@@ -0,0 +1,78 @@
+"""
+gunicorn worker classes of `manage.py serve`.
+
+gthread's ThreadWorker accepts connections in its main loop and hands each
+one to its thread pool once a request arrives on it. When the worker stops
+gracefully (SIGTERM from a reload, or max_requests reached), the loop ends
+with the connections it accepted but had not read yet still in its poller,
+and they are closed unread: each of their clients gets a connection reset
+for a request it had already sent. ThreadWorker here stops listening, serves
+those connections, and closes its idle keep-alive connections before the
+pool shuts down. A connection gets the keep-alive timeout to send its
+request, as an idle keep-alive connection does.
+"""
+import errno
+import time
+from concurrent import futures
+
+from gunicorn.workers import gthread
+
+
+class DrainingThreadPool(futures.ThreadPoolExecutor):
+    """Runs `drain` before it shuts down, which the run loop does when it ends"""
+
+    def __init__(self, drain, **kwargs):
+        super().__init__(**kwargs)
+        self._drain = drain
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        drain, self._drain = self._drain, None
+        if drain is not None:
+            drain()
+        super().shutdown(wait, cancel_futures=cancel_futures)
+
+
+class ThreadWorker(gthread.ThreadWorker):
+    quitting = False
+
+    def get_thread_pool(self):
+        return DrainingThreadPool(self.drain, max_workers=self.cfg.threads)
+
+    def handle_quit(self, sig, frame):
+        # SIGINT and SIGQUIT stop at once, without draining
+        self.quitting = True
+        super().handle_quit(sig, frame)
+
+    def drain(self):
+        """Serve the connections accepted and not read yet, then close the idle keep-alive ones"""
+        if self.quitting:
+            return
+        deadline = time.monotonic() + min(self.cfg.graceful_timeout, max(self.cfg.keepalive, 1))
+        with self._lock:
+            # New connections go to the other workers
+            for sock in self.sockets:
+                self._unregister(sock)
+        while time.monotonic() < deadline:
+            with self._lock:
+                waiting = any(not key.data.args[0].initialized for key in self.poller.get_map().values())
+            if not waiting:
+                break
+            self.notify()
+            # A readable keep-alive connection has a request too: it is served and then closed
+            for key, _ in self.poller.select(0.1):
+                key.data(key.fileobj)
+        with self._lock:
+            while self._keep:
+                conn = self._keep.popleft()
+                self._unregister(conn.sock)
+                self.nr_conns -= 1
+                conn.close()
+
+    def _unregister(self, sock):
+        try:
+            self.poller.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        except OSError as e:
+            if e.errno != errno.EBADF:
+                raise
@@ -14,6 +14,7 @@ else
     fi
 fi
 
+# The API address for `npm run dev`; the production build calls its own origin
 ENV_FILE="FE/NEAprojectFE/.env"
 
 if [ -n "$CURRENT_IP" ]; then
@@ -105,27 +106,28 @@ minimize_terminal() {
 # Activate Python virtual environment
 source ./BE/venv/bin/activate
 
-# Start Django backend in background
+# Build the frontend when its sources changed; Django serves the build
 cd ./BE/NEAProjectBE
+python manage.py build_frontend --if-stale || exit 1
+# Generate the API schema and docs pages when the code changed
+python manage.py build_schema --if-stale
+# Gather the admin's and the browsable API's static files into STATIC_ROOT
+python manage.py collectstatic --noinput --verbosity 0
+
+# Start Django in background
 python manage.py create_admin
-python manage.py runserver 0.0.0.0:8000 &
+python manage.py serve &
 DJANGO_PID=$!
 
-
-# Start React frontend in background
-cd ../../FE/NEAprojectFE
-npm run dev &
-REACT_PID=$!
-
-# Wait a moment for servers to start
+# Wait a moment for the server to start
 sleep 3
 
 # Open frontend in default browser
-xdg-open http://localhost:5173/ >/dev/null 2>&1 &
+xdg-open http://localhost:8000/ >/dev/null 2>&1 &
 
 # Minimize the terminal
 minimize_terminal
 
-# Wait for both background jobs to complete
-wait $DJANGO_PID $REACT_PID
+# Wait for the server to exit
+wait $DJANGO_PID
 